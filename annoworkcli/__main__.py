@@ -10,16 +10,34 @@ import annoworkcli
 import annoworkcli.account.subcommand
 import annoworkcli.actual_working_time.subcommand
 import annoworkcli.annofab.subcommand
+import annoworkcli.cube.subcommand
 import annoworkcli.expected_working_time.subcommand
 import annoworkcli.job.subcommand
 import annoworkcli.my.subcommand
+import annoworkcli.query.subcommand
 import annoworkcli.schedule.subcommand
 import annoworkcli.schedule_actual.subcommand
+import annoworkcli.trace.subcommand
 import annoworkcli.workspace.subcommand
 import annoworkcli.workspace_member.subcommand
 import annoworkcli.workspace_tag.subcommand
+from annoworkcli.common.annofab_project_cache import (
+    DEFAULT_NEGATIVE_TTL_SECONDS,
+    AnnofabProjectCache,
+    get_default_annofab_project_cache_dir,
+    is_annofab_project_cache_enabled_by_envvar,
+    set_annofab_project_cache,
+)
+from annoworkcli.common.cassette import CassettePlayer, CassetteRecorder, set_cassette_player, set_cassette_recorder
 from annoworkcli.common.cli import PrettyHelpFormatter
+from annoworkcli.common.metrics import profile_and_measure
+from annoworkcli.common.multi_workspace import is_multi_workspace, run_for_each_workspace
+from annoworkcli.common.token_cache import TokenCache, get_default_token_cache_dir, is_token_cache_enabled_by_envvar, set_token_cache
+from annoworkcli.common.trace import TraceRecorder, get_trace_recorder, set_trace_recorder, span
+from annoworkcli.common.transport import TransportController, set_transport_controller
 from annoworkcli.common.utils import set_default_logger
+from annoworkcli.common.workspace_snapshot import SnapshotResponder, set_snapshot_responder
+from annoworkcli.common.writer import Compression, OutputOptions, check_compression, set_output_options
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +63,14 @@ def create_parser() -> argparse.ArgumentParser:
     annoworkcli.account.subcommand.add_parser(subparsers)
     annoworkcli.actual_working_time.subcommand.add_parser(subparsers)
     annoworkcli.annofab.subcommand.add_parser(subparsers)
+    annoworkcli.cube.subcommand.add_parser(subparsers)
     annoworkcli.expected_working_time.subcommand.add_parser(subparsers)
     annoworkcli.job.subcommand.add_parser(subparsers)
     annoworkcli.my.subcommand.add_parser(subparsers)
+    annoworkcli.query.subcommand.add_parser(subparsers)
     annoworkcli.schedule.subcommand.add_parser(subparsers)
     annoworkcli.schedule_actual.subcommand.add_parser(subparsers)
+    annoworkcli.trace.subcommand.add_parser(subparsers)
     annoworkcli.workspace.subcommand.add_parser(subparsers)
     annoworkcli.workspace_member.subcommand.add_parser(subparsers)
     annoworkcli.workspace_tag.subcommand.add_parser(subparsers)
@@ -76,6 +97,103 @@ def mask_sensitive_value_in_argv(argv: list[str]) -> list[str]:
     return tmp_argv
 
 
+def create_transport_controller(args: argparse.Namespace) -> TransportController | None:
+    """
+    コマンドライン引数 ``--max_rps`` , ``--max_concurrency`` から、WebAPIへのリクエストの流量を制御するTransportControllerを生成します。
+    どちらも指定されていない場合はNoneを返します。
+    """
+    if args.max_rps is None and args.max_concurrency is None:
+        return None
+    return TransportController(max_rps=args.max_rps, max_concurrency=args.max_concurrency)
+
+
+def create_token_cache(args: argparse.Namespace) -> TokenCache | None:
+    """
+    コマンドライン引数 ``--use_token_cache`` または環境変数で有効にされていれば、TokenCacheを生成します。
+    """
+    if args.replay is not None or args.snapshot is not None:
+        # カセットやスナップショットを利用する場合、トークンはダミーなのでキャッシュしない
+        return None
+    if args.use_token_cache or is_token_cache_enabled_by_envvar():
+        return TokenCache(get_default_token_cache_dir())
+    return None
+
+
+def create_annofab_project_cache(args: argparse.Namespace) -> AnnofabProjectCache | None:
+    """
+    コマンドライン引数 ``--use_annofab_project_cache`` または環境変数で有効にされていれば、AnnofabProjectCacheを生成します。
+    """
+    if args.record is not None or args.replay is not None:
+        # キャッシュを利用するとWebAPIを呼び出さないので、カセットの記録・再生とは併用しない
+        return None
+    if args.use_annofab_project_cache or is_annofab_project_cache_enabled_by_envvar():
+        return AnnofabProjectCache(
+            get_default_annofab_project_cache_dir(),
+            ttl_seconds=args.annofab_project_cache_ttl,
+            negative_ttl_seconds=min(args.annofab_project_cache_ttl, DEFAULT_NEGATIVE_TTL_SECONDS),
+        )
+    return None
+
+
+def create_cassette_recorder(args: argparse.Namespace) -> CassetteRecorder | None:
+    """
+    コマンドライン引数 ``--record`` が指定されていれば、WebAPIのレスポンスをカセットに記録するCassetteRecorderを生成します。
+    以前に記録したカセットは削除します。
+    """
+    if args.record is None:
+        return None
+    recorder = CassetteRecorder(args.record)
+    recorder.clear()
+    return recorder
+
+
+def create_cassette_player(args: argparse.Namespace) -> CassettePlayer | None:
+    """
+    コマンドライン引数 ``--replay`` が指定されていれば、カセットに記録されたレスポンスを返すCassettePlayerを生成します。
+    """
+    if args.replay is None:
+        return None
+    logger.info(f"'{args.replay}' に記録されたカセットを再生します。WebAPIにはアクセスしません。")
+    return CassettePlayer(args.replay, latency_seconds=args.replay_latency)
+
+
+def create_snapshot_responder(args: argparse.Namespace) -> SnapshotResponder | None:
+    """
+    コマンドライン引数 ``--snapshot`` が指定されていれば、スナップショットのデータをWebAPIのレスポンスとして返すSnapshotResponderを生成します。
+    """
+    if args.snapshot is None:
+        return None
+    logger.info(f"スナップショット '{args.snapshot}' のデータを利用します。Annowork WebAPIにはアクセスしません。")
+    return SnapshotResponder(args.snapshot)
+
+
+def create_trace_recorder(args: argparse.Namespace) -> TraceRecorder | None:
+    """
+    コマンドライン引数 ``--trace`` が指定されていれば、スパンをファイルに記録するTraceRecorderを生成します。
+    """
+    if args.trace is None:
+        return None
+    return TraceRecorder(args.trace)
+
+
+def get_command_name(args: argparse.Namespace) -> str:
+    """``annoworkcli actual_working_time list`` のようなコマンド名を返します。"""
+    names = [getattr(args, "command_name", None), getattr(args, "subcommand_name", None)]
+    return " ".join(["annoworkcli", *[e for e in names if e is not None]])
+
+
+def create_output_options(args: argparse.Namespace) -> OutputOptions:
+    """
+    コマンドライン引数 ``--partition_by`` , ``--compression`` から、出力ファイルの分割と圧縮の設定を生成します。
+
+    Raises:
+        CommandLineArgumentError: 指定した圧縮形式が利用できない場合
+    """
+    compression = Compression(args.compression) if args.compression is not None else None
+    check_compression(compression)
+    return OutputOptions(partition_by=args.partition_by, compression=compression)
+
+
 def main(arguments: Sequence[str] | None = None) -> None:
     """
     annoworkcli コマンドのメイン処理
@@ -98,10 +216,34 @@ def main(arguments: Sequence[str] | None = None) -> None:
             if arguments is not None:
                 argv = ["annoworkcli", *list(arguments)]
             logger.info(f"args={mask_sensitive_value_in_argv(argv)}")
-            args.subcommand_func(args)
+            set_transport_controller(create_transport_controller(args))
+            set_token_cache(create_token_cache(args))
+            set_annofab_project_cache(create_annofab_project_cache(args))
+            cassette_recorder = create_cassette_recorder(args)
+            set_cassette_recorder(cassette_recorder)
+            set_cassette_player(create_cassette_player(args))
+            set_snapshot_responder(create_snapshot_responder(args))
+            set_output_options(create_output_options(args))
+            set_trace_recorder(create_trace_recorder(args))
+            with (
+                profile_and_measure(profile_output=args.profile, is_output_metrics=args.metrics),
+                span(get_command_name(args), attributes={"process.command_args": mask_sensitive_value_in_argv(argv)}),
+            ):
+                if is_multi_workspace(args):
+                    run_for_each_workspace(args, args.subcommand_func)
+                else:
+                    args.subcommand_func(args)
+            if cassette_recorder is not None:
+                logger.info(f"{cassette_recorder.record_count} 件のレスポンスを '{cassette_recorder.cassette_dir}' に記録しました。")
         except Exception as e:
             logger.exception(e)
             raise e
+        finally:
+            trace_recorder = get_trace_recorder()
+            if trace_recorder is not None:
+                trace_recorder.close()
+                set_trace_recorder(None)
+                logger.info(f"{trace_recorder.span_count} 件のスパンを '{trace_recorder.output}' に出力しました。")
 
     else:
         # 未知のサブコマンドの場合はヘルプを表示
@@ -8,6 +8,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import map_concurrently
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
@@ -20,9 +21,13 @@ class ListExternalLinkageInfo:
     def main(self, user_id_list: list[str], output: Path | None, output_format: OutputFormat) -> None:
         logger.info(f"{len(user_id_list)} 件のアカウント外部連携情報を取得します。")
 
+        infos = map_concurrently(
+            self.annowork_service.wrapper.get_account_external_linkage_info_or_none,
+            user_id_list,
+            progress_description="アカウント外部連携情報の取得",
+        )
         results = []
-        for user_id in user_id_list:
-            info = self.annowork_service.wrapper.get_account_external_linkage_info_or_none(user_id)
+        for user_id, info in zip(user_id_list, infos, strict=True):
             if info is None:
                 logger.warning(f"user_id={user_id} のアカウント外部連携情報は存在しません。")
             info["user_id"] = user_id
@@ -14,6 +14,7 @@ from annoworkcli.common.cli import (
     get_list_from_args,
     prompt_yesnoall,
 )
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -40,33 +41,33 @@ class DeleteActualWorkingTime:
 
     def delete_actual_working_times(self, actual_working_times: list[dict[str, Any]]) -> None:
         success_count = 0
-        for index, actual in enumerate(actual_working_times):
-            try:
-                if not self.all_yes:
-                    message = (
-                        f"job_name={actual['job_name']}, user_id={actual['user_id']}, "
-                        f"start_datetime={actual['start_datetime']}, end_datetime={actual['end_datetime']} の実績作業時間情報を削除しますか？"
-                        f" :: actual_working_time_id={actual['actual_working_time_id']}"
-                    )
-                    is_yes, all_yes = prompt_yesnoall(message)
-                    if not is_yes:
+        with track_progress("実績作業時間の削除", total=len(actual_working_times)) as progress:
+            for index, actual in enumerate(actual_working_times):
+                with progress.track_item():
+                    try:
+                        if not self.all_yes:
+                            message = (
+                                f"job_name={actual['job_name']}, user_id={actual['user_id']}, "
+                                f"start_datetime={actual['start_datetime']}, end_datetime={actual['end_datetime']} の実績作業時間情報を削除しますか？"
+                                f" :: actual_working_time_id={actual['actual_working_time_id']}"
+                            )
+                            is_yes, all_yes = prompt_yesnoall(message)
+                            if not is_yes:
+                                continue
+                            if all_yes:
+                                self.all_yes = all_yes
+
+                        actual2 = self.annowork_service.api.delete_actual_working_time_by_workspace_member(
+                            self.workspace_id,
+                            workspace_member_id=actual["workspace_member_id"],
+                            actual_working_time_id=actual["actual_working_time_id"],
+                        )
+                        logger.debug(f"{index + 1} 件目: 実績作業時間を削除しました。:: {actual2}")
+                        success_count += 1
+                    except Exception:
+                        progress.record_failure()
+                        logger.warning(f"{index + 1} 件目: 実績作業時間の削除に失敗しました。", exc_info=True)
                         continue
-                    if all_yes:
-                        self.all_yes = all_yes
-
-                actual2 = self.annowork_service.api.delete_actual_working_time_by_workspace_member(
-                    self.workspace_id,
-                    workspace_member_id=actual["workspace_member_id"],
-                    actual_working_time_id=actual["actual_working_time_id"],
-                )
-                logger.debug(f"{index + 1} 件目: 実績作業時間を削除しました。:: {actual2}")
-                success_count += 1
-            except Exception:
-                logger.warning(f"{index + 1} 件目: 実績作業時間の削除に失敗しました。", exc_info=True)
-                continue
-            finally:
-                if (index + 1) % 100 == 0:
-                    logger.debug(f"{index + 1} 件 実績作業時間情報を削除しました。")
 
         logger.info(f"{success_count} / {len(actual_working_times)} 件の実績作業時間を削除しました。")
 
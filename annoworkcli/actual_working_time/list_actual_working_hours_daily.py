@@ -1,9 +1,8 @@
 import argparse
 import datetime
-import json
 import logging
 from collections import defaultdict
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -18,7 +17,12 @@ import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
-from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.job import get_all_jobs
+from annoworkcli.common.reader import RowFilter, read_input_file
+from annoworkcli.common.utils import get_today_str, print_csv, print_json
+from annoworkcli.common.watch import add_watch_argument, get_watch_window, run_watch, validate_watch_args, write_if_changed
 
 logger = logging.getLogger(__name__)
 
@@ -161,26 +165,33 @@ def create_actual_working_hours_daily_list(
     return results_list
 
 
-def get_actual_working_time_list_from_input_file(input_file: Path) -> list[dict[str, Any]]:
+INPUT_FILE_DTYPES = {
+    "date": "string",
+    "job_id": "string",
+    "job_name": "string",
+    "workspace_member_id": "string",
+    "user_id": "string",
+    "username": "string",
+    "actual_working_hours": "float64",
+    "notes": "object",
+}
+"""``annoworkcli actual_working_time list_daily`` の出力結果の列とdtype"""
+
+
+def get_actual_working_time_df_from_input_file(input_file: Path, *, row_filter: RowFilter | None = None) -> pandas.DataFrame:
     """input_fileから実績作業時間情報を取得する。
-    拡張子がjsonかcsvかで読み込み方法を変更する。
+    拡張子でファイルの形式（CSV, JSON, JSON Lines, Parquet）を判断する。
+
+    行ごとのdictに変換するとメモリを多く使うので、 ``INPUT_FILE_DTYPES`` の列を持つDataFrameのまま返す。
 
     Args:
-        input_file (Path): [description]
+        input_file: 読み込むファイル
+        row_filter: 読み込む段階で適用する絞り込み条件
 
     Returns:
-        list[dict[str,Any]]: [description]
+        実績作業時間情報のDataFrame
     """
-    if input_file.suffix.lower() == ".json":
-        with input_file.open(encoding="utf-8") as f:
-            return json.load(f)
-
-    elif input_file.suffix.lower() == ".csv":
-        df = pandas.read_csv(str(input_file))
-        return df.to_dict("records")
-
-    else:
-        raise RuntimeError(f" '--input' に指定したファイル '{input_file}' の拡張子はサポート対象外です。拡張子はcsv,jsonのみサポートしています。")
+    return read_input_file(input_file, dtypes=INPUT_FILE_DTYPES, row_filter=row_filter)
 
 
 def filter_actual_daily_list(
@@ -206,7 +217,7 @@ class ListActualWorkingHoursDaily:
         self.workspace_id = workspace_id
 
     def add_parent_job_info(self, daily_list: Sequence[ActualWorkingHoursDaily]) -> list[ActualWorkingHoursDailyWithParentJob]:
-        all_job_list = self.annowork_service.api.get_jobs(self.workspace_id)
+        all_job_list = get_all_jobs(self.annowork_service, self.workspace_id, required_job_ids={e.job_id for e in daily_list})
         all_job_dict = {e["job_id"]: e for e in all_job_list}
         parent_job_id_set = {get_parent_job_id_from_job_tree(e["job_tree"]) for e in all_job_list}
         parent_job_id_set.discard(None)
@@ -223,6 +234,36 @@ class ListActualWorkingHoursDaily:
             result.append(tmp)
         return result
 
+    def get_actual_working_hours_daily_list(
+        self,
+        list_actual_working_time_obj: ListActualWorkingTime,
+        *,
+        job_ids: Collection[str] | None = None,
+        parent_job_ids: Collection[str] | None = None,
+        user_ids: Collection[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        timezone_offset_hours: float | None = None,
+    ) -> list[ActualWorkingHoursDailyWithParentJob]:
+        """WebAPIから実績作業時間を取得して、日ごとに集約した情報に親ジョブの情報を付与して返します。"""
+        actual_working_time_list = list_actual_working_time_obj.get_actual_working_times(
+            job_ids=job_ids,
+            parent_job_ids=parent_job_ids,
+            user_ids=user_ids,
+            start_date=start_date,
+            end_date=end_date,
+            is_set_additional_info=False,
+        )
+        list_actual_working_time_obj.set_additional_info_to_actual_working_time(actual_working_time_list)
+
+        logger.debug(f"{len(actual_working_time_list)} 件の実績作業時間情報を日ごとに集約します。")
+        result: Sequence[ActualWorkingHoursDaily] = create_actual_working_hours_daily_list(
+            actual_working_time_list, timezone_offset_hours=timezone_offset_hours, show_notes=True
+        )
+
+        result = filter_actual_daily_list(result, start_date=start_date, end_date=end_date)
+        return self.add_parent_job_info(result)
+
 
 def get_required_columns() -> list[str]:
     required_columns = [
@@ -240,7 +281,54 @@ def get_required_columns() -> list[str]:
     return required_columns
 
 
+def main_with_cube(args: argparse.Namespace) -> None:
+    """WebAPIにアクセスせずに、キューブから日ごとの実績作業時間を出力します。"""
+    with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+        cube.warn_if_out_of_range(start_date=args.start_date, end_date=args.end_date)
+        df = cube.read_actual_daily(
+            start_date=args.start_date,
+            end_date=args.end_date,
+            job_ids=get_list_from_args(args.job_id),
+            parent_job_ids=get_list_from_args(args.parent_job_id),
+            user_ids=get_list_from_args(args.user_id),
+        )
+    logger.info(f"{len(df)} 件の日ごとの実績作業時間情報を出力します。")
+
+    if OutputFormat(args.format) == OutputFormat.JSON:
+        print_json(df.astype(object).where(df.notna(), None).to_dict("records"), is_pretty=True, output=args.output)
+    else:
+        print_csv(df[get_required_columns()], output=args.output)
+
+
+def print_actual_working_hours_daily_list(
+    result: Sequence[ActualWorkingHoursDailyWithParentJob], *, output: Path | None, output_format: OutputFormat
+) -> None:
+    if output_format == OutputFormat.JSON:
+        # `.schema().dump(many=True)`を使わない理由：使うと警告が発生するから
+        # https://qiita.com/yuji38kwmt/items/a3625b2011aff1d9901b
+        dict_result = []
+        for elm in result:
+            dict_result.append(elm.to_dict())  # noqa: PERF401
+
+        print_json(dict_result, is_pretty=True, output=output)
+    else:
+        required_columns = get_required_columns()
+        if len(result) > 0:
+            df = pandas.DataFrame(result)
+        else:
+            df = pandas.DataFrame(columns=required_columns)
+        print_csv(df[required_columns], output=output)
+
+
 def main(args: argparse.Namespace) -> None:
+    if args.cube is not None:
+        if args.watch is not None:
+            raise CommandLineArgumentError("'--watch' と '--cube' は同時に指定できません。")
+        main_with_cube(args)
+        return
+
+    validate_watch_args(args)
+
     annowork_service = build_annoworkapi(args)
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
     job_id_list = get_list_from_args(args.job_id)
@@ -262,44 +350,45 @@ def main(args: argparse.Namespace) -> None:
         workspace_id=workspace_id,
         timezone_offset_hours=args.timezone_offset,
     )
-    actual_working_time_list = list_actual_working_time_obj.get_actual_working_times(
-        job_ids=job_id_list,
-        parent_job_ids=parent_job_id_list,
-        user_ids=user_id_list,
-        start_date=args.start_date,
-        end_date=args.end_date,
-        is_set_additional_info=False,
-    )
-    list_actual_working_time_obj.set_additional_info_to_actual_working_time(actual_working_time_list)
 
-    logger.debug(f"{len(actual_working_time_list)} 件の実績作業時間情報を日ごとに集約します。")
-    result: Sequence[ActualWorkingHoursDaily] = create_actual_working_hours_daily_list(
-        actual_working_time_list, timezone_offset_hours=args.timezone_offset, show_notes=True
-    )
+    def get_daily_list(start_date: str | None, end_date: str | None) -> list[ActualWorkingHoursDailyWithParentJob]:
+        return main_obj.get_actual_working_hours_daily_list(
+            list_actual_working_time_obj,
+            job_ids=job_id_list,
+            parent_job_ids=parent_job_id_list,
+            user_ids=user_id_list,
+            start_date=start_date,
+            end_date=end_date,
+            timezone_offset_hours=args.timezone_offset,
+        )
 
-    result = filter_actual_daily_list(result, start_date=start_date, end_date=end_date)
-    result = main_obj.add_parent_job_info(result)
+    result = get_daily_list(start_date, end_date)
     logger.info(f"{len(result)} 件の日ごとの実績作業時間情報を出力します。")
+    output_format = OutputFormat(args.format)
+    print_actual_working_hours_daily_list(result, output=args.output, output_format=output_format)
+
+    if args.watch is None:
+        return
+
+    def update() -> bool:
+        nonlocal result
+        window = get_watch_window(
+            today=get_today_str(timezone_offset_hours=args.timezone_offset),
+            window_days=args.watch_window_days,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if window is None:
+            return False
+        # ウォッチ期間より前の日ごとの実績作業時間は変わらないとみなして、ウォッチ期間の行だけを置き換える
+        result = [e for e in result if not window.contains(e.date)] + get_daily_list(window.start_date, window.end_date)
+        return write_if_changed(args.output, lambda f: print_actual_working_hours_daily_list(result, output=f, output_format=output_format))
 
-    if OutputFormat(args.format) == OutputFormat.JSON:
-        # `.schema().dump(many=True)`を使わない理由：使うと警告が発生するから
-        # https://qiita.com/yuji38kwmt/items/a3625b2011aff1d9901b
-        dict_result = []
-        for elm in result:
-            dict_result.append(elm.to_dict())  # noqa: PERF401
-
-        print_json(dict_result, is_pretty=True, output=args.output)
-    else:
-        required_columns = get_required_columns()
-        if len(result) > 0:
-            df = pandas.DataFrame(result)
-        else:
-            df = pandas.DataFrame(columns=required_columns)
-        print_csv(df[required_columns], output=args.output)
+    run_watch(update, interval_seconds=args.watch)
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
     # parent_job_idとjob_idの両方を指定するユースケースはなさそうなので、exclusiveにする。
@@ -316,6 +405,9 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         help="日付に対するタイムゾーンのオフセット時間。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
     )
 
+    add_cube_argument(parser)
+    add_watch_argument(parser)
+
     parser.add_argument("-o", "--output", type=Path, help="出力先")
 
     parser.add_argument(
@@ -11,6 +11,7 @@ import annoworkcli.common.cli
 from annoworkcli.actual_working_time.list_actual_working_hours_daily import create_actual_working_hours_daily_list, filter_actual_daily_list
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
@@ -70,7 +71,36 @@ def get_daily_actual_working_hours_by_job_df(
     return df_total[required_columns]
 
 
+def print_daily_actual_working_hours_by_job_df(df: pandas.DataFrame, *, output: Path | None, output_format: OutputFormat) -> None:
+    logger.info(f"{len(df)} 件の日ごとの実績作業時間情報（ジョブごと）を出力します。")
+
+    match output_format:
+        case OutputFormat.CSV:
+            print_csv(df, output=output)
+        case OutputFormat.JSON:
+            print_json(df.to_dict("records"), is_pretty=True, output=output)
+        case _ as unreachable:
+            assert_never(unreachable)
+
+
+def main_with_cube(args: argparse.Namespace) -> None:
+    """WebAPIにアクセスせずに、キューブからジョブごとの日ごとの実績作業時間を出力します。"""
+    with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+        cube.warn_if_out_of_range(start_date=args.start_date, end_date=args.end_date)
+        df = cube.read_actual_daily_by_job(
+            start_date=args.start_date,
+            end_date=args.end_date,
+            job_ids=get_list_from_args(args.job_id),
+            parent_job_ids=get_list_from_args(args.parent_job_id),
+        )
+    print_daily_actual_working_hours_by_job_df(df, output=args.output, output_format=OutputFormat(args.format))
+
+
 def main(args: argparse.Namespace) -> None:
+    if args.cube is not None:
+        main_with_cube(args)
+        return
+
     annowork_service = build_annoworkapi(args)
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
     job_id_list = get_list_from_args(args.job_id)
@@ -109,20 +139,11 @@ def main(args: argparse.Namespace) -> None:
 
     all_jobs = annowork_service.api.get_jobs(workspace_id)
     df = get_daily_actual_working_hours_by_job_df([e.to_dict() for e in actual_daily_list], all_jobs)
-
-    logger.info(f"{len(df)} 件の日ごとの実績作業時間情報（ジョブごと）を出力します。")
-
-    match OutputFormat(args.format):
-        case OutputFormat.CSV:
-            print_csv(df, output=args.output)
-        case OutputFormat.JSON:
-            print_json(df.to_dict("records"), is_pretty=True, output=args.output)
-        case _ as unreachable:
-            assert_never(unreachable)
+    print_daily_actual_working_hours_by_job_df(df, output=args.output, output_format=OutputFormat(args.format))
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
     job_id_group = parser.add_mutually_exclusive_group()
     job_id_group.add_argument("-j", "--job_id", type=str, nargs="+", required=False, help="絞り込み対象のジョブID")
     job_id_group.add_argument("-pj", "--parent_job_id", type=str, nargs="+", required=False, help="絞り込み対象の親のジョブID")
@@ -136,6 +157,8 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         help="日付に対するタイムゾーンのオフセット時間。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
     )
 
+    add_cube_argument(parser)
+
     parser.add_argument("-o", "--output", type=Path, help="出力先")
 
     parser.add_argument(
@@ -18,11 +18,41 @@ from annoworkcli.actual_working_time.list_actual_working_hours_daily import (
 )
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import map_concurrently
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
 
 
+def print_actual_working_times_groupby_tag(results: list[dict[str, Any]], *, output: Path, output_format: OutputFormat) -> None:
+    """ワークスペースタグで集計した実績作業時間を出力します。"""
+    logger.info(f"{len(results)} 件のワークスペースタグで集計した実績作業時間の一覧を出力します。")
+
+    if output_format == OutputFormat.JSON:
+        print_json(results, is_pretty=True, output=output)
+    else:
+        required_columns = [
+            "date",
+            "parent_job_id",
+            "parent_job_name",
+            "job_id",
+            "job_name",
+            "actual_working_hours.total",
+        ]
+
+        if len(results) > 0:
+            df = pandas.json_normalize(results)
+            df.fillna(0, inplace=True)
+            remaining_columns = list(set(df.columns) - set(required_columns))
+            columns = required_columns + sorted(remaining_columns)
+        else:
+            df = pandas.DataFrame(columns=required_columns)
+            columns = required_columns
+
+        print_csv(df[columns], output=output)
+
+
 class ListActualWorkingTimeGroupbyTag:
     def __init__(self, annowork_service: AnnoworkResource, workspace_id: str, timezone_offset_hours: int) -> None:
         self.annowork_service = annowork_service
@@ -74,9 +104,13 @@ class ListActualWorkingTimeGroupbyTag:
         dict_hours: dict[tuple[str, str, str], float] = defaultdict(float)
 
         # ワークスペースタグごと日毎の時間を集計する
-        for workspace_tag in workspace_tags:
+        tag_members_list = map_concurrently(
+            lambda workspace_tag: self.annowork_service.api.get_workspace_tag_members(self.workspace_id, workspace_tag["workspace_tag_id"]),
+            workspace_tags,
+            progress_description="ワークスペースタグのメンバの取得",
+        )
+        for workspace_tag, members in zip(workspace_tags, tag_members_list, strict=True):
             workspace_tag_name = workspace_tag["workspace_tag_name"]
-            members = self.annowork_service.api.get_workspace_tag_members(self.workspace_id, workspace_tag["workspace_tag_id"])
             member_ids = {e["workspace_member_id"] for e in members}
             for elm in actual_working_hours_daily:
                 if elm.workspace_member_id in member_ids:
@@ -162,33 +196,30 @@ class ListActualWorkingTimeGroupbyTag:
                 target_workspace_tag_names=target_workspace_tag_names,
             )
 
-        logger.info(f"{len(results)} 件のワークスペースタグで集計した実績作業時間の一覧を出力します。")
-
-        if output_format == OutputFormat.JSON:
-            print_json(results, is_pretty=True, output=output)
-        else:
-            required_columns = [
-                "date",
-                "parent_job_id",
-                "parent_job_name",
-                "job_id",
-                "job_name",
-                "actual_working_hours.total",
-            ]
-
-            if len(results) > 0:
-                df = pandas.json_normalize(results)
-                df.fillna(0, inplace=True)
-                remaining_columns = list(set(df.columns) - set(required_columns))
-                columns = required_columns + sorted(remaining_columns)
-            else:
-                df = pandas.DataFrame(columns=required_columns)
-                columns = required_columns
-
-            print_csv(df[columns], output=output)
+        print_actual_working_times_groupby_tag(results, output=output, output_format=output_format)
+
+
+def main_with_cube(args: argparse.Namespace) -> None:
+    """WebAPIにアクセスせずに、キューブからワークスペースタグで集計した実績作業時間を出力します。"""
+    with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+        cube.warn_if_out_of_range(start_date=args.start_date, end_date=args.end_date)
+        results = cube.read_actual_daily_groupby_tag(
+            start_date=args.start_date,
+            end_date=args.end_date,
+            job_ids=get_list_from_args(args.job_id),
+            parent_job_ids=get_list_from_args(args.parent_job_id),
+            user_ids=get_list_from_args(args.user_id),
+            workspace_tag_ids=get_list_from_args(args.workspace_tag_id),
+            workspace_tag_names=get_list_from_args(args.workspace_tag_name),
+        )
+    print_actual_working_times_groupby_tag(results, output=args.output, output_format=OutputFormat(args.format))
 
 
 def main(args: argparse.Namespace) -> None:
+    if args.cube is not None:
+        main_with_cube(args)
+        return
+
     annowork_service = build_annoworkapi(args)
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
     job_id_list = get_list_from_args(args.job_id)
@@ -223,7 +254,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
@@ -257,6 +288,8 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         help="日付に対するタイムゾーンのオフセット時間。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
     )
 
+    add_cube_argument(parser)
+
     parser.add_argument("-o", "--output", type=Path, help="出力先")
 
     parser.add_argument(
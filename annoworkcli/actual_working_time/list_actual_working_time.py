@@ -14,6 +14,9 @@ from annoworkapi.utils import str_to_datetime
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import flat_map_concurrently
+from annoworkcli.common.job import get_all_jobs
+from annoworkcli.common.metrics import phase
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
@@ -48,14 +51,13 @@ class ListActualWorkingTime:
         if term_end is not None:
             query_params["term_end"] = term_end
 
-        result = []
-        for workspace_member_id in workspace_member_id_list:
+        def get_actual_working_times(workspace_member_id: str) -> list[dict[str, Any]]:
             logger.debug(f"実績時間情報を取得します。{workspace_member_id=}, {query_params=}")
-            tmp = self.annowork_service.api.get_actual_working_times_by_workspace_member(
+            return self.annowork_service.api.get_actual_working_times_by_workspace_member(
                 self.workspace_id, workspace_member_id, query_params=query_params
             )
-            result.extend(tmp)
-        return result
+
+        return flat_map_concurrently(get_actual_working_times, workspace_member_id_list, progress_description="メンバごとの実績作業時間の取得")
 
     def get_actual_working_times_by_job(
         self,
@@ -72,13 +74,13 @@ class ListActualWorkingTime:
             query_params["term_end"] = term_end
 
         if job_id_list is not None:
-            result = []
-            for job_id in job_id_list:
-                query_params["job_id"] = job_id
-                logger.debug(f"実績時間情報を取得します。{job_id=}, {query_params=}")
-                tmp = self.annowork_service.api.get_actual_working_times(self.workspace_id, query_params=query_params)
-                result.extend(tmp)
-            return result
+
+            def get_actual_working_times(job_id: str) -> list[dict[str, Any]]:
+                query_params_with_job_id = {**query_params, "job_id": job_id}
+                logger.debug(f"実績時間情報を取得します。{job_id=}, {query_params_with_job_id=}")
+                return self.annowork_service.api.get_actual_working_times(self.workspace_id, query_params=query_params_with_job_id)
+
+            return flat_map_concurrently(get_actual_working_times, job_id_list, progress_description="ジョブごとの実績作業時間の取得")
         else:
             logger.debug(f"実績時間情報を取得します。{query_params=}")
             return self.annowork_service.api.get_actual_working_times(self.workspace_id, query_params=query_params)
@@ -97,7 +99,7 @@ class ListActualWorkingTime:
             actual_working_time_list (list[dict[str,Any]]): (IN/OUT) 実績作業時間のリスト
         """
         workspace_member_dict = {e["workspace_member_id"]: e for e in self.workspace_members}
-        job_list = self.annowork_service.api.get_jobs(self.workspace_id)
+        job_list = get_all_jobs(self.annowork_service, self.workspace_id, required_job_ids={e["job_id"] for e in actual_working_time_list})
         job_dict = {e["job_id"]: e for e in job_list}
 
         parent_job_id_set = {get_parent_job_id_from_job_tree(e["job_tree"]) for e in job_list}
@@ -185,16 +187,17 @@ class ListActualWorkingTime:
             logger.debug(f"{parent_job_ids=} の子のジョブの {job_ids=}")
 
         # user_id_list, parent_job_id_list, job_id_listは排他なので、以下のような条件分岐にしている
-        if workspace_member_id_list is not None:
-            result = self.get_actual_working_times_by_workspace_member(
-                workspace_member_id_list=workspace_member_id_list, start_date=start_date, end_date=end_date
-            )
-            # webapiではjob_idで絞り込めないので、クライアント側で絞り込む
-            if job_ids is not None:
-                result = [e for e in result if e["job_id"] in set(job_ids)]
+        with phase("fetch_actual_working_times"):
+            if workspace_member_id_list is not None:
+                result = self.get_actual_working_times_by_workspace_member(
+                    workspace_member_id_list=workspace_member_id_list, start_date=start_date, end_date=end_date
+                )
+                # webapiではjob_idで絞り込めないので、クライアント側で絞り込む
+                if job_ids is not None:
+                    result = [e for e in result if e["job_id"] in set(job_ids)]
 
-        else:
-            result = self.get_actual_working_times_by_job(job_id_list=job_ids, start_date=start_date, end_date=end_date)
+            else:
+                result = self.get_actual_working_times_by_job(job_id_list=job_ids, start_date=start_date, end_date=end_date)
 
         if is_set_additional_info is not None:
             self.set_additional_info_to_actual_working_time(result, is_add_parent_job_info=is_add_parent_job_info)
@@ -281,7 +284,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
@@ -11,43 +11,35 @@ import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
 from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
 from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.weekly import DEFAULT_WEEK_START, WeekStart, add_week_start_argument, aggregate_weekly
 
 logger = logging.getLogger(__name__)
 
 
-def get_weekly_actual_working_hours_df(actual_working_times: list[dict[str, Any]], workspace_members: list[dict[str, Any]]) -> pandas.DataFrame:
+def get_weekly_actual_working_hours_df(
+    actual_working_times: list[dict[str, Any]], workspace_members: list[dict[str, Any]], *, week_start: WeekStart = DEFAULT_WEEK_START
+) -> pandas.DataFrame:
     """週単位の実績作業時間が格納されたDataFrameを生成します。
 
     Args:
         actual_working_times: 実績作業時間情報。start_datetime, workspace_member_id, job_id, job_name, actual_working_hours を参照します。
         workspace_members: ワークスペースメンバ情報。workspace_member_id, user_id, username を参照します。
+        week_start: 週の始まりの曜日
 
     Returns:
         以下の列を返すDataFrame。
             "workspace_member_id", "user_id","username", "job_id", "job_name", "start_date", "end_date", "actual_working_hours"
     """
     df = pandas.DataFrame(actual_working_times)
-    # 1週間ごとに集計する（日曜日始まり, 日曜日がindexになっている）
-    df["dt_date"] = pandas.to_datetime(df["start_datetime"])
-
-    df_weekly = (
-        # `include_groups=False`を指定する理由：pandas2.2.0で以下の警告が出ないようにするため
-        # DeprecationWarning: DataFrameGroupBy.resample operated on the grouping columns.
-        # This behavior is deprecated, and in a future version of pandas the grouping columns will be excluded from the operation.
-        # Either pass `include_groups=False` to exclude the groupings or explicitly select the grouping columns after groupby to silence this warning.  # noqa: E501
-        df.groupby(["workspace_member_id", "job_id"])
-        .resample("W-SUN", on="dt_date", label="left", closed="left", include_groups=False)
-        .agg({"actual_working_hours": "sum", "job_name": "first"})
+    df_weekly = aggregate_weekly(
+        df,
+        date_column="start_datetime",
+        group_columns=["workspace_member_id", "job_id"],
+        agg={"actual_working_hours": "sum", "job_name": "first"},
+        week_start=week_start,
     )
-    df_weekly.reset_index(inplace=True)
-
-    # 1週間の始まり（日曜日）と終わり（土曜日）の日付列を設定
-    df_weekly.rename(columns={"dt_date": "dt_start_date"}, inplace=True)
-    df_weekly["dt_end_date"] = df_weekly["dt_start_date"] + pandas.Timedelta(days=6)
-    # pandas.Timestamp型をstr型に変換する
-    df_weekly["start_date"] = df_weekly["dt_start_date"].dt.date.apply(lambda e: e.isoformat())
-    df_weekly["end_date"] = df_weekly["dt_end_date"].dt.date.apply(lambda e: e.isoformat())
 
     # 実績作業時間が0の行は不要なので、除外する
     df_weekly = df_weekly.query("actual_working_hours > 0")
@@ -90,9 +82,79 @@ def add_parent_job_info_to_df(df: pandas.DataFrame, all_jobs: list[dict[str, Any
     return df
 
 
-def main(args: argparse.Namespace) -> None:
+REQUIRED_COLUMNS = [
+    "workspace_member_id",
+    "user_id",
+    "username",
+    "parent_job_id",
+    "parent_job_name",
+    "job_id",
+    "job_name",
+    "start_date",
+    "end_date",
+    "actual_working_hours",
+]
+
+
+def get_weekly_actual_working_hours_df_from_cube(
+    cube: WorkingHoursCube,
+    *,
+    week_start: WeekStart,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    job_ids: list[str] | None = None,
+    parent_job_ids: list[str] | None = None,
+    user_ids: list[str] | None = None,
+) -> pandas.DataFrame:
+    """
+    キューブから週単位の実績作業時間が格納されたDataFrameを生成します。
+
+    キューブを作成したときの週の始まりの曜日と ``week_start`` が同じならば、集計済みのテーブルを参照します。
+    異なる場合は、キューブに格納されている日ごとの実績作業時間から集計します。
+    """
+    if cube.week_start == week_start:
+        return cube.read_actual_weekly(start_date=start_date, end_date=end_date, job_ids=job_ids, parent_job_ids=parent_job_ids, user_ids=user_ids)
+
+    df_daily = cube.read_actual_daily(start_date=start_date, end_date=end_date, job_ids=job_ids, parent_job_ids=parent_job_ids, user_ids=user_ids)
+    group_columns = ["workspace_member_id", "user_id", "username", "parent_job_id", "parent_job_name", "job_id", "job_name"]
+    df = aggregate_weekly(df_daily, date_column="date", group_columns=group_columns, agg={"actual_working_hours": "sum"}, week_start=week_start)
+    return df.sort_values(["user_id", "job_id", "start_date"], ignore_index=True)[REQUIRED_COLUMNS]
+
+
+def get_weekly_actual_working_hours_df_from_webapi(
+    args: argparse.Namespace,
+    *,
+    start_date: str | None,
+    end_date: str | None,
+    job_ids: list[str] | None,
+    parent_job_ids: list[str] | None,
+    user_ids: list[str] | None,
+) -> pandas.DataFrame:
+    """WebAPIから取得した実績作業時間から、週単位の実績作業時間が格納されたDataFrameを生成します。"""
     annowork_service = build_annoworkapi(args)
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
+    main_obj = ListActualWorkingTime(annowork_service=annowork_service, workspace_id=workspace_id, timezone_offset_hours=args.timezone_offset)
+
+    actual_working_times = main_obj.get_actual_working_times(
+        job_ids=job_ids,
+        parent_job_ids=parent_job_ids,
+        start_date=start_date,
+        end_date=end_date,
+        user_ids=user_ids,
+        is_set_additional_info=True,
+    )
+
+    if len(actual_working_times) == 0:
+        return pandas.DataFrame(columns=REQUIRED_COLUMNS)
+
+    df = get_weekly_actual_working_hours_df(actual_working_times, main_obj.workspace_members, week_start=WeekStart(args.week_start))
+    # 親ジョブ情報を追加
+    all_jobs = annowork_service.api.get_jobs(workspace_id)
+    df = add_parent_job_info_to_df(df, all_jobs)
+    return df[REQUIRED_COLUMNS]
+
+
+def main(args: argparse.Namespace) -> None:
     job_id_list = get_list_from_args(args.job_id)
     parent_job_id_list = get_list_from_args(args.parent_job_id)
     user_id_list = get_list_from_args(args.user_id)
@@ -104,38 +166,27 @@ def main(args: argparse.Namespace) -> None:
         print(f"{command}: error: '--start_date'や'--user_id'などの絞り込み条件を1つ以上指定してください。", file=sys.stderr)  # noqa: T201
         sys.exit(COMMAND_LINE_ERROR_STATUS_CODE)
 
-    main_obj = ListActualWorkingTime(annowork_service=annowork_service, workspace_id=workspace_id, timezone_offset_hours=args.timezone_offset)
-
-    actual_working_times = main_obj.get_actual_working_times(
-        job_ids=job_id_list,
-        parent_job_ids=parent_job_id_list,
-        start_date=start_date,
-        end_date=end_date,
-        user_ids=user_id_list,
-        is_set_additional_info=True,
-    )
-
-    required_columns = [
-        "workspace_member_id",
-        "user_id",
-        "username",
-        "parent_job_id",
-        "parent_job_name",
-        "job_id",
-        "job_name",
-        "start_date",
-        "end_date",
-        "actual_working_hours",
-    ]
-
-    if len(actual_working_times) == 0:
-        df = pandas.DataFrame(columns=required_columns)
+    if args.cube is not None:
+        with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+            cube.warn_if_out_of_range(start_date=start_date, end_date=end_date)
+            df = get_weekly_actual_working_hours_df_from_cube(
+                cube,
+                week_start=WeekStart(args.week_start),
+                start_date=start_date,
+                end_date=end_date,
+                job_ids=job_id_list,
+                parent_job_ids=parent_job_id_list,
+                user_ids=user_id_list,
+            )
     else:
-        df = get_weekly_actual_working_hours_df(actual_working_times, main_obj.workspace_members)
-        # 親ジョブ情報を追加
-        all_jobs = annowork_service.api.get_jobs(workspace_id)
-        df = add_parent_job_info_to_df(df, all_jobs)
-        df = df[required_columns]
+        df = get_weekly_actual_working_hours_df_from_webapi(
+            args,
+            start_date=start_date,
+            end_date=end_date,
+            job_ids=job_id_list,
+            parent_job_ids=parent_job_id_list,
+            user_ids=user_id_list,
+        )
 
     logger.info(f"{len(df)} 件の週単位の実績作業時間情報を出力します。")
 
@@ -150,7 +201,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="集計対象のユーザID")
 
@@ -168,6 +219,10 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         help="日付に対するタイムゾーンのオフセット時間を指定します。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
     )
 
+    add_week_start_argument(parser)
+
+    add_cube_argument(parser)
+
     parser.add_argument("-o", "--output", type=Path, help="出力先")
     parser.add_argument(
         "-f",
@@ -183,7 +238,7 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
 
 def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
     subcommand_name = "list_weekly"
-    subcommand_help = "実績作業時間の一覧を週ごと（日曜日始まり）に出力します。"
+    subcommand_help = "実績作業時間の一覧を週ごとに出力します。"
 
     parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=subcommand_help)
     parse_args(parser)
@@ -3,7 +3,6 @@ import logging
 from collections.abc import Collection
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
 
 import pandas
 from annoworkapi.job import get_parent_job_id_from_job_tree
@@ -12,8 +11,8 @@ from dataclasses_json import DataClassJsonMixin
 
 import annoworkcli
 import annoworkcli.common.cli
-from annoworkcli.common.annofab import get_annofab_project_id_from_job
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.job import get_job_snapshot
 from annoworkcli.common.utils import print_csv, print_json
 from annoworkcli.schedule.list_assigned_hours_daily import ListAssignedHoursDaily
 
@@ -43,7 +42,9 @@ class ListAssignedHoursMain:
         self.list_assigned_hours_daily_obj = ListAssignedHoursDaily(annowork_service, workspace_id)
 
         # 全ジョブと全メンバーを取得
-        self.all_jobs = self.annowork_service.api.get_jobs(self.workspace_id)
+        job_snapshot = get_job_snapshot(self.annowork_service, self.workspace_id)
+        self.all_jobs = job_snapshot.jobs
+        self.annofab_linkage_index = job_snapshot.annofab_linkage_index
         self.all_workspace_members = self.annowork_service.api.get_workspace_members(self.workspace_id)
 
     def get_parent_job_id_list_from_annofab_project_id_list(self, annofab_project_id_list: list[str]) -> list[str]:
@@ -56,23 +57,7 @@ class ListAssignedHoursMain:
         Returns:
             親ジョブIDのリスト
         """
-        annofab_project_id_set = set(annofab_project_id_list)
-
-        def _match_job(job: dict[str, Any]) -> bool:
-            af_project_id = get_annofab_project_id_from_job(job)
-            if af_project_id is None:
-                return False
-            return af_project_id in annofab_project_id_set
-
-        # Annofabプロジェクトに紐づくジョブを取得し、その親ジョブIDを取得
-        parent_job_id_set: set[str] = set()
-        for job in self.all_jobs:
-            if _match_job(job):
-                parent_job_id = get_parent_job_id_from_job_tree(job["job_tree"])
-                if parent_job_id is not None:
-                    parent_job_id_set.add(parent_job_id)
-
-        return list(parent_job_id_set)
+        return self.annofab_linkage_index.get_parent_job_ids(annofab_project_id_list)
 
     def get_job_id_list_from_parent_job_id_list(self, parent_job_id_list: Collection[str]) -> list[str]:
         """
@@ -217,7 +202,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument(
         "-af_p",
@@ -1,19 +1,18 @@
 import argparse
 import logging
-import multiprocessing
 from pathlib import Path
 from typing import Any
 
 import pandas
 from annofabapi.resource import Resource as AnnofabResource
-from annoworkapi.annofab import get_annofab_project_id_from_url
 from annoworkapi.job import get_parent_job_id_from_job_tree
 from annoworkapi.resource import Resource as AnnoworkResource
 
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.annofab.utils import build_annofabapi_resource
-from annoworkcli.common.annofab import get_annofab_project_id_from_job
+from annoworkcli.common.annofab import AnnofabLinkageIndex
+from annoworkcli.common.annofab_project_cache import get_annofab_projects
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
 from annoworkcli.common.utils import print_csv, print_json
 from annoworkcli.job.list_job import ListJob
@@ -23,17 +22,7 @@ logger = logging.getLogger(__name__)
 
 def get_annofab_project_ids(job_list: list[dict[str, Any]]) -> set[str]:
     """job_listから, annofab project_idの集合を取得する。"""
-    # annofabプロジェクトの取得は時間がかかるので、並列化する
-    af_project_id_set = set()
-    for job in job_list:
-        url = job["external_linkage_info"].get("url")
-        if url is None:
-            continue
-        af_project_id = get_annofab_project_id_from_url(url)
-        if af_project_id is None:
-            continue
-        af_project_id_set.add(af_project_id)
-    return af_project_id_set
+    return AnnofabLinkageIndex.from_jobs(job_list).get_annofab_project_ids()
 
 
 class ListJobWithAnnofabProject:
@@ -55,26 +44,16 @@ class ListJobWithAnnofabProject:
         """
         keyがAnnofabのproject_id, valueがAnnofabプロジェクトのdictを返します。
         """
-        # annofabプロジェクトの取得は時間がかかるので、並列化する
         af_project_ids = get_annofab_project_ids(job_list)
 
         logger.info(f"{len(af_project_ids)} 件のAnnofabプロジェクトの情報を取得します。")
-        if self.parallelism is not None:
-            with multiprocessing.Pool(self.parallelism) as pool:
-                af_project_list = pool.map(self.annofab_service.wrapper.get_project_or_none, af_project_ids)
-            return {e["project_id"]: e for e in af_project_list if e is not None}
-        else:
-            result = {}
-            for index, af_project_id in enumerate(af_project_ids):
-                af_project = self.annofab_service.wrapper.get_project_or_none(af_project_id)
-                if af_project is None:
-                    logger.warning(f"annofab_project_id='{af_project_id}'のAnnofabプロジェクトは存在しません。")
-                    continue
-                result[af_project["project_id"]] = af_project
-                if (index + 1) % 100 == 0:
-                    logger.debug(f"{index + 1}件のAnnofabプロジェクト情報を取得しました。")
-
-            return result
+        result = {}
+        for af_project_id, af_project in get_annofab_projects(self.annofab_service, af_project_ids, max_concurrency=self.parallelism).items():
+            if af_project is None:
+                logger.warning(f"annofab_project_id='{af_project_id}'のAnnofabプロジェクトは存在しません。")
+                continue
+            result[af_project_id] = af_project
+        return result
 
     def get_job_list_added_annofab_project(
         self,
@@ -87,8 +66,10 @@ class ListJobWithAnnofabProject:
             parent_job_id_list=parent_job_id_list,
         )
 
+        annofab_linkage_index = AnnofabLinkageIndex.from_jobs(job_list)
         if annofab_project_id_list is not None:
-            job_list = [job for job in job_list if get_annofab_project_id_from_job(job) in set(annofab_project_id_list)]
+            job_id_set = set(annofab_linkage_index.get_job_ids(annofab_project_id_list))
+            job_list = [job for job in job_list if job["job_id"] in job_id_set]
 
         all_job_dict = {e["job_id"]: e for e in self.annowork_service.api.get_jobs(self.workspace_id)}
 
@@ -100,12 +81,7 @@ class ListJobWithAnnofabProject:
             job["parent_job_id"] = parent_job_id
             job["parent_job_name"] = parent_job_name
 
-            external_linkage_info_url = job["external_linkage_info"].get("url")
-            if external_linkage_info_url is None:
-                job["annofab"] = None
-                continue
-
-            af_project_id = get_annofab_project_id_from_url(external_linkage_info_url)
+            af_project_id = annofab_linkage_index.get_annofab_project_id(job["job_id"])
             if af_project_id is None:
                 job["annofab"] = None
                 continue
@@ -167,7 +143,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     job_id_group = parser.add_mutually_exclusive_group()
     job_id_group.add_argument(
@@ -199,7 +175,12 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
 
     parser.add_argument("-f", "--format", type=str, choices=[e.value for e in OutputFormat], help="出力先", default=OutputFormat.CSV.value)
 
-    parser.add_argument("--parallelism", type=int, required=False, help="並列度。指定しない場合は、逐次的に処理します。")
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        required=False,
+        help="Annofabプロジェクトの情報を同時に取得する数。指定しない場合は ``--max_concurrency`` の値（未指定なら逐次的に取得します）です。",
+    )
 
     parser.add_argument("--annofab_user_id", type=str, help="Annofabにログインする際のユーザID")
     parser.add_argument("--annofab_password", type=str, help="Annofabにログインする際のパスワード")
@@ -1,8 +1,6 @@
 import argparse
 import functools
-import itertools
 import logging
-import multiprocessing
 from collections.abc import Collection
 from pathlib import Path
 from typing import Any
@@ -22,8 +20,12 @@ from annoworkcli.actual_working_time.list_actual_working_hours_daily import (
 )
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
 from annoworkcli.annofab.utils import build_annofabapi_resource
-from annoworkcli.common.annofab import TIMEZONE_OFFSET_HOURS, get_annofab_project_id_from_job, isoduration_to_hour
+from annoworkcli.common.annofab import TIMEZONE_OFFSET_HOURS, isoduration_to_hour
+from annoworkcli.common.annofab_project_cache import get_annofab_projects
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import flat_map_concurrently, map_concurrently
+from annoworkcli.common.job import get_job_snapshot
+from annoworkcli.common.metrics import phase
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
@@ -66,41 +68,43 @@ def _get_df_working_hours_from_df(
         df_job_and_af_project: ジョブ情報とAnnofabプロジェクト情報
         df_af_working_hours: Annofabの作業時間情報
     """
+    # 結合キーから値を引くためのSeriesを事前に作成しておき、`merge`ではなく`map`で列を追加・補完する。
+    # `merge`は結合のたびにDataFrame全体をコピーするので、行数が多いと遅くなるため。
+    # 補足：欠損値のキーは結合しない。`merge`は欠損値のキー同士も結合してしまい、行が重複するため。
+    df_user_by_af_account = df_user_and_af_account.dropna(subset=["annofab_account_id"]).drop_duplicates(subset=["annofab_account_id"])
+    df_user_by_af_account = df_user_by_af_account.set_index("annofab_account_id")
+    df_af_project = df_job_and_af_project.dropna(subset=["annofab_project_id"]).drop_duplicates(subset=["annofab_project_id"])
+    df_af_project = df_af_project.set_index("annofab_project_id")
+    # drop_duplicatesの理由: AnnoworkのジョブとAnnofabのプロジェクトが1対1で紐づくときだけ、job_idとjob_nameの欠損値を埋めるようにするため
+    df_job_by_af_project = (
+        df_job_and_af_project.dropna(subset=["annofab_project_id"])
+        .drop_duplicates(subset=["annofab_project_id"], keep=False)
+        .set_index("annofab_project_id")
+    )
+
     # annowork側の作業時間情報
-    df_aw_working_hours = df_actual_working_hours.merge(df_user_and_af_account[["user_id", "annofab_account_id"]], how="left", on="user_id").merge(
-        df_job_and_af_project[["job_id", "annofab_project_id"]],
-        how="left",
-        on="job_id",
+    df_aw_working_hours = df_actual_working_hours.assign(
+        annofab_account_id=_map_column(
+            df_actual_working_hours["user_id"],
+            df_user_and_af_account.dropna(subset=["user_id"]).drop_duplicates(subset=["user_id"]).set_index("user_id")["annofab_account_id"],
+        ),
+        annofab_project_id=_map_column(
+            df_actual_working_hours["job_id"],
+            df_job_and_af_project.dropna(subset=["job_id"]).drop_duplicates(subset=["job_id"]).set_index("job_id")["annofab_project_id"],
+        ),
     )
 
     df_merged = df_aw_working_hours.merge(df_af_working_hours, how="outer", on=["date", "annofab_project_id", "annofab_account_id"])
 
-    TMP_SUFFIX = "_tmp"  # noqa: N806
-    # df_merged は outer joinしているため、左側にも欠損値ができる。
-    # それを埋めるために、以前に user情報, job情報の一意な dataframe を生成して、欠損値を埋める
+    # df_merged は outer joinしているため、左側にも欠損値ができる。その欠損値をannofab_account_id, annofab_project_idから埋める。
     USER_COLUMNS = ["workspace_member_id", "user_id", "username"]  # noqa: N806
-    df_merged = df_merged.merge(df_user_and_af_account, how="left", on="annofab_account_id", suffixes=(None, TMP_SUFFIX))
     for user_column in USER_COLUMNS:
-        df_merged[user_column] = df_merged[user_column].fillna(df_merged[f"{user_column}{TMP_SUFFIX}"])
+        df_merged[user_column] = _fillna_by_map(df_merged[user_column], df_merged["annofab_account_id"], df_user_by_af_account[user_column])
 
-    # job_id, job_nameの欠損値を、df_job_and_af_project を使って埋める
-    # af_projectに紐付いているジョブとaf_projectのDataFrameを生成して、それを使って欠損値を埋める
-    # drop_duplicatesの理由: AnnoworkのジョブとAnnofabのプロジェクトが1対1で紐づくときだけ、df_mergeのjob_idとjob_nameの欠損値を埋めるようにするため
-    df_job_id_af_project = df_job_and_af_project[df_job_and_af_project["annofab_project_id"].notna()].drop_duplicates(
-        ["annofab_project_id"], keep=False
-    )
-    df_merged = df_merged.merge(
-        df_job_id_af_project[["job_id", "job_name", "annofab_project_id"]],
-        how="left",
-        on=["annofab_project_id"],
-        suffixes=(None, TMP_SUFFIX),
-    )
-    df_merged["job_id"] = df_merged["job_id"].fillna(df_merged[f"job_id{TMP_SUFFIX}"])
-    df_merged["job_name"] = df_merged["job_name"].fillna(df_merged[f"job_name{TMP_SUFFIX}"])
+    for job_column in ["job_id", "job_name"]:
+        df_merged[job_column] = _fillna_by_map(df_merged[job_column], df_merged["annofab_project_id"], df_job_by_af_project[job_column])
 
-    # annofab_project_titleを結合するために、annofab_projectだけのDataFrameを生成する
-    df_af_project = df_job_and_af_project.drop_duplicates(subset=["annofab_project_id"])[["annofab_project_id", "annofab_project_title"]]
-    df_merged = df_merged.merge(df_af_project, on="annofab_project_id", how="left")
+    df_merged["annofab_project_title"] = _map_column(df_merged["annofab_project_id"], df_af_project["annofab_project_title"])
 
     df_merged = df_merged.fillna(
         {
@@ -125,6 +129,25 @@ def _get_df_working_hours_from_df(
     ]
 
 
+def _map_column(keys: pandas.Series, lookup: pandas.Series) -> pandas.Series:
+    """``keys`` の値に対応する ``lookup`` の値を返します。 ``lookup`` のindexは一意である必要があります。"""
+    values = keys.map(lookup)
+    if values.dtype != lookup.dtype:
+        # `map`の結果の型が変わる場合があるので、`lookup`の型に揃える
+        values = values.astype(lookup.dtype)
+    return values
+
+
+def _fillna_by_map(target: pandas.Series, keys: pandas.Series, lookup: pandas.Series) -> pandas.Series:
+    """``target`` の欠損値を、 ``keys`` の値に対応する ``lookup`` の値で埋めます。"""
+    # 欠損値があるのは外部結合で追加された一部の行だけなので、その行のキーだけを引く。
+    # すべての行のキーを引くと、`merge`で結合するより遅くなる。
+    mask = target.isna()
+    if not mask.any():
+        return target
+    return target.fillna(_map_column(keys[mask], lookup))
+
+
 class ListWorkingHoursWithAnnofab:
     def __init__(
         self,
@@ -139,10 +162,13 @@ class ListWorkingHoursWithAnnofab:
         self.annofab_service = annofab_service
         self.parallelism = parallelism
 
-        self.all_jobs = self.annowork_service.api.get_jobs(self.workspace_id)
-        self.all_workspace_members = self.annowork_service.api.get_workspace_members(
-            self.workspace_id, query_params={"includes_inactive_members": True}
-        )
+        job_snapshot = get_job_snapshot(self.annowork_service, self.workspace_id)
+        self.all_jobs = job_snapshot.jobs
+        self.annofab_linkage_index = job_snapshot.annofab_linkage_index
+        with phase("fetch_workspace_members"):
+            self.all_workspace_members = self.annowork_service.api.get_workspace_members(
+                self.workspace_id, query_params={"includes_inactive_members": True}
+            )
 
         self.list_actual_working_time_obj = ListActualWorkingTime(annowork_service, workspace_id, timezone_offset_hours=TIMEZONE_OFFSET_HOURS)
 
@@ -177,10 +203,17 @@ class ListWorkingHoursWithAnnofab:
         * workspace_member_id
         * annofab_account_id
         """
-        af_account_list = []
         logger.debug(f"{len(user_ids)} 件のユーザのアカウント外部連携情報を取得します。")
-        for user_id in user_ids:
-            annofab_account_id = self.annowork_service.wrapper.get_annofab_account_id_from_user_id(user_id)
+        user_id_list = list(user_ids)
+        with phase("fetch_annofab_accounts"):
+            annofab_account_ids = map_concurrently(
+                self.annowork_service.wrapper.get_annofab_account_id_from_user_id,
+                user_id_list,
+                progress_description="アカウント外部連携情報の取得",
+            )
+
+        af_account_list = []
+        for user_id, annofab_account_id in zip(user_id_list, annofab_account_ids, strict=True):
             if annofab_account_id is None:
                 logger.warning(f"{user_id=} の外部連携情報にAnnofabのaccount_idは設定されていませんでした。")
             af_account_list.append({"user_id": user_id, "annofab_account_id": annofab_account_id})
@@ -204,21 +237,17 @@ class ListWorkingHoursWithAnnofab:
                 * annofab_project_title
         """
 
-        def get_project_title(project_id: str) -> str | None:
-            project = self.annofab_service.wrapper.get_project_or_none(project_id)
-            if project is None:
-                return None
-            return project["title"]
-
-        all_job_dict = {e["job_id"]: e for e in self.all_jobs}
-
         df_job = pandas.DataFrame(self.all_jobs)
 
         # dtype="string"を指定する理由: dtypeを指定しないとdtypeがfloatになり、後続のmerge処理でdtypeが一致しないというエラーが発生するため
         # 参考サイト: https://qiita.com/yuji38kwmt/items/74d1990bc8554f8b81ef
         df_af_project = pandas.DataFrame({"job_id": list(job_ids)}, dtype="string")
-        df_af_project["annofab_project_id"] = df_af_project["job_id"].apply(lambda e: get_annofab_project_id_from_job(all_job_dict[e]))
-        df_af_project["annofab_project_title"] = df_af_project["annofab_project_id"].apply(get_project_title)
+        df_af_project["annofab_project_id"] = df_af_project["job_id"].apply(self.annofab_linkage_index.get_annofab_project_id)
+
+        af_project_ids = {e for e in df_af_project["annofab_project_id"] if isinstance(e, str)}
+        af_project_dict = get_annofab_projects(self.annofab_service, af_project_ids, max_concurrency=self.parallelism)
+        af_project_title_dict = {project_id: project["title"] for project_id, project in af_project_dict.items() if project is not None}
+        df_af_project["annofab_project_title"] = df_af_project["annofab_project_id"].map(af_project_title_dict)
         df = df_job.merge(df_af_project, how="inner", on="job_id")
         return df[["job_id", "job_name", "annofab_project_id", "annofab_project_title"]]
 
@@ -250,7 +279,7 @@ class ListWorkingHoursWithAnnofab:
                     )
         return result
 
-    def _get_af_working_hours(self, af_project_ids: Collection[str], start_date: str | None, end_date: str | None) -> pandas.DataFrame:
+    def get_af_working_hours(self, af_project_ids: Collection[str], start_date: str | None, end_date: str | None) -> pandas.DataFrame:
         """Annofabの作業時間情報が格納されたDataFrameを返す。
 
         返すDataFrameには以下の列が存在します。
@@ -259,23 +288,15 @@ class ListWorkingHoursWithAnnofab:
         * annofab_account_id
         * annofab_working_hours
         """
-        result: list[dict[str, Any]] = []
-
         logger.debug(f"{len(af_project_ids)} 件のAnnofabプロジェクトの作業時間を取得します。")
 
-        if self.parallelism is not None:
-            partial_func = functools.partial(
-                self._get_af_working_hours_from_af_project,
-                start_date=start_date,
-                end_date=end_date,
+        with phase("fetch_annofab_working_hours"):
+            result = flat_map_concurrently(
+                functools.partial(self._get_af_working_hours_from_af_project, start_date=start_date, end_date=end_date),
+                af_project_ids,
+                max_concurrency=self.parallelism,
+                progress_description="Annofabプロジェクトの作業時間の取得",
             )
-            with multiprocessing.Pool(self.parallelism) as pool:
-                tmp_result = pool.map(partial_func, af_project_ids)
-                result = list(itertools.chain.from_iterable(tmp_result))
-
-        else:
-            for af_project_id in af_project_ids:
-                result.extend(self._get_af_working_hours_from_af_project(af_project_id, start_date=start_date, end_date=end_date))
 
         if len(result) > 0:
             return pandas.DataFrame(result).astype(
@@ -408,18 +429,19 @@ class ListWorkingHoursWithAnnofab:
         )
 
         af_project_ids = _get_af_project_ids(df_job_and_af_project)
-        df_af_working_hours = self._get_af_working_hours(
+        df_af_working_hours = self.get_af_working_hours(
             af_project_ids=af_project_ids,
             start_date=_get_start_date(df_actual_working_hours),
             end_date=_get_end_date(df_actual_working_hours),
         )
 
-        df = _get_df_working_hours_from_df(
-            df_actual_working_hours=df_actual_working_hours,
-            df_user_and_af_account=df_user_and_af_account,
-            df_job_and_af_project=df_job_and_af_project,
-            df_af_working_hours=df_af_working_hours,
-        )
+        with phase("aggregate"):
+            df = _get_df_working_hours_from_df(
+                df_actual_working_hours=df_actual_working_hours,
+                df_user_and_af_account=df_user_and_af_account,
+                df_job_and_af_project=df_job_and_af_project,
+                df_af_working_hours=df_af_working_hours,
+            )
         if user_ids is not None:
             df = df[df["user_id"].isin(set(user_ids))]
         if start_date is not None:
@@ -443,15 +465,7 @@ class ListWorkingHoursWithAnnofab:
         return [e["job_id"] for e in self.all_jobs if get_parent_job_id_from_job_tree(e["job_tree"]) in set(parent_job_id_list)]
 
     def get_job_id_list_from_annofab_project_id_list(self, annofab_project_id_list: list[str]) -> list[str]:
-        annofab_project_id_set = set(annofab_project_id_list)
-
-        def _match_job(job: dict[str, Any]) -> bool:
-            af_project_id = get_annofab_project_id_from_job(job)
-            if af_project_id is None:
-                return False
-            return af_project_id in annofab_project_id_set
-
-        return [e["job_id"] for e in self.all_jobs if _match_job(e)]
+        return self.annofab_linkage_index.get_job_ids(annofab_project_id_list)
 
 
 def main(args: argparse.Namespace) -> None:
@@ -505,7 +519,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
@@ -537,7 +551,12 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         default=OutputFormat.CSV.value,
     )
 
-    parser.add_argument("--parallelism", type=int, required=False, help="並列度。指定しない場合は、逐次的に処理します。")
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        required=False,
+        help="Annofabプロジェクトの作業時間を同時に取得する数。指定しない場合は ``--max_concurrency`` の値（未指定なら逐次的に取得します）です。",
+    )
     parser.add_argument("--annofab_user_id", type=str, help="Annofabにログインする際のユーザID")
     parser.add_argument("--annofab_password", type=str, help="Annofabにログインする際のパスワード")
     parser.add_argument("--annofab_pat", type=str, help="Annofabにログインする際のパーソナルアクセストークン")
@@ -2,12 +2,11 @@
 
 
 import argparse
-import json
 import logging
-from collections.abc import Collection
+from collections.abc import Callable, Collection
 from enum import Enum
 from pathlib import Path
-from typing import Any, assert_never
+from typing import assert_never
 
 import numpy
 import pandas
@@ -19,8 +18,12 @@ import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.annofab.list_working_hours import ListWorkingHoursWithAnnofab
 from annoworkcli.annofab.utils import build_annofabapi_resource
-from annoworkcli.common.annofab import get_annofab_project_id_from_job
 from annoworkcli.common.cli import build_annoworkapi, get_list_from_args
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.job import get_job_snapshot
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.reader import RowFilter, read_input_file
 from annoworkcli.common.utils import print_csv
 from annoworkcli.common.workspace_tag import get_company_from_workspace_tag_name, is_company_from_workspace_tag_name
 from annoworkcli.schedule.list_assigned_hours_daily import ListAssignedHoursDaily
@@ -57,6 +60,10 @@ class ShapeType(Enum):
     """作業時間の一覧を、日付, ユーザ, ジョブ単位で出力する。アサイン対象のジョブと比較できないので、アサイン時間は含まない。"""
 
 
+SHAPE_TYPES_WITHOUT_ASSIGNED = {ShapeType.TOTAL_BY_JOB, ShapeType.LIST_BY_DATE_USER_JOB, ShapeType.LIST_BY_DATE_USER_PARENT_JOB}
+"""アサイン時間が不要なshape_type"""
+
+
 def filter_df(
     df: pandas.DataFrame,
     *,
@@ -673,25 +680,129 @@ class ReshapeDataFrame:
         return df2
 
 
-def get_dataframe_from_input_file(input_file: Path) -> pandas.DataFrame:
-    """JSONまたはCSVファイルからDataFrameを生成する
-    拡張子がjsonかcsvかで読み込み方法を変更する。
+ACTUAL_FILE_DTYPES = {
+    "date": "string",
+    "job_id": "string",
+    "job_name": "string",
+    "parent_job_id": "string",
+    "parent_job_name": "string",
+    "workspace_member_id": "string",
+    "user_id": "string",
+    "username": "string",
+    "actual_working_hours": "float64",
+    "annofab_project_id": "string",
+    "annofab_project_title": "string",
+    "annofab_account_id": "string",
+    "annofab_working_hours": "float64",
+    "notes": "object",
+}
+"""``--actual_file`` （ ``annoworkcli annofab list_working_hours`` の出力結果）の列とdtype"""
+
+ASSIGNED_FILE_DTYPES = {
+    "date": "string",
+    "job_id": "string",
+    "job_name": "string",
+    "workspace_member_id": "string",
+    "user_id": "string",
+    "username": "string",
+    "assigned_working_hours": "float64",
+}
+"""``--assigned_file`` （ ``annoworkcli schedule list_daily`` の出力結果）の列とdtype"""
+
+
+def get_actual_file_columns(shape_type: ShapeType) -> list[str]:
+    """``--actual_file`` の列のうち、shape_typeに対応するDataFrameを生成するのに必要な列を返します。"""
+    if shape_type == ShapeType.LIST_BY_DATE_USER_JOB:
+        return [c for c in ACTUAL_FILE_DTYPES if c != "workspace_member_id"]
+    return [c for c in ACTUAL_FILE_DTYPES if c not in {"workspace_member_id", "annofab_account_id", "notes"}]
+
+
+def get_dataframe_from_input_file(
+    input_file: Path,
+    *,
+    dtypes: dict[str, str],
+    columns: Collection[str] | None = None,
+    row_filter: RowFilter | None = None,
+) -> pandas.DataFrame:
+    """JSON, CSVなどのファイルから、列ごとにdtypeを指定してDataFrameを生成する
+    拡張子でファイルの形式を判断する。
 
     Args:
-        input_file (Path): [description]
+        input_file: 読み込むファイル
+        dtypes: key:列名, value:dtype
+        columns: 読み込む列。未指定の場合は ``dtypes`` に含まれる列を読み込む。
+        row_filter: 読み込む段階で適用する絞り込み条件
+    """
+    return read_input_file(input_file, dtypes=dtypes, columns=columns, row_filter=row_filter)
+
+
+def drop_duplicated_user_company(df_user_company: pandas.DataFrame) -> pandas.DataFrame:
+    """ユーザに複数の会社情報が設定されている場合は、警告を出して最初の会社情報だけを残します。"""
+    df_duplicated = df_user_company[df_user_company.duplicated(["user_id"])]
+    if len(df_duplicated) > 0:
+        logger.warning(
+            f"{len(df_duplicated)} 件のユーザに複数の会社情報がワークスペースタグとして設定されています。:: {list(df_duplicated['user_id'])}"
+        )
+        df_user_company = df_user_company.drop_duplicates(subset=["user_id"])
+    return df_user_company
+
+
+def reshape_df(
+    *,
+    df_actual: pandas.DataFrame,
+    df_assigned: pandas.DataFrame,
+    shape_type: ShapeType,
+    get_df_user_company: Callable[[], pandas.DataFrame],
+) -> pandas.DataFrame:
+    """実績時間DataFrameとアサイン時間のDataFrameから、shape_typeに従ったDataFrameを生成します。
 
-    Returns:
-        list[dict[str,Any]]: [description]
+    Args:
+        get_df_user_company: "user_id", "username", "company" 列を持つDataFrameを返す関数。 ``total_by_user`` のときだけ呼び出します。
     """
-    if input_file.suffix.lower() == ".json":
-        with input_file.open(encoding="utf-8") as f:
-            tmp = json.load(f)
-            return pandas.DataFrame(tmp)
 
-    elif input_file.suffix.lower() == ".csv":
-        return pandas.read_csv(str(input_file))
+    # 見やすくするため、小数点以下2桁になるように四捨五入する
+    reshape_obj = ReshapeDataFrame(round_decimals=2)
+    if shape_type == ShapeType.DETAILS:
+        df_output = reshape_obj.get_df_details(df_actual=df_actual, df_assigned=df_assigned)
+
+    elif shape_type == ShapeType.TOTAL_BY_USER:
+        df_user_company = get_df_user_company()
+        df_output = reshape_obj.get_df_total_by_user(df_actual=df_actual, df_assigned=df_assigned, df_user_company=df_user_company)
+
+    elif shape_type == ShapeType.TOTAL_BY_JOB:
+        df_output = reshape_obj.get_df_total_by_job(
+            df_actual=df_actual,
+        )
+
+    elif shape_type == ShapeType.TOTAL_BY_PARENT_JOB:
+        df_output = reshape_obj.get_df_total_by_parent_job(
+            df_actual=df_actual,
+            df_assigned=df_assigned,
+        )
+
+    elif shape_type == ShapeType.TOTAL_BY_USER_PARENT_JOB:
+        df_output = reshape_obj.get_df_total_by_user_parent_job(
+            df_actual=df_actual,
+            df_assigned=df_assigned,
+        )
+
+    elif shape_type == ShapeType.TOTAL_BY_USER_JOB:
+        df_output = reshape_obj.get_df_total_by_user_job(
+            df_actual=df_actual,
+        )
+
+    elif shape_type == ShapeType.TOTAL:
+        df_output = reshape_obj.get_df_total(df_actual=df_actual, df_assigned=df_assigned)
+
+    elif shape_type == ShapeType.LIST_BY_DATE_USER_JOB:
+        df_output = reshape_obj.get_df_list_by_date_user_job(df_actual=df_actual)
+
+    elif shape_type == ShapeType.LIST_BY_DATE_USER_PARENT_JOB:
+        df_output = reshape_obj.get_df_list_by_date_user_parent_job(df_actual=df_actual)
 
-    return pandas.DataFrame()
+    else:
+        assert_never(shape_type)
+    return df_output
 
 
 class ReshapeWorkingHours:
@@ -705,18 +816,12 @@ class ReshapeWorkingHours:
         self.annowork_service = annowork_service
         self.workspace_id = workspace_id
         self.parallelism = parallelism
-        self.all_jobs = self.annowork_service.api.get_jobs(self.workspace_id)
+        job_snapshot = get_job_snapshot(self.annowork_service, self.workspace_id)
+        self.all_jobs = job_snapshot.jobs
+        self.annofab_linkage_index = job_snapshot.annofab_linkage_index
 
     def get_job_id_list_from_af_project_id(self, annofab_project_id_list: Collection[str]) -> list[str]:
-        annofab_project_id_set = set(annofab_project_id_list)
-
-        def _match_job(job: dict[str, Any]) -> bool:
-            af_project_id = get_annofab_project_id_from_job(job)
-            if af_project_id is None:
-                return False
-            return af_project_id in annofab_project_id_set
-
-        return [e["job_id"] for e in self.all_jobs if _match_job(e)]
+        return self.annofab_linkage_index.get_job_ids(annofab_project_id_list)
 
     def get_df_actual(
         self,
@@ -795,14 +900,7 @@ class ReshapeWorkingHours:
                 member["company"] = get_company_from_workspace_tag_name(tag["workspace_tag_name"])
             result.extend(tmp_list)
 
-        df = pandas.DataFrame(result)[["user_id", "username", "company"]]
-        df_duplicated = df[df.duplicated(["user_id"])]
-        if len(df_duplicated) > 0:
-            logger.warning(
-                f"{len(df_duplicated)} 件のユーザに複数の会社情報がワークスペースタグとして設定されています。:: {list(df_duplicated['user_id'])}"
-            )
-            df = df.drop_duplicates(subset=["user_id"])
-        return df
+        return drop_duplicated_user_company(pandas.DataFrame(result)[["user_id", "username", "company"]])
 
     def get_df_job_parent_job(self) -> pandas.DataFrame:
         """job_id,parent_job_idが格納されたpandas.DataFrameを返します。"""
@@ -829,63 +927,11 @@ class ReshapeWorkingHours:
         df_assigned: pandas.DataFrame,
         shape_type: ShapeType,
     ) -> pandas.DataFrame:
-        """実績時間DataFrameとアサイン時間のDataFrameから、shape_typeに従ったDataFrameを生成します。
-
-        Args:
-            df_actual (pandas.DataFrame): [description]
-            df_assigned (pandas.DataFrame): [description]
-            shape_type (ShapeType): [description]
-
-        Returns:
-            pandas.DataFrame: [description]
-        """
-
-        # 見やすくするため、小数点以下2桁になるように四捨五入する
-        reshape_obj = ReshapeDataFrame(round_decimals=2)
-        if shape_type == ShapeType.DETAILS:
-            df_output = reshape_obj.get_df_details(df_actual=df_actual, df_assigned=df_assigned)
-
-        elif shape_type == ShapeType.TOTAL_BY_USER:
-            df_user_company = self.get_df_user_company()
-            df_output = reshape_obj.get_df_total_by_user(df_actual=df_actual, df_assigned=df_assigned, df_user_company=df_user_company)
-
-        elif shape_type == ShapeType.TOTAL_BY_JOB:
-            df_output = reshape_obj.get_df_total_by_job(
-                df_actual=df_actual,
-            )
-
-        elif shape_type == ShapeType.TOTAL_BY_PARENT_JOB:
-            df_output = reshape_obj.get_df_total_by_parent_job(
-                df_actual=df_actual,
-                df_assigned=df_assigned,
-            )
-
-        elif shape_type == ShapeType.TOTAL_BY_USER_PARENT_JOB:
-            df_output = reshape_obj.get_df_total_by_user_parent_job(
-                df_actual=df_actual,
-                df_assigned=df_assigned,
-            )
-
-        elif shape_type == ShapeType.TOTAL_BY_USER_JOB:
-            df_output = reshape_obj.get_df_total_by_user_job(
-                df_actual=df_actual,
-            )
-
-        elif shape_type == ShapeType.TOTAL:
-            df_output = reshape_obj.get_df_total(df_actual=df_actual, df_assigned=df_assigned)
-
-        elif shape_type == ShapeType.LIST_BY_DATE_USER_JOB:
-            df_output = reshape_obj.get_df_list_by_date_user_job(df_actual=df_actual)
-
-        elif shape_type == ShapeType.LIST_BY_DATE_USER_PARENT_JOB:
-            df_output = reshape_obj.get_df_list_by_date_user_parent_job(df_actual=df_actual)
-
-        else:
-            assert_never(shape_type)
-        return df_output
+        """実績時間DataFrameとアサイン時間のDataFrameから、shape_typeに従ったDataFrameを生成します。"""
+        return reshape_df(df_actual=df_actual, df_assigned=df_assigned, shape_type=shape_type, get_df_user_company=self.get_df_user_company)
 
+    @staticmethod
     def filter_df(
-        self,
         *,
         df_actual: pandas.DataFrame,
         df_assigned: pandas.DataFrame,
@@ -950,7 +996,51 @@ def get_empty_df_assigned() -> pandas.DataFrame:
     )
 
 
+def main_with_cube(args: argparse.Namespace) -> None:
+    """WebAPIにアクセスせずに、キューブから読み込んだ作業時間を成形して出力します。"""
+    if args.actual_file is not None or args.assigned_file is not None:
+        raise CommandLineArgumentError("'--cube' と '--actual_file' , '--assigned_file' は同時に指定できません。")
+
+    parent_job_id_list = get_list_from_args(args.parent_job_id)
+    job_id_list = get_list_from_args(args.job_id)
+    user_id_list = get_list_from_args(args.user_id)
+    start_date = args.start_date
+    end_date = args.end_date
+    shape_type = ShapeType(args.shape_type)
+
+    with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+        cube.warn_if_out_of_range(start_date=start_date, end_date=end_date)
+        df_actual = cube.read_working_hours_daily(start_date=start_date, end_date=end_date, user_ids=user_id_list).astype(ACTUAL_FILE_DTYPES)
+        if shape_type in SHAPE_TYPES_WITHOUT_ASSIGNED or job_id_list is not None:
+            df_assigned = get_empty_df_assigned()
+        else:
+            df_assigned = cube.read_assigned_daily(
+                start_date=start_date, end_date=end_date, job_ids=parent_job_id_list, user_ids=user_id_list
+            ).astype(ASSIGNED_FILE_DTYPES)
+        df_user_company = drop_duplicated_user_company(cube.read_user_company())
+
+    df_actual, df_assigned = ReshapeWorkingHours.filter_df(
+        df_actual=df_actual,
+        df_assigned=df_assigned,
+        start_date=start_date,
+        end_date=end_date,
+        user_ids=user_id_list,
+        parent_job_ids=parent_job_id_list,
+        annofab_project_ids=get_list_from_args(args.annofab_project_id),
+        job_ids=job_id_list,
+    )
+
+    with phase("reshape"):
+        df_output = reshape_df(df_actual=df_actual, df_assigned=df_assigned, shape_type=shape_type, get_df_user_company=lambda: df_user_company)
+    logger.info(f"{len(df_output)} 件のデータを出力します。")
+    print_csv(df_output, output=args.output)
+
+
 def main(args: argparse.Namespace) -> None:
+    if args.cube is not None:
+        main_with_cube(args)
+        return
+
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
     main_obj = ReshapeWorkingHours(
         annowork_service=build_annoworkapi(args),
@@ -973,9 +1063,12 @@ def main(args: argparse.Namespace) -> None:
             )
 
     shape_type = ShapeType(args.shape_type)
+    row_filter = RowFilter(start_date=start_date, end_date=end_date, user_ids=user_id_list)
 
     if args.actual_file is not None:
-        df_actual = get_dataframe_from_input_file(args.actual_file)
+        df_actual = get_dataframe_from_input_file(
+            args.actual_file, dtypes=ACTUAL_FILE_DTYPES, columns=get_actual_file_columns(shape_type), row_filter=row_filter
+        )
     else:
         annofab_service = build_annofabapi_resource(
             annofab_login_user_id=args.annofab_user_id,
@@ -994,16 +1087,8 @@ def main(args: argparse.Namespace) -> None:
         )
 
     if args.assigned_file is not None:
-        df_assigned = get_dataframe_from_input_file(args.assigned_file)
-    elif (
-        shape_type
-        in {
-            ShapeType.TOTAL_BY_JOB,
-            ShapeType.LIST_BY_DATE_USER_JOB,
-            ShapeType.LIST_BY_DATE_USER_PARENT_JOB,
-        }
-        or job_id_list is not None
-    ):
+        df_assigned = get_dataframe_from_input_file(args.assigned_file, dtypes=ASSIGNED_FILE_DTYPES, row_filter=row_filter)
+    elif shape_type in SHAPE_TYPES_WITHOUT_ASSIGNED or job_id_list is not None:
         # このshape_typeのときは、df_assignedが不要なので、空のDataFrameを生成する
         # job_idが指定されたときも、アサインを取得できないので、空のDataFrameを生成する
         df_assigned = get_empty_df_assigned()
@@ -1021,13 +1106,14 @@ def main(args: argparse.Namespace) -> None:
         job_ids=job_id_list,
     )
 
-    df_output = main_obj.get_df_output(df_actual=df_actual, df_assigned=df_assigned, shape_type=shape_type)
+    with phase("reshape"):
+        df_output = main_obj.get_df_output(df_actual=df_actual, df_assigned=df_assigned, shape_type=shape_type)
     logger.info(f"{len(df_output)} 件のデータを出力します。")
     print_csv(df_output, output=args.output)
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument(
         "--actual_file",
@@ -1042,9 +1128,13 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         type=Path,
         required=False,
         help="``annoworkcli schedule list_daily`` コマンドで出力したファイルのパスを指定します。"
-        "未指定の場合は ``annoworkcli schedule list_daily`` コマンドの結果を参照します。",
+        "未指定の場合は ``annoworkcli schedule list_daily`` コマンドの結果を参照します。\n"
+        "``--actual_file`` , ``--assigned_file`` には、CSV, JSON, JSON Lines（ ``.jsonl`` ）, Parquetファイルを指定できます。"
+        "Parquetファイルを読み込むには ``pyarrow`` パッケージが必要です。",
     )
 
+    add_cube_argument(parser)
+
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
     # parent_job_idとjob_idの両方を指定するユースケースはなさそうなので、exclusiveにする。
@@ -1097,7 +1187,12 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         ),
     )
 
-    parser.add_argument("--parallelism", type=int, required=False, help="並列度。指定しない場合は、逐次的に処理します。")
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        required=False,
+        help="Annofabプロジェクトの作業時間を同時に取得する数。指定しない場合は ``--max_concurrency`` の値（未指定なら逐次的に取得します）です。",
+    )
 
     parser.add_argument("-o", "--output", type=Path, help="出力先")
     parser.add_argument("--annofab_user_id", type=str, help="Annofabにログインする際のユーザID")
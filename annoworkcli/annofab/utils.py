@@ -1,9 +1,24 @@
 import getpass
+import logging
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 
 import annofabapi
 from annofabapi import build as build_annofabapi
 from annofabapi.exceptions import CredentialsNotFoundError
 
+from annoworkcli.common.cassette import CASSETTE_REPLAY_USER_ID, get_cassette_player
+from annoworkcli.common.token_cache import get_token_cache
+from annoworkcli.common.transport import configure_session
+
+logger = logging.getLogger(__name__)
+
+_shared_annofabapi_lock = threading.Lock()
+_shared_annofabapi_dict: dict[tuple[str | None, str | None, str | None], annofabapi.Resource] | None = None
+"""Noneでなければ、key:認証情報, value:生成済みのannofabapi.Resourceインスタンス"""
+
 
 def _get_annofab_user_id_from_stdin() -> str:
     """標準入力からAnnofabにログインする際のユーザーIDを取得します。"""
@@ -21,6 +36,31 @@ def _get_annofab_password_from_stdin() -> str:
     return login_password
 
 
+def _get_annofab_endpoint_url_from_envvar() -> str:
+    """
+    環境変数`ANNOFAB_ENDPOINT_URL`から、AnnofabのエンドポイントURLを取得します。
+    環境変数が設定されていない場合は、annofabapiのデフォルトのエンドポイントURLを返します。
+    """
+    endpoint_url = os.environ.get("ANNOFAB_ENDPOINT_URL", annofabapi.api.DEFAULT_ENDPOINT_URL)
+    if endpoint_url != annofabapi.api.DEFAULT_ENDPOINT_URL:
+        logger.info(f"annofab_endpoint_url='{endpoint_url}'")
+    return endpoint_url
+
+
+@contextmanager
+def share_annofabapi_resource() -> Iterator[None]:
+    """
+    このコンテキストの中では、 :func:`build_annofabapi_resource` は同じ認証情報に対して同じインスタンスを返します。
+    複数のワークスペースに対してコマンドを並行して実行するときに、Annofabへのログインや標準入力からの認証情報の入力を1回にするために利用します。
+    """
+    global _shared_annofabapi_dict  # noqa: PLW0603
+    _shared_annofabapi_dict = {}
+    try:
+        yield
+    finally:
+        _shared_annofabapi_dict = None
+
+
 def build_annofabapi_resource(
     *,
     annofab_login_user_id: str | None = None,
@@ -37,12 +77,43 @@ def build_annofabapi_resource(
         annofabapi.Resourceインスタンス
 
     """
+    if _shared_annofabapi_dict is None:
+        return _build_annofabapi_resource(
+            annofab_login_user_id=annofab_login_user_id, annofab_login_password=annofab_login_password, annofab_pat=annofab_pat
+        )
+
+    key = (annofab_login_user_id, annofab_login_password, annofab_pat)
+    with _shared_annofabapi_lock:
+        if key not in _shared_annofabapi_dict:
+            _shared_annofabapi_dict[key] = _build_annofabapi_resource(
+                annofab_login_user_id=annofab_login_user_id, annofab_login_password=annofab_login_password, annofab_pat=annofab_pat
+            )
+        return _shared_annofabapi_dict[key]
+
+
+def _build_annofabapi_resource(
+    *,
+    annofab_login_user_id: str | None,
+    annofab_login_password: str | None,
+    annofab_pat: str | None,
+) -> annofabapi.Resource:
+    endpoint_url = _get_annofab_endpoint_url_from_envvar()
     try:
-        service = build_annofabapi(annofab_login_user_id, annofab_login_password, pat=annofab_pat, input_mfa_code_via_stdin=True)
+        service = build_annofabapi(
+            annofab_login_user_id, annofab_login_password, pat=annofab_pat, endpoint_url=endpoint_url, input_mfa_code_via_stdin=True
+        )
     except CredentialsNotFoundError:
-        # 環境変数, netrcフィアルに認証情報が設定されていなかったので、標準入力から認証情報を入力させる。
-        stdin_login_user_id = _get_annofab_user_id_from_stdin()
-        stdin_login_password = _get_annofab_password_from_stdin()
-        service = build_annofabapi(stdin_login_user_id, stdin_login_password)
+        if get_cassette_player() is not None:
+            # カセットを再生する場合はWebAPIにアクセスしないので、認証情報は不要
+            service = build_annofabapi(CASSETTE_REPLAY_USER_ID, CASSETTE_REPLAY_USER_ID, endpoint_url=endpoint_url)
+        else:
+            # 環境変数, netrcフィアルに認証情報が設定されていなかったので、標準入力から認証情報を入力させる。
+            stdin_login_user_id = _get_annofab_user_id_from_stdin()
+            stdin_login_password = _get_annofab_password_from_stdin()
+            service = build_annofabapi(stdin_login_user_id, stdin_login_password, endpoint_url=endpoint_url)
 
+    configure_session(service.api.session)
+    token_cache = get_token_cache()
+    if token_cache is not None:
+        token_cache.apply_to_annofabapi(service.api)
     return service
@@ -1,5 +1,6 @@
 import argparse
 import copy
+import io
 import logging
 import subprocess
 import tempfile
@@ -13,8 +14,11 @@ import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.actual_working_time.list_actual_working_hours_daily import create_actual_working_hours_daily_list
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
-from annoworkcli.common.annofab import TIMEZONE_OFFSET_HOURS, get_annofab_project_id_from_job
+from annoworkcli.annofab.utils import build_annofabapi_resource
+from annoworkcli.common.annofab import TIMEZONE_OFFSET_HOURS
 from annoworkcli.common.cli import build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import map_concurrently
+from annoworkcli.common.job import get_job_snapshot
 from annoworkcli.common.utils import print_csv
 
 logger = logging.getLogger(__name__)
@@ -35,7 +39,9 @@ class ListLabor:
         self.annowork_service = annowork_service
         self.workspace_id = workspace_id
 
-        self.all_job_list = self.annowork_service.api.get_jobs(self.workspace_id)
+        job_snapshot = get_job_snapshot(self.annowork_service, self.workspace_id)
+        self.all_job_list = job_snapshot.jobs
+        self.annofab_linkage_index = job_snapshot.annofab_linkage_index
 
         # Annofabが日本時間に固定されているので、それに合わせて timezone_offset_hours を指定する。
         self.list_actual_working_time_obj = ListActualWorkingTime(
@@ -45,16 +51,9 @@ class ListLabor:
         )
 
     def get_job_id_annofab_project_id_dict_from_annofab_project_id(self, annofab_project_id_list: list[str]) -> JobIdAnnofabProjectIdDict:
-        # オーダを減らすため、事前にdictを作成する
-        annofab_project_id_dict: dict[str, list[str]] = defaultdict(list)
-        for job in self.all_job_list:
-            af_project_id = get_annofab_project_id_from_job(job)
-            if af_project_id is not None:
-                annofab_project_id_dict[af_project_id].append(job["job_id"])
-
         result = {}
         for annofab_project_id in annofab_project_id_list:
-            job_id_list = annofab_project_id_dict.get(annofab_project_id)
+            job_id_list = self.annofab_linkage_index.annofab_project_id_to_job_ids.get(annofab_project_id)
             if job_id_list is None:
                 logger.warning(
                     f"ジョブの外部連携情報に、AnnofabのプロジェクトID '{annofab_project_id}' を表すURLが設定されたジョブは見つかりませんでした。"
@@ -67,13 +66,9 @@ class ListLabor:
         return result
 
     def get_job_id_annofab_project_id_dict_from_job_id(self, job_id_list: list[str]) -> JobIdAnnofabProjectIdDict:
-        job_id_dict = {
-            job["job_id"]: get_annofab_project_id_from_job(job) for job in self.all_job_list if get_annofab_project_id_from_job(job) is not None
-        }
-
         result = {}
         for job_id in job_id_list:
-            annofab_project_id = job_id_dict.get(job_id)
+            annofab_project_id = self.annofab_linkage_index.get_annofab_project_id(job_id)
             if annofab_project_id is None:
                 logger.warning(f"{job_id=} のジョブの外部連携情報にAnnofabのプロジェクトを表すURLは設定されていませんでした。")
                 continue
@@ -83,9 +78,12 @@ class ListLabor:
         return result
 
     def get_user_id_annofab_account_id_dict(self, user_id_set: set[str]) -> dict[str, str]:
+        user_id_list = list(user_id_set)
+        annofab_account_ids = map_concurrently(
+            self.annowork_service.wrapper.get_annofab_account_id_from_user_id, user_id_list, progress_description="アカウント外部連携情報の取得"
+        )
         result = {}
-        for user_id in user_id_set:
-            annofab_account_id = self.annowork_service.wrapper.get_annofab_account_id_from_user_id(user_id)
+        for user_id, annofab_account_id in zip(user_id_list, annofab_account_ids, strict=True):
             if annofab_account_id is None:
                 logger.warning(f"{user_id=} の外部連携情報にAnnofabのaccount_idが設定されていません。")
                 continue
@@ -165,24 +163,35 @@ def mask_credential_in_command(command: list[str]) -> list[str]:
     return tmp_command
 
 
-def visualize_statistics(temp_dir: Path, args: argparse.Namespace, workspace_id: str) -> None:
-    annowork_service = build_annoworkapi(args)
-    job_id_list = get_list_from_args(args.job_id)
-    annofab_project_id_list = get_list_from_args(args.annofab_project_id)
-    main_obj = ListLabor(annowork_service, workspace_id)
-    annofab_labor_dict = main_obj.get_annofab_labor_dict(
-        job_id_list=job_id_list,
-        annofab_project_id_list=annofab_project_id_list,
-        start_date=args.start_date,
-        end_date=args.end_date,
-    )
-    tmp_data = [
-        {"date": date, "account_id": account_id, "project_id": project_id, "actual_worktime_hour": actual_worktime_hour}
-        for (date, account_id, project_id), actual_worktime_hour in annofab_labor_dict.items()
-    ]
-    df = pandas.DataFrame(tmp_data, columns=["date", "account_id", "project_id", "actual_worktime_hour"])
+def create_annofabcli_visualize_options(args: argparse.Namespace, annofab_project_id_list: list[str]) -> list[str]:
+    """
+    ``annofabcli statistics visualize`` コマンドに渡すオプションを生成します。
+    実績作業時間のCSVと認証情報は含みません。
+    """
+    options = ["--project_id", *annofab_project_id_list]
+
+    if args.start_date is not None:
+        options.extend(["--start_date", args.start_date])
+
+    if args.end_date is not None:
+        options.extend(["--end_date", args.end_date])
+
+    if args.output_dir is not None:
+        options.extend(["--output_dir", str(args.output_dir)])
+
+    if args.annofabcli_options is not None:
+        options.extend(args.annofabcli_options)
+
+    return options
+
+
+def run_annofabcli_visualize_in_subprocess(df_labor: pandas.DataFrame, temp_dir: Path, args: argparse.Namespace, options: list[str]) -> None:
+    """
+    ``annofabcli statistics visualize`` コマンドを子プロセスで実行します。
+    実績作業時間はCSVファイルを経由して渡します。
+    """
     annofab_labor_csv = temp_dir / "annofab_labor.csv"
-    print_csv(df, output=annofab_labor_csv)
+    print_csv(df_labor, output=annofab_labor_csv)
 
     command = [
         "annofabcli",
@@ -190,26 +199,9 @@ def visualize_statistics(temp_dir: Path, args: argparse.Namespace, workspace_id:
         "visualize",
         "--labor_csv",
         str(annofab_labor_csv),
+        *options,
     ]
 
-    if annofab_project_id_list is not None:
-        command.extend(["--project_id"] + annofab_project_id_list)  # noqa: RUF005
-    elif job_id_list is not None:
-        job_id_annofab_project_id_dict = main_obj.get_job_id_annofab_project_id_dict_from_job_id(job_id_list)
-        if len(job_id_annofab_project_id_dict) == 0:
-            logger.error("Annofabプロジェクトに紐づくジョブが0件なので、終了します。")
-            return
-        command.extend(["--project_id"] + list(job_id_annofab_project_id_dict.values()))  # noqa: RUF005
-
-    if args.start_date is not None:
-        command.extend(["--start_date", args.start_date])
-
-    if args.end_date is not None:
-        command.extend(["--end_date", args.end_date])
-
-    if args.output_dir is not None:
-        command.extend(["--output_dir", str(args.output_dir)])
-
     if args.annofab_user_id is not None:
         command.extend(["--annofab_user_id", str(args.annofab_user_id)])
 
@@ -219,17 +211,85 @@ def visualize_statistics(temp_dir: Path, args: argparse.Namespace, workspace_id:
     if args.annofab_pat is not None:
         command.extend(["--annofab_pat", str(args.annofab_pat)])
 
-    if args.annofabcli_options is not None:
-        command.extend(args.annofabcli_options)
-
     str_command = " ".join(mask_credential_in_command(command))
     logger.debug(f"run command: {str_command}")
     subprocess.run(command, check=True)
 
 
+def run_annofabcli_visualize_in_process(df_labor: pandas.DataFrame, args: argparse.Namespace, options: list[str]) -> None:
+    """
+    ``annofabcli statistics visualize`` コマンドの処理を、このプロセス内で実行します。
+    子プロセスの起動とAnnofabへの再ログインが不要になります。
+    実績作業時間はファイルを経由せずにメモリ上で渡します。
+    """
+    # annofabcliのモジュールはimportに時間がかかるので、このコマンドを実行するときだけimportする
+    from annofabcli.common.facade import AnnofabApiFacade  # noqa: PLC0415
+    from annofabcli.statistics.visualize_statistics import VisualizeStatistics  # noqa: PLC0415
+    from annofabcli.statistics.visualize_statistics import add_parser as add_annofabcli_parser  # noqa: PLC0415
+
+    # annofabcliの共通オプション（`--yes`など）も含めて解析するため、annofabcliのparserを利用する
+    annofabcli_args = add_annofabcli_parser(None).parse_args(options)
+
+    # annofabcliは実績作業時間をCSVのパスからしか読み込めない（`read_actual_worktime`内で`pandas.read_csv`を呼ぶ）ので、
+    # DataFrameは直接渡せない。必須列のチェックなども含めてannofabcliの読み込み処理をそのまま使うため、CSVをメモリ上のバッファとして渡す
+    csv_buffer = io.StringIO(df_labor.to_csv(index=False))
+    if hasattr(annofabcli_args, "actual_worktime_csv"):
+        annofabcli_args.actual_worktime_csv = csv_buffer
+    else:
+        annofabcli_args.labor_csv = csv_buffer
+
+    logger.debug(f"annofabcli statistics visualize をプロセス内で実行します。 :: {options=}")
+    annofab_service = build_annofabapi_resource(
+        annofab_login_user_id=args.annofab_user_id,
+        annofab_login_password=args.annofab_password,
+        annofab_pat=args.annofab_pat,
+    )
+    VisualizeStatistics(annofab_service, AnnofabApiFacade(annofab_service), annofabcli_args).main()
+
+
+def visualize_statistics(temp_dir: Path | None, args: argparse.Namespace, workspace_id: str) -> None:
+    """
+    Args:
+        temp_dir: 実績作業時間のCSVを出力するテンポラリディレクトリ。 ``--in_process`` を指定した場合はファイルに出力しないので、Noneです。
+    """
+    annowork_service = build_annoworkapi(args)
+    job_id_list = get_list_from_args(args.job_id)
+    annofab_project_id_list = get_list_from_args(args.annofab_project_id)
+    main_obj = ListLabor(annowork_service, workspace_id)
+    annofab_labor_dict = main_obj.get_annofab_labor_dict(
+        job_id_list=job_id_list,
+        annofab_project_id_list=annofab_project_id_list,
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+    tmp_data = [
+        {"date": date, "account_id": account_id, "project_id": project_id, "actual_worktime_hour": actual_worktime_hour}
+        for (date, account_id, project_id), actual_worktime_hour in annofab_labor_dict.items()
+    ]
+    df = pandas.DataFrame(tmp_data, columns=["date", "account_id", "project_id", "actual_worktime_hour"])
+
+    if annofab_project_id_list is None:
+        assert job_id_list is not None
+        job_id_annofab_project_id_dict = main_obj.get_job_id_annofab_project_id_dict_from_job_id(job_id_list)
+        if len(job_id_annofab_project_id_dict) == 0:
+            logger.error("Annofabプロジェクトに紐づくジョブが0件なので、終了します。")
+            return
+        annofab_project_id_list = list(job_id_annofab_project_id_dict.values())
+
+    options = create_annofabcli_visualize_options(args, annofab_project_id_list)
+    if args.in_process:
+        run_annofabcli_visualize_in_process(df, args, options)
+    else:
+        assert temp_dir is not None
+        run_annofabcli_visualize_in_subprocess(df, temp_dir, args, options)
+
+
 def main(args: argparse.Namespace) -> None:
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
-    if args.temp_dir is not None:
+    if args.in_process:
+        # 実績作業時間をファイルに出力しないので、テンポラリディレクトリは不要
+        visualize_statistics(None, args, workspace_id)
+    elif args.temp_dir is not None:
         visualize_statistics(args.temp_dir, args, workspace_id)
     else:
         with tempfile.TemporaryDirectory() as str_temp_dir:
@@ -250,6 +310,13 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
 
     parser.add_argument("--temp_dir", type=Path, required=False, help="テンポラリディレクトリ")
 
+    parser.add_argument(
+        "--in_process",
+        action="store_true",
+        help="``annofabcli statistics visualize`` コマンドを子プロセスで実行せずに、このプロセス内で実行します。"
+        "Pythonインタプリタの起動とAnnofabへの再ログインが不要になるので、処理が速くなります。",
+    )
+
     parser.add_argument("--annofab_user_id", type=str, help="Annofabにログインする際のユーザID")
     parser.add_argument("--annofab_password", type=str, help="Annofabにログインする際のパスワード")
     parser.add_argument("--annofab_pat", type=str, help="Annofabにログインする際のパーソナルアクセストークン")
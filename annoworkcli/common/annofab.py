@@ -2,10 +2,15 @@
 annofabに関するutil関係の関数
 """
 
+import bisect
+from collections import defaultdict
+from collections.abc import Collection
+from dataclasses import dataclass, field
 from typing import Any
 
 import isodate
 from annoworkapi.annofab import get_annofab_project_id_from_url
+from annoworkapi.job import get_parent_job_id_from_job_tree
 
 TIMEZONE_OFFSET_HOURS = 9
 """Annofabのタイムゾーンのオフセット時間。AnnofabはJSTに固定されているので、9を指定する"""
@@ -19,6 +24,91 @@ def get_annofab_project_id_from_job(job: dict[str, Any]) -> str | None:
     return get_annofab_project_id_from_url(url)
 
 
+@dataclass(frozen=True)
+class AnnofabLinkageIndex:
+    """
+    ジョブとAnnofabプロジェクトの対応関係の索引。
+    ジョブの外部連携情報のURLを、ジョブの一覧ごとに1回だけ解析します。
+    """
+
+    job_id_to_annofab_project_id: dict[str, str] = field(default_factory=dict)
+    """key:job_id, value:AnnofabプロジェクトID。Annofabプロジェクトに紐付いているジョブだけを含みます。"""
+
+    annofab_project_id_to_job_ids: dict[str, list[str]] = field(default_factory=dict)
+    """key:AnnofabプロジェクトID, value:紐付いているジョブのjob_idのlist"""
+
+    parent_job_id_to_annofab_project_ids: dict[str, list[str]] = field(default_factory=dict)
+    """key:親ジョブのjob_id, value:子ジョブに紐付いているAnnofabプロジェクトIDのlist"""
+
+    job_id_to_parent_job_id: dict[str, str] = field(default_factory=dict)
+    """key:Annofabプロジェクトに紐付いているジョブのjob_id, value:親ジョブのjob_id"""
+
+    sorted_urls: list[tuple[str, str]] = field(default_factory=list)
+    """(外部連携情報のURL, job_id)をURLの昇順に並べたlist。URLの前方一致検索に利用します。"""
+
+    @classmethod
+    def from_jobs(cls, jobs: Collection[dict[str, Any]]) -> "AnnofabLinkageIndex":
+        job_id_to_annofab_project_id: dict[str, str] = {}
+        annofab_project_id_to_job_ids: dict[str, list[str]] = defaultdict(list)
+        parent_job_id_to_annofab_project_ids: dict[str, list[str]] = defaultdict(list)
+        job_id_to_parent_job_id: dict[str, str] = {}
+        urls: list[tuple[str, str]] = []
+        for job in jobs:
+            url = job["external_linkage_info"].get("url")
+            if url is None:
+                continue
+            job_id = job["job_id"]
+            urls.append((url.strip(), job_id))
+
+            annofab_project_id = get_annofab_project_id_from_url(url)
+            if annofab_project_id is None:
+                continue
+            job_id_to_annofab_project_id[job_id] = annofab_project_id
+            annofab_project_id_to_job_ids[annofab_project_id].append(job_id)
+            parent_job_id = get_parent_job_id_from_job_tree(job["job_tree"])
+            if parent_job_id is not None:
+                job_id_to_parent_job_id[job_id] = parent_job_id
+                if annofab_project_id not in parent_job_id_to_annofab_project_ids[parent_job_id]:
+                    parent_job_id_to_annofab_project_ids[parent_job_id].append(annofab_project_id)
+
+        return cls(
+            job_id_to_annofab_project_id=job_id_to_annofab_project_id,
+            annofab_project_id_to_job_ids=dict(annofab_project_id_to_job_ids),
+            parent_job_id_to_annofab_project_ids=dict(parent_job_id_to_annofab_project_ids),
+            job_id_to_parent_job_id=job_id_to_parent_job_id,
+            sorted_urls=sorted(urls),
+        )
+
+    def get_annofab_project_id(self, job_id: str) -> str | None:
+        return self.job_id_to_annofab_project_id.get(job_id)
+
+    def get_annofab_project_ids(self) -> set[str]:
+        """ジョブに紐付いているAnnofabプロジェクトIDの集合を返します。"""
+        return set(self.annofab_project_id_to_job_ids.keys())
+
+    def get_job_ids(self, annofab_project_ids: Collection[str]) -> list[str]:
+        """Annofabプロジェクトに紐付いているジョブのjob_idのlistを返します。"""
+        return [
+            job_id for af_project_id in dict.fromkeys(annofab_project_ids) for job_id in self.annofab_project_id_to_job_ids.get(af_project_id, [])
+        ]
+
+    def get_parent_job_ids(self, annofab_project_ids: Collection[str]) -> list[str]:
+        """Annofabプロジェクトに紐付いているジョブの、親ジョブのjob_idのlistを返します。"""
+        result = (self.job_id_to_parent_job_id.get(job_id) for job_id in self.get_job_ids(annofab_project_ids))
+        return list(dict.fromkeys(e for e in result if e is not None))
+
+    def get_job_ids_by_url_prefix(self, url_prefixes: Collection[str]) -> set[str]:
+        """外部連携情報のURLが、いずれかの ``url_prefixes`` で始まるジョブのjob_idの集合を返します。"""
+        result: set[str] = set()
+        for prefix in url_prefixes:
+            stripped_prefix = prefix.strip()
+            index = bisect.bisect_left(self.sorted_urls, (stripped_prefix, ""))
+            while index < len(self.sorted_urls) and self.sorted_urls[index][0].startswith(stripped_prefix):
+                result.add(self.sorted_urls[index][1])
+                index += 1
+        return result
+
+
 def isoduration_to_hour(duration: str) -> float:
     """
     ISO 8601 duration を 時間に変換する
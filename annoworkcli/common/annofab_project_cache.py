@@ -0,0 +1,208 @@
+"""
+Annofabプロジェクトの情報をファイルにキャッシュして、コマンドの実行をまたいで再利用するための処理
+
+プロジェクトのタイトルや設定はほとんど変わらないので、有効期限（TTL）内であればWebAPIを呼び出さずにキャッシュを返します。
+存在しないプロジェクトやアクセスできないプロジェクトも、より短い有効期限でキャッシュします（ネガティブキャッシュ）。
+プロジェクトにアクセスできるかどうかはユーザーによって異なるので、キャッシュはエンドポイントURLと認証情報ごとに保存します。
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from collections.abc import Collection
+from pathlib import Path
+from typing import Any
+
+import annofabapi
+import requests
+from annofabapi.credentials import IdPass
+
+from annoworkcli.common.concurrency import map_concurrently
+from annoworkcli.common.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+USE_ANNOFAB_PROJECT_CACHE_ENVVAR = "ANNOWORKCLI_USE_ANNOFAB_PROJECT_CACHE"
+"""Annofabプロジェクトのキャッシュを有効にする環境変数。値が空でなければ有効になります。"""
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+"""取得できたプロジェクトのキャッシュの有効期限[秒]"""
+
+DEFAULT_NEGATIVE_TTL_SECONDS = 60 * 60
+"""存在しないプロジェクト、またはアクセスできないプロジェクトのキャッシュの有効期限[秒]"""
+
+
+def get_default_annofab_project_cache_dir() -> Path:
+    """Annofabプロジェクトのキャッシュを保存するディレクトリを返します。 ``$XDG_CACHE_HOME/annoworkcli/annofab_projects`` です。"""
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    cache_home = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return cache_home / "annoworkcli" / "annofab_projects"
+
+
+def _get_credential_key(api: annofabapi.AnnofabApi) -> str:
+    """キャッシュを区別するための認証情報の文字列を返します。WebAPIは呼び出しません。"""
+    if isinstance(api.credentials, IdPass):
+        return f"user_id:{api.credentials.user_id}"
+    return f"pat:{api.credentials.token}"
+
+
+def _get_project_or_none(annofab_service: annofabapi.Resource, project_id: str) -> dict[str, Any] | None:
+    """
+    Annofabプロジェクトの情報を返します。プロジェクトが存在しない（404）、またはアクセスできない（403）場合はNoneを返します。
+    1個のプロジェクトにアクセスできないだけで、コマンド全体が失敗しないようにするためです。
+    """
+    try:
+        return annofab_service.wrapper.get_project_or_none(project_id)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code not in {requests.codes.forbidden, requests.codes.not_found}:
+            raise
+        logger.debug(f"Annofabプロジェクト '{project_id}' にアクセスできませんでした。 :: status_code={e.response.status_code}")
+        return None
+
+
+def _fetch_projects(
+    annofab_service: annofabapi.Resource, project_ids: Collection[str], *, max_concurrency: int | None
+) -> dict[str, dict[str, Any] | None]:
+    project_id_list = list(project_ids)
+    with phase("fetch_annofab_projects"):
+        projects = map_concurrently(
+            lambda project_id: _get_project_or_none(annofab_service, project_id),
+            project_id_list,
+            max_concurrency=max_concurrency,
+            progress_description="Annofabプロジェクトの取得",
+        )
+    return dict(zip(project_id_list, projects, strict=True))
+
+
+class AnnofabProjectCache:
+    """
+    Annofabプロジェクトの情報をファイルにキャッシュします。
+
+    Args:
+        cache_dir: キャッシュファイルを保存するディレクトリ
+        ttl_seconds: 取得できたプロジェクトのキャッシュの有効期限[秒]
+        negative_ttl_seconds: 取得できなかったプロジェクトのキャッシュの有効期限[秒]
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+    def _get_cache_file(self, endpoint_url: str, credential_key: str) -> Path:
+        # ファイル名からユーザーIDやトークンが分からないようにハッシュ化する
+        key = hashlib.sha256(f"{endpoint_url}\n{credential_key}".encode()).hexdigest()
+        return self.cache_dir / f"{key[:32]}.json"
+
+    def load(self, endpoint_url: str, credential_key: str) -> dict[str, dict[str, Any]]:
+        """
+        キャッシュを読み込みます。キャッシュが存在しない場合や読み込めない場合は空のdictを返します。
+
+        Returns:
+            key:プロジェクトID, value: ``fetched_at`` （取得したUNIX時間）と ``project`` （取得できなかった場合はNone）を持つdict
+        """
+        cache_file = self._get_cache_file(endpoint_url, credential_key)
+        try:
+            with cache_file.open(encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning(f"Annofabプロジェクトのキャッシュ '{cache_file}' を読み込めませんでした。", exc_info=True)
+            return {}
+
+    def save(self, endpoint_url: str, credential_key: str, entries: dict[str, dict[str, Any]]) -> None:
+        """キャッシュを所有者のみ読み書きできるファイルに保存します。"""
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        cache_file = self._get_cache_file(endpoint_url, credential_key)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            # 書き込み途中のファイルを他のプロセスが読み込まないように、アトミックに置き換える
+            tmp_file.replace(cache_file)
+        except OSError:
+            logger.warning(f"Annofabプロジェクトのキャッシュ '{cache_file}' に書き込めませんでした。", exc_info=True)
+            with contextlib.suppress(OSError):
+                tmp_file.unlink()
+
+    def is_fresh(self, entry: dict[str, Any], *, now: float) -> bool:
+        """キャッシュのエントリが有効期限内かどうかを返します。"""
+        ttl_seconds = self.ttl_seconds if entry.get("project") is not None else self.negative_ttl_seconds
+        return now - entry.get("fetched_at", 0) < ttl_seconds
+
+    def get_projects(
+        self,
+        annofab_service: annofabapi.Resource,
+        project_ids: Collection[str],
+        *,
+        max_concurrency: int | None = None,
+        now: float | None = None,
+    ) -> dict[str, dict[str, Any] | None]:
+        """
+        Annofabプロジェクトの情報を返します。
+        有効期限内のキャッシュがないプロジェクトだけを、WebAPIから並行して取得してキャッシュに保存します。
+
+        Returns:
+            key:プロジェクトID, value:プロジェクトの情報。プロジェクトが存在しない、またはアクセスできない場合はNone
+        """
+        if now is None:
+            now = time.time()
+        endpoint_url = annofab_service.api.endpoint_url
+        credential_key = _get_credential_key(annofab_service.api)
+        entries = self.load(endpoint_url, credential_key)
+
+        target_project_ids = set(project_ids)
+        missing_project_ids = [e for e in target_project_ids if e not in entries or not self.is_fresh(entries[e], now=now)]
+        logger.debug(f"{len(target_project_ids) - len(missing_project_ids)} 件のAnnofabプロジェクトの情報をキャッシュから取得しました。")
+        if len(missing_project_ids) > 0:
+            fetched_projects = _fetch_projects(annofab_service, missing_project_ids, max_concurrency=max_concurrency)
+            for project_id, project in fetched_projects.items():
+                entries[project_id] = {"fetched_at": now, "project": project}
+            # 有効期限が切れたエントリは削除して、キャッシュファイルが大きくなり続けないようにする
+            self.save(endpoint_url, credential_key, {k: v for k, v in entries.items() if self.is_fresh(v, now=now)})
+
+        return {project_id: entries[project_id]["project"] for project_id in target_project_ids}
+
+
+_annofab_project_cache: AnnofabProjectCache | None = None
+
+
+def set_annofab_project_cache(annofab_project_cache: AnnofabProjectCache | None) -> None:
+    """プロセス全体で利用するAnnofabProjectCacheを設定します。NoneならAnnofabプロジェクトの情報をキャッシュしません。"""
+    global _annofab_project_cache  # noqa: PLW0603
+    _annofab_project_cache = annofab_project_cache
+
+
+def get_annofab_project_cache() -> AnnofabProjectCache | None:
+    return _annofab_project_cache
+
+
+def is_annofab_project_cache_enabled_by_envvar() -> bool:
+    return os.environ.get(USE_ANNOFAB_PROJECT_CACHE_ENVVAR, "") != ""
+
+
+def get_annofab_projects(
+    annofab_service: annofabapi.Resource, project_ids: Collection[str], *, max_concurrency: int | None = None
+) -> dict[str, dict[str, Any] | None]:
+    """
+    Annofabプロジェクトの情報を返します。
+    キャッシュが有効ならキャッシュを利用し、無効ならWebAPIから並行して取得します。
+
+    Returns:
+        key:プロジェクトID, value:プロジェクトの情報。プロジェクトが存在しない、またはアクセスできない場合はNone
+    """
+    annofab_project_cache = get_annofab_project_cache()
+    if annofab_project_cache is not None:
+        return annofab_project_cache.get_projects(annofab_service, project_ids, max_concurrency=max_concurrency)
+    return _fetch_projects(annofab_service, set(project_ids), max_concurrency=max_concurrency)
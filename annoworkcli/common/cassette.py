@@ -0,0 +1,240 @@
+"""
+WebAPIのリクエストとレスポンスをファイル（カセット）に記録して、後で再生するための処理
+
+``--record DIR`` を指定すると、Annowork/AnnofabのSessionを経由したレスポンスをカセットに記録します。
+``--replay DIR`` を指定すると、ネットワークに接続せずに、カセットに記録されたレスポンスを返します。
+WebAPIを呼び出さずに集計処理を繰り返し実行できるので、集計処理のプロファイリングに利用できます。
+
+カセットは、1行に1レスポンスを格納したJSON Linesをgzip圧縮したファイルです。
+トークンなどの認証情報は記録しません。
+"""
+
+import base64
+import collections
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_FILE_GLOB = "cassette-*.jsonl.gz"
+
+REDACTED_KEYS = frozenset(["id_token", "access_token", "refresh_token", "password"])
+"""カセットに記録しないJSONのキー"""
+
+REDACTED_VALUE = "***"
+
+CASSETTE_REPLAY_USER_ID = "cassette-replay"
+"""カセットを再生するときに、認証情報が設定されていない場合に利用するダミーのユーザーID"""
+
+
+class CassetteNotFoundError(Exception):
+    """
+    カセットに記録されていないリクエストを送信しようとしたときに発生する例外。
+
+    requestsの例外にすると、annoworkapiがリトライしてしまうので、requestsの例外を継承していません。
+    """
+
+
+def create_cassette_key(method: str, url: str) -> str:
+    """レスポンスを検索するためのキーを返します。リクエストボディはキーに含めません。"""
+    return f"{method.upper()} {url}"
+
+
+def _redact(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, dict):
+        return {k: (REDACTED_VALUE if k in REDACTED_KEYS else _redact(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def _redact_body(body: bytes) -> bytes:
+    """レスポンスボディがJSONで認証情報が含まれていれば、その値を置き換えたJSONを返します。"""
+    try:
+        json_obj = json.loads(body)
+    except ValueError:
+        return body
+    redacted_json_obj = _redact(json_obj)
+    if redacted_json_obj == json_obj:
+        return body
+    return json.dumps(redacted_json_obj, ensure_ascii=False).encode("utf-8")
+
+
+class CassetteRecorder:
+    """
+    レスポンスをカセットに記録します。複数のスレッドから利用できます。
+
+    プロセスごとに別のファイルに記録します。
+    レスポンスごとにgzipのメンバーとして追記するので、プロセスが途中で終了しても、それまでに記録したレスポンスは読み込めます。
+
+    Args:
+        cassette_dir: カセットを保存するディレクトリ
+    """
+
+    def __init__(self, cassette_dir: Path) -> None:
+        self.cassette_dir = cassette_dir
+        self._lock = threading.Lock()
+        self.record_count = 0
+
+    def clear(self) -> None:
+        """以前に記録したカセットを削除します。"""
+        for cassette_file in self.cassette_dir.glob(CASSETTE_FILE_GLOB):
+            cassette_file.unlink()
+
+    def _get_cassette_file(self) -> Path:
+        return self.cassette_dir / f"cassette-{os.getpid()}.jsonl.gz"
+
+    def record(self, response: requests.Response) -> None:
+        """レスポンスをカセットに記録します。"""
+        request = response.request
+        body = _redact_body(response.content)
+        entry: dict[str, Any] = {
+            "key": create_cassette_key(request.method or "GET", request.url or response.url),
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "content_type": response.headers.get("Content-Type"),
+        }
+        try:
+            entry["text"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["base64"] = base64.b64encode(body).decode("ascii")
+
+        data = gzip.compress((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        with self._lock:
+            self.cassette_dir.mkdir(exist_ok=True, parents=True)
+            with self._get_cassette_file().open("ab") as f:
+                f.write(data)
+            self.record_count += 1
+
+
+class CassettePlayer:
+    """
+    カセットに記録されたレスポンスを返します。複数のスレッドから利用できます。
+
+    同じリクエストが複数回記録されている場合は、記録された順にレスポンスを返します。
+    記録された回数より多く送信された場合は、最後のレスポンスを返します。
+
+    Args:
+        cassette_dir: カセットを保存したディレクトリ
+        latency_seconds: レスポンスを返すまでの待ち時間[秒]。実際のWebAPIのレイテンシを模擬するために指定します。
+    """
+
+    def __init__(self, cassette_dir: Path, *, latency_seconds: float = 0.0) -> None:
+        self.cassette_dir = cassette_dir
+        self.latency_seconds = latency_seconds
+        self._lock = threading.Lock()
+        self._entries = self._load(cassette_dir)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # `multiprocessing.Pool`でSessionごとpickleされる場合があるので、設定値だけをpickleする。
+        return {"cassette_dir": self.cassette_dir, "latency_seconds": self.latency_seconds}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["cassette_dir"], latency_seconds=state["latency_seconds"])  # type: ignore[misc]
+
+    @staticmethod
+    def _load(cassette_dir: Path) -> dict[str, collections.deque[dict[str, Any]]]:
+        cassette_files = sorted(cassette_dir.glob(CASSETTE_FILE_GLOB))
+        if len(cassette_files) == 0:
+            raise FileNotFoundError(f"ディレクトリ '{cassette_dir}' にカセットが存在しません。")
+
+        entries: dict[str, collections.deque[dict[str, Any]]] = collections.defaultdict(collections.deque)
+        for cassette_file in cassette_files:
+            with gzip.open(cassette_file, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    entries[entry["key"]].append(entry)
+        logger.debug(f"{len(entries)} 種類のリクエストのレスポンスをカセットから読み込みました。 :: {cassette_dir=}")
+        return entries
+
+    def play(self, request: requests.PreparedRequest) -> dict[str, Any]:
+        """
+        リクエストに対応するレスポンスの情報を返します。
+
+        Raises:
+            CassetteNotFoundError: カセットに記録されていないリクエストの場合
+        """
+        key = create_cassette_key(request.method or "GET", request.url or "")
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue is None or len(queue) == 0:
+                raise CassetteNotFoundError(f"カセットに記録されていないリクエストです。 :: {key}")
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        return entry
+
+
+class ReplayHTTPAdapter(BaseAdapter):
+    """
+    ネットワークに接続せずに、 :class:`CassettePlayer` が返すレスポンスを返すHTTPAdapter
+    """
+
+    def __init__(self, player: CassettePlayer) -> None:
+        super().__init__()
+        self.player = player
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]  # noqa: ANN401, ARG002
+        entry = self.player.play(request)
+
+        body = entry["text"].encode("utf-8") if "text" in entry else base64.b64decode(entry["base64"])
+        headers = {"Content-Length": str(len(body))}
+        if entry["content_type"] is not None:
+            headers["Content-Type"] = entry["content_type"]
+
+        response = requests.Response()
+        response.status_code = entry["status_code"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url or ""
+        response.request = request
+        response.connection = self  # type: ignore[assignment]
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+_cassette_recorder: CassetteRecorder | None = None
+_cassette_player: CassettePlayer | None = None
+
+
+def set_cassette_recorder(recorder: CassetteRecorder | None) -> None:
+    """プロセス全体で利用するCassetteRecorderを設定します。Noneならレスポンスを記録しません。"""
+    global _cassette_recorder  # noqa: PLW0603
+    _cassette_recorder = recorder
+
+
+def get_cassette_recorder() -> CassetteRecorder | None:
+    return _cassette_recorder
+
+
+def set_cassette_player(player: CassettePlayer | None) -> None:
+    """プロセス全体で利用するCassettePlayerを設定します。Noneならカセットを再生しません。"""
+    global _cassette_player  # noqa: PLW0603
+    _cassette_player = player
+
+
+def get_cassette_player() -> CassettePlayer | None:
+    return _cassette_player
+
+
+def record_cassette_hook(response: requests.Response, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401, ARG001
+    """
+    ``requests.Session`` のresponseフックに登録して、レスポンスをカセットに記録します。
+    Sessionをpickleできるように、モジュールレベルの関数にしています。
+    """
+    if _cassette_recorder is not None:
+        _cassette_recorder.record(response)
@@ -8,6 +8,7 @@ import json
 import logging
 import os
 from enum import Enum
+from pathlib import Path
 from typing import Any
 
 import annoworkapi
@@ -15,8 +16,15 @@ from annoworkapi.api import DEFAULT_ENDPOINT_URL
 from annoworkapi.exceptions import CredentialsNotFoundError
 from more_itertools import first_true
 
+from annoworkcli.common.annofab_project_cache import DEFAULT_NEGATIVE_TTL_SECONDS, DEFAULT_TTL_SECONDS, USE_ANNOFAB_PROJECT_CACHE_ENVVAR
+from annoworkcli.common.cassette import CASSETTE_REPLAY_USER_ID, get_cassette_player
 from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.progress import clear_progress_line
+from annoworkcli.common.token_cache import USE_TOKEN_CACHE_ENVVAR, get_token_cache
+from annoworkcli.common.transport import configure_session
 from annoworkcli.common.utils import get_file_scheme_path, read_lines_except_blank_line
+from annoworkcli.common.workspace_snapshot import SNAPSHOT_USER_ID, SnapshotHTTPAdapter, get_snapshot_responder
+from annoworkcli.common.writer import PARTITION_COLUMNS, Compression
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +122,109 @@ def add_parser(
             help=f"Annowork WebAPIのエンドポイントを指定します。指定しない場合は ``{DEFAULT_ENDPOINT_URL}`` です。",
         )
 
+        group.add_argument(
+            "--profile",
+            type=Path,
+            help="cProfileでプロファイリングして、結果をpstats形式で指定したファイルに出力します。"
+            "並行してWebAPIを呼び出すワーカースレッドの処理も含みます。",
+        )
+
+        group.add_argument(
+            "--metrics",
+            action="store_true",
+            help="コマンドの終了時に、処理のフェーズごとの時間、WebAPIの呼び出し回数と受信バイト数、メモリ使用量のピークを、"
+            "JSON形式で標準エラー出力に出力します。",
+        )
+
+        group.add_argument(
+            "--trace",
+            type=Path,
+            metavar="FILE",
+            help="コマンド全体、処理のフェーズ、WebAPIの呼び出し（エンドポイント、クエリパラメータ、ステータスコード、受信バイト数、レイテンシ）を、"
+            "OpenTelemetryのスパンに似た形式でJSON Linesファイルに出力します（OTLP/JSONとは互換性がありません）。"
+            " ``annoworkcli trace summarize`` で集計できます。",
+        )
+
+        group.add_argument(
+            "--use_token_cache",
+            action="store_true",
+            help="ログインして取得したトークンをファイルにキャッシュして、次回以降のコマンド実行で再利用します。"
+            f"環境変数 ``{USE_TOKEN_CACHE_ENVVAR}`` に値を設定した場合も有効になります。",
+        )
+
+        group.add_argument(
+            "--use_annofab_project_cache",
+            action="store_true",
+            help="Annofabプロジェクトの情報をファイルにキャッシュして、次回以降のコマンド実行で再利用します。"
+            f"環境変数 ``{USE_ANNOFAB_PROJECT_CACHE_ENVVAR}`` に値を設定した場合も有効になります。",
+        )
+
+        group.add_argument(
+            "--annofab_project_cache_ttl",
+            type=int,
+            default=DEFAULT_TTL_SECONDS,
+            help="Annofabプロジェクトのキャッシュの有効期限[秒]。存在しないプロジェクトやアクセスできないプロジェクトは、"
+            f"この値と{DEFAULT_NEGATIVE_TTL_SECONDS}秒の小さい方を有効期限にします。",
+        )
+
+        group.add_argument(
+            "--max_rps",
+            type=float,
+            help="Annowork/Annofab WebAPIへの1秒あたりの最大リクエスト数を指定します。指定しない場合は制限しません。",
+        )
+
+        group.add_argument(
+            "--max_concurrency",
+            type=int,
+            help="Annowork/Annofab WebAPIへ同時に送信するリクエスト数の最大値を指定します。"
+            "サーバーから429/503が返ってきた場合やレイテンシが悪化した場合は、自動で同時送信数を減らします。"
+            "指定した場合、ジョブやワークスペースメンバごとにWebAPIを呼び出す処理を、この数まで並行して実行します。"
+            "指定しない場合は、逐次的にWebAPIを呼び出します。",
+        )
+
+        group.add_argument(
+            "--partition_by",
+            type=str,
+            choices=PARTITION_COLUMNS,
+            help="``--output`` をディレクトリとみなして、指定した列の値ごとに ``{列名}={値}.csv`` などのファイルに分割して出力します。",
+        )
+
+        group.add_argument(
+            "--compression",
+            type=str,
+            choices=[e.value for e in Compression],
+            help="出力ファイルを指定した形式で圧縮します。ファイル名に拡張子（ ``.gz`` , ``.zst`` ）が付いていなければ付けます。"
+            "``zstd`` を指定するには、Python 3.14以上を利用するか、 ``zstandard`` パッケージをインストールしてください。",
+        )
+
+        cassette_group = group.add_mutually_exclusive_group()
+        cassette_group.add_argument(
+            "--record",
+            type=Path,
+            metavar="DIR",
+            help="Annowork/Annofab WebAPIのレスポンスを、指定したディレクトリにカセット（gzip圧縮したJSON Lines）として記録します。"
+            "認証情報は記録しません。",
+        )
+        cassette_group.add_argument(
+            "--replay",
+            type=Path,
+            metavar="DIR",
+            help="``--record`` で記録したカセットのレスポンスを返して、WebAPIにアクセスせずにコマンドを実行します。",
+        )
+        cassette_group.add_argument(
+            "--snapshot",
+            type=Path,
+            metavar="FILE",
+            help="``annoworkcli workspace snapshot`` で作成したスナップショットのデータを返して、"
+            "Annowork WebAPIにアクセスせずにコマンドを実行します。Annofab WebAPIにはアクセスします。",
+        )
+        group.add_argument(
+            "--replay_latency",
+            type=float,
+            default=0.0,
+            help="``--replay`` を指定したときに、レスポンスを返すまでの待ち時間[秒]を指定します。WebAPIのレイテンシを模擬するために利用します。",
+        )
+
         return parent_parser
 
     if subparsers is None:
@@ -155,9 +266,43 @@ def add_workspace_id_argument_with_env_fallback(parser: argparse.ArgumentParser)
     )
 
 
+ALL_WORKSPACES = "all"
+"""``--workspace_id`` に指定すると、自分が所属するすべてのワークスペースを対象にする値"""
+
+
+def add_workspace_ids_argument_with_env_fallback(parser: argparse.ArgumentParser) -> None:
+    """
+    複数のワークスペースIDを指定できるworkspace_id引数を追加します。未指定時は環境変数を参照します。
+
+    複数のワークスペースIDが指定された場合は、ワークスペースごとにコマンドを実行して（ ``--max_concurrency`` を指定した場合は並行して実行して）、
+    ``workspace_id`` 列を追加した結果を1個のファイルに出力します。
+    """
+    parser.add_argument(
+        "-w",
+        "--workspace_id",
+        type=str,
+        nargs="+",
+        required=False,
+        help=f"対象のワークスペースID。未指定の場合は環境変数`{WORKSPACE_ID_ENVVAR}`を使用します。\n"
+        f"複数指定できます。 ``{ALL_WORKSPACES}`` を指定すると、自分が所属するすべてのワークスペースが対象になります。\n"
+        "複数のワークスペースを対象にした場合は、 ``workspace_id`` 列を追加した結果を出力します。",
+    )
+    parser.add_argument(
+        "--partition_by_workspace",
+        action="store_true",
+        help="複数のワークスペースを対象にした場合に、 ``--output`` をディレクトリとみなして、"
+        "ワークスペースごとに ``{workspace_id}.csv`` などのファイルに出力します。",
+    )
+
+
 def resolve_required_workspace_id(args: argparse.Namespace) -> str:
     """必須のworkspace_idをコマンドライン引数または環境変数から取得します。"""
     workspace_id = getattr(args, "workspace_id", None)
+    if isinstance(workspace_id, list):
+        # `add_workspace_ids_argument_with_env_fallback`で追加した引数の場合
+        if len(workspace_id) > 1 or ALL_WORKSPACES in workspace_id:
+            raise CommandLineArgumentError("`--workspace_id` には、ワークスペースIDを1個だけ指定してください。")
+        workspace_id = workspace_id[0] if len(workspace_id) == 1 else None
     if isinstance(workspace_id, str) and workspace_id != "":
         return workspace_id
 
@@ -220,6 +365,7 @@ def prompt_yesno(msg: str) -> bool:
         True: Yes, False: No
 
     """
+    clear_progress_line()
     while True:
         choice = input(f"{msg} [y/N] : ")
         if choice == "y":
@@ -239,6 +385,8 @@ def prompt_yesnoall(msg: str) -> tuple[bool, bool]:
         Tuple[yesno, is_all]. yesno:Trueならyes. is_all: Trueならall.
 
     """
+    # 端末に表示している進捗の行に、確認メッセージが続けて表示されないようにする
+    clear_progress_line()
     while True:
         choice = input(f"{msg} [y/N/ALL] : ")
         if choice == "y":
@@ -286,6 +434,19 @@ def _get_endpoint_url_from_args_or_envvar(args: argparse.Namespace) -> str:
     return endpoint_url
 
 
+_shared_annoworkapi: annoworkapi.resource.Resource | None = None
+
+
+def set_shared_annoworkapi(service: annoworkapi.resource.Resource | None) -> None:
+    """
+    :func:`build_annoworkapi` が返すannoworkapiのインスタンスを設定します。
+    複数のワークスペースに対してコマンドを実行するときに、ログイン済みのSessionを共有するために利用します。
+    Noneなら、 :func:`build_annoworkapi` を呼び出すたびにインスタンスを生成します。
+    """
+    global _shared_annoworkapi  # noqa: PLW0603
+    _shared_annoworkapi = service
+
+
 def build_annoworkapi(args: argparse.Namespace) -> annoworkapi.resource.Resource:
     """annoworkapiのインスタンスを生成します。
 
@@ -299,12 +460,29 @@ def build_annoworkapi(args: argparse.Namespace) -> annoworkapi.resource.Resource
     Returns:
         annoworkapi.resource.Resource: annoworkapiのインスタンス
     """
+    if _shared_annoworkapi is not None:
+        return _shared_annoworkapi
+
     endpoint_url = _get_endpoint_url_from_args_or_envvar(args)
 
     # エンドポイントURLがデフォルトでない場合は、気付けるようにするためログに出力する
     if endpoint_url != annoworkapi.api.DEFAULT_ENDPOINT_URL:
         logger.info(f"endpoint_url='{endpoint_url}'")
 
+    service = _build_annoworkapi_with_credentials(args, endpoint_url)
+    configure_session(service.api.session)
+    snapshot_responder = get_snapshot_responder()
+    if snapshot_responder is not None:
+        # Annofab WebAPIにはアクセスできるように、Annowork WebAPIのURLだけをスナップショットから返す
+        service.api.session.mount(endpoint_url, SnapshotHTTPAdapter(snapshot_responder))
+    token_cache = get_token_cache()
+    if token_cache is not None:
+        token_cache.apply_to_annoworkapi(service.api)
+    return service
+
+
+def _build_annoworkapi_with_credentials(args: argparse.Namespace, endpoint_url: str) -> annoworkapi.resource.Resource:
+    """コマンドライン引数、環境変数、.netrc、標準入力のいずれかから認証情報を取得して、annoworkapiのインスタンスを生成します。"""
     if args.annowork_user_id is not None and args.annowork_password is not None:
         return annoworkapi.build(login_user_id=args.annowork_user_id, login_password=args.annowork_password, endpoint_url=endpoint_url)
 
@@ -321,6 +499,12 @@ def build_annoworkapi(args: argparse.Namespace) -> annoworkapi.resource.Resource
     try:
         return annoworkapi.build(endpoint_url=endpoint_url)
     except CredentialsNotFoundError:
+        if get_cassette_player() is not None:
+            # カセットを再生する場合はWebAPIにアクセスしないので、認証情報は不要
+            return annoworkapi.build(endpoint_url=endpoint_url, login_user_id=CASSETTE_REPLAY_USER_ID, login_password=CASSETTE_REPLAY_USER_ID)
+        if get_snapshot_responder() is not None:
+            # スナップショットを利用する場合はAnnowork WebAPIにアクセスしないので、認証情報は不要
+            return annoworkapi.build(endpoint_url=endpoint_url, login_user_id=SNAPSHOT_USER_ID, login_password=SNAPSHOT_USER_ID)
         # 環境変数, netrcフィアルに認証情報が設定されていなかったので、標準入力から認証情報を入力させる。
         login_user_id = _get_annowork_user_id_from_stdin()
         login_password = _get_annowork_password_from_stdin()
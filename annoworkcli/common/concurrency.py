@@ -0,0 +1,84 @@
+"""
+WebAPIへのリクエストを並行して実行するための処理
+
+``annoworkapi`` , ``annofabapi`` は同期的なクライアントなので、WebAPIを呼び出す関数を、同時実行数に上限のあるスレッドプール上で実行します。
+認証情報やURLの組み立ては既存のクライアントをそのまま利用します。
+並行して実行するのは、 ``--max_concurrency`` などで同時実行数を指定した場合だけです。指定しない場合は逐次的に実行します。
+"""
+
+import logging
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from annoworkcli.common.metrics import profile_worker_thread
+from annoworkcli.common.progress import Progress, track_progress
+from annoworkcli.common.trace import bind_trace_context
+from annoworkcli.common.transport import get_transport_controller
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def get_default_max_concurrency() -> int:
+    """
+    同時に実行するリクエスト数の上限を返します。
+    コマンドライン引数 ``--max_concurrency`` が指定されていればその値を、指定されていなければ1（逐次的に実行する）を返します。
+    """
+    controller = get_transport_controller()
+    if controller is not None and controller.max_concurrency is not None:
+        return controller.max_concurrency
+    return 1
+
+
+def _with_progress(func: Callable[[T], R], progress: Progress) -> Callable[[T], R]:
+    def wrapper(item: T) -> R:
+        with progress.track_item():
+            return func(item)
+
+    return wrapper
+
+
+def map_concurrently(
+    func: Callable[[T], R], items: Iterable[T], *, max_concurrency: int | None = None, progress_description: str | None = None
+) -> list[R]:
+    """
+    ``items`` の要素ごとに ``func`` をスレッドプール上で実行して、その結果を ``items`` の順番で返します。
+
+    ``items`` が1個以下の場合や、同時実行数の上限が1の場合は、スレッドプールを使わずに逐次的に実行します。
+
+    Args:
+        func: 同期的な関数。WebAPIを呼び出す関数を想定しています。
+        items: ``func`` に渡す値
+        max_concurrency: 同時に実行する ``func`` の数の上限。Noneなら :func:`get_default_max_concurrency` の値です。
+        progress_description: 進捗に表示する処理の内容。指定した場合は、 ``func`` の実行状況を進捗として表示します。
+    """
+    item_list: Sequence[T] = list(items)
+    if progress_description is not None:
+        with track_progress(progress_description, total=len(item_list)) as progress:
+            return map_concurrently(_with_progress(func, progress), item_list, max_concurrency=max_concurrency)
+
+    # スレッドプール上で呼び出したWebAPIのスパンを、呼び出し元のフェーズの子として記録する
+    func = bind_trace_context(func)
+    max_workers = max_concurrency if max_concurrency is not None else get_default_max_concurrency()
+    if len(item_list) <= 1 or max_workers == 1:
+        return [func(item) for item in item_list]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # cProfileはメインスレッドしかプロファイリングしないので、ワーカースレッドでもプロファイリングする
+        return list(executor.map(profile_worker_thread(func), item_list))
+
+
+def flat_map_concurrently(
+    func: Callable[[T], list[R]], items: Iterable[T], *, max_concurrency: int | None = None, progress_description: str | None = None
+) -> list[R]:
+    """
+    :func:`map_concurrently` の結果のリストを平坦化して返します。
+    1個の値に対して複数の要素を返すWebAPI（例：ジョブごとの実績作業時間の一覧）を、まとめて取得する際に利用します。
+    """
+    result: list[R] = []
+    for elm in map_concurrently(func, items, max_concurrency=max_concurrency, progress_description=progress_description):
+        result.extend(elm)
+    return result
@@ -0,0 +1,708 @@
+"""
+作業時間のキューブ（集計済みのデータを格納したローカルのSQLiteファイル）を扱うための処理
+
+実績作業時間、アサイン時間、予定稼働時間、Annofabの作業時間を「日付×ワークスペースメンバ×ジョブ」単位で格納して、
+週、親ジョブ、ワークスペースタグの単位に事前に集計したテーブルを作成します。
+キューブを更新したときは、集計済みのテーブルのうち更新した期間の行だけを作り直します。
+``--cube`` を指定したコマンドは、WebAPIにアクセスせずにキューブから結果を出力します。
+
+キューブは ``annoworkcli cube build`` で作成します。
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import sqlite3
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import pandas
+
+from annoworkcli.common.weekly import DEFAULT_WEEK_START, WeekStart
+
+logger = logging.getLogger(__name__)
+
+CUBE_SCHEMA_VERSION = "2"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job_name TEXT,
+    parent_job_id TEXT,
+    parent_job_name TEXT,
+    status TEXT,
+    annofab_project_id TEXT
+);
+CREATE TABLE IF NOT EXISTS members (
+    workspace_member_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    username TEXT,
+    role TEXT,
+    status TEXT,
+    annofab_account_id TEXT
+);
+CREATE TABLE IF NOT EXISTS tags (
+    workspace_tag_id TEXT PRIMARY KEY,
+    workspace_tag_name TEXT,
+    company TEXT
+);
+CREATE TABLE IF NOT EXISTS tag_members (
+    workspace_tag_id TEXT,
+    workspace_member_id TEXT,
+    PRIMARY KEY (workspace_tag_id, workspace_member_id)
+);
+CREATE TABLE IF NOT EXISTS actual_daily (
+    date TEXT,
+    workspace_member_id TEXT,
+    job_id TEXT,
+    actual_working_hours REAL,
+    notes TEXT,
+    PRIMARY KEY (date, workspace_member_id, job_id)
+);
+CREATE TABLE IF NOT EXISTS assigned_daily (
+    date TEXT,
+    workspace_member_id TEXT,
+    job_id TEXT,
+    assigned_working_hours REAL,
+    PRIMARY KEY (date, workspace_member_id, job_id)
+);
+CREATE TABLE IF NOT EXISTS expected_daily (
+    date TEXT,
+    workspace_member_id TEXT,
+    expected_working_hours REAL,
+    PRIMARY KEY (date, workspace_member_id)
+);
+CREATE TABLE IF NOT EXISTS annofab_daily (
+    date TEXT,
+    annofab_project_id TEXT,
+    annofab_account_id TEXT,
+    annofab_working_hours REAL,
+    PRIMARY KEY (date, annofab_project_id, annofab_account_id)
+);
+CREATE TABLE IF NOT EXISTS cube_daily (
+    date TEXT,
+    workspace_member_id TEXT,
+    job_id TEXT,
+    actual_working_hours REAL,
+    assigned_working_hours REAL,
+    annofab_working_hours REAL,
+    PRIMARY KEY (date, workspace_member_id, job_id)
+);
+CREATE TABLE IF NOT EXISTS cube_weekly (
+    start_date TEXT,
+    end_date TEXT,
+    workspace_member_id TEXT,
+    job_id TEXT,
+    actual_working_hours REAL,
+    assigned_working_hours REAL,
+    annofab_working_hours REAL,
+    PRIMARY KEY (start_date, workspace_member_id, job_id)
+);
+CREATE TABLE IF NOT EXISTS cube_daily_parent_job (
+    date TEXT,
+    workspace_member_id TEXT,
+    parent_job_id TEXT,
+    actual_working_hours REAL,
+    assigned_working_hours REAL,
+    annofab_working_hours REAL,
+    PRIMARY KEY (date, workspace_member_id, parent_job_id)
+);
+CREATE TABLE IF NOT EXISTS cube_daily_tag (
+    date TEXT,
+    workspace_tag_id TEXT,
+    job_id TEXT,
+    actual_working_hours REAL,
+    assigned_working_hours REAL,
+    annofab_working_hours REAL,
+    PRIMARY KEY (date, workspace_tag_id, job_id)
+);
+"""
+
+FACT_TABLES = ["actual_daily", "assigned_daily", "expected_daily", "annofab_daily"]
+"""日付単位のデータを格納するテーブル。期間を指定して差し替えます。"""
+
+DIMENSION_TABLES = ["jobs", "members", "tags", "tag_members"]
+"""ジョブやメンバなどの情報を格納するテーブル。キューブを更新するたびに全件差し替えます。"""
+
+AGGREGATE_TABLES = ["cube_daily", "cube_weekly", "cube_daily_parent_job", "cube_daily_tag"]
+"""集計済みのテーブル"""
+
+AGGREGATE_DEPENDENT_DIMENSION_TABLES = ["jobs", "members", "tag_members"]
+"""内容が変わると、集計済みのテーブルをすべての期間について作り直す必要があるテーブル"""
+
+_HOURS_COLUMNS_SQL = """
+    SUM(actual_working_hours) AS actual_working_hours,
+    SUM(assigned_working_hours) AS assigned_working_hours,
+    SUM(annofab_working_hours) AS annofab_working_hours
+"""
+
+# 集計済みのテーブルのうち、 :start_date から :end_date までの期間の行を作り直すSQL。
+# 週ごとのテーブルは、 :first_week_start_date から :last_week_start_date までに始まる週の行を作り直す。
+# Annofabの作業時間は、AnnofabプロジェクトとAnnoworkのジョブが1対1で紐づく場合だけ、ジョブの作業時間として集計する
+_REFRESH_AGGREGATE_SQLS = [
+    "DELETE FROM cube_daily WHERE date BETWEEN :start_date AND :end_date",
+    f"""
+    INSERT INTO cube_daily
+    SELECT date, workspace_member_id, job_id, {_HOURS_COLUMNS_SQL}
+    FROM (
+        SELECT date, workspace_member_id, job_id, actual_working_hours, 0.0 AS assigned_working_hours, 0.0 AS annofab_working_hours
+        FROM actual_daily
+        WHERE date BETWEEN :start_date AND :end_date
+        UNION ALL
+        SELECT date, workspace_member_id, job_id, 0.0, assigned_working_hours, 0.0
+        FROM assigned_daily
+        WHERE date BETWEEN :start_date AND :end_date
+        UNION ALL
+        SELECT af.date, m.workspace_member_id, j.job_id, 0.0, 0.0, af.annofab_working_hours
+        FROM annofab_daily AS af
+        INNER JOIN members AS m ON m.annofab_account_id = af.annofab_account_id
+        INNER JOIN (
+            SELECT annofab_project_id, MIN(job_id) AS job_id FROM jobs
+            WHERE annofab_project_id IS NOT NULL
+            GROUP BY annofab_project_id HAVING COUNT(*) = 1
+        ) AS j ON j.annofab_project_id = af.annofab_project_id
+        WHERE af.date BETWEEN :start_date AND :end_date
+    )
+    GROUP BY date, workspace_member_id, job_id
+    """,
+    "DELETE FROM cube_weekly WHERE start_date BETWEEN :first_week_start_date AND :last_week_start_date",
+    f"""
+    INSERT INTO cube_weekly
+    SELECT start_date, date(start_date, '+6 days') AS end_date, workspace_member_id, job_id, {_HOURS_COLUMNS_SQL}
+    FROM (
+        SELECT date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) - :week_start_w + 7) % 7) || ' days') AS start_date, *
+        FROM cube_daily
+        WHERE date BETWEEN :first_week_start_date AND date(:last_week_start_date, '+6 days')
+    )
+    GROUP BY start_date, workspace_member_id, job_id
+    """,
+    "DELETE FROM cube_daily_parent_job WHERE date BETWEEN :start_date AND :end_date",
+    f"""
+    INSERT INTO cube_daily_parent_job
+    SELECT d.date, d.workspace_member_id, j.parent_job_id, {_HOURS_COLUMNS_SQL}
+    FROM cube_daily AS d
+    LEFT JOIN jobs AS j ON j.job_id = d.job_id
+    WHERE d.date BETWEEN :start_date AND :end_date
+    GROUP BY d.date, d.workspace_member_id, j.parent_job_id
+    """,
+    "DELETE FROM cube_daily_tag WHERE date BETWEEN :start_date AND :end_date",
+    f"""
+    INSERT INTO cube_daily_tag
+    SELECT d.date, t.workspace_tag_id, d.job_id, {_HOURS_COLUMNS_SQL}
+    FROM cube_daily AS d
+    INNER JOIN tag_members AS t ON t.workspace_member_id = d.workspace_member_id
+    WHERE d.date BETWEEN :start_date AND :end_date
+    GROUP BY d.date, t.workspace_tag_id, d.job_id
+    """,
+]
+
+
+def _to_sqlite_weekday(week_start: WeekStart) -> int:
+    """SQLiteの ``strftime('%w')`` の曜日の番号（日曜日が0）を返します。"""
+    return (week_start.weekday + 1) % 7
+
+
+def _get_week_start_date(date: str, week_start: WeekStart) -> str:
+    """``date`` を含む週の開始日を返します。"""
+    dt = datetime.date.fromisoformat(date)
+    return (dt - datetime.timedelta(days=(dt.weekday() - week_start.weekday) % 7)).isoformat()
+
+
+class WorkingHoursCube:
+    """
+    作業時間のキューブ。 :meth:`open` で開きます。
+
+    Args:
+        connection: キューブのSQLiteファイルに接続したConnection
+    """
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    @classmethod
+    @contextmanager
+    def open(cls, cube_file: Path, *, is_create: bool = False, is_readonly: bool = False) -> Iterator["WorkingHoursCube"]:
+        """
+        キューブを開きます。
+
+        Args:
+            cube_file: キューブのSQLiteファイル
+            is_create: Trueなら、ファイルが存在しないときに新しく作成します。Falseなら、ファイルが存在しないときに例外を発生させます。
+            is_readonly: Trueなら、読み取り専用で開きます。キューブを変更するSQLを実行すると ``sqlite3.OperationalError`` が発生します。
+
+        Raises:
+            FileNotFoundError: ``is_create`` がFalseで、ファイルが存在しない場合
+        """
+        if not is_create and not cube_file.exists():
+            raise FileNotFoundError(f"キューブのファイル '{cube_file}' は存在しません。 `annoworkcli cube build` で作成してください。")
+
+        if is_readonly:
+            connection = sqlite3.connect(f"{cube_file.resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            cube_file.parent.mkdir(exist_ok=True, parents=True)
+            connection = sqlite3.connect(cube_file)
+        try:
+            if not is_readonly:
+                connection.executescript(_SCHEMA)
+            yield cls(connection)
+            if not is_readonly:
+                connection.commit()
+        finally:
+            connection.close()
+
+    def get_meta(self, key: str) -> str | None:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def workspace_id(self) -> str | None:
+        return self.get_meta("workspace_id")
+
+    @property
+    def week_start(self) -> WeekStart:
+        value = self.get_meta("week_start")
+        return WeekStart(value) if value is not None else DEFAULT_WEEK_START
+
+    def get_date_range(self) -> tuple[str | None, str | None]:
+        """キューブに格納されているデータの期間（開始日、終了日）を返します。"""
+        return self.get_meta("start_date"), self.get_meta("end_date")
+
+    def replace_dimension(self, table: str, rows: list[dict[str, Any]]) -> bool:
+        """
+        ジョブやメンバなどのテーブルの内容を差し替えます。
+
+        Returns:
+            テーブルの内容が変わったかどうか
+        """
+        assert table in DIMENSION_TABLES
+        old_rows = set(self.connection.execute(f"SELECT * FROM {table}"))
+        self.connection.execute(f"DELETE FROM {table}")
+        self._insert_rows(table, rows)
+        return set(self.connection.execute(f"SELECT * FROM {table}")) != old_rows
+
+    def replace_facts(self, table: str, rows: list[dict[str, Any]], *, start_date: str, end_date: str) -> None:
+        """日付単位のテーブルについて、 ``start_date`` から ``end_date`` までの期間のデータを差し替えます。"""
+        assert table in FACT_TABLES
+        self.connection.execute(f"DELETE FROM {table} WHERE date BETWEEN ? AND ?", (start_date, end_date))
+        self._insert_rows(table, [row for row in rows if start_date <= row["date"] <= end_date])
+
+    def _insert_rows(self, table: str, rows: list[dict[str, Any]]) -> None:
+        if len(rows) == 0:
+            return
+        columns = [row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")]
+        placeholders = ", ".join(f":{column}" for column in columns)
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            ({column: row.get(column) for column in columns} for row in rows),
+        )
+
+    def update_date_range(self, *, start_date: str, end_date: str) -> None:
+        """キューブに格納されているデータの期間を、 ``start_date`` から ``end_date`` までの期間を含むように広げます。"""
+        current_start_date, current_end_date = self.get_date_range()
+        self.set_meta("start_date", min(start_date, current_start_date) if current_start_date is not None else start_date)
+        self.set_meta("end_date", max(end_date, current_end_date) if current_end_date is not None else end_date)
+        self.set_meta("updated_datetime", datetime.datetime.now().astimezone().isoformat())
+
+    def refresh_aggregates(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        week_start: WeekStart = DEFAULT_WEEK_START,
+        is_dimension_changed: bool = False,
+    ) -> None:
+        """
+        集計済みのテーブルのうち、 ``start_date`` から ``end_date`` までの期間の行を作り直します。
+        週ごとのテーブルは、その期間を含む週の行を作り直します。
+
+        以下の場合は、集計結果がすべての期間に影響するので、キューブに格納されているすべての期間について作り直します。
+
+        * ``start_date`` または ``end_date`` がNone
+        * ``is_dimension_changed`` がTrue（ワークスペースタグのメンバなどが変わった場合）
+        * 週の始まりの曜日やキューブのスキーマのバージョンが、前回集計したときと異なる
+
+        Args:
+            is_dimension_changed: ジョブ、メンバ、ワークスペースタグのメンバのいずれかの内容が変わったかどうか
+        """
+        is_full_refresh = start_date is None or end_date is None or is_dimension_changed or self.get_meta("week_start") != week_start.value
+        if self.get_meta("schema_version") != CUBE_SCHEMA_VERSION:
+            # 以前のバージョンで作成した集計済みのテーブルは、列や主キーが異なる可能性があるので作り直す
+            for table in [*AGGREGATE_TABLES, "cube_daily_company"]:
+                self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self.connection.executescript(_SCHEMA)
+            is_full_refresh = True
+
+        if is_full_refresh:
+            for table in AGGREGATE_TABLES:
+                self.connection.execute(f"DELETE FROM {table}")
+            start_date, end_date = self.get_date_range()
+
+        if start_date is not None and end_date is not None:
+            params = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "first_week_start_date": _get_week_start_date(start_date, week_start),
+                "last_week_start_date": _get_week_start_date(end_date, week_start),
+                "week_start_w": _to_sqlite_weekday(week_start),
+            }
+            for sql in _REFRESH_AGGREGATE_SQLS:
+                self.connection.execute(sql, params)
+            logger.debug(f"{start_date} から {end_date} までの期間について、集計済みのテーブルを作り直しました。")
+
+        self.set_meta("week_start", week_start.value)
+        self.set_meta("schema_version", CUBE_SCHEMA_VERSION)
+
+    def warn_if_out_of_range(self, *, start_date: str | None, end_date: str | None) -> None:
+        """指定された期間がキューブに格納されているデータの期間に含まれていなければ、警告を出します。"""
+        cube_start_date, cube_end_date = self.get_date_range()
+        if cube_start_date is None or cube_end_date is None:
+            logger.warning("キューブにデータが格納されていません。")
+            return
+        if (start_date is None or start_date < cube_start_date) or (end_date is None or end_date > cube_end_date):
+            logger.warning(
+                f"キューブには {cube_start_date} から {cube_end_date} までのデータしか格納されていません。"
+                f"それ以外の期間のデータは出力されません。 :: {start_date=}, {end_date=}"
+            )
+
+    def read_sql(self, sql: str, params: Collection[Any] | dict[str, Any] = ()) -> pandas.DataFrame:
+        return pandas.read_sql_query(sql, self.connection, params=params)
+
+    def read_actual_daily(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        job_ids: Collection[str] | None = None,
+        parent_job_ids: Collection[str] | None = None,
+        user_ids: Collection[str] | None = None,
+    ) -> pandas.DataFrame:
+        """
+        日ごとの実績作業時間を返します。 ``actual_working_time list_daily`` と同じ列を持ちます。
+        notes列は備考のlistです。
+        """
+        where_sql, params = _create_where_sql(
+            start_date=start_date, end_date=end_date, job_ids=job_ids, parent_job_ids=parent_job_ids, user_ids=user_ids
+        )
+        df = self.read_sql(
+            f"""
+            SELECT a.date, j.parent_job_id, j.parent_job_name, a.job_id, j.job_name,
+                a.workspace_member_id, m.user_id, m.username, a.actual_working_hours, a.notes
+            FROM actual_daily AS a
+            LEFT JOIN jobs AS j ON j.job_id = a.job_id
+            LEFT JOIN members AS m ON m.workspace_member_id = a.workspace_member_id
+            WHERE a.actual_working_hours != 0 {where_sql}
+            ORDER BY a.date, a.job_id, m.user_id
+            """,
+            params,
+        )
+        df["notes"] = [json.loads(e) if isinstance(e, str) else None for e in df["notes"]]
+        return df
+
+    def read_actual_weekly(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        job_ids: Collection[str] | None = None,
+        parent_job_ids: Collection[str] | None = None,
+        user_ids: Collection[str] | None = None,
+    ) -> pandas.DataFrame:
+        """
+        週ごとの実績作業時間を返します。 ``actual_working_time list_weekly`` と同じ列を持ちます。
+        週の始まりの曜日は、キューブを作成したときの曜日です。
+        """
+        where_sql, params = _create_where_sql(
+            start_date=None, end_date=None, job_ids=job_ids, parent_job_ids=parent_job_ids, user_ids=user_ids, table_alias="w"
+        )
+        # 指定された期間と重なる週を出力する
+        if start_date is not None:
+            where_sql += " AND w.end_date >= :start_date"
+            params["start_date"] = start_date
+        if end_date is not None:
+            where_sql += " AND w.start_date <= :end_date"
+            params["end_date"] = end_date
+        return self.read_sql(
+            f"""
+            SELECT w.workspace_member_id, m.user_id, m.username, j.parent_job_id, j.parent_job_name, w.job_id, j.job_name,
+                w.start_date, w.end_date, w.actual_working_hours
+            FROM cube_weekly AS w
+            LEFT JOIN jobs AS j ON j.job_id = w.job_id
+            LEFT JOIN members AS m ON m.workspace_member_id = w.workspace_member_id
+            WHERE w.actual_working_hours > 0 {where_sql}
+            ORDER BY m.user_id, w.job_id, w.start_date
+            """,
+            params,
+        )
+
+    def read_actual_daily_groupby_tag(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        job_ids: Collection[str] | None = None,
+        parent_job_ids: Collection[str] | None = None,
+        user_ids: Collection[str] | None = None,
+        workspace_tag_ids: Collection[str] | None = None,
+        workspace_tag_names: Collection[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        ワークスペースタグごとに集計した日ごとの実績作業時間を返します。
+        ``actual_working_time list_daily_groupby_tag`` と同じ構造のlistです。
+
+        ``user_ids`` が指定されていなければ集計済みのテーブルを参照し、指定されていれば日ごとの実績作業時間から集計します。
+        """
+        where_sql, params = _create_where_sql(
+            start_date=start_date, end_date=end_date, job_ids=job_ids, parent_job_ids=parent_job_ids, user_ids=user_ids, table_alias="d"
+        )
+        if user_ids is None:
+            total_source_sql = "cube_daily AS d"
+            tag_source_sql = "cube_daily_tag AS d"
+        else:
+            total_source_sql = "actual_daily AS d LEFT JOIN members AS m ON m.workspace_member_id = d.workspace_member_id"
+            tag_source_sql = (
+                "actual_daily AS d LEFT JOIN members AS m ON m.workspace_member_id = d.workspace_member_id"
+                " INNER JOIN tag_members AS t ON t.workspace_member_id = d.workspace_member_id"
+            )
+
+        df_total = self.read_sql(
+            f"""
+            SELECT d.date, j.parent_job_id, j.parent_job_name, d.job_id, j.job_name, SUM(d.actual_working_hours) AS actual_working_hours
+            FROM {total_source_sql}
+            LEFT JOIN jobs AS j ON j.job_id = d.job_id
+            WHERE d.actual_working_hours != 0 {where_sql}
+            GROUP BY d.date, d.job_id
+            ORDER BY d.date, d.job_id
+            """,
+            params,
+        )
+
+        tag_where_sql = where_sql
+        if workspace_tag_ids is not None:
+            tag_where_sql += _create_in_sql("tag.workspace_tag_id", "tag_id", workspace_tag_ids, params)
+        if workspace_tag_names is not None:
+            tag_where_sql += _create_in_sql("tag.workspace_tag_name", "tag_name", workspace_tag_names, params)
+        tag_id_column = "d.workspace_tag_id" if user_ids is None else "t.workspace_tag_id"
+        df_tag = self.read_sql(
+            f"""
+            SELECT d.date, d.job_id, tag.workspace_tag_name, SUM(d.actual_working_hours) AS actual_working_hours
+            FROM {tag_source_sql}
+            INNER JOIN tags AS tag ON tag.workspace_tag_id = {tag_id_column}
+            LEFT JOIN jobs AS j ON j.job_id = d.job_id
+            WHERE d.actual_working_hours != 0 {tag_where_sql}
+            GROUP BY d.date, d.job_id, tag.workspace_tag_name
+            """,
+            params,
+        )
+        tag_hours: dict[tuple[str, str], dict[str, float]] = {}
+        for date, job_id, workspace_tag_name, hours in df_tag.itertuples(index=False):
+            tag_hours.setdefault((date, job_id), {})[workspace_tag_name] = hours
+
+        results = []
+        for row in _to_records(df_total):
+            hours = dict(tag_hours.get((row["date"], row["job_id"]), {}))
+            hours["total"] = row["actual_working_hours"]
+            results.append(
+                {
+                    "date": row["date"],
+                    "job_id": row["job_id"],
+                    "job_name": row["job_name"],
+                    "actual_working_hours": hours,
+                    "parent_job_id": row["parent_job_id"],
+                    "parent_job_name": row["parent_job_name"],
+                }
+            )
+        return results
+
+    def read_actual_daily_by_job(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        job_ids: Collection[str] | None = None,
+        parent_job_ids: Collection[str] | None = None,
+    ) -> pandas.DataFrame:
+        """
+        ジョブごとに集計した日ごとの実績作業時間を返します。 ``actual_working_time list_daily_by_job`` と同じ列を持ちます。
+        """
+        where_sql, params = _create_where_sql(
+            start_date=start_date, end_date=end_date, job_ids=job_ids, parent_job_ids=parent_job_ids, user_ids=None, table_alias="d"
+        )
+        return self.read_sql(
+            f"""
+            SELECT d.date, j.parent_job_id, j.parent_job_name, d.job_id, j.job_name,
+                SUM(d.actual_working_hours) AS actual_working_hours, COUNT(DISTINCT d.workspace_member_id) AS active_user_count
+            FROM cube_daily AS d
+            LEFT JOIN jobs AS j ON j.job_id = d.job_id
+            WHERE d.actual_working_hours > 0 {where_sql}
+            GROUP BY d.date, d.job_id
+            ORDER BY d.date, d.job_id
+            """,
+            params,
+        )
+
+    def read_jobs(self) -> pandas.DataFrame:
+        """ジョブの一覧を返します。"""
+        return self.read_sql("SELECT job_id, job_name, parent_job_id, parent_job_name, annofab_project_id FROM jobs ORDER BY job_id")
+
+    def read_actual_hours_by_parent_job(
+        self, *, parent_job_ids: Collection[str], start_date: str | None = None, end_date: str | None = None
+    ) -> pandas.DataFrame:
+        """
+        親ジョブごとに集計した日ごとの実績作業時間を返します。
+
+        Returns:
+            "parent_job_id", "date", "actual_working_hours" 列を持つDataFrame
+        """
+        where_sql, params = _create_where_sql(
+            start_date=start_date, end_date=end_date, job_ids=None, parent_job_ids=None, user_ids=None, table_alias="p"
+        )
+        where_sql += _create_in_sql("p.parent_job_id", "parent_job_id", parent_job_ids, params)
+        return self.read_sql(
+            f"""
+            SELECT p.parent_job_id, p.date, SUM(p.actual_working_hours) AS actual_working_hours
+            FROM cube_daily_parent_job AS p
+            WHERE p.actual_working_hours != 0 {where_sql}
+            GROUP BY p.parent_job_id, p.date
+            ORDER BY p.parent_job_id, p.date
+            """,
+            params,
+        )
+
+    def read_assigned_daily(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        job_ids: Collection[str] | None = None,
+        user_ids: Collection[str] | None = None,
+    ) -> pandas.DataFrame:
+        """
+        日ごとのアサイン時間を返します。 ``schedule list_daily`` と同じ列を持ちます。
+        アサインは親ジョブに紐付いているので、 ``job_ids`` には親ジョブのjob_idを指定します。
+        """
+        where_sql, params = _create_where_sql(start_date=start_date, end_date=end_date, job_ids=job_ids, parent_job_ids=None, user_ids=user_ids)
+        return self.read_sql(
+            f"""
+            SELECT a.date, a.job_id, j.job_name, a.workspace_member_id, m.user_id, m.username, a.assigned_working_hours
+            FROM assigned_daily AS a
+            LEFT JOIN jobs AS j ON j.job_id = a.job_id
+            LEFT JOIN members AS m ON m.workspace_member_id = a.workspace_member_id
+            WHERE a.assigned_working_hours != 0 {where_sql}
+            ORDER BY a.date, a.job_id, m.user_id
+            """,
+            params,
+        )
+
+    def read_working_hours_daily(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        user_ids: Collection[str] | None = None,
+    ) -> pandas.DataFrame:
+        """
+        日ごとの実績作業時間とAnnofabの作業時間を返します。 ``annofab list_working_hours`` と同じ列を持ちます。
+
+        Annofabの作業時間は、AnnofabプロジェクトとAnnoworkのジョブが1対1で紐づく場合だけ格納されています。
+        キューブにはAnnofabプロジェクトのタイトルを格納していないので、annofab_project_title列はすべて欠損値です。
+        """
+        where_sql, params = _create_where_sql(
+            start_date=start_date, end_date=end_date, job_ids=None, parent_job_ids=None, user_ids=user_ids, table_alias="d"
+        )
+        df = self.read_sql(
+            f"""
+            SELECT d.date, j.parent_job_id, j.parent_job_name, d.job_id, j.job_name,
+                d.workspace_member_id, m.user_id, m.username, d.actual_working_hours,
+                j.annofab_project_id, NULL AS annofab_project_title, m.annofab_account_id, d.annofab_working_hours, a.notes
+            FROM cube_daily AS d
+            LEFT JOIN jobs AS j ON j.job_id = d.job_id
+            LEFT JOIN members AS m ON m.workspace_member_id = d.workspace_member_id
+            LEFT JOIN actual_daily AS a ON a.date = d.date AND a.workspace_member_id = d.workspace_member_id AND a.job_id = d.job_id
+            WHERE (d.actual_working_hours != 0 OR d.annofab_working_hours != 0) {where_sql}
+            ORDER BY d.date, d.job_id, m.user_id
+            """,
+            params,
+        )
+        df["notes"] = [json.loads(e) if isinstance(e, str) else None for e in df["notes"]]
+        return df
+
+    def read_user_company(self) -> pandas.DataFrame:
+        """
+        ワークスペースタグから判断したユーザの会社を返します。
+
+        Returns:
+            "user_id", "username", "company" 列を持つDataFrame
+        """
+        return self.read_sql(
+            """
+            SELECT m.user_id, m.username, tag.company
+            FROM tags AS tag
+            INNER JOIN tag_members AS t ON t.workspace_tag_id = tag.workspace_tag_id
+            INNER JOIN members AS m ON m.workspace_member_id = t.workspace_member_id
+            WHERE tag.company IS NOT NULL
+            ORDER BY tag.workspace_tag_name, m.user_id
+            """
+        )
+
+
+def _to_records(df: pandas.DataFrame) -> list[dict[str, Any]]:
+    """欠損値をNoneにして、DataFrameをdictのlistに変換します。"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _create_in_sql(column: str, param_prefix: str, values: Collection[str], params: dict[str, Any]) -> str:
+    names = []
+    for index, value in enumerate(values):
+        name = f"{param_prefix}_{index}"
+        params[name] = value
+        names.append(f":{name}")
+    return f" AND {column} IN ({', '.join(names)})"
+
+
+def _create_where_sql(
+    *,
+    start_date: str | None,
+    end_date: str | None,
+    job_ids: Collection[str] | None,
+    parent_job_ids: Collection[str] | None,
+    user_ids: Collection[str] | None,
+    table_alias: str = "a",
+) -> tuple[str, dict[str, Any]]:
+    """
+    絞り込み条件を表すSQL（先頭が ``AND`` ）とパラメータを返します。
+    ジョブは ``j`` 、メンバは ``m`` という別名で結合されていることを前提にしています。
+    """
+    sql = ""
+    params: dict[str, Any] = {}
+    if start_date is not None:
+        sql += f" AND {table_alias}.date >= :start_date"
+        params["start_date"] = start_date
+    if end_date is not None:
+        sql += f" AND {table_alias}.date <= :end_date"
+        params["end_date"] = end_date
+    if job_ids is not None:
+        sql += _create_in_sql(f"{table_alias}.job_id", "job_id", job_ids, params)
+    if parent_job_ids is not None:
+        sql += _create_in_sql("j.parent_job_id", "parent_job_id", parent_job_ids, params)
+    if user_ids is not None:
+        sql += _create_in_sql("m.user_id", "user_id", user_ids, params)
+    return sql, params
+
+
+def add_cube_argument(parser: argparse.ArgumentParser) -> None:
+    """``--cube`` 引数を追加します。"""
+    parser.add_argument(
+        "--cube",
+        type=Path,
+        help="``annoworkcli cube build`` で作成したキューブのファイル。指定した場合は、WebAPIにアクセスせずにキューブから出力します。",
+    )
@@ -1,3 +1,79 @@
 """
 jobに関するutil関係の関数
 """
+
+import logging
+import threading
+import weakref
+from collections.abc import Collection
+from functools import cached_property
+from typing import Any
+
+from annoworkapi.resource import Resource as AnnoworkResource
+
+from annoworkcli.common.annofab import AnnofabLinkageIndex
+from annoworkcli.common.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+
+class JobSnapshot:
+    """
+    ある時点のワークスペースのジョブ一覧と、そこから作成した索引。
+
+    Args:
+        jobs: ワークスペースのすべてのジョブ。変更しないでください。
+    """
+
+    def __init__(self, jobs: list[dict[str, Any]]) -> None:
+        self.jobs = jobs
+
+    @cached_property
+    def job_dict(self) -> dict[str, dict[str, Any]]:
+        """key:job_id, value:ジョブ"""
+        return {e["job_id"]: e for e in self.jobs}
+
+    @cached_property
+    def annofab_linkage_index(self) -> AnnofabLinkageIndex:
+        """ジョブとAnnofabプロジェクトの対応関係の索引"""
+        return AnnofabLinkageIndex.from_jobs(self.jobs)
+
+
+_lock = threading.Lock()
+_job_snapshots: "weakref.WeakKeyDictionary[Any, dict[str, JobSnapshot]]" = weakref.WeakKeyDictionary()
+"""key:annoworkapiのAnnoworkApiインスタンス, value:(key:workspace_id, value:JobSnapshot)"""
+
+
+def get_job_snapshot(annowork_service: AnnoworkResource, workspace_id: str, *, required_job_ids: Collection[str] | None = None) -> JobSnapshot:
+    """
+    ワークスペースのジョブ一覧を取得します。
+    同じannoworkapiのインスタンスとワークスペースに対しては、WebAPIを1回だけ呼び出して、その結果（索引も含む）を再利用します。
+    ジョブを変更するコマンドでは利用しないでください。
+
+    Args:
+        required_job_ids: キャッシュしたジョブ一覧に、これらのジョブが1つでも含まれていなければ、ジョブ一覧を取得し直します。
+            ``--watch`` のように長時間実行する処理で、途中で追加されたジョブを扱うために指定します。
+    """
+    api = annowork_service.api
+    with _lock:
+        try:
+            snapshot = _job_snapshots.get(api, {}).get(workspace_id)
+        except TypeError:
+            # 弱参照を作れないオブジェクト（テスト用のスタブなど）はキャッシュしない
+            snapshot = None
+    if snapshot is not None and (required_job_ids is None or all(e in snapshot.job_dict for e in required_job_ids)):
+        return snapshot
+
+    with phase("fetch_jobs"):
+        snapshot = JobSnapshot(api.get_jobs(workspace_id))
+    with _lock:
+        try:
+            _job_snapshots.setdefault(api, {})[workspace_id] = snapshot
+        except TypeError:
+            pass
+    return snapshot
+
+
+def get_all_jobs(annowork_service: AnnoworkResource, workspace_id: str, *, required_job_ids: Collection[str] | None = None) -> list[dict[str, Any]]:
+    """:func:`get_job_snapshot` で取得したワークスペースのすべてのジョブを返します。"""
+    return get_job_snapshot(annowork_service, workspace_id, required_job_ids=required_job_ids).jobs
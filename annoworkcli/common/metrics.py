@@ -0,0 +1,231 @@
+"""
+処理時間、WebAPIの呼び出し回数、メモリ使用量などの計測情報を記録するための処理
+
+処理のまとまり（フェーズ）ごとの時間は :func:`phase` で計測します。
+
+.. code-block:: python
+
+    with phase("fetch_jobs"):
+        jobs = annowork_service.api.get_jobs(workspace_id)
+
+計測情報は、コマンドライン引数 ``--metrics`` を指定すると、コマンドの終了時にJSON形式で標準エラー出力に出力されます。
+"""
+
+import cProfile
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+from annoworkcli.common.trace import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class PhaseMetrics:
+    count: int = 0
+    """フェーズを実行した回数"""
+    total_seconds: float = 0.0
+    """フェーズの合計時間[秒]"""
+
+
+@dataclass
+class ApiMetrics:
+    call_count: int = 0
+    """WebAPIの呼び出し回数"""
+    response_bytes: int = 0
+    """レスポンスボディの合計バイト数"""
+
+
+class MetricsRecorder:
+    """
+    計測情報を記録します。複数のスレッドから利用できます。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+        self.phases: dict[str, PhaseMetrics] = {}
+        """key:フェーズ名"""
+        self.apis: dict[str, ApiMetrics] = {}
+        """key:WebAPIのホスト名"""
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        ``with`` ブロック内の処理時間を、フェーズ ``name`` の時間として記録します。
+        フェーズは入れ子にできます。その場合、外側のフェーズの時間には内側のフェーズの時間も含まれます。
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_seconds = time.perf_counter() - start_time
+            with self._lock:
+                phase_metrics = self.phases.setdefault(name, PhaseMetrics())
+                phase_metrics.count += 1
+                phase_metrics.total_seconds += elapsed_seconds
+
+    def record_response(self, response: requests.Response, *, is_stream: bool = False) -> None:
+        """WebAPIのレスポンスを記録します。"""
+        if is_stream:
+            # ストリームの場合はレスポンスボディを読み込まないように、Content-Lengthヘッダの値を利用する
+            response_bytes = int(response.headers.get("Content-Length", 0))
+        else:
+            response_bytes = len(response.content)
+
+        host = urlparse(response.url).netloc
+        with self._lock:
+            api_metrics = self.apis.setdefault(host, ApiMetrics())
+            api_metrics.call_count += 1
+            api_metrics.response_bytes += response_bytes
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            result: dict[str, Any] = {
+                "elapsed_seconds": time.perf_counter() - self._start_time,
+                "phases": {
+                    name: {"count": e.count, "total_seconds": e.total_seconds}
+                    for name, e in sorted(self.phases.items(), key=lambda item: item[1].total_seconds, reverse=True)
+                },
+                "apis": {host: {"call_count": e.call_count, "response_bytes": e.response_bytes} for host, e in self.apis.items()},
+            }
+
+        if tracemalloc.is_tracing():
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            result["peak_memory_bytes"] = peak_bytes
+        return result
+
+
+_metrics_recorder = MetricsRecorder()
+
+
+def get_metrics_recorder() -> MetricsRecorder:
+    return _metrics_recorder
+
+
+def reset_metrics_recorder() -> None:
+    """計測情報を初期化します。"""
+    global _metrics_recorder  # noqa: PLW0603
+    _metrics_recorder = MetricsRecorder()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    処理時間を計測するフェーズを表すコンテキストマネージャを返します。 :meth:`MetricsRecorder.phase` を参照してください。
+    ``--trace`` が指定されている場合は、フェーズをスパンとしても記録します。
+    """
+    with _metrics_recorder.phase(name), span(name):
+        yield
+
+
+def record_response_hook(response: requests.Response, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401, ARG001
+    """
+    ``requests.Session`` のresponseフックに登録して、WebAPIの呼び出し回数とレスポンスのバイト数を記録します。
+    Sessionをpickleできるように、モジュールレベルの関数にしています。
+    """
+    _metrics_recorder.record_response(response, is_stream=bool(kwargs.get("stream", False)))
+
+
+_worker_profilers: list[cProfile.Profile] | None = None
+"""``--profile`` を指定した場合に、ワーカースレッドごとに作成したプロファイラ。プロファイリングしていない場合はNone"""
+
+_worker_profilers_lock = threading.Lock()
+
+_thread_local = threading.local()
+
+
+def _get_worker_profiler(worker_profilers: list[cProfile.Profile]) -> cProfile.Profile:
+    """現在のスレッドのプロファイラを返します。なければ作成して ``worker_profilers`` に追加します。"""
+    if getattr(_thread_local, "worker_profilers", None) is not worker_profilers:
+        _thread_local.worker_profilers = worker_profilers
+        _thread_local.profiler = cProfile.Profile()
+        with _worker_profilers_lock:
+            worker_profilers.append(_thread_local.profiler)
+    return _thread_local.profiler
+
+
+def profile_worker_thread(func: Callable[[T], R]) -> Callable[[T], R]:
+    """
+    ``func`` をワーカースレッドで実行しても、 ``--profile`` のプロファイリングの対象になるようにした関数を返します。
+
+    cProfileはプロファイラを有効にしたスレッドしかプロファイリングしないので、ワーカースレッドごとにプロファイラを作成して、
+    :func:`profile_and_measure` の終了時にメインスレッドの結果とまとめて出力します。
+    """
+    worker_profilers = _worker_profilers
+    if worker_profilers is None:
+        return func
+
+    def wrapper(item: T) -> R:
+        if threading.current_thread() is threading.main_thread():
+            # メインスレッドはすでにプロファイリングされている
+            return func(item)
+        profiler = _get_worker_profiler(worker_profilers)
+        profiler.enable()
+        try:
+            return func(item)
+        finally:
+            profiler.disable()
+
+    return wrapper
+
+
+def _dump_profile_stats(profiler: cProfile.Profile, worker_profilers: list[cProfile.Profile], output: Path) -> None:
+    stats = pstats.Stats(profiler)
+    for worker_profiler in worker_profilers:
+        stats.add(worker_profiler)
+    output.parent.mkdir(exist_ok=True, parents=True)
+    stats.dump_stats(output)
+
+
+@contextmanager
+def profile_and_measure(*, profile_output: Path | None, is_output_metrics: bool) -> Iterator[None]:
+    """
+    ``with`` ブロック内の処理をプロファイリング、計測します。
+
+    Args:
+        profile_output: cProfileの結果（pstats形式）の出力先。Noneならプロファイリングしません。
+            :func:`profile_worker_thread` でラップした関数を実行したワーカースレッドの結果も含めます。
+        is_output_metrics: Trueなら、終了時に計測情報をJSON形式で標準エラー出力に出力します。
+            メモリ使用量のピークを計測するため、tracemallocを有効にします。
+    """
+    reset_metrics_recorder()
+    if is_output_metrics:
+        tracemalloc.start()
+
+    global _worker_profilers  # noqa: PLW0603
+    profiler = cProfile.Profile() if profile_output is not None else None
+    worker_profilers: list[cProfile.Profile] = []
+    if profiler is not None:
+        _worker_profilers = worker_profilers
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _worker_profilers = None
+            assert profile_output is not None
+            _dump_profile_stats(profiler, worker_profilers, profile_output)
+            logger.info(f"プロファイリングの結果を '{profile_output}' に出力しました。 `python -m pstats {profile_output}` で確認できます。")
+
+        if is_output_metrics:
+            # 標準出力にはコマンドの結果が出力される場合があるので、標準エラー出力に出力する
+            sys.stderr.write(json.dumps(get_metrics_recorder().to_dict(), ensure_ascii=False, indent=2) + "\n")
+            tracemalloc.stop()
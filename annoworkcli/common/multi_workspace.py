@@ -0,0 +1,148 @@
+"""
+複数のワークスペースに対してコマンドを実行するための処理
+
+``add_workspace_ids_argument_with_env_fallback`` で追加した ``--workspace_id`` に複数のワークスペースIDが指定された場合、
+ワークスペースごとのコマンドを実行して、それぞれの出力結果に ``workspace_id`` 列を追加して1個のファイルにまとめます。
+``--max_concurrency`` を指定した場合は、ワークスペースごとのコマンドを並行して実行します。
+ログイン済みのannoworkapi, annofabapiのインスタンスは、すべてのワークスペースで共有します。
+"""
+
+import argparse
+import copy
+import json
+import logging
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pandas
+from annoworkapi.resource import Resource as AnnoworkResource
+
+from annoworkcli.annofab.utils import share_annofabapi_resource
+from annoworkcli.common.cli import ALL_WORKSPACES, OutputFormat, build_annoworkapi, set_shared_annoworkapi
+from annoworkcli.common.concurrency import map_concurrently
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.writer import OutputOptions, get_output_options, set_output_options
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_ID_COLUMN = "workspace_id"
+
+
+def is_multi_workspace(args: argparse.Namespace) -> bool:
+    """複数のワークスペースを対象にしたコマンドライン引数かどうかを返します。"""
+    workspace_id = getattr(args, "workspace_id", None)
+    return isinstance(workspace_id, list) and (len(workspace_id) > 1 or ALL_WORKSPACES in workspace_id)
+
+
+def resolve_workspace_ids(annowork_service: AnnoworkResource, workspace_ids: list[str]) -> list[str]:
+    """
+    対象のワークスペースIDのlistを返します。
+    ``all`` が指定されている場合は、自分が所属するすべてのワークスペースに置き換えます。重複は除きます。
+    """
+    result: list[str] = []
+    for workspace_id in workspace_ids:
+        if workspace_id == ALL_WORKSPACES:
+            my_workspace_members = annowork_service.api.get_my_workspace_members()
+            result.extend(e["workspace_id"] for e in my_workspace_members if e.get("status") != "inactive")
+        else:
+            result.append(workspace_id)
+    return list(dict.fromkeys(result))
+
+
+def _get_output_format(args: argparse.Namespace) -> OutputFormat:
+    output_format = getattr(args, "format", None)
+    return OutputFormat(output_format) if output_format is not None else OutputFormat.CSV
+
+
+def merge_csv_files(csv_files: dict[str, Path]) -> pandas.DataFrame:
+    """
+    ワークスペースごとのCSVファイルを、先頭に ``workspace_id`` 列を追加して結合します。
+    値の表現が変わらないように、すべての列を文字列として読み込みます。
+
+    Args:
+        csv_files: key:workspace_id, value:CSVファイルのパス
+    """
+    dfs = []
+    for workspace_id, csv_file in csv_files.items():
+        df = pandas.read_csv(csv_file, dtype=str, keep_default_na=False, encoding="utf_8_sig")
+        df.insert(0, WORKSPACE_ID_COLUMN, workspace_id)
+        dfs.append(df)
+    if len(dfs) == 0:
+        return pandas.DataFrame(columns=[WORKSPACE_ID_COLUMN])
+    return pandas.concat(dfs, ignore_index=True)
+
+
+def merge_json_files(json_files: dict[str, Path]) -> list[Any]:
+    """
+    ワークスペースごとのJSONファイル（要素がdictのlist）を、各要素に ``workspace_id`` を追加して結合します。
+
+    Args:
+        json_files: key:workspace_id, value:JSONファイルのパス
+    """
+    result: list[Any] = []
+    for workspace_id, json_file in json_files.items():
+        with json_file.open(encoding="utf-8") as f:
+            elements = json.load(f)
+        if not isinstance(elements, list):
+            elements = [elements]
+        result.extend(
+            {WORKSPACE_ID_COLUMN: workspace_id, **e} if isinstance(e, dict) else {WORKSPACE_ID_COLUMN: workspace_id, "value": e} for e in elements
+        )
+    return result
+
+
+def run_for_each_workspace(args: argparse.Namespace, subcommand_func: Callable[[argparse.Namespace], None]) -> None:
+    """
+    ワークスペースごとに ``subcommand_func`` を実行して、結果を出力します。 ``--max_concurrency`` を指定した場合は並行して実行します。
+
+    ``--partition_by_workspace`` が指定されている場合は、 ``--output`` のディレクトリにワークスペースごとのファイルを出力します。
+    そうでなければ、ワークスペースごとの結果を一時ファイルに出力してから、 ``workspace_id`` 列を追加して1個のファイルにまとめます。
+    """
+    output_format = _get_output_format(args)
+    if args.partition_by_workspace and args.output is None:
+        raise CommandLineArgumentError("`--partition_by_workspace` を指定する場合は、`--output` も指定してください。")
+    if getattr(args, "watch", None) is not None:
+        raise CommandLineArgumentError("`--watch` を指定する場合は、`--workspace_id` に1個のワークスペースIDを指定してください。")
+
+    annowork_service = build_annoworkapi(args)
+    if annowork_service.api.token_dict is None:
+        # ワークスペースごとのスレッドがそれぞれログインしないように、事前にログインしておく
+        annowork_service.api.login()
+    workspace_ids = resolve_workspace_ids(annowork_service, args.workspace_id)
+    logger.info(f"{len(workspace_ids)} 件のワークスペースに対してコマンドを実行します。 :: {workspace_ids=}")
+
+    with tempfile.TemporaryDirectory() as str_temp_dir:
+        output_dir = args.output if args.partition_by_workspace else Path(str_temp_dir)
+
+        def run(workspace_id: str) -> Path:
+            workspace_args = copy.copy(args)
+            workspace_args.workspace_id = workspace_id
+            workspace_args.output = output_dir / f"{workspace_id}.{output_format.value}"
+            subcommand_func(workspace_args)
+            return workspace_args.output
+
+        output_options = get_output_options()
+        if not args.partition_by_workspace:
+            # ワークスペースごとの一時ファイルは分割・圧縮せずに出力して、まとめたファイルに対して分割・圧縮する
+            set_output_options(OutputOptions())
+        set_shared_annoworkapi(annowork_service)
+        try:
+            with share_annofabapi_resource():
+                results = map_concurrently(run, workspace_ids, progress_description="ワークスペースごとのコマンドの実行")
+                output_files = dict(zip(workspace_ids, results, strict=True))
+        finally:
+            set_shared_annoworkapi(None)
+            set_output_options(output_options)
+
+        if args.partition_by_workspace:
+            return
+
+        # 出力対象のデータが存在しないと、ファイルを出力しないコマンドもある
+        output_files = {workspace_id: output_file for workspace_id, output_file in output_files.items() if output_file.exists()}
+        if output_format == OutputFormat.JSON:
+            print_json(merge_json_files(output_files), is_pretty=True, output=args.output)
+        else:
+            print_csv(merge_csv_files(output_files), output=args.output)
@@ -0,0 +1,267 @@
+"""
+件数の多いWebAPIの呼び出しや更新処理の進捗を表示するための処理
+
+.. code-block:: python
+
+    with track_progress("実績作業時間の削除", total=len(actual_working_times)) as progress:
+        for actual in actual_working_times:
+            delete(actual)
+            progress.advance()
+
+標準エラー出力が端末の場合は、処理件数、1秒あたりの処理件数、実行中の件数、リトライ回数、残り時間の目安を1行で表示して更新し続けます。
+端末でない場合（リダイレクトやCIなど）は、同じ情報を ``key=value`` 形式のログとして一定間隔で出力します。
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, TextIO
+
+from annoworkcli.common.transport import get_transport_controller
+
+logger = logging.getLogger(__name__)
+
+LOG_INTERVAL_SECONDS = 10.0
+"""端末でない場合に、進捗をログに出力する間隔[秒]"""
+
+TTY_REFRESH_INTERVAL_SECONDS = 0.2
+"""端末の場合に、進捗の表示を更新する間隔[秒]"""
+
+TTY_DELAY_SECONDS = 1.0
+"""端末の場合に、進捗を表示し始めるまでの時間[秒]。すぐに終わる処理で表示がちらつかないようにするため。"""
+
+_tty_lock = threading.Lock()
+_tty_owner: "Progress | None" = None
+"""端末に進捗を表示しているProgress。複数の進捗が同時に1行を奪い合わないように、端末に表示するのは1個だけにします。"""
+
+
+def _get_retry_count() -> int:
+    controller = get_transport_controller()
+    return controller.retry_count if controller is not None else 0
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """ある時点での進捗"""
+
+    description: str
+    done: int
+    """処理が終わった件数（失敗した件数も含む）"""
+    total: int | None
+    """全体の件数。不明な場合はNone"""
+    failed: int
+    """処理に失敗した件数"""
+    in_flight: int
+    """実行中の件数"""
+    retries: int
+    """進捗の計測を始めてから、WebAPIへのリクエストをリトライした回数"""
+    elapsed_seconds: float
+    items_per_second: float
+    eta_seconds: float | None
+    """残り時間の目安[秒]。全体の件数が不明な場合や、まだ1件も終わっていない場合はNone"""
+
+    def to_log_message(self) -> str:
+        """ログに出力する ``key=value`` 形式の文字列を返します。"""
+        eta = f"{self.eta_seconds:.0f}" if self.eta_seconds is not None else "-"
+        return (
+            f"progress: description={self.description} done={self.done} total={self.total if self.total is not None else '-'} "
+            f"failed={self.failed} in_flight={self.in_flight} retries={self.retries} "
+            f"items_per_second={self.items_per_second:.2f} elapsed_seconds={self.elapsed_seconds:.0f} eta_seconds={eta}"
+        )
+
+    def to_tty_line(self) -> str:
+        """端末に表示する1行の文字列を返します。"""
+        if self.total is not None and self.total > 0:
+            count = f"{self.done}/{self.total} 件 ({self.done / self.total:.0%})"
+        else:
+            count = f"{self.done} 件"
+        line = f"{self.description}: {count} {self.items_per_second:.1f} 件/秒"
+        if self.in_flight > 0:
+            line += f" 実行中 {self.in_flight}"
+        if self.failed > 0:
+            line += f" 失敗 {self.failed}"
+        if self.retries > 0:
+            line += f" リトライ {self.retries}"
+        line += f" 経過 {_format_duration(self.elapsed_seconds)}"
+        if self.eta_seconds is not None:
+            line += f" 残り {_format_duration(self.eta_seconds)}"
+        return line
+
+
+class Progress:
+    """
+    処理の進捗を記録して表示します。複数のスレッドから利用できます。
+
+    Args:
+        description: 処理の内容
+        total: 全体の件数。不明な場合はNone
+        stream: 進捗を表示する出力先。Noneなら標準エラー出力です。
+        is_tty: 出力先が端末かどうか。Noneなら ``stream`` から判定します。
+        clock: 現在時刻[秒]を返す関数
+    """
+
+    def __init__(
+        self,
+        description: str,
+        total: int | None = None,
+        *,
+        stream: TextIO | None = None,
+        is_tty: bool | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.description = description
+        self.total = total
+        self._stream = stream if stream is not None else sys.stderr
+        self._is_tty = is_tty if is_tty is not None else self._stream.isatty()
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._done = 0
+        self._failed = 0
+        self._in_flight = 0
+        self._start_time = clock()
+        self._start_retry_count = _get_retry_count()
+        self._last_output_time = self._start_time
+        self._is_rendered = False
+
+    def snapshot(self) -> ProgressSnapshot:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> ProgressSnapshot:
+        elapsed_seconds = self._clock() - self._start_time
+        items_per_second = self._done / elapsed_seconds if elapsed_seconds > 0 else 0.0
+        eta_seconds = None
+        if self.total is not None and items_per_second > 0:
+            eta_seconds = max(0, self.total - self._done) / items_per_second
+        return ProgressSnapshot(
+            description=self.description,
+            done=self._done,
+            total=self.total,
+            failed=self._failed,
+            in_flight=self._in_flight,
+            retries=_get_retry_count() - self._start_retry_count,
+            elapsed_seconds=elapsed_seconds,
+            items_per_second=items_per_second,
+            eta_seconds=eta_seconds,
+        )
+
+    def advance(self, count: int = 1) -> None:
+        """処理が終わった件数を増やします。失敗した処理も、処理が終わった件数として数えます。"""
+        with self._lock:
+            self._done += count
+            self._output(is_final=False)
+
+    def record_failure(self, count: int = 1) -> None:
+        """処理に失敗した件数を増やします。処理が終わった件数は増やさないので、別途 :meth:`advance` を呼んでください。"""
+        with self._lock:
+            self._failed += count
+
+    @contextmanager
+    def track_item(self) -> Iterator[None]:
+        """
+        ``with`` ブロック内の処理を、実行中の1件として数えます。
+        ブロックを抜けると処理が終わった件数を増やし、例外が発生した場合は失敗した件数としても数えます。
+        """
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        except BaseException:
+            self.record_failure()
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self.advance()
+
+    def close(self) -> None:
+        """最終的な進捗を出力します。端末の場合は、進捗を表示していた行を確定させます。"""
+        with self._lock:
+            self._output(is_final=True)
+            if self._is_tty:
+                _release_tty(self)
+
+    def clear_line(self) -> None:
+        """端末に表示している進捗を消します。次に進捗を出力するときに再び表示します。"""
+        with self._lock:
+            if self._is_rendered:
+                self._stream.write("\r\x1b[K")
+                self._stream.flush()
+                self._is_rendered = False
+
+    def _output(self, *, is_final: bool) -> None:
+        now = self._clock()
+        if self._is_tty and _acquire_tty(self):
+            if is_final:
+                if self._is_rendered:
+                    self._stream.write(f"\r\x1b[K{self._snapshot().to_tty_line()}\n")
+                    self._stream.flush()
+                    self._is_rendered = False
+                return
+            if now - self._start_time < TTY_DELAY_SECONDS or (self._is_rendered and now - self._last_output_time < TTY_REFRESH_INTERVAL_SECONDS):
+                return
+            self._stream.write(f"\r\x1b[K{self._snapshot().to_tty_line()}")
+            self._stream.flush()
+            self._is_rendered = True
+            self._last_output_time = now
+            return
+
+        if is_final:
+            logger.debug(self._snapshot().to_log_message())
+            return
+        if now - self._last_output_time >= LOG_INTERVAL_SECONDS:
+            snapshot = self._snapshot()
+            logger.info(snapshot.to_log_message(), extra={"progress": asdict(snapshot)})
+            self._last_output_time = now
+
+
+def _acquire_tty(progress: Progress) -> bool:
+    global _tty_owner  # noqa: PLW0603
+    with _tty_lock:
+        if _tty_owner is None:
+            _tty_owner = progress
+        return _tty_owner is progress
+
+
+def _release_tty(progress: Progress) -> None:
+    global _tty_owner  # noqa: PLW0603
+    with _tty_lock:
+        if _tty_owner is progress:
+            _tty_owner = None
+
+
+def clear_progress_line() -> None:
+    """
+    端末に表示している進捗を消します。
+    進捗を表示している途中で、標準入力から確認を求める場合などに利用します。
+    """
+    with _tty_lock:
+        owner = _tty_owner
+    if owner is not None:
+        owner.clear_line()
+
+
+@contextmanager
+def track_progress(description: str, total: int | None = None, **kwargs: Any) -> Iterator[Progress]:  # noqa: ANN401
+    """
+    ``with`` ブロック内の処理の進捗を表示する :class:`Progress` を返します。
+    ブロックを抜けると、最終的な進捗を出力します。引数は :class:`Progress` と同じです。
+    """
+    progress = Progress(description, total, **kwargs)
+    try:
+        yield progress
+    finally:
+        progress.close()
@@ -0,0 +1,231 @@
+"""
+入力ファイルの読み込み
+
+``--actual_file`` などに指定された、コマンドの出力ファイル（CSV, JSON, JSON Lines, Parquet）を読み込みます。
+
+* 列ごとにdtypeを指定して読み込むので、型の推論に時間がかからず、IDなどの文字列が数値に変換されることもありません。
+* 必要な列だけを読み込みます。
+* CSVとJSON Linesは一定の行数ごとに読み込み、読み込んだ行を日付やユーザで絞り込んでから結合します。
+  行数を指定せずに一度に読み込む場合、CSVは ``pyarrow`` がインストールされていれば、pyarrowのエンジンで読み込みます。
+  Parquetは絞り込み条件をpyarrowに渡して、読み込む段階で絞り込みます。
+"""
+
+import gzip
+import importlib
+import json
+import logging
+from collections.abc import Collection, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import pandas
+
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROW_COUNT = 100_000
+"""CSVとJSON Linesを1回に読み込む行数"""
+
+SUPPORTED_SUFFIXES = [".csv", ".json", ".jsonl", ".ndjson", ".parquet"]
+"""読み込めるファイルの拡張子。CSV, JSON, JSON Linesは ``.gz`` で圧縮されていても読み込めます。"""
+
+
+@dataclass(frozen=True)
+class RowFilter:
+    """読み込む段階で適用する絞り込み条件"""
+
+    start_date: str | None = None
+    end_date: str | None = None
+    user_ids: Collection[str] | None = None
+
+    @property
+    def columns(self) -> list[str]:
+        """絞り込みに使う列"""
+        result = []
+        if self.start_date is not None or self.end_date is not None:
+            result.append("date")
+        if self.user_ids is not None:
+            result.append("user_id")
+        return result
+
+    def apply(self, df: pandas.DataFrame) -> pandas.DataFrame:
+        """絞り込み条件に一致する行を返します。絞り込みに使う列が存在しない場合、その条件は無視します。"""
+        if self.start_date is not None and "date" in df.columns:
+            df = df[df["date"] >= self.start_date]
+        if self.end_date is not None and "date" in df.columns:
+            df = df[df["date"] <= self.end_date]
+        if self.user_ids is not None and "user_id" in df.columns:
+            df = df[df["user_id"].isin(set(self.user_ids))]
+        return df
+
+    def to_parquet_filters(self, columns: Collection[str]) -> list[tuple[str, str, Any]] | None:
+        """pyarrowに渡す絞り込み条件を返します。"""
+        filters: list[tuple[str, str, Any]] = []
+        if self.start_date is not None and "date" in columns:
+            filters.append(("date", ">=", self.start_date))
+        if self.end_date is not None and "date" in columns:
+            filters.append(("date", "<=", self.end_date))
+        if self.user_ids is not None and "user_id" in columns:
+            filters.append(("user_id", "in", list(self.user_ids)))
+        return filters if len(filters) > 0 else None
+
+
+def _get_format_suffix(input_file: Path) -> str:
+    """ファイルの形式を表す拡張子（ ``.gz`` を除いた拡張子）を返します。"""
+    suffixes = [e.lower() for e in input_file.suffixes]
+    if len(suffixes) >= 2 and suffixes[-1] == ".gz":
+        return suffixes[-2]
+    return suffixes[-1] if len(suffixes) > 0 else ""
+
+
+def _import_pyarrow_parquet() -> ModuleType:
+    try:
+        return importlib.import_module("pyarrow.parquet")
+    except ImportError as e:
+        raise CommandLineArgumentError("Parquetファイルを読み込むには、`pyarrow` パッケージをインストールしてください。") from e
+
+
+def _is_pyarrow_installed() -> bool:
+    try:
+        importlib.import_module("pyarrow")
+    except ImportError:
+        return False
+    return True
+
+
+def _get_usecols(all_columns: Collection[str], dtypes: dict[str, str], columns: Collection[str] | None) -> list[str]:
+    """ファイルに存在する列のうち、読み込む列を返します。"""
+    target_columns = set(columns) if columns is not None else set(dtypes.keys())
+    return [c for c in all_columns if c in target_columns]
+
+
+def _astype(df: pandas.DataFrame, dtypes: dict[str, str]) -> pandas.DataFrame:
+    return df.astype({c: dtype for c, dtype in dtypes.items() if c in df.columns})
+
+
+def _iter_csv(input_file: Path, *, dtypes: dict[str, str], columns: Collection[str] | None, chunk_size: int | None) -> Iterator[pandas.DataFrame]:
+    header = pandas.read_csv(input_file, nrows=0, encoding="utf_8_sig").columns
+    usecols = _get_usecols(header, dtypes, columns)
+    kwargs: dict[str, Any] = {"usecols": usecols, "dtype": {c: dtypes[c] for c in usecols if c in dtypes}, "encoding": "utf_8_sig"}
+    if chunk_size is not None:
+        # pyarrowのエンジンはチャンク単位の読み込みに対応していないので、Cのエンジンで読み込む
+        yield from pandas.read_csv(input_file, chunksize=chunk_size, **kwargs)
+        return
+
+    # 一度に読み込む場合は、マルチスレッドで高速に読み込めるpyarrowのエンジンを利用する
+    yield pandas.read_csv(input_file, engine="pyarrow" if _is_pyarrow_installed() else "c", **kwargs)
+
+
+def _iter_json(input_file: Path, *, dtypes: dict[str, str], columns: Collection[str] | None, chunk_size: int | None) -> Iterator[pandas.DataFrame]:
+    opener: Any = gzip.open if input_file.suffix.lower() == ".gz" else open
+    with opener(input_file, "rt", encoding="utf-8") as f:
+        records = json.load(f)
+
+    if len(records) == 0:
+        return
+    all_columns = list(dict.fromkeys(key for record in records for key in record))
+    usecols = _get_usecols(all_columns, dtypes, columns)
+    step = chunk_size if chunk_size is not None else len(records)
+    for start in range(0, len(records), step):
+        yield _astype(pandas.DataFrame(records[start : start + step], columns=usecols), dtypes)
+
+
+def _iter_json_lines(
+    input_file: Path, *, dtypes: dict[str, str], columns: Collection[str] | None, chunk_size: int | None
+) -> Iterator[pandas.DataFrame]:
+    # `dtype=False`を指定する理由：日付などの文字列が、日時や数値に変換されないようにするため
+    if chunk_size is None:
+        df = pandas.read_json(input_file, lines=True, dtype=False, convert_dates=False)
+        yield _astype(df[_get_usecols(df.columns, dtypes, columns)], dtypes)
+        return
+
+    with pandas.read_json(input_file, lines=True, dtype=False, convert_dates=False, chunksize=chunk_size) as reader:
+        for df in reader:
+            usecols = _get_usecols(df.columns, dtypes, columns)
+            yield _astype(df[usecols], dtypes)
+
+
+def iter_input_file(
+    input_file: Path,
+    *,
+    dtypes: dict[str, str],
+    columns: Collection[str] | None = None,
+    row_filter: RowFilter | None = None,
+    chunk_size: int | None = CHUNK_ROW_COUNT,
+) -> Iterator[pandas.DataFrame]:
+    """
+    入力ファイルを一定の行数ごとに読み込んで、絞り込んだDataFrameを返します。
+
+    Args:
+        input_file: CSV, JSON, JSON Lines, Parquetファイル。拡張子でファイルの形式を判断します。
+        dtypes: key:列名, value:dtype。 ``columns`` が未指定の場合は、ここに含まれる列だけを読み込みます。
+        columns: 読み込む列。ファイルに存在しない列は無視します。
+        row_filter: 読み込む段階で適用する絞り込み条件
+        chunk_size: CSVとJSON Linesを1回に読み込む行数。Noneなら一度に読み込みます。
+
+    Raises:
+        CommandLineArgumentError: ファイルの拡張子がサポート対象外の場合、またはParquetファイルを読み込むのに必要なパッケージがない場合
+    """
+    # 絞り込みに使う列も読み込んで、絞り込んだ後に除外する
+    filter_only_columns: list[str] = []
+    if columns is not None and row_filter is not None:
+        filter_only_columns = [c for c in row_filter.columns if c not in columns]
+        columns = [*columns, *filter_only_columns]
+
+    format_suffix = _get_format_suffix(input_file)
+    if format_suffix == ".parquet":
+        pq = _import_pyarrow_parquet()
+        usecols = _get_usecols(pq.read_schema(input_file).names, dtypes, columns)
+        filters = row_filter.to_parquet_filters(usecols) if row_filter is not None else None
+        df_parquet = _astype(pq.read_table(input_file, columns=usecols, filters=filters).to_pandas(), dtypes)
+        yield df_parquet.drop(columns=filter_only_columns, errors="ignore")
+        return
+
+    if format_suffix == ".csv":
+        chunks = _iter_csv(input_file, dtypes=dtypes, columns=columns, chunk_size=chunk_size)
+    elif format_suffix == ".json":
+        chunks = _iter_json(input_file, dtypes=dtypes, columns=columns, chunk_size=chunk_size)
+    elif format_suffix in {".jsonl", ".ndjson"}:
+        chunks = _iter_json_lines(input_file, dtypes=dtypes, columns=columns, chunk_size=chunk_size)
+    else:
+        raise CommandLineArgumentError(
+            f"ファイル '{input_file}' の拡張子はサポート対象外です。拡張子は {', '.join(SUPPORTED_SUFFIXES)} のみサポートしています。"
+        )
+
+    for df in chunks:
+        if row_filter is not None:
+            df = row_filter.apply(df)  # noqa: PLW2901
+        yield df.drop(columns=filter_only_columns, errors="ignore")
+
+
+def read_input_file(
+    input_file: Path,
+    *,
+    dtypes: dict[str, str],
+    columns: Collection[str] | None = None,
+    row_filter: RowFilter | None = None,
+    chunk_size: int | None = CHUNK_ROW_COUNT,
+) -> pandas.DataFrame:
+    """
+    入力ファイルを読み込んで、絞り込んだDataFrameを返します。引数は :func:`iter_input_file` と同じです。
+    ファイルに存在しない列は、空の列として追加します。
+    """
+    usecols = list(columns) if columns is not None else list(dtypes.keys())
+    with phase("read_input_file"):
+        dfs = list(iter_input_file(input_file, dtypes=dtypes, columns=columns, row_filter=row_filter, chunk_size=chunk_size))
+        df_empty = _astype(pandas.DataFrame(columns=usecols), dtypes)
+        if len(dfs) == 0:
+            return df_empty
+        df = pandas.concat(dfs, ignore_index=True)
+
+    missing_columns = [c for c in usecols if c not in df.columns]
+    if len(missing_columns) > 0:
+        logger.warning(f"ファイル '{input_file}' に次の列が存在しません。 :: {missing_columns}")
+        for column in missing_columns:
+            df[column] = df_empty[column].reindex(df.index)
+    logger.debug(f"ファイル '{input_file}' から {len(df)} 件の行を読み込みました。")
+    return df
@@ -0,0 +1,257 @@
+"""
+2個のスナップショット（またはキューブ）の間で、テーブルの行の追加・更新・削除を求めるための処理
+
+テーブルの行を、行を一意に識別するキーの昇順に1行ずつ読みながら、2個のテーブルを突き合わせます（マージジョイン）。
+行の内容はハッシュ値で比較するので、突き合わせるときにメモリに保持するのはそれぞれのテーブルの現在の1行だけです。
+
+スナップショット（ ``annoworkcli workspace snapshot`` ）のテーブルはWebAPIのレスポンスの順に格納されているので、
+一定の行数ごとにキーで並べ替えて一時ファイルに書き出し、一時ファイルをマージしながら読み込みます（外部ソート）。
+キューブ（ ``annoworkcli cube build`` ）のテーブルは、主キーの昇順にSQLで読み込みます。
+どちらの場合も、テーブルの大きさによらず少ないメモリで差分を求められます。
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import tempfile
+import zipfile
+from collections.abc import Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Protocol
+
+from annoworkcli.common.cube import DIMENSION_TABLES, FACT_TABLES, WorkingHoursCube
+from annoworkcli.common.exeptions import AnnoworkCliException
+from annoworkcli.common.workspace_snapshot import TABLE_KEY_COLUMNS, TableFormat, get_row_key, iter_table_rows, read_manifest
+
+logger = logging.getLogger(__name__)
+
+KeyedRows = Iterator[tuple[tuple[str, ...], dict[str, Any]]]
+"""キーの昇順に並んだ、キーと行の組"""
+
+DEFAULT_SORT_CHUNK_SIZE = 100_000
+"""外部ソートで、メモリ上で並べ替えてから一時ファイルに書き出す行数"""
+
+
+class ChangeType(Enum):
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+@dataclass(frozen=True)
+class RowChange:
+    """テーブルの1行の変更"""
+
+    table_name: str
+    change_type: ChangeType
+    key: tuple[str, ...]
+    old_hash: str | None
+    """変更前の行のハッシュ値。追加された行ならNone"""
+    new_hash: str | None
+    """変更後の行のハッシュ値。削除された行ならNone"""
+    changed_columns: list[str]
+    """値が変わった列。更新された行以外は空です。"""
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "table_name": self.table_name,
+            "change_type": self.change_type.value,
+            "key": ",".join(self.key),
+            "changed_columns": self.changed_columns,
+            "old_hash": self.old_hash,
+            "new_hash": self.new_hash,
+        }
+
+
+def get_row_hash(row: dict[str, Any]) -> str:
+    """行の内容のハッシュ値を返します。列の順番には依存しません。"""
+    data = json.dumps(row, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _check_sorted(rows: KeyedRows, *, source: str) -> KeyedRows:
+    """キーが昇順（重複なし）に並んでいることを確認しながら、行を返します。"""
+    previous_key: tuple[str, ...] | None = None
+    for key, row in rows:
+        if previous_key is not None and key <= previous_key:
+            raise AnnoworkCliException(f"{source} の行がキーの昇順に並んでいないか、キーが重複しています。 :: key={key}")
+        previous_key = key
+        yield key, row
+
+
+def diff_sorted_rows(table_name: str, old_rows: KeyedRows, new_rows: KeyedRows) -> Iterator[RowChange]:
+    """
+    キーの昇順に並んだ2個のテーブルを突き合わせて、行の追加・更新・削除を返します。
+
+    Args:
+        table_name: テーブル名
+        old_rows: 変更前のテーブルの、キーと行の組。キーの昇順に並んでいる必要があります。
+        new_rows: 変更後のテーブルの、キーと行の組。キーの昇順に並んでいる必要があります。
+    """
+    old_iter = _check_sorted(old_rows, source=f"変更前のテーブル '{table_name}'")
+    new_iter = _check_sorted(new_rows, source=f"変更後のテーブル '{table_name}'")
+    old = next(old_iter, None)
+    new = next(new_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            assert old is not None
+            yield RowChange(table_name, ChangeType.DELETE, old[0], old_hash=get_row_hash(old[1]), new_hash=None, changed_columns=[])
+            old = next(old_iter, None)
+        elif old is None or new[0] < old[0]:
+            yield RowChange(table_name, ChangeType.INSERT, new[0], old_hash=None, new_hash=get_row_hash(new[1]), changed_columns=[])
+            new = next(new_iter, None)
+        else:
+            old_hash, new_hash = get_row_hash(old[1]), get_row_hash(new[1])
+            if old_hash != new_hash:
+                columns = dict.fromkeys([*old[1], *new[1]])
+                changed_columns = [column for column in columns if old[1].get(column) != new[1].get(column)]
+                yield RowChange(table_name, ChangeType.UPDATE, new[0], old_hash=old_hash, new_hash=new_hash, changed_columns=changed_columns)
+            old = next(old_iter, None)
+            new = next(new_iter, None)
+
+
+def _read_sorted_run(file: Path) -> KeyedRows:
+    with file.open(encoding="utf-8") as f:
+        for line in f:
+            key, row = json.loads(line)
+            yield tuple(key), row
+
+
+def sort_keyed_rows(rows: KeyedRows, *, chunk_size: int = DEFAULT_SORT_CHUNK_SIZE) -> KeyedRows:
+    """
+    キーと行の組をキーの昇順に並べ替えて返します。
+    ``chunk_size`` 行ごとにメモリ上で並べ替えて一時ファイルに書き出し、一時ファイルをマージしながら返すので、
+    メモリに保持する行数は ``chunk_size`` 行とそれぞれの一時ファイルの1行だけです。
+    """
+    with tempfile.TemporaryDirectory(prefix="annoworkcli-diff-") as temp_dir:
+        run_files: list[Path] = []
+        chunk: list[tuple[tuple[str, ...], dict[str, Any]]] = []
+        for keyed_row in rows:
+            chunk.append(keyed_row)
+            if len(chunk) < chunk_size:
+                continue
+            run_file = Path(temp_dir) / f"{len(run_files)}.jsonl"
+            with run_file.open("w", encoding="utf-8") as f:
+                f.writelines(json.dumps([key, row], ensure_ascii=False) + "\n" for key, row in sorted(chunk, key=lambda e: e[0]))
+            run_files.append(run_file)
+            chunk = []
+
+        chunk.sort(key=lambda e: e[0])
+        if len(run_files) == 0:
+            # すべての行がメモリに収まる場合は、一時ファイルを経由しない
+            yield from chunk
+            return
+        yield from heapq.merge(*[_read_sorted_run(e) for e in run_files], iter(chunk), key=lambda e: e[0])
+
+
+class DiffSource(Protocol):
+    """差分を求める対象（スナップショットまたはキューブ）"""
+
+    @property
+    def table_names(self) -> list[str]: ...
+
+    def iter_keyed_rows(self, table_name: str) -> KeyedRows:
+        """テーブルの行を、キーの昇順に1行ずつ返します。"""
+        ...
+
+
+class SnapshotDiffSource:
+    """
+    スナップショットのテーブルを、外部ソートでキーの昇順に並べ替えて読み込みます。
+
+    Args:
+        zf: スナップショットのzipファイル
+        snapshot_file: スナップショットのファイル。メッセージに利用します。
+        sort_chunk_size: 外部ソートで、メモリ上で並べ替えてから一時ファイルに書き出す行数
+    """
+
+    def __init__(self, zf: zipfile.ZipFile, snapshot_file: Path, *, sort_chunk_size: int = DEFAULT_SORT_CHUNK_SIZE) -> None:
+        self.zf = zf
+        self.snapshot_file = snapshot_file
+        self.sort_chunk_size = sort_chunk_size
+        self.manifest = read_manifest(zf, snapshot_file)
+        self.table_format = TableFormat(self.manifest["table_format"])
+
+    @property
+    def table_names(self) -> list[str]:
+        return [table_name for table_name in self.manifest["tables"] if table_name in TABLE_KEY_COLUMNS]
+
+    def iter_keyed_rows(self, table_name: str) -> KeyedRows:
+        key_columns = TABLE_KEY_COLUMNS[table_name]
+        rows = iter_table_rows(self.zf, self.manifest["tables"][table_name], self.table_format)
+        return sort_keyed_rows(((get_row_key(row, key_columns), row) for row in rows), chunk_size=self.sort_chunk_size)
+
+
+class CubeDiffSource:
+    """
+    キューブのテーブル（集計済みのテーブル以外）を、主キーの昇順に読み込みます。
+
+    Args:
+        cube: キューブ
+    """
+
+    def __init__(self, cube: WorkingHoursCube) -> None:
+        self.cube = cube
+
+    @property
+    def table_names(self) -> list[str]:
+        return DIMENSION_TABLES + FACT_TABLES
+
+    def get_key_columns(self, table_name: str) -> list[str]:
+        # PRAGMA table_infoの6列目は、主キーの何番目の列か（主キーでなければ0）
+        table_info = [row for row in self.cube.connection.execute(f"PRAGMA table_info({table_name})") if row[5] > 0]
+        return [row[1] for row in sorted(table_info, key=lambda row: row[5])]
+
+    def iter_keyed_rows(self, table_name: str) -> KeyedRows:
+        key_columns = self.get_key_columns(table_name)
+        cursor = self.cube.connection.execute(f"SELECT * FROM {table_name} ORDER BY {', '.join(key_columns)}")
+        columns = [e[0] for e in cursor.description]
+        for values in cursor:
+            row = dict(zip(columns, values, strict=True))
+            yield get_row_key(row, key_columns), row
+
+
+def is_cube_file(file: Path) -> bool:
+    """ファイルがキューブ（SQLiteファイル）かどうかを返します。"""
+    with file.open("rb") as f:
+        return f.read(16) == b"SQLite format 3\x00"
+
+
+def diff_sources(old_source: DiffSource, new_source: DiffSource, *, table_names: list[str] | None = None) -> Iterator[RowChange]:
+    """
+    2個のスナップショット（またはキューブ）の間で、テーブルの行の追加・更新・削除を返します。
+
+    Args:
+        table_names: 差分を求めるテーブル。Noneなら両方に存在するすべてのテーブルです。
+    """
+    common_table_names = [e for e in old_source.table_names if e in new_source.table_names]
+    for table_name in table_names if table_names is not None else common_table_names:
+        if table_name not in common_table_names:
+            logger.warning(f"テーブル '{table_name}' は、差分を求められるテーブルとして両方に存在しないので、無視します。")
+            continue
+        yield from diff_sorted_rows(table_name, old_source.iter_keyed_rows(table_name), new_source.iter_keyed_rows(table_name))
+
+
+def open_diff_source(file: Path, stack: ExitStack) -> DiffSource:
+    """
+    スナップショットまたはキューブのファイルを開きます。
+
+    Args:
+        stack: ファイルを閉じる処理を登録するExitStack
+
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合
+    """
+    if not file.exists():
+        raise FileNotFoundError(f"ファイル '{file}' は存在しません。")
+    if is_cube_file(file):
+        return CubeDiffSource(stack.enter_context(WorkingHoursCube.open(file, is_readonly=True)))
+    try:
+        zf = stack.enter_context(zipfile.ZipFile(file))
+    except zipfile.BadZipFile as e:
+        raise AnnoworkCliException(f"ファイル '{file}' は、スナップショット（zipファイル）でもキューブ（SQLiteファイル）でもありません。") from e
+    return SnapshotDiffSource(zf, file)
@@ -0,0 +1,192 @@
+"""
+ログインして取得したトークンをファイルにキャッシュして、コマンドの実行をまたいで再利用するための処理
+
+キャッシュはエンドポイントURLとユーザーIDごとに、所有者のみ読み書きできるファイル(0600)に保存します。
+トークンは、有効期限が切れた場合か、WebAPIが401を返した場合にのみ再取得します。
+"""
+
+import base64
+import binascii
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import annofabapi
+import annoworkapi
+from annofabapi.credentials import IdPass, Tokens
+
+logger = logging.getLogger(__name__)
+
+USE_TOKEN_CACHE_ENVVAR = "ANNOWORKCLI_USE_TOKEN_CACHE"
+"""トークンキャッシュを有効にする環境変数。値が空でなければ有効になります。"""
+
+EXPIRATION_MARGIN_SECONDS = 60
+"""有効期限の何秒前から、トークンが期限切れとみなすか"""
+
+
+def get_default_token_cache_dir() -> Path:
+    """トークンキャッシュを保存するディレクトリを返します。 ``$XDG_CACHE_HOME/annoworkcli/tokens`` です。"""
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    cache_home = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return cache_home / "annoworkcli" / "tokens"
+
+
+def get_jwt_expiration(token: str) -> float | None:
+    """
+    JWTのpayloadの ``exp`` （有効期限のUNIX時間）を返します。
+    JWTとして解釈できない場合はNoneを返します。
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload))["exp"]
+    except (IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+    return float(exp)
+
+
+def is_token_expired(token: str, *, now: float | None = None) -> bool:
+    """
+    トークンの有効期限が切れているかどうかを返します。
+    有効期限が分からない場合は、期限切れでないとみなします（WebAPIが401を返した時点で再取得されるため）。
+    """
+    expiration = get_jwt_expiration(token)
+    if expiration is None:
+        return False
+    if now is None:
+        now = time.time()
+    return now + EXPIRATION_MARGIN_SECONDS >= expiration
+
+
+class TokenCache:
+    """
+    トークンをファイルにキャッシュします。
+
+    Args:
+        cache_dir: キャッシュファイルを保存するディレクトリ
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+
+    def _get_cache_file(self, service_name: str, endpoint_url: str, user_id: str) -> Path:
+        # ファイル名からユーザーIDが分からないようにハッシュ化する
+        key = hashlib.sha256(f"{service_name}\n{endpoint_url}\n{user_id}".encode()).hexdigest()
+        return self.cache_dir / f"{service_name}_{key[:32]}.json"
+
+    def load(self, service_name: str, endpoint_url: str, user_id: str) -> dict[str, Any] | None:
+        """キャッシュされたトークンを返します。キャッシュが存在しない場合や読み込めない場合はNoneを返します。"""
+        cache_file = self._get_cache_file(service_name, endpoint_url, user_id)
+        try:
+            with cache_file.open(encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning(f"トークンキャッシュ '{cache_file}' を読み込めませんでした。", exc_info=True)
+            return None
+
+    def save(self, service_name: str, endpoint_url: str, user_id: str, token_dict: dict[str, Any]) -> None:
+        """トークンを所有者のみ読み書きできるファイルに保存します。"""
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        cache_file = self._get_cache_file(service_name, endpoint_url, user_id)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(token_dict, f)
+            # 書き込み途中のファイルを他のプロセスが読み込まないように、アトミックに置き換える
+            tmp_file.replace(cache_file)
+        except OSError:
+            logger.warning(f"トークンキャッシュ '{cache_file}' に書き込めませんでした。", exc_info=True)
+            with contextlib.suppress(OSError):
+                tmp_file.unlink()
+
+    def apply_to_annoworkapi(self, api: annoworkapi.api.AnnoworkApi) -> None:
+        """
+        annoworkapiのインスタンスに、キャッシュされたトークンを設定します。
+        また、ログインして取得したトークンをキャッシュに保存するようにします。
+        """
+        service_name = "annowork"
+        endpoint_url = api.base_url
+        user_id = api.login_user_id
+
+        token_dict = self.load(service_name, endpoint_url, user_id)
+        if token_dict is not None and "id_token" in token_dict and not is_token_expired(token_dict["id_token"]):
+            logger.debug(f"キャッシュされたAnnoworkのトークンを利用します。 :: {user_id=}")
+            api.token_dict = token_dict
+
+        original_login = api.login
+
+        def login() -> dict[str, Any]:
+            new_token_dict = original_login()
+            self.save(service_name, endpoint_url, user_id, new_token_dict)
+            return new_token_dict
+
+        api.login = login
+
+    def apply_to_annofabapi(self, api: annofabapi.AnnofabApi) -> None:
+        """
+        annofabapiのインスタンスに、キャッシュされたトークンを設定します。
+        また、ログインまたはトークンの再発行で取得したトークンをキャッシュに保存するようにします。
+        パーソナルアクセストークンを利用する場合は、ログインしないので何もしません。
+        """
+        if not isinstance(api.credentials, IdPass):
+            return
+
+        service_name = "annofab"
+        endpoint_url = api.endpoint_url
+        user_id = api.credentials.user_id
+
+        def save_tokens() -> None:
+            if isinstance(api.tokens, Tokens):
+                self.save(service_name, endpoint_url, user_id, api.tokens.to_dict())
+
+        original_login = api.login
+        original_refresh_token = api.refresh_token
+
+        def login(mfa_code: str | None = None) -> None:
+            original_login(mfa_code)
+            save_tokens()
+
+        def refresh_token() -> None:
+            original_refresh_token()
+            save_tokens()
+
+        api.login = login  # type: ignore[method-assign]
+        api.refresh_token = refresh_token  # type: ignore[method-assign]
+
+        token_dict = self.load(service_name, endpoint_url, user_id)
+        if token_dict is None:
+            return
+        try:
+            api.tokens = Tokens.from_dict(token_dict)
+        except KeyError:
+            return
+
+        logger.debug(f"キャッシュされたAnnofabのトークンを利用します。 :: {user_id=}")
+        if is_token_expired(api.tokens.id_token):
+            # リフレッシュトークンはIDトークンより有効期限が長いので、ログインせずにトークンを再発行する
+            api.refresh_token()
+
+
+_token_cache: TokenCache | None = None
+
+
+def set_token_cache(token_cache: TokenCache | None) -> None:
+    """プロセス全体で利用するTokenCacheを設定します。Noneならトークンをキャッシュしません。"""
+    global _token_cache  # noqa: PLW0603
+    _token_cache = token_cache
+
+
+def get_token_cache() -> TokenCache | None:
+    return _token_cache
+
+
+def is_token_cache_enabled_by_envvar() -> bool:
+    return os.environ.get(USE_TOKEN_CACHE_ENVVAR, "") != ""
@@ -0,0 +1,252 @@
+"""
+WebAPIの呼び出しと処理のフェーズを、スパンとしてファイルに記録するための処理
+
+コマンドライン引数 ``--trace`` を指定すると、コマンド全体、 :func:`annoworkcli.common.metrics.phase` で計測するフェーズ、
+WebAPIの呼び出しのそれぞれを1個のスパンとして、JSON Lines形式で記録します。
+スパンの形式はOpenTelemetryのスパンに似せていますが、OTLP/JSONとは互換性がありません。
+属性（ ``attributes`` ）はOTLPのKeyValueのlistではなく、属性名をキーにしたdictです。ルートのスパンの ``parentSpanId`` はnullです。
+属性名はOpenTelemetryのセマンティック規約に従います。
+
+WebAPIの呼び出しのスパンは、呼び出したときに実行中のフェーズのスパンの子になります。
+:func:`annoworkcli.common.concurrency.map_concurrently` でスレッドプール上で実行した呼び出しも、呼び出し元のフェーズの子になります。
+記録したスパンは ``annoworkcli trace summarize`` で集計できます。
+"""
+
+import contextvars
+import json
+import logging
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SPAN_KIND_INTERNAL = "SPAN_KIND_INTERNAL"
+SPAN_KIND_CLIENT = "SPAN_KIND_CLIENT"
+
+STATUS_CODE_UNSET = "STATUS_CODE_UNSET"
+STATUS_CODE_ERROR = "STATUS_CODE_ERROR"
+
+ID_PARENT_SEGMENTS = frozenset(
+    {
+        "actual-working-times",
+        "expected-working-times",
+        "jobs",
+        "members",
+        "projects",
+        "schedules",
+        "tags",
+        "workspaces",
+    }
+)
+"""URLのパスで、直後のセグメントがIDになるセグメント。エンドポイントごとに集計できるように、IDを ``{id}`` に置き換えます。"""
+
+_START_TIME_ATTRIBUTE = "_annoworkcli_start_time_unix_nano"
+
+_current_span_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_span_id", default=None)
+
+
+def get_endpoint_template(path: str) -> str:
+    """
+    URLのパスに含まれるIDを ``{id}`` に置き換えた文字列を返します。
+
+    Examples:
+        >>> get_endpoint_template("/api/v1/workspaces/org/jobs/job1")
+        '/api/v1/workspaces/{id}/jobs/{id}'
+    """
+    segments = path.split("/")
+    result = []
+    for index, segment in enumerate(segments):
+        if index > 0 and segments[index - 1] in ID_PARENT_SEGMENTS and segment != "":
+            result.append("{id}")
+        else:
+            result.append(segment)
+    return "/".join(result)
+
+
+class TraceRecorder:
+    """
+    スパンをJSON Lines形式でファイルに記録します。複数のスレッドから利用できます。
+    スパンは終了した順に1行ずつ書き込むので、コマンドが途中で終了しても、それまでに終了したスパンは読み込めます。
+
+    Args:
+        output: 出力先のファイル
+    """
+
+    def __init__(self, output: Path) -> None:
+        self.output = output
+        self.trace_id = secrets.token_hex(16)
+        self.span_count = 0
+        self._lock = threading.Lock()
+        output.parent.mkdir(parents=True, exist_ok=True)
+        self._file = output.open("w", encoding="utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def write_span(
+        self,
+        name: str,
+        *,
+        kind: str,
+        span_id: str,
+        parent_span_id: str | None,
+        start_time_unix_nano: int,
+        end_time_unix_nano: int,
+        attributes: dict[str, Any],
+        status_code: str = STATUS_CODE_UNSET,
+    ) -> None:
+        """スパンを1行書き込みます。"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": span_id,
+            "parentSpanId": parent_span_id,
+            "name": name,
+            "kind": kind,
+            "startTimeUnixNano": start_time_unix_nano,
+            "endTimeUnixNano": end_time_unix_nano,
+            "attributes": attributes,
+            "status": {"code": status_code},
+        }
+        line = json.dumps(span, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self.span_count += 1
+
+    @contextmanager
+    def span(self, name: str, *, attributes: dict[str, Any] | None = None) -> Iterator[None]:
+        """``with`` ブロック内の処理を、実行中のスパンの子スパンとして記録します。"""
+        span_id = secrets.token_hex(8)
+        parent_span_id = _current_span_id.get()
+        token = _current_span_id.set(span_id)
+        start_time = time.time_ns()
+        status_code = STATUS_CODE_UNSET
+        try:
+            yield
+        except BaseException:
+            status_code = STATUS_CODE_ERROR
+            raise
+        finally:
+            _current_span_id.reset(token)
+            self.write_span(
+                name,
+                kind=SPAN_KIND_INTERNAL,
+                span_id=span_id,
+                parent_span_id=parent_span_id,
+                start_time_unix_nano=start_time,
+                end_time_unix_nano=time.time_ns(),
+                attributes=attributes if attributes is not None else {},
+                status_code=status_code,
+            )
+
+    def record_response(self, response: requests.Response, *, is_stream: bool = False) -> None:
+        """WebAPIの呼び出しを、実行中のスパンの子スパンとして記録します。"""
+        end_time = time.time_ns()
+        start_time = getattr(response, _START_TIME_ATTRIBUTE, None)
+        if start_time is None:
+            start_time = end_time - int(response.elapsed.total_seconds() * 1e9)
+
+        if is_stream:
+            # ストリームの場合はレスポンスボディを読み込まないように、Content-Lengthヘッダの値を利用する
+            response_bytes = int(response.headers.get("Content-Length", 0))
+        else:
+            response_bytes = len(response.content)
+
+        request = response.request
+        method = (request.method or "GET").upper()
+        parsed_url = urlparse(request.url or response.url)
+        endpoint = get_endpoint_template(parsed_url.path)
+        attributes: dict[str, Any] = {
+            "http.request.method": method,
+            "server.address": parsed_url.hostname,
+            "url.path": parsed_url.path,
+            "url.query": parsed_url.query,
+            "url.template": endpoint,
+            "http.response.status_code": response.status_code,
+            "http.response.body.size": response_bytes,
+        }
+        self.write_span(
+            f"{method} {endpoint}",
+            kind=SPAN_KIND_CLIENT,
+            span_id=secrets.token_hex(8),
+            parent_span_id=_current_span_id.get(),
+            start_time_unix_nano=start_time,
+            end_time_unix_nano=end_time,
+            attributes=attributes,
+            status_code=STATUS_CODE_ERROR if response.status_code >= 400 else STATUS_CODE_UNSET,
+        )
+
+
+_trace_recorder: TraceRecorder | None = None
+
+
+def set_trace_recorder(recorder: TraceRecorder | None) -> None:
+    """プロセス全体で利用するTraceRecorderを設定します。Noneならスパンを記録しません。"""
+    global _trace_recorder  # noqa: PLW0603
+    _trace_recorder = recorder
+
+
+def get_trace_recorder() -> TraceRecorder | None:
+    return _trace_recorder
+
+
+@contextmanager
+def span(name: str, *, attributes: dict[str, Any] | None = None) -> Iterator[None]:
+    """
+    ``with`` ブロック内の処理をスパンとして記録します。 ``--trace`` が指定されていない場合は何もしません。
+    """
+    recorder = _trace_recorder
+    if recorder is None:
+        yield
+        return
+    with recorder.span(name, attributes=attributes):
+        yield
+
+
+def bind_trace_context(func: Callable[[T], R]) -> Callable[[T], R]:
+    """
+    ``func`` を別のスレッドで実行しても、呼び出し元で実行中のスパンの子としてスパンを記録するようにした関数を返します。
+    """
+    if _trace_recorder is None:
+        return func
+    parent_span_id = _current_span_id.get()
+
+    def wrapper(item: T) -> R:
+        token = _current_span_id.set(parent_span_id)
+        try:
+            return func(item)
+        finally:
+            _current_span_id.reset(token)
+
+    return wrapper
+
+
+def annotate_response(response: requests.Response, *, start_time_unix_nano: int) -> None:
+    """
+    流量制御による待ち時間を含めたWebAPIの呼び出しの開始時刻を、レスポンスに記録します。
+    :class:`annoworkcli.common.transport.TransportController` から呼び出します。
+    """
+    setattr(response, _START_TIME_ATTRIBUTE, start_time_unix_nano)
+
+
+def record_trace_hook(response: requests.Response, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401, ARG001
+    """
+    ``requests.Session`` のresponseフックに登録して、WebAPIの呼び出しをスパンとして記録します。
+    Sessionをpickleできるように、モジュールレベルの関数にしています。
+    """
+    if _trace_recorder is not None:
+        _trace_recorder.record_response(response, is_stream=bool(kwargs.get("stream", False)))
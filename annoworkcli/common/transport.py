@@ -0,0 +1,331 @@
+"""
+Annowork/AnnofabのWebAPIへのHTTPリクエストの流量を制御する処理
+
+``annoworkapi`` , ``annofabapi`` はどちらも ``requests.Session`` を経由してリクエストを送信するので、
+Sessionに :class:`ControlledHTTPAdapter` をマウントすることで、すべてのWebAPI呼び出しの流量を1箇所で制御します。
+
+429/5xxや通信エラーのリトライは ``annoworkapi`` , ``annofabapi`` が指数バックオフで行うので、ここではリトライしません。
+リトライを重ねると、流量制限されているエンドポイントへのリクエスト数が何倍にも増えてしまうためです。
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from annoworkcli.common.cassette import ReplayHTTPAdapter, get_cassette_player, get_cassette_recorder, record_cassette_hook
+from annoworkcli.common.metrics import record_response_hook
+from annoworkcli.common.trace import annotate_response, record_trace_hook
+
+logger = logging.getLogger(__name__)
+
+THROTTLED_STATUS_CODES = frozenset({requests.codes.too_many_requests, requests.codes.service_unavailable})
+"""サーバーが混雑していることを表すHTTPステータスコード"""
+
+
+def is_retried_by_api_client(status_code: int) -> bool:
+    """
+    ``annoworkapi`` , ``annofabapi`` がリトライするHTTPステータスコードかどうかを返します。
+    どちらも429と、500以外の5xxをリトライします。
+    """
+    return status_code == requests.codes.too_many_requests or (
+        requests.codes.internal_server_error < status_code < 600  # noqa: PLR2004
+    )
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレートリミッタ。
+
+    Args:
+        rate: 1秒あたりに補充されるトークンの数。つまり1秒あたりの最大リクエスト数。
+        capacity: バケットの容量。バーストとして許容するリクエスト数。Noneなら ``max(1, rate)`` です。
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError(f"rateには正の値を指定してください。 :: {rate=}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill_time = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill_time
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill_time = now
+
+    def acquire(self) -> None:
+        """トークンを1個取得します。トークンがなければ、補充されるまで待ちます。"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    waiting_seconds = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    waiting_seconds = (1 - self._tokens) / self.rate
+            time.sleep(waiting_seconds)
+
+    def pause(self, seconds: float) -> None:
+        """
+        指定した秒数の間、トークンの払い出しを止めます。
+        ``Retry-After`` ヘッダで待機時間を指定された場合、後続のリクエストも含めて待機させるために利用します。
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD(Additive Increase / Multiplicative Decrease)方式で、同時に実行するリクエスト数の上限を調整します。
+
+    * レスポンスが正常に返ってくれば、上限を少しずつ増やします（最大 ``max_concurrency`` ）。
+    * 429/503が返ってきた場合や、レイテンシが直近の平均より大きく悪化したレスポンスが続いた場合は、上限を ``decrease_factor`` 倍に減らします。
+      もともと遅いエンドポイントで上限が下がりすぎないように、1回遅いだけでは減らしません。
+
+    Args:
+        max_concurrency: 同時に実行するリクエスト数の上限の最大値
+        min_concurrency: 同時に実行するリクエスト数の上限の最小値
+        decrease_factor: 混雑を検知したときに上限に掛ける値
+        latency_tolerance: レイテンシの平均値の何倍を超えたら遅いとみなすか
+        slow_response_threshold: 遅いレスポンスが何回続いたら混雑とみなすか
+    """
+
+    DECREASE_COOLDOWN_SECONDS = 1.0
+    """上限を減らした後、次に減らせるようになるまでの秒数。同じ混雑で何度も上限が減らないようにするため。"""
+
+    LATENCY_SMOOTHING_FACTOR = 0.1
+    """レイテンシの指数移動平均の平滑化係数"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        *,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 3.0,
+        slow_response_threshold: int = 3,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrencyには1以上の値を指定してください。 :: {max_concurrency=}")
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.slow_response_threshold = slow_response_threshold
+
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._average_latency: float | None = None
+        self._consecutive_slow_count = 0
+        self._last_decrease_time = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行数の上限"""
+        return max(self.min_concurrency, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """実行中のリクエスト数"""
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """リクエストを実行する枠を1個取得します。枠が空いていなければ、空くまで待ちます。"""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, *, latency: float, is_throttled: bool) -> None:
+        """
+        リクエストを実行する枠を返却して、レスポンスの結果から同時実行数の上限を調整します。
+
+        Args:
+            latency: リクエストのレイテンシ[秒]
+            is_throttled: サーバーから流量制限されたかどうか
+        """
+        with self._condition:
+            self._in_flight -= 1
+            is_congested = is_throttled or self._is_latency_degraded(latency)
+            if is_congested:
+                self._decrease()
+            else:
+                self._limit = min(float(self.max_concurrency), self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def _is_latency_degraded(self, latency: float) -> bool:
+        average_latency = self._average_latency
+        if average_latency is None:
+            self._average_latency = latency
+            return False
+
+        self._average_latency = average_latency + self.LATENCY_SMOOTHING_FACTOR * (latency - average_latency)
+        if latency <= average_latency * self.latency_tolerance:
+            self._consecutive_slow_count = 0
+            return False
+
+        self._consecutive_slow_count += 1
+        if self._consecutive_slow_count < self.slow_response_threshold:
+            return False
+        self._consecutive_slow_count = 0
+        return True
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease_time < self.DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease_time = now
+        new_limit = max(float(self.min_concurrency), self._limit * self.decrease_factor)
+        if int(new_limit) != int(self._limit):
+            logger.debug(f"同時実行数の上限を {int(self._limit)} から {int(new_limit)} に減らします。")
+        self._limit = new_limit
+
+
+class TransportController:
+    """
+    WebAPIへのリクエストの流量を制御します。リトライは ``annoworkapi`` , ``annofabapi`` に任せて、ここではリトライしません。
+
+    Args:
+        max_rps: 1秒あたりの最大リクエスト数。Noneなら制限しません。
+        max_concurrency: 同時に実行するリクエスト数の最大値。Noneなら制限しません。
+    """
+
+    def __init__(self, *, max_rps: float | None = None, max_concurrency: int | None = None) -> None:
+        self.max_rps = max_rps
+        self.max_concurrency = max_concurrency
+
+        self.token_bucket = TokenBucket(max_rps) if max_rps is not None else None
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(max_concurrency) if max_concurrency is not None else None
+
+        self.request_count = 0
+        """送信したリクエストの数"""
+        self.retry_count = 0
+        """失敗して、 ``annoworkapi`` , ``annofabapi`` がリトライするリクエストの数"""
+        self._counter_lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # `multiprocessing.Pool`でSessionごとpickleされる場合があるので、設定値だけをpickleする。
+        # 子プロセスでは、プロセスごとに独立して流量を制御する。
+        return {"max_rps": self.max_rps, "max_concurrency": self.max_concurrency}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
+
+    @staticmethod
+    def get_retry_after_seconds(response: requests.Response) -> float | None:
+        """``Retry-After`` ヘッダの秒数を返します。ヘッダがない場合やHTTP-date形式の場合はNoneを返します。"""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+
+    def _count_request(self, *, is_retried: bool) -> None:
+        with self._counter_lock:
+            self.request_count += 1
+            if is_retried:
+                self.retry_count += 1
+
+    def send(self, send_func: Callable[..., requests.Response], request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """
+        流量を制御しながら ``send_func`` でリクエストを送信します。
+        ``Retry-After`` ヘッダ付きで429/503が返ってきた場合は、その秒数だけ後続のリクエストの送信を止めます。
+        """
+        start_time_unix_nano = time.time_ns()
+        if self.token_bucket is not None:
+            self.token_bucket.acquire()
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.acquire()
+
+        start_time = time.monotonic()
+        response: requests.Response | None = None
+        try:
+            response = send_func(request, **kwargs)
+        finally:
+            self._count_request(is_retried=response is None or is_retried_by_api_client(response.status_code))
+            if self.concurrency_limiter is not None:
+                is_throttled = response is None or response.status_code in THROTTLED_STATUS_CODES
+                self.concurrency_limiter.release(latency=time.monotonic() - start_time, is_throttled=is_throttled)
+
+        if self.token_bucket is not None and response.status_code in THROTTLED_STATUS_CODES:
+            retry_after_seconds = self.get_retry_after_seconds(response)
+            if retry_after_seconds is not None:
+                logger.debug(
+                    f"{retry_after_seconds}秒間、リクエストの送信を止めます。 :: {request.method} {request.url} , status_code={response.status_code}"
+                )
+                self.token_bucket.pause(retry_after_seconds)
+
+        annotate_response(response, start_time_unix_nano=start_time_unix_nano)
+        return response
+
+
+class ControlledHTTPAdapter(HTTPAdapter):
+    """
+    :class:`TransportController` で流量を制御しながらリクエストを送信するHTTPAdapter
+    """
+
+    __attrs__ = [*HTTPAdapter.__attrs__, "controller"]  # noqa: RUF012
+
+    def __init__(self, controller: TransportController, **kwargs: Any) -> None:  # noqa: ANN401
+        self.controller = controller
+        if controller.max_concurrency is not None:
+            # コネクションプールが足りずにコネクションが破棄されないよう、同時実行数に合わせる
+            kwargs.setdefault("pool_maxsize", max(controller.max_concurrency, requests.adapters.DEFAULT_POOLSIZE))
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]  # noqa: ANN401
+        return self.controller.send(super().send, request, **kwargs)
+
+
+_transport_controller: TransportController | None = None
+"""プロセス全体で共有するTransportController。Annowork/Annofabの両方のSessionで共有します。"""
+
+
+def set_transport_controller(controller: TransportController | None) -> None:
+    """プロセス全体で共有するTransportControllerを設定します。Noneなら流量を制御しません。"""
+    global _transport_controller  # noqa: PLW0603
+    _transport_controller = controller
+
+
+def get_transport_controller() -> TransportController | None:
+    return _transport_controller
+
+
+def configure_session(session: requests.Session) -> None:
+    """
+    annoworkapi/annofabapiのSessionに、コマンドライン引数で指定された通信関係の設定を適用します。
+    """
+    session.hooks["response"].append(record_response_hook)
+    session.hooks["response"].append(record_trace_hook)
+
+    player = get_cassette_player()
+    if player is not None:
+        # カセットを再生する場合は、ネットワークに接続しない
+        replay_adapter = ReplayHTTPAdapter(player)
+        session.mount("https://", replay_adapter)
+        session.mount("http://", replay_adapter)
+        return
+
+    if get_cassette_recorder() is not None:
+        session.hooks["response"].append(record_cassette_hook)
+
+    controller = get_transport_controller()
+    if controller is not None:
+        adapter = ControlledHTTPAdapter(controller)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
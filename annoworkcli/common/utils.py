@@ -11,6 +11,9 @@ import isodate
 import pandas
 import yaml
 
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.writer import get_output_options, write_csv, write_json
+
 DEFAULT_CSV_FORMAT = {"encoding": "utf_8_sig", "index": False}
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
 
@@ -62,10 +65,16 @@ def print_json(target: Any, *, is_pretty: bool = False, output: Path | None = No
         output: 出力先。Noneなら標準出力に出力する。
 
     """
-    if is_pretty:
-        output_string(json.dumps(target, indent=2, ensure_ascii=False), output)
-    else:
-        output_string(json.dumps(target, ensure_ascii=False), output)
+    if not get_output_options().is_default:
+        for output_file in write_json(target, output, is_pretty=is_pretty):
+            logger.info(f"{output_file} に出力しました。")
+        return
+
+    with phase("write"):
+        if is_pretty:
+            output_string(json.dumps(target, indent=2, ensure_ascii=False), output)
+        else:
+            output_string(json.dumps(target, ensure_ascii=False), output)
 
 
 def print_csv(
@@ -73,16 +82,20 @@ def print_csv(
     output: Path | None = None,
     to_csv_kwargs: dict[str, Any] | None = None,
 ) -> None:
+    kwargs = copy.deepcopy(DEFAULT_CSV_FORMAT)
+    if to_csv_kwargs is not None:
+        kwargs.update(to_csv_kwargs)
+
+    if not get_output_options().is_default:
+        for output_file in write_csv(df, output, kwargs):
+            logger.info(f"{output_file} に出力しました。")
+        return
+
     if output is not None:
         output.parent.mkdir(parents=True, exist_ok=True)
 
     path_or_buf = sys.stdout if output is None else str(output)
-
-    kwargs = copy.deepcopy(DEFAULT_CSV_FORMAT)
-    if to_csv_kwargs is None:
-        df.to_csv(path_or_buf, **kwargs)
-    else:
-        kwargs.update(to_csv_kwargs)
+    with phase("write"):
         df.to_csv(path_or_buf, **kwargs)
 
     if output is not None:
@@ -125,6 +138,17 @@ def to_iso8601_string(dt: datetime.datetime) -> str:
     return dt.astimezone(datetime.UTC).strftime(DATETIME_FORMAT)
 
 
+def get_tzinfo(timezone_offset_hours: float | None) -> datetime.tzinfo:
+    if timezone_offset_hours is not None:
+        return datetime.timezone(datetime.timedelta(hours=timezone_offset_hours))
+    return datetime.datetime.now().astimezone().tzinfo  # type: ignore[return-value]
+
+
+def get_today_str(*, timezone_offset_hours: float | None) -> str:
+    tzinfo = get_tzinfo(timezone_offset_hours)
+    return datetime.datetime.now(tz=tzinfo).date().isoformat()
+
+
 def set_default_logger(*, is_debug_mode: bool = False) -> None:
     """
     デフォルトのロガーを設定する。パッケージ内のlogging.yamlを読み込む。
@@ -0,0 +1,145 @@
+"""
+``--watch`` を指定して、出力ファイルを一定間隔で更新し続けるための処理
+
+最初に指定された期間全体を集計した後は、直近の数日間（ウォッチ期間）だけをWebAPIから取得し直して、
+メモリ上の集計結果のうちウォッチ期間の行だけを置き換えます。
+出力ファイルは、内容が変わった場合だけアトミックに置き換えます。
+"""
+
+import argparse
+import contextlib
+import datetime
+import filecmp
+import logging
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.writer import get_output_options
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCH_WINDOW_DAYS = 2
+"""ウォッチ期間の日数のデフォルト値。当日と前日です。"""
+
+
+def add_watch_argument(parser: argparse.ArgumentParser) -> None:
+    """``--watch`` , ``--watch_window_days`` をparserに追加します。"""
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="INTERVAL",
+        help="指定した秒数ごとに、直近の期間（ ``--watch_window_days`` ）の作業時間だけを取得し直して、出力ファイルを更新し続けます。"
+        "出力ファイルは内容が変わった場合だけ置き換えます。Ctrl+Cで終了します。 ``--output`` の指定が必要です。",
+    )
+    parser.add_argument(
+        "--watch_window_days",
+        type=int,
+        default=DEFAULT_WATCH_WINDOW_DAYS,
+        help="``--watch`` を指定したときに取得し直す期間の日数。当日から遡った日数です。",
+    )
+
+
+def validate_watch_args(args: argparse.Namespace) -> None:
+    """
+    ``--watch`` に関するコマンドライン引数を検証します。
+
+    Raises:
+        CommandLineArgumentError: ``--watch`` と同時に指定できない引数が指定されている場合
+    """
+    if args.watch is None:
+        return
+    if args.watch <= 0:
+        raise CommandLineArgumentError("'--watch' には正の値を指定してください。")
+    if args.watch_window_days < 1:
+        raise CommandLineArgumentError("'--watch_window_days' には1以上の値を指定してください。")
+    if args.output is None:
+        raise CommandLineArgumentError("'--watch' を指定する場合は、'--output' も指定してください。")
+    if not get_output_options().is_default:
+        # 圧縮したファイルはヘッダに書き込み時刻を含むので、内容が変わったかどうかを判定できない
+        raise CommandLineArgumentError("'--watch' と '--partition_by', '--compression' は同時に指定できません。")
+
+
+@dataclass(frozen=True)
+class WatchWindow:
+    """ウォッチ期間。WebAPIから取得し直す期間です。"""
+
+    start_date: str
+    end_date: str
+
+    def contains(self, date: str) -> bool:
+        return self.start_date <= date <= self.end_date
+
+
+def get_watch_window(*, today: str, window_days: int, start_date: str | None, end_date: str | None) -> WatchWindow | None:
+    """
+    当日から ``window_days`` 日遡った期間のうち、 ``start_date`` から ``end_date`` までに含まれる期間を返します。
+    含まれる期間がない場合はNoneを返します。
+    """
+    window_start = (datetime.date.fromisoformat(today) - datetime.timedelta(days=window_days - 1)).isoformat()
+    window_end = today
+    if start_date is not None:
+        window_start = max(window_start, start_date)
+    if end_date is not None:
+        window_end = min(window_end, end_date)
+    if window_start > window_end:
+        return None
+    return WatchWindow(start_date=window_start, end_date=window_end)
+
+
+def write_if_changed(output: Path, write: Callable[[Path], None]) -> bool:
+    """
+    ``write`` で一時ファイルに書き込んで、 ``output`` と内容が異なる場合だけ ``output`` をアトミックに置き換えます。
+
+    Args:
+        output: 出力先のファイル
+        write: 引数に渡したファイルに書き込む関数
+
+    Returns:
+        ``output`` を置き換えた場合はTrue
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp_file)
+        if output.exists() and filecmp.cmp(tmp_file, output, shallow=False):
+            tmp_file.unlink()
+            return False
+        tmp_file.replace(output)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp_file.unlink()
+        raise
+    return True
+
+
+def run_watch(update: Callable[[], bool], *, interval_seconds: float, max_iterations: int | None = None) -> None:
+    """
+    ``interval_seconds`` 秒ごとに ``update`` を実行します。Ctrl+Cで終了します。
+    WebAPIの一時的なエラーなどで終了しないように、 ``update`` で発生した例外はログに出力して次の実行を待ちます。
+
+    Args:
+        update: 出力ファイルを更新する関数。出力ファイルを置き換えた場合はTrueを返します。
+        interval_seconds: 実行間隔[秒]
+        max_iterations: ``update`` を実行する回数の上限。Noneなら終了するまで実行します。
+    """
+    logger.info(f"{interval_seconds}秒ごとに出力ファイルを更新します。終了するにはCtrl+Cを押してください。")
+    iteration = 0
+    try:
+        while max_iterations is None or iteration < max_iterations:
+            time.sleep(interval_seconds)
+            iteration += 1
+            try:
+                is_updated = update()
+            except Exception:
+                logger.warning("出力ファイルの更新に失敗しました。次の実行で再試行します。", exc_info=True)
+                continue
+            if is_updated:
+                logger.info("出力ファイルを更新しました。")
+            else:
+                logger.debug("出力内容が変わらなかったので、出力ファイルを更新しませんでした。")
+    except KeyboardInterrupt:
+        logger.info("出力ファイルの更新を終了します。")
@@ -0,0 +1,121 @@
+"""
+週単位の集計処理
+
+``groupby(...).resample("W-SUN")`` はグループごとにresampleするため、グループ数が多いと遅くなります。
+また、データがまばらなグループでは、値が存在しない週の行も生成されます。
+このモジュールでは、日付から「週の開始日」を表す整数（1970-01-01からの日数）をベクトル演算で求めて、1回のgroupbyで集計します。
+"""
+
+import argparse
+from collections.abc import Mapping
+from enum import Enum
+
+import numpy
+import pandas
+
+_EPOCH_WEEKDAY = 3
+"""1970-01-01の曜日（月曜日が0）"""
+
+
+class WeekStart(Enum):
+    """週の始まりの曜日"""
+
+    MONDAY = "monday"
+    TUESDAY = "tuesday"
+    WEDNESDAY = "wednesday"
+    THURSDAY = "thursday"
+    FRIDAY = "friday"
+    SATURDAY = "saturday"
+    SUNDAY = "sunday"
+
+    @property
+    def weekday(self) -> int:
+        """``datetime.date.weekday()`` と同じ曜日の番号（月曜日が0, 日曜日が6）"""
+        return list(WeekStart).index(self)
+
+
+DEFAULT_WEEK_START = WeekStart.SUNDAY
+
+
+def add_week_start_argument(parser: argparse.ArgumentParser) -> None:
+    """``--week_start`` 引数を追加します。"""
+    parser.add_argument(
+        "--week_start",
+        type=str,
+        choices=[e.value for e in WeekStart],
+        default=DEFAULT_WEEK_START.value,
+        help="週の始まりの曜日",
+    )
+
+
+def _to_epoch_days(dates: pandas.Series) -> numpy.ndarray:
+    """日付（YYYY-MM-DD形式の文字列、またはdatetime）を1970-01-01からの日数に変換します。タイムゾーン付きのdatetimeは、そのタイムゾーンでの日付を参照します。"""
+    dt_dates = pandas.to_datetime(dates)
+    if dt_dates.dt.tz is not None:
+        dt_dates = dt_dates.dt.tz_localize(None)
+    return dt_dates.to_numpy().astype("datetime64[D]").astype(numpy.int64)
+
+
+def get_week_ids(dates: pandas.Series, *, week_start: WeekStart = DEFAULT_WEEK_START) -> numpy.ndarray:
+    """
+    日付が属する週の開始日を、1970-01-01からの日数で返します。
+
+    Args:
+        dates: 日付（YYYY-MM-DD形式の文字列、またはdatetime）
+        week_start: 週の始まりの曜日
+    """
+    epoch_days = _to_epoch_days(dates)
+    return epoch_days - (epoch_days + (_EPOCH_WEEKDAY - week_start.weekday)) % 7
+
+
+def format_epoch_days(epoch_days: numpy.ndarray) -> numpy.ndarray:
+    """1970-01-01からの日数を、YYYY-MM-DD形式の文字列に変換します。"""
+    return numpy.datetime_as_string(epoch_days.astype("datetime64[D]"), unit="D").astype(object)
+
+
+def aggregate_weekly(
+    df: pandas.DataFrame,
+    *,
+    date_column: str,
+    group_columns: list[str],
+    agg: Mapping[str, str],
+    week_start: WeekStart = DEFAULT_WEEK_START,
+    is_fill_empty_weeks: bool = False,
+) -> pandas.DataFrame:
+    """
+    週ごとに集計します。
+
+    Args:
+        df: 集計対象のDataFrame
+        date_column: 日付の列名。YYYY-MM-DD形式の文字列、またはdatetimeの列です。
+        group_columns: 週以外の集計単位の列名
+        agg: key:集計対象の列名, value:集計方法（"sum", "first"など）
+        week_start: 週の始まりの曜日
+        is_fill_empty_weeks: Trueなら、最初の週から最後の週までの値が存在しない週の行も出力します（集計方法が"sum"の列は0になります）。
+            ``group_columns`` が空のときだけ指定できます。
+
+    Returns:
+        ``group_columns`` , "start_date", "end_date", ``agg`` のkeyの列を持つDataFrame。
+        "start_date", "end_date"はYYYY-MM-DD形式の文字列です。
+    """
+    if is_fill_empty_weeks and len(group_columns) > 0:
+        raise ValueError("`is_fill_empty_weeks` は `group_columns` が空のときだけ指定できます。")
+
+    result_columns = [*group_columns, "start_date", "end_date", *agg.keys()]
+    if len(df) == 0:
+        return pandas.DataFrame(columns=result_columns)
+
+    df_week = df[[*group_columns, *agg.keys()]].assign(_week_id=get_week_ids(df[date_column], week_start=week_start))
+    df_weekly = df_week.groupby([*group_columns, "_week_id"], dropna=False, sort=True).agg(dict(agg)).reset_index()
+
+    if is_fill_empty_weeks:
+        week_ids = df_weekly["_week_id"]
+        all_week_ids = numpy.arange(week_ids.min(), week_ids.max() + 1, 7)
+        df_weekly = df_weekly.set_index("_week_id").reindex(all_week_ids).rename_axis("_week_id").reset_index()
+        sum_columns = [column for column, func in agg.items() if func == "sum"]
+        df_weekly[sum_columns] = df_weekly[sum_columns].fillna(0.0)
+
+    week_ids = df_weekly["_week_id"].to_numpy()
+    df_weekly["start_date"] = format_epoch_days(week_ids)
+    df_weekly["end_date"] = format_epoch_days(week_ids + 6)
+    return df_weekly[result_columns]
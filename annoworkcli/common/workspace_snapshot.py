@@ -0,0 +1,520 @@
+"""
+ワークスペースのデータをまとめたスナップショットの読み書きと、スナップショットからWebAPIのレスポンスを返すための処理
+
+``annoworkcli workspace snapshot`` で、ワークスペース、メンバ、タグ、ジョブ、作業計画、予定稼働時間、実績作業時間を
+1個のスナップショット（zipファイル）に出力します。スナップショットは以下のファイルで構成されます。
+
+* ``manifest.json`` : フォーマットのバージョン、ワークスペースID、データの期間、テーブルごとのファイル名と行数
+* ``tables/{テーブル名}.jsonl`` または ``tables/{テーブル名}.parquet`` : WebAPIのレスポンスの要素を1行に格納したテーブル
+
+コマンドライン引数 ``--snapshot`` を指定すると、Annowork WebAPIにアクセスせずに、スナップショットに格納されたデータを
+WebAPIのレスポンスとして返します。WebAPIと同じ絞り込み条件（期間、ジョブなど）を、スナップショットのデータに適用します。
+"""
+
+import datetime
+import importlib.util
+import io
+import json
+import logging
+import os
+import re
+import threading
+import zipfile
+from collections.abc import Callable, Collection, Iterator
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+import pandas
+import requests
+from annoworkapi.job import get_parent_job_id_from_job_tree
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from annoworkcli.common.exeptions import AnnoworkCliException, CommandLineArgumentError
+from annoworkcli.common.utils import get_tzinfo
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+"""スナップショットのフォーマットのバージョン。互換性のない変更をしたら上げます。"""
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+TABLE_NAMES = [
+    "workspaces",
+    "workspace_members",
+    "workspace_tags",
+    "workspace_tag_members",
+    "jobs",
+    "schedules",
+    "expected_working_times",
+    "actual_working_times",
+]
+"""スナップショットに格納するテーブル。 ``workspace_tag_members`` は ``workspace_tag_id`` と ``workspace_member_id`` の組です。"""
+
+TABLE_KEY_COLUMNS: dict[str, list[str]] = {
+    "workspaces": ["workspace_id"],
+    "workspace_members": ["workspace_member_id"],
+    "workspace_tags": ["workspace_tag_id"],
+    "workspace_tag_members": ["workspace_tag_id", "workspace_member_id"],
+    "jobs": ["job_id"],
+    "schedules": ["schedule_id"],
+    "expected_working_times": ["workspace_member_id", "date"],
+    "actual_working_times": ["actual_working_time_id"],
+}
+"""テーブルごとに行を一意に識別する列"""
+
+SNAPSHOT_USER_ID = "snapshot"
+"""スナップショットを利用するときに、認証情報が設定されていない場合に利用するダミーのユーザーID"""
+
+
+class TableFormat(Enum):
+    """スナップショットのテーブルのファイル形式"""
+
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+
+
+class SnapshotRequestError(AnnoworkCliException):
+    """
+    スナップショットから返せないリクエストを送信しようとしたときに発生する例外。
+
+    requestsの例外にすると、annoworkapiがリトライしてしまうので、requestsの例外を継承していません。
+    """
+
+
+def check_table_format(table_format: TableFormat) -> None:
+    """
+    テーブルのファイル形式が利用可能かどうかを確認します。
+
+    Raises:
+        CommandLineArgumentError: Parquetを指定したが ``pyarrow`` がインストールされていない場合
+    """
+    if table_format == TableFormat.PARQUET and importlib.util.find_spec("pyarrow") is None:
+        raise CommandLineArgumentError("`--table_format parquet` を指定するには、`pyarrow` パッケージをインストールしてください。")
+
+
+def get_row_key(row: dict[str, Any], key_columns: list[str]) -> tuple[str, ...]:
+    """行を一意に識別するキーを返します。キーで並べ替えられるように、値を文字列に変換します。"""
+    return tuple("" if row.get(column) is None else str(row[column]) for column in key_columns)
+
+
+def _is_nested_value(value: Any) -> bool:  # noqa: ANN401
+    return isinstance(value, (dict, list))
+
+
+def _serialize_table(rows: list[dict[str, Any]], table_format: TableFormat) -> tuple[bytes, list[str]]:
+    """
+    テーブルをファイルの内容に変換します。
+
+    Returns:
+        tuple[0]: ファイルの内容
+        tuple[1]: JSON文字列に変換した列。Parquetの場合、dictやlistを含む列は列の型が定まらないのでJSON文字列に変換します。
+    """
+    if table_format == TableFormat.JSONL:
+        return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8"), []
+
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    json_columns = [column for column in columns if any(_is_nested_value(row.get(column)) for row in rows)]
+    df = pandas.DataFrame(
+        [{**row, **{column: json.dumps(row[column], ensure_ascii=False) for column in json_columns if column in row}} for row in rows],
+        columns=columns,
+    )
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue(), json_columns
+
+
+def _deserialize_table(data: bytes, table_format: TableFormat, json_columns: Collection[str]) -> list[dict[str, Any]]:
+    if table_format == TableFormat.JSONL:
+        return [json.loads(line) for line in data.decode("utf-8").splitlines() if line != ""]
+
+    df = pandas.read_parquet(io.BytesIO(data))
+    # 欠損値をNoneにするために、JSONを経由してdictに変換する
+    rows: list[dict[str, Any]] = json.loads(df.to_json(orient="records", force_ascii=False))
+    for row in rows:
+        for column in json_columns:
+            if row.get(column) is not None:
+                row[column] = json.loads(row[column])
+    return rows
+
+
+def write_snapshot(output: Path, manifest: dict[str, Any], tables: dict[str, list[dict[str, Any]]], *, table_format: TableFormat) -> None:
+    """
+    スナップショットをzipファイルに書き込みます。書き込み途中のファイルを読み込まないように、アトミックに置き換えます。
+
+    Args:
+        output: 出力先のファイル
+        manifest: ``manifest.json`` に格納する情報。テーブルの情報とフォーマットのバージョンは追加します。
+        tables: key:テーブル名, value:テーブルの行
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    table_infos = {}
+    try:
+        with zipfile.ZipFile(tmp_file, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for table_name, rows in tables.items():
+                file_name = f"tables/{table_name}.{table_format.value}"
+                data, json_columns = _serialize_table(rows, table_format)
+                zf.writestr(file_name, data)
+                table_infos[table_name] = {"file": file_name, "row_count": len(rows), "json_columns": json_columns}
+
+            manifest = {**manifest, "format_version": SNAPSHOT_FORMAT_VERSION, "table_format": table_format.value, "tables": table_infos}
+            zf.writestr(MANIFEST_FILE_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+        tmp_file.replace(output)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+
+class WorkspaceSnapshot:
+    """
+    スナップショットに格納されたワークスペースのデータ
+
+    Args:
+        manifest: ``manifest.json`` の内容
+        tables: key:テーブル名, value:テーブルの行
+    """
+
+    def __init__(self, manifest: dict[str, Any], tables: dict[str, list[dict[str, Any]]]) -> None:
+        self.manifest = manifest
+        self.tables = tables
+
+    @property
+    def workspace_id(self) -> str:
+        return self.manifest["workspace_id"]
+
+    @property
+    def start_date(self) -> str | None:
+        """格納されている作業計画・予定稼働時間・実績作業時間の期間の開始日。Noneなら期間を絞り込まずに取得しています。"""
+        return self.manifest.get("start_date")
+
+    @property
+    def end_date(self) -> str | None:
+        """格納されている作業計画・予定稼働時間・実績作業時間の期間の終了日。Noneなら期間を絞り込まずに取得しています。"""
+        return self.manifest.get("end_date")
+
+    @classmethod
+    def load(cls, snapshot_file: Path) -> "WorkspaceSnapshot":
+        """
+        スナップショットを読み込みます。
+
+        Raises:
+            FileNotFoundError: ファイルが存在しない場合
+            AnnoworkCliException: このバージョンのannoworkcliでは読み込めないスナップショットの場合
+        """
+        if not snapshot_file.exists():
+            raise FileNotFoundError(f"スナップショット '{snapshot_file}' は存在しません。 `annoworkcli workspace snapshot` で作成してください。")
+
+        with zipfile.ZipFile(snapshot_file) as zf:
+            manifest = read_manifest(zf, snapshot_file)
+            table_format = TableFormat(manifest["table_format"])
+            tables = {
+                table_name: _deserialize_table(zf.read(table_info["file"]), table_format, table_info.get("json_columns", []))
+                for table_name, table_info in manifest["tables"].items()
+            }
+
+        logger.debug(
+            f"スナップショット '{snapshot_file}' を読み込みました。 :: workspace_id='{manifest['workspace_id']}', "
+            f"start_date={manifest.get('start_date')}, end_date={manifest.get('end_date')}, created_datetime={manifest.get('created_datetime')}"
+        )
+        return cls(manifest, tables)
+
+
+def read_manifest(zf: zipfile.ZipFile, snapshot_file: Path) -> dict[str, Any]:
+    """
+    スナップショットの ``manifest.json`` を読み込みます。
+
+    Raises:
+        AnnoworkCliException: このバージョンのannoworkcliでは読み込めないスナップショットの場合
+    """
+    manifest = json.loads(zf.read(MANIFEST_FILE_NAME))
+    format_version = manifest.get("format_version")
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise AnnoworkCliException(
+            f"スナップショット '{snapshot_file}' のフォーマットのバージョン '{format_version}' は読み込めません。"
+            f"バージョン '{SNAPSHOT_FORMAT_VERSION}' のスナップショットを作成し直してください。"
+        )
+    check_table_format(TableFormat(manifest["table_format"]))
+    return manifest
+
+
+def iter_table_rows(zf: zipfile.ZipFile, table_info: dict[str, Any], table_format: TableFormat) -> Iterator[dict[str, Any]]:
+    """
+    スナップショットのテーブルの行を、格納されている順に1行ずつ返します。テーブル全体をメモリに読み込みません。
+
+    Args:
+        zf: スナップショットのzipファイル
+        table_info: ``manifest.json`` の ``tables`` に格納されているテーブルの情報
+    """
+    json_columns = table_info.get("json_columns", [])
+    with zf.open(table_info["file"]) as f:
+        if table_format == TableFormat.JSONL:
+            for line in io.TextIOWrapper(f, encoding="utf-8"):
+                if line.strip() != "":
+                    yield json.loads(line)
+            return
+
+        parquet = importlib.import_module("pyarrow.parquet")
+        for batch in parquet.ParquetFile(f).iter_batches():
+            for row in batch.to_pylist():
+                for column in json_columns:
+                    if row.get(column) is not None:
+                        row[column] = json.loads(row[column])
+                yield row
+
+
+class _HttpNotFound(Exception):  # noqa: N818
+    pass
+
+
+def _parse_term_datetime(value: str, *, is_end: bool) -> datetime.datetime:
+    """
+    実績作業時間の ``term_start`` , ``term_end`` を日時に変換します。日付だけの場合はローカルのタイムゾーンの日付とみなします。
+    """
+    if len(value) == len("2022-01-01"):
+        dt = datetime.datetime.fromisoformat(value).astimezone()
+        return dt + datetime.timedelta(days=1) - datetime.timedelta(microseconds=1) if is_end else dt
+    return datetime.datetime.fromisoformat(value)
+
+
+def _is_true(value: str | None) -> bool:
+    return value is not None and value.lower() == "true"
+
+
+Route = tuple[str, re.Pattern[str], Callable[..., Any]]
+
+
+class SnapshotResponder:
+    """
+    Annowork WebAPIのGETリクエストに対するレスポンスを、スナップショットのデータから返します。複数のスレッドから利用できます。
+
+    Args:
+        snapshot_file: スナップショットのファイル
+    """
+
+    def __init__(self, snapshot_file: Path) -> None:
+        self.snapshot_file = snapshot_file
+        self.snapshot = WorkspaceSnapshot.load(snapshot_file)
+        self._lock = threading.Lock()
+        self._is_warned_out_of_range = False
+
+        tables = self.snapshot.tables
+        self._member_dict = {e["workspace_member_id"]: e for e in tables["workspace_members"]}
+        self._tag_dict = {e["workspace_tag_id"]: e for e in tables["workspace_tags"]}
+        self._job_dict = {e["job_id"]: e for e in tables["jobs"]}
+        self._schedule_dict = {e["schedule_id"]: e for e in tables["schedules"]}
+        self._routes = self._create_routes()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # `multiprocessing.Pool`でSessionごとpickleされる場合があるので、ファイルのパスだけをpickleする。
+        return {"snapshot_file": self.snapshot_file}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["snapshot_file"])  # type: ignore[misc]
+
+    def _create_routes(self) -> list[Route]:
+        ws = "/workspaces/(?P<workspace_id>[^/]+)"
+        routes: list[tuple[str, str, Callable[..., Any]]] = [
+            ("POST", "/login", self._login),
+            ("GET", ws, self._get_workspace),
+            ("GET", f"{ws}/members", self._get_workspace_members),
+            ("GET", f"{ws}/members/(?P<workspace_member_id>[^/]+)", self._get_workspace_member),
+            ("GET", f"{ws}/members/(?P<workspace_member_id>[^/]+)/tags", self._get_workspace_member_tags),
+            ("GET", f"{ws}/members/(?P<workspace_member_id>[^/]+)/actual-working-times", self._get_actual_working_times),
+            ("GET", f"{ws}/members/(?P<workspace_member_id>[^/]+)/expected-working-times", self._get_expected_working_times),
+            ("GET", f"{ws}/tags", self._get_workspace_tags),
+            ("GET", f"{ws}/tags/(?P<workspace_tag_id>[^/]+)", self._get_workspace_tag),
+            ("GET", f"{ws}/tags/(?P<workspace_tag_id>[^/]+)/members", self._get_workspace_tag_members),
+            ("GET", f"{ws}/jobs", self._get_jobs),
+            ("GET", f"{ws}/jobs/(?P<job_id>[^/]+)", self._get_job),
+            ("GET", f"{ws}/jobs/(?P<job_id>[^/]+)/children", self._get_job_children),
+            ("GET", f"{ws}/schedules", self._get_schedules),
+            ("GET", f"{ws}/schedules/(?P<schedule_id>[^/]+)", self._get_schedule),
+            ("GET", f"{ws}/actual-working-times", self._get_actual_working_times),
+            ("GET", f"{ws}/expected-working-times", self._get_expected_working_times),
+        ]
+        # エンドポイントURLのパス（ ``/api/v1`` など）は問わない
+        return [(method, re.compile(f"{pattern}$"), handler) for method, pattern, handler in routes]
+
+    def respond(self, request: requests.PreparedRequest) -> tuple[int, Any]:
+        """
+        リクエストに対するレスポンスのステータスコードとボディを返します。
+
+        Raises:
+            SnapshotRequestError: スナップショットから返せないリクエストの場合
+        """
+        method = (request.method or "GET").upper()
+        parsed_url = urlparse(request.url or "")
+        query = {key: values[-1] for key, values in parse_qs(parsed_url.query).items()}
+        for route_method, pattern, handler in self._routes:
+            m = pattern.search(parsed_url.path)
+            if m is None or route_method != method:
+                continue
+            params = m.groupdict()
+            try:
+                if "workspace_id" in params and params.pop("workspace_id") != self.snapshot.workspace_id:
+                    raise _HttpNotFound
+                return 200, handler(query=query, **params)
+            except _HttpNotFound:
+                return 404, {"errors": [{"error_code": "NOT_FOUND", "message": "スナップショットに存在しないリソースです。"}]}
+
+        raise SnapshotRequestError(f"スナップショットからは返せないリクエストです。 :: {method} {request.url}")
+
+    def _to_date(self, term: str) -> str:
+        """``term_start`` などの日時を、スナップショットを作成したときのタイムゾーンの日付に変換します。"""
+        if len(term) == len("2022-01-01"):
+            return term
+        tzinfo = get_tzinfo(self.snapshot.manifest.get("timezone_offset_hours"))
+        return datetime.datetime.fromisoformat(term).astimezone(tzinfo).date().isoformat()
+
+    def _warn_if_out_of_range(self, query: dict[str, str]) -> None:
+        """リクエストの期間がスナップショットに格納されているデータの期間に含まれていなければ、1回だけ警告を出します。"""
+        snapshot_start_date, snapshot_end_date = self.snapshot.start_date, self.snapshot.end_date
+        term_start, term_end = query.get("term_start"), query.get("term_end")
+        is_out_of_range = (snapshot_start_date is not None and (term_start is None or self._to_date(term_start) < snapshot_start_date)) or (
+            snapshot_end_date is not None and (term_end is None or self._to_date(term_end) > snapshot_end_date)
+        )
+        if not is_out_of_range:
+            return
+        with self._lock:
+            if self._is_warned_out_of_range:
+                return
+            self._is_warned_out_of_range = True
+        logger.warning(
+            f"スナップショットには {snapshot_start_date} から {snapshot_end_date} までのデータしか格納されていません。"
+            f"それ以外の期間のデータは出力されません。 :: term_start={term_start}, term_end={term_end}"
+        )
+
+    def _login(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return {"id_token": SNAPSHOT_USER_ID, "access_token": SNAPSHOT_USER_ID, "refresh_token": SNAPSHOT_USER_ID}
+
+    def _get_workspace(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return self.snapshot.tables["workspaces"][0]
+
+    def _get_workspace_members(self, query: dict[str, str], **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        members = self.snapshot.tables["workspace_members"]
+        if _is_true(query.get("includes_inactive_members")):
+            return members
+        return [e for e in members if e.get("status") != "inactive"]
+
+    def _get_workspace_member(self, workspace_member_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if workspace_member_id not in self._member_dict:
+            raise _HttpNotFound
+        return self._member_dict[workspace_member_id]
+
+    def _get_workspace_member_tags(self, workspace_member_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        tag_ids = {e["workspace_tag_id"] for e in self.snapshot.tables["workspace_tag_members"] if e["workspace_member_id"] == workspace_member_id}
+        return [e for e in self.snapshot.tables["workspace_tags"] if e["workspace_tag_id"] in tag_ids]
+
+    def _get_workspace_tags(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return self.snapshot.tables["workspace_tags"]
+
+    def _get_workspace_tag(self, workspace_tag_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if workspace_tag_id not in self._tag_dict:
+            raise _HttpNotFound
+        return self._tag_dict[workspace_tag_id]
+
+    def _get_workspace_tag_members(self, workspace_tag_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        member_ids = [e["workspace_member_id"] for e in self.snapshot.tables["workspace_tag_members"] if e["workspace_tag_id"] == workspace_tag_id]
+        return [self._member_dict[e] for e in member_ids if e in self._member_dict]
+
+    def _get_jobs(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return self.snapshot.tables["jobs"]
+
+    def _get_job(self, job_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if job_id not in self._job_dict:
+            raise _HttpNotFound
+        return self._job_dict[job_id]
+
+    def _get_job_children(self, job_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return [e for e in self.snapshot.tables["jobs"] if get_parent_job_id_from_job_tree(e["job_tree"]) == job_id]
+
+    def _get_schedules(self, query: dict[str, str], **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        self._warn_if_out_of_range(query)
+        job_id = query.get("job_id")
+        term_start = query.get("term_start")
+        term_end = query.get("term_end")
+        return [
+            e
+            for e in self.snapshot.tables["schedules"]
+            if (job_id is None or e["job_id"] == job_id)
+            and (term_start is None or e["end_date"] >= term_start)
+            and (term_end is None or e["start_date"] <= term_end)
+        ]
+
+    def _get_schedule(self, schedule_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if schedule_id not in self._schedule_dict:
+            raise _HttpNotFound
+        return self._schedule_dict[schedule_id]
+
+    def _get_actual_working_times(self, query: dict[str, str], workspace_member_id: str | None = None, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        self._warn_if_out_of_range(query)
+        job_id = query.get("job_id")
+        term_start = _parse_term_datetime(query["term_start"], is_end=False) if "term_start" in query else None
+        term_end = _parse_term_datetime(query["term_end"], is_end=True) if "term_end" in query else None
+        result = []
+        for actual in self.snapshot.tables["actual_working_times"]:
+            if (workspace_member_id is not None and actual["workspace_member_id"] != workspace_member_id) or (
+                job_id is not None and actual["job_id"] != job_id
+            ):
+                continue
+            start_datetime = datetime.datetime.fromisoformat(actual["start_datetime"])
+            if (term_start is not None and start_datetime < term_start) or (term_end is not None and start_datetime > term_end):
+                continue
+            result.append(actual)
+        return result
+
+    def _get_expected_working_times(self, query: dict[str, str], workspace_member_id: str | None = None, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        self._warn_if_out_of_range(query)
+        term_start = query.get("term_start")
+        term_end = query.get("term_end")
+        return [
+            e
+            for e in self.snapshot.tables["expected_working_times"]
+            if (workspace_member_id is None or e["workspace_member_id"] == workspace_member_id)
+            and (term_start is None or e["date"] >= term_start[:10])
+            and (term_end is None or e["date"] <= term_end[:10])
+        ]
+
+
+class SnapshotHTTPAdapter(BaseAdapter):
+    """
+    ネットワークに接続せずに、 :class:`SnapshotResponder` が返すレスポンスを返すHTTPAdapter
+    """
+
+    def __init__(self, responder: SnapshotResponder) -> None:
+        super().__init__()
+        self.responder = responder
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]  # noqa: ANN401, ARG002
+        status_code, body = self.responder.respond(request)
+        content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = "OK" if status_code == 200 else "Not Found"
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json", "Content-Length": str(len(content))})
+        response._content = content
+        response.url = request.url or ""
+        response.request = request
+        response.connection = self  # type: ignore[assignment]
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+_snapshot_responder: SnapshotResponder | None = None
+
+
+def set_snapshot_responder(responder: SnapshotResponder | None) -> None:
+    """プロセス全体で利用するSnapshotResponderを設定します。NoneならWebAPIにアクセスします。"""
+    global _snapshot_responder  # noqa: PLW0603
+    _snapshot_responder = responder
+
+
+def get_snapshot_responder() -> SnapshotResponder | None:
+    return _snapshot_responder
@@ -0,0 +1,364 @@
+"""
+出力ファイルの分割と圧縮
+
+``--partition_by`` を指定すると、 ``--output`` をディレクトリとみなして、指定した列の値ごとに ``{列名}={値}.csv`` などのファイルに出力します。
+``--compression`` を指定すると、出力ファイルをgzipまたはzstdで圧縮します。
+
+行を一定の件数ごとにCSV/JSONの文字列に変換する処理（メインスレッド）と、圧縮・書き込みの処理（バックグラウンドのスレッド）を並行して実行します。
+:func:`write_csv` と :func:`write_json` は、作成済みのデータを受け取るので、データを作成する処理と書き込みは並行しません。
+:func:`write_lines` は、行を生成しながら書き込みます。
+"""
+
+import gzip
+import importlib
+import json
+import logging
+import queue
+import sys
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Protocol, Self
+
+import pandas
+
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.metrics import phase
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ["date", "parent_job_id", "user_id"]
+"""``--partition_by`` に指定できる列"""
+
+NULL_PARTITION_NAME = "__null__"
+"""分割に使う列の値が欠損値の場合のファイル名"""
+
+CHUNK_ROW_COUNT = 50_000
+"""1回に文字列に変換する行数"""
+
+_QUEUE_MAX_SIZE = 8
+"""バックグラウンドのスレッドに渡す、書き込み待ちのデータの最大数。変換が書き込みより速い場合に、メモリを使いすぎないようにします。"""
+
+
+class Compression(Enum):
+    """出力ファイルの圧縮形式"""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+    @property
+    def suffix(self) -> str:
+        """ファイルの拡張子"""
+        return {Compression.GZIP: ".gz", Compression.ZSTD: ".zst"}[self]
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """出力ファイルの分割と圧縮の設定"""
+
+    partition_by: str | None = None
+    """出力ファイルを分割する列"""
+    compression: Compression | None = None
+    """出力ファイルの圧縮形式"""
+
+    @property
+    def is_default(self) -> bool:
+        return self.partition_by is None and self.compression is None
+
+
+_output_options = OutputOptions()
+
+
+def set_output_options(options: OutputOptions) -> None:
+    """プロセス全体で利用する出力ファイルの分割と圧縮の設定を設定します。"""
+    global _output_options  # noqa: PLW0603
+    _output_options = options
+
+
+def get_output_options() -> OutputOptions:
+    return _output_options
+
+
+def _import_zstd_module() -> ModuleType:
+    """
+    zstdで圧縮するモジュールを返します。
+    Python 3.14以上の標準ライブラリ ``compression.zstd`` 、または ``zstandard`` パッケージを利用します。
+
+    Raises:
+        CommandLineArgumentError: どちらも利用できない場合
+    """
+    for module_name in ["compression.zstd", "zstandard"]:
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
+            continue
+    raise CommandLineArgumentError(
+        "`--compression zstd` を指定するには、Python 3.14以上を利用するか、`zstandard` パッケージをインストールしてください。"
+    )
+
+
+def check_compression(compression: Compression | None) -> None:
+    """
+    圧縮形式が利用可能かどうかを確認します。
+
+    Raises:
+        CommandLineArgumentError: 圧縮形式が利用できない場合
+    """
+    if compression == Compression.ZSTD:
+        _import_zstd_module()
+
+
+class _BinaryWriter(Protocol):
+    def write(self, data: bytes, /) -> int: ...
+
+    def close(self) -> None: ...
+
+
+def _open_binary_stream(output: Path | None, compression: Compression | None) -> _BinaryWriter:
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+    raw: _BinaryWriter = output.open("wb") if output is not None else _UnclosableStream(sys.stdout.buffer)
+    if compression is None:
+        return raw
+    if compression == Compression.GZIP:
+        return _ClosingWrapper(gzip.GzipFile(fileobj=raw, mode="wb"), raw)  # type: ignore[call-overload]
+
+    zstd = _import_zstd_module()
+    if zstd.__name__ == "zstandard":
+        return zstd.ZstdCompressor().stream_writer(raw, closefd=True)
+    return _ClosingWrapper(zstd.ZstdFile(raw, mode="wb"), raw)
+
+
+class _UnclosableStream:
+    """標準出力を閉じないようにするためのラッパー"""
+
+    def __init__(self, stream: Any) -> None:  # noqa: ANN401
+        self._stream = stream
+
+    def write(self, data: bytes) -> int:
+        return self._stream.write(data)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def close(self) -> None:
+        self._stream.flush()
+
+
+class _ClosingWrapper:
+    """圧縮用のストリームを閉じたときに、書き込み先のストリームも閉じるためのラッパー"""
+
+    def __init__(self, stream: Any, raw: Any) -> None:  # noqa: ANN401
+        self._stream = stream
+        self._raw = raw
+
+    def write(self, data: bytes) -> int:
+        return self._stream.write(data)
+
+    def close(self) -> None:
+        self._stream.close()
+        self._raw.close()
+
+
+class BackgroundWriter:
+    """
+    バックグラウンドのスレッドで、ファイルを開いてバイト列を書き込みます。
+    呼び出し元のスレッドは、書き込みの完了を待たずに次のバイト列を作成できます。
+
+    1個のスレッドで順番に書き込むので、 :meth:`open` を呼び出すと、それ以前に開いたファイルは閉じられます。
+    コンテキストマネージャーとして利用して、終了時にすべての書き込みが完了するまで待ちます。
+    バックグラウンドのスレッドで発生した例外は、終了時に送出します。
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, *, compression: Compression | None) -> None:
+        self.compression = compression
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=_QUEUE_MAX_SIZE)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="annoworkcli-writer", daemon=True)
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self._queue.put(self._CLOSE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def open(self, output: Path | None) -> None:
+        self._put(("open", output))
+
+    def write(self, data: bytes) -> None:
+        self._put(("write", data))
+
+    def _put(self, item: tuple[str, Any]) -> None:
+        if self._error is not None:
+            # バックグラウンドのスレッドで例外が発生したら、それ以上変換しない
+            raise self._error
+        self._queue.put(item)
+
+    def _run(self) -> None:
+        stream: _BinaryWriter | None = None
+        while True:
+            item = self._queue.get()
+            if self._error is not None and item is not self._CLOSE:
+                # 例外が発生した後は、キューを空にするだけにする
+                continue
+            try:
+                if item is self._CLOSE:
+                    if stream is not None:
+                        stream.close()
+                    return
+                command, value = item
+                if command == "open":
+                    if stream is not None:
+                        stream.close()
+                    stream = _open_binary_stream(value, self.compression)
+                else:
+                    assert stream is not None
+                    stream.write(value)
+            except BaseException as e:
+                self._error = e
+
+
+def _get_partition_file_name(column: str, value: Any, suffix: str) -> str:  # noqa: ANN401
+    if value is None or (not isinstance(value, (list, dict)) and pandas.isna(value)):
+        str_value = NULL_PARTITION_NAME
+    else:
+        str_value = str(value).replace("/", "_")
+    return f"{column}={str_value}{suffix}"
+
+
+def _get_compressed_output(output: Path, compression: Compression | None) -> Path:
+    """圧縮する場合は、拡張子が付いていなければ付けます。"""
+    if compression is None or output.name.endswith(compression.suffix):
+        return output
+    return output.with_name(output.name + compression.suffix)
+
+
+def _iter_csv_chunks(df: pandas.DataFrame, to_csv_kwargs: dict[str, Any]) -> Iterator[bytes]:
+    kwargs = dict(to_csv_kwargs)
+    encoding = kwargs.pop("encoding", "utf_8")
+    header = kwargs.pop("header", True)
+    # BOMは先頭のチャンクにだけ付ける
+    subsequent_encoding = "utf_8" if encoding.lower().replace("-", "_") in {"utf_8_sig", "utf8_sig"} else encoding
+    for start in range(0, max(len(df), 1), CHUNK_ROW_COUNT):
+        is_first = start == 0
+        text = df.iloc[start : start + CHUNK_ROW_COUNT].to_csv(None, header=header if is_first else False, **kwargs)
+        yield text.encode(encoding if is_first else subsequent_encoding)
+
+
+def _get_partitions(df: pandas.DataFrame, output: Path | None, options: OutputOptions, extension: str) -> list[tuple[Path | None, pandas.DataFrame]]:
+    """出力先のパスと、そのパスに出力するDataFrameのlistを返します。"""
+    suffix = extension + (options.compression.suffix if options.compression is not None else "")
+    partition_by = options.partition_by
+    if partition_by is None or output is None:
+        if partition_by is not None:
+            logger.warning("`--output` が指定されていないので、`--partition_by` を無視して標準出力に出力します。")
+        return [(_get_compressed_output(output, options.compression) if output is not None else None, df)]
+
+    if partition_by not in df.columns:
+        logger.warning(f"出力対象のデータに '{partition_by}' 列が存在しないので、分割せずに '{output / ('all' + suffix)}' に出力します。")
+        return [(output / f"all{suffix}", df)]
+
+    return [
+        (output / _get_partition_file_name(partition_by, value, suffix), df_partition)
+        for value, df_partition in df.groupby(partition_by, dropna=False, sort=True)
+    ]
+
+
+def write_csv(df: pandas.DataFrame, output: Path | None, to_csv_kwargs: dict[str, Any]) -> list[Path]:
+    """
+    :func:`get_output_options` の設定に従って、DataFrameをCSVとして出力します。
+
+    Returns:
+        出力したファイルのパスのlist
+    """
+    options = get_output_options()
+    partitions = _get_partitions(df, output, options, ".csv")
+    with phase("write"), BackgroundWriter(compression=options.compression) as writer:
+        for partition_output, df_partition in partitions:
+            writer.open(partition_output)
+            for data in _iter_csv_chunks(df_partition, to_csv_kwargs):
+                writer.write(data)
+    return [e for e, _ in partitions if e is not None]
+
+
+def write_json(target: Any, output: Path | None, *, is_pretty: bool) -> list[Path]:  # noqa: ANN401
+    """
+    :func:`get_output_options` の設定に従って、JSONを出力します。
+    ``target`` がdictのlistの場合だけ、 ``--partition_by`` で分割します。
+
+    Returns:
+        出力したファイルのパスのlist
+    """
+    options = get_output_options()
+    indent = 2 if is_pretty else None
+
+    outputs: list[tuple[Path | None, Any]]
+    if isinstance(target, list) and all(isinstance(e, dict) for e in target) and options.partition_by is not None and output is not None:
+        partition_by = options.partition_by
+        suffix = ".json" + (options.compression.suffix if options.compression is not None else "")
+        if len(target) > 0 and all(partition_by not in e for e in target):
+            logger.warning(f"出力対象のデータに '{partition_by}' キーが存在しないので、分割せずに出力します。")
+            outputs = [(output / f"all{suffix}", target)]
+        else:
+            grouped: dict[str, list[Any]] = {}
+            for elm in target:
+                grouped.setdefault(_get_partition_file_name(partition_by, elm.get(partition_by), suffix), []).append(elm)
+            outputs = [(output / file_name, elements) for file_name, elements in sorted(grouped.items())]
+    else:
+        if options.partition_by is not None:
+            logger.warning("出力対象のデータを分割できないので、`--partition_by` を無視します。")
+        outputs = [(_get_compressed_output(output, options.compression) if output is not None else None, target)]
+
+    with phase("write"), BackgroundWriter(compression=options.compression) as writer:
+        for partition_output, partition_target in outputs:
+            writer.open(partition_output)
+            writer.write(
+                (json.dumps(partition_target, indent=indent, ensure_ascii=False) + ("\n" if partition_output is None else "")).encode("utf_8")
+            )
+    return [e for e, _ in outputs if e is not None]
+
+
+def write_lines(lines: Iterable[str], output: Path | None, *, encoding: str = "utf_8") -> Path | None:
+    """
+    :func:`get_output_options` の圧縮の設定に従って、行を順番に出力します。
+    ``lines`` は ``CHUNK_ROW_COUNT`` 行ずつ書き込むので、すべての行をメモリに保持しません。
+    ``--partition_by`` には対応していません。
+
+    Args:
+        lines: 出力する行。末尾に改行を含める必要があります。
+        output: 出力先。Noneなら標準出力に出力する。
+        encoding: 文字コード。 ``utf_8_sig`` の場合、BOMは先頭にだけ付けます。
+
+    Returns:
+        出力したファイルのパス。標準出力に出力した場合はNone
+    """
+    options = get_output_options()
+    if options.partition_by is not None:
+        logger.warning("出力対象のデータを分割できないので、`--partition_by` を無視します。")
+    output = _get_compressed_output(output, options.compression) if output is not None else None
+
+    subsequent_encoding = "utf_8" if encoding.lower().replace("-", "_") in {"utf_8_sig", "utf8_sig"} else encoding
+    with phase("write"), BackgroundWriter(compression=options.compression) as writer:
+        writer.open(output)
+        chunk: list[str] = []
+        is_first = True
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) < CHUNK_ROW_COUNT:
+                continue
+            writer.write("".join(chunk).encode(encoding if is_first else subsequent_encoding))
+            chunk = []
+            is_first = False
+        if len(chunk) > 0 or is_first:
+            writer.write("".join(chunk).encode(encoding if is_first else subsequent_encoding))
+    return output
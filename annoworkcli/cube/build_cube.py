@@ -0,0 +1,320 @@
+import argparse
+import datetime
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any
+
+from annoworkapi.job import get_parent_job_id_from_job_tree
+from annoworkapi.resource import Resource as AnnoworkResource
+
+import annoworkcli
+import annoworkcli.common.cli
+from annoworkcli.actual_working_time.list_actual_working_hours_daily import create_actual_working_hours_daily_list
+from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
+from annoworkcli.annofab.list_working_hours import ListWorkingHoursWithAnnofab
+from annoworkcli.annofab.utils import build_annofabapi_resource
+from annoworkcli.common.annofab import get_annofab_project_id_from_job
+from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, build_annoworkapi
+from annoworkcli.common.concurrency import flat_map_concurrently, map_concurrently
+from annoworkcli.common.cube import AGGREGATE_DEPENDENT_DIMENSION_TABLES, WorkingHoursCube
+from annoworkcli.common.job import get_all_jobs
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.utils import get_today_str
+from annoworkcli.common.weekly import WeekStart, add_week_start_argument
+from annoworkcli.common.workspace_tag import get_company_from_workspace_tag_name
+from annoworkcli.expected_working_time.list_expected_working_time import ListExpectedWorkingTime
+from annoworkcli.schedule.list_assigned_hours_daily import ListAssignedHoursDaily
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_DAYS = 7
+
+
+def create_job_rows(all_jobs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """キューブの ``jobs`` テーブルに格納する行を生成します。"""
+    all_job_dict = {e["job_id"]: e for e in all_jobs}
+    result = []
+    for job in all_jobs:
+        parent_job_id = get_parent_job_id_from_job_tree(job["job_tree"])
+        parent_job = all_job_dict.get(parent_job_id) if parent_job_id is not None else None
+        result.append(
+            {
+                "job_id": job["job_id"],
+                "job_name": job["job_name"],
+                "parent_job_id": parent_job_id,
+                "parent_job_name": parent_job["job_name"] if parent_job is not None else None,
+                "status": job.get("status"),
+                "annofab_project_id": get_annofab_project_id_from_job(job),
+            }
+        )
+    return result
+
+
+def create_actual_daily_rows(actual_working_times: list[dict[str, Any]], *, timezone_offset_hours: float | None) -> list[dict[str, Any]]:
+    """キューブの ``actual_daily`` テーブルに格納する行を生成します。"""
+    daily_list = create_actual_working_hours_daily_list(actual_working_times, timezone_offset_hours=timezone_offset_hours, show_notes=True)
+    return [
+        {
+            "date": e.date,
+            "workspace_member_id": e.workspace_member_id,
+            "job_id": e.job_id,
+            "actual_working_hours": e.actual_working_hours,
+            "notes": json.dumps(e.notes, ensure_ascii=False) if e.notes is not None else None,
+        }
+        for e in daily_list
+    ]
+
+
+class BuildCube:
+    def __init__(
+        self,
+        annowork_service: AnnoworkResource,
+        workspace_id: str,
+        *,
+        timezone_offset_hours: float | None,
+        annofab_args: argparse.Namespace | None = None,
+    ) -> None:
+        self.annowork_service = annowork_service
+        self.workspace_id = workspace_id
+        self.timezone_offset_hours = timezone_offset_hours
+        self.annofab_args = annofab_args
+        """Noneでなければ、Annofabの作業時間もキューブに格納します。"""
+
+    def get_tag_rows(self) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """キューブの ``tags`` , ``tag_members`` テーブルに格納する行を返します。"""
+        with phase("fetch_workspace_tags"):
+            workspace_tags = self.annowork_service.api.get_workspace_tags(self.workspace_id)
+
+        def get_tag_members(workspace_tag: dict[str, Any]) -> list[dict[str, Any]]:
+            members = self.annowork_service.api.get_workspace_tag_members(self.workspace_id, workspace_tag["workspace_tag_id"])
+            return [{"workspace_tag_id": workspace_tag["workspace_tag_id"], "workspace_member_id": e["workspace_member_id"]} for e in members]
+
+        with phase("fetch_workspace_tag_members"):
+            tag_member_rows = flat_map_concurrently(get_tag_members, workspace_tags, progress_description="ワークスペースタグのメンバの取得")
+
+        tag_rows = [
+            {
+                "workspace_tag_id": e["workspace_tag_id"],
+                "workspace_tag_name": e["workspace_tag_name"],
+                "company": get_company_from_workspace_tag_name(e["workspace_tag_name"]),
+            }
+            for e in workspace_tags
+        ]
+        return tag_rows, tag_member_rows
+
+    def get_annofab_rows(self, *, start_date: str, end_date: str) -> tuple[dict[str, str | None], list[dict[str, Any]]]:
+        """
+        Annofabの作業時間を取得します。
+
+        Returns:
+            tuple[0]: key:workspace_member_id, value:annofab_account_id
+            tuple[1]: キューブの ``annofab_daily`` テーブルに格納する行
+        """
+        assert self.annofab_args is not None
+        list_obj = ListWorkingHoursWithAnnofab(
+            annowork_service=self.annowork_service,
+            workspace_id=self.workspace_id,
+            annofab_service=build_annofabapi_resource(
+                annofab_login_user_id=self.annofab_args.annofab_user_id,
+                annofab_login_password=self.annofab_args.annofab_password,
+                annofab_pat=self.annofab_args.annofab_pat,
+            ),
+            parallelism=self.annofab_args.parallelism,
+        )
+
+        members = list_obj.all_workspace_members
+        with phase("fetch_annofab_accounts"):
+            account_ids = map_concurrently(
+                self.annowork_service.wrapper.get_annofab_account_id_from_user_id,
+                [member["user_id"] for member in members],
+                progress_description="アカウント外部連携情報の取得",
+            )
+        annofab_account_ids = {member["workspace_member_id"]: account_id for member, account_id in zip(members, account_ids, strict=True)}
+
+        af_project_ids = list_obj.annofab_linkage_index.get_annofab_project_ids()
+        df_af_working_hours = list_obj.get_af_working_hours(af_project_ids, start_date, end_date)
+        return annofab_account_ids, df_af_working_hours.to_dict("records")
+
+    def build(self, cube: WorkingHoursCube, *, start_date: str, end_date: str, week_start: WeekStart) -> None:
+        """``start_date`` から ``end_date`` までのデータをWebAPIから取得して、キューブを更新します。"""
+        all_jobs = get_all_jobs(self.annowork_service, self.workspace_id)
+
+        list_actual_obj = ListActualWorkingTime(self.annowork_service, self.workspace_id, timezone_offset_hours=self.timezone_offset_hours)
+        workspace_members = list_actual_obj.workspace_members
+
+        # 日付をまたぐ実績作業時間を取りこぼさないように、前日の実績作業時間も取得する
+        actual_start_date = (datetime.date.fromisoformat(start_date) - datetime.timedelta(days=1)).isoformat()
+        actual_working_times = list_actual_obj.get_actual_working_times(start_date=actual_start_date, end_date=end_date, is_set_additional_info=True)
+        actual_rows = create_actual_daily_rows(actual_working_times, timezone_offset_hours=self.timezone_offset_hours)
+        logger.info(f"{len(actual_rows)} 件の日ごとの実績作業時間を取得しました。")
+
+        assigned_hours_daily_list = ListAssignedHoursDaily(self.annowork_service, self.workspace_id).get_assigned_hours_daily_list(
+            start_date=start_date, end_date=end_date
+        )
+        assigned_rows = [e.to_dict() for e in assigned_hours_daily_list]
+        logger.info(f"{len(assigned_rows)} 件の日ごとのアサイン時間を取得しました。")
+
+        expected_rows = ListExpectedWorkingTime(self.annowork_service, self.workspace_id).get_expected_working_times(
+            start_date=start_date, end_date=end_date
+        )
+        logger.info(f"{len(expected_rows)} 件の予定稼働時間を取得しました。")
+
+        tag_rows, tag_member_rows = self.get_tag_rows()
+
+        member_rows = [dict(e) for e in workspace_members]
+        annofab_rows: list[dict[str, Any]] | None = None
+        if self.annofab_args is not None:
+            annofab_account_ids, annofab_rows = self.get_annofab_rows(start_date=start_date, end_date=end_date)
+            for row in member_rows:
+                row["annofab_account_id"] = annofab_account_ids.get(row["workspace_member_id"])
+            logger.info(f"{len(annofab_rows)} 件のAnnofabの作業時間を取得しました。")
+        else:
+            # Annofabの作業時間を取得しない場合は、以前に格納したAnnofabアカウントの情報を引き継ぐ
+            previous_annofab_account_ids = dict(cube.connection.execute("SELECT workspace_member_id, annofab_account_id FROM members").fetchall())
+            for row in member_rows:
+                row["annofab_account_id"] = previous_annofab_account_ids.get(row["workspace_member_id"])
+
+        with phase("write_cube"):
+            cube.set_meta("workspace_id", self.workspace_id)
+            cube.set_meta("timezone_offset_hours", str(self.timezone_offset_hours) if self.timezone_offset_hours is not None else "")
+            changed_dimensions = [
+                table
+                for table, rows in [
+                    ("jobs", create_job_rows(all_jobs)),
+                    ("members", member_rows),
+                    ("tags", tag_rows),
+                    ("tag_members", tag_member_rows),
+                ]
+                if cube.replace_dimension(table, rows)
+            ]
+            cube.replace_facts("actual_daily", actual_rows, start_date=start_date, end_date=end_date)
+            cube.replace_facts("assigned_daily", assigned_rows, start_date=start_date, end_date=end_date)
+            cube.replace_facts("expected_daily", expected_rows, start_date=start_date, end_date=end_date)
+            if annofab_rows is not None:
+                cube.replace_facts("annofab_daily", annofab_rows, start_date=start_date, end_date=end_date)
+            cube.update_date_range(start_date=start_date, end_date=end_date)
+
+        with phase("refresh_cube_aggregates"):
+            if len(changed_dimensions) > 0:
+                logger.info(f"{changed_dimensions} の内容が変わったので、集計済みのテーブルをすべての期間について作り直します。")
+            cube.refresh_aggregates(
+                start_date=start_date,
+                end_date=end_date,
+                week_start=week_start,
+                is_dimension_changed=any(table in AGGREGATE_DEPENDENT_DIMENSION_TABLES for table in changed_dimensions),
+            )
+
+
+def get_build_date_range(
+    cube: WorkingHoursCube, *, start_date: str | None, end_date: str | None, refresh_days: int, timezone_offset_hours: float | None
+) -> tuple[str, str] | None:
+    """
+    WebAPIから取得する期間を返します。
+
+    ``start_date`` が指定されていない場合は、キューブに格納されているデータの終了日の ``refresh_days`` 日前から取得します。
+    実績作業時間などは後から修正される可能性があるため、直近の期間は取得し直します。
+    キューブにデータが格納されておらず ``start_date`` も指定されていない場合は、Noneを返します。
+    """
+    if end_date is None:
+        end_date = get_today_str(timezone_offset_hours=timezone_offset_hours)
+
+    if start_date is None:
+        cube_start_date, cube_end_date = cube.get_date_range()
+        if cube_start_date is None or cube_end_date is None:
+            return None
+        start_date = max(
+            cube_start_date, (datetime.date.fromisoformat(min(cube_end_date, end_date)) - datetime.timedelta(days=refresh_days)).isoformat()
+        )
+
+    return start_date, end_date
+
+
+def main(args: argparse.Namespace) -> None:
+    workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
+    command = " ".join(sys.argv[0:3])
+
+    with WorkingHoursCube.open(args.cube, is_create=True) as cube:
+        if cube.workspace_id is not None and cube.workspace_id != workspace_id:
+            print(  # noqa: T201
+                f"{command}: error: キューブ '{args.cube}' には、別のワークスペース '{cube.workspace_id}' のデータが格納されています。",
+                file=sys.stderr,
+            )
+            sys.exit(COMMAND_LINE_ERROR_STATUS_CODE)
+
+        date_range = get_build_date_range(
+            cube, start_date=args.start_date, end_date=args.end_date, refresh_days=args.refresh_days, timezone_offset_hours=args.timezone_offset
+        )
+        if date_range is None:
+            print(f"{command}: error: キューブを新しく作成する場合は '--start_date' を指定してください。", file=sys.stderr)  # noqa: T201
+            sys.exit(COMMAND_LINE_ERROR_STATUS_CODE)
+
+        start_date, end_date = date_range
+        logger.info(f"{start_date} から {end_date} までのデータを取得して、キューブ '{args.cube}' を更新します。")
+        BuildCube(
+            build_annoworkapi(args),
+            workspace_id,
+            timezone_offset_hours=args.timezone_offset,
+            annofab_args=args if args.include_annofab else None,
+        ).build(cube, start_date=start_date, end_date=end_date, week_start=WeekStart(args.week_start))
+
+        cube_start_date, cube_end_date = cube.get_date_range()
+        logger.info(f"キューブ '{args.cube}' を更新しました。キューブには {cube_start_date} から {cube_end_date} までのデータが格納されています。")
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+
+    parser.add_argument("--cube", type=Path, required=True, help="作成または更新するキューブのファイル")
+
+    parser.add_argument(
+        "--start_date",
+        type=str,
+        required=False,
+        help="WebAPIから取得する期間の開始日(YYYY-mm-dd)。キューブを新しく作成する場合は必須です。\n"
+        "キューブを更新する場合に指定しないと、キューブに格納されているデータの終了日の ``--refresh_days`` 日前から取得します。",
+    )
+    parser.add_argument("--end_date", type=str, required=False, help="WebAPIから取得する期間の終了日(YYYY-mm-dd)。指定しない場合は今日です。")
+    parser.add_argument(
+        "--refresh_days",
+        type=int,
+        default=DEFAULT_REFRESH_DAYS,
+        help="``--start_date`` を指定せずにキューブを更新する場合に、取得し直す直近の日数",
+    )
+
+    add_week_start_argument(parser)
+
+    parser.add_argument(
+        "--timezone_offset",
+        type=float,
+        help="日付に対するタイムゾーンのオフセット時間。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
+    )
+
+    parser.add_argument(
+        "--include_annofab", action="store_true", help="指定した場合は、ジョブに紐づくAnnofabプロジェクトの作業時間もキューブに格納します。"
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        required=False,
+        help="Annofabプロジェクトの作業時間を同時に取得する数。指定しない場合は ``--max_concurrency`` の値（未指定なら逐次的に取得します）です。",
+    )
+    parser.add_argument("--annofab_user_id", type=str, help="Annofabにログインする際のユーザID")
+    parser.add_argument("--annofab_password", type=str, help="Annofabにログインする際のパスワード")
+    parser.add_argument("--annofab_pat", type=str, help="Annofabにログインする際のパーソナルアクセストークン")
+
+    parser.set_defaults(subcommand_func=main)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "build"
+    subcommand_help = "実績作業時間やアサイン時間などを集計したキューブ（SQLiteファイル）を作成または更新します。"
+    description = (
+        "実績作業時間、アサイン時間、予定稼働時間、Annofabの作業時間を、日付・ワークスペースメンバ・ジョブ単位で集計したキューブ（SQLiteファイル）を作成または更新します。\n"
+        "``--cube`` を指定できるコマンドは、WebAPIにアクセスせずにキューブから結果を出力します。"
+    )
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=description)
+    parse_args(parser)
+    return parser
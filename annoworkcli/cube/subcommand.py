@@ -0,0 +1,20 @@
+import argparse
+
+import annoworkcli
+import annoworkcli.common.cli
+import annoworkcli.cube.build_cube
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    subparsers = parser.add_subparsers(dest="subcommand_name")
+
+    annoworkcli.cube.build_cube.add_parser(subparsers)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "cube"
+    subcommand_help = "作業時間を集計したキューブ関係のサブコマンド"
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=subcommand_help, is_subcommand=False)
+    parse_args(parser)
+    return parser
@@ -8,6 +8,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import build_annoworkapi, prompt_yesno
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +19,14 @@ class DeleteExpectedWorkingTime:
         self.workspace_id = workspace_id
 
     def delete_expected_working_times(self, expected_working_times: list[dict[str, Any]]) -> None:
-        for expected in expected_working_times:
-            self.annowork_service.api.delete_expected_working_time_by_workspace_member(
-                self.workspace_id,
-                workspace_member_id=expected["workspace_member_id"],
-                date=expected["date"],
-            )
+        with track_progress("予定稼働時間の削除", total=len(expected_working_times)) as progress:
+            for expected in expected_working_times:
+                with progress.track_item():
+                    self.annowork_service.api.delete_expected_working_time_by_workspace_member(
+                        self.workspace_id,
+                        workspace_member_id=expected["workspace_member_id"],
+                        date=expected["date"],
+                    )
 
     def get_expected_working_times(self, *, user_id: str, start_date: str, end_date: str) -> list[dict[str, Any]]:
         workspace_members = self.annowork_service.api.get_workspace_members(self.workspace_id, query_params={"includes_inactive_members": True})
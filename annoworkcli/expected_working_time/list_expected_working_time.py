@@ -1,4 +1,5 @@
 import argparse
+import datetime
 import logging
 import sys
 from pathlib import Path
@@ -10,10 +11,50 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import flat_map_concurrently
+from annoworkcli.common.metrics import phase
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
 
+TERM_SHARD_DAYS = 31
+"""予定稼働時間を取得する際に、1回のリクエストで取得する期間の日数"""
+
+WORKSPACE_WIDE_FETCH_MEMBER_RATIO = 0.5
+"""
+ユーザで絞り込む場合でも、対象のメンバがワークスペースメンバのこの割合以上ならば、
+メンバごとに取得せずに、ワークスペース全体の予定稼働時間を取得してから絞り込みます。
+"""
+
+
+def split_term(start_date: str | None, end_date: str | None, *, days: int = TERM_SHARD_DAYS) -> list[tuple[str | None, str | None]]:
+    """
+    期間を ``days`` 日ごとに分割します。開始日または終了日がNoneの場合は分割しません。
+
+    Returns:
+        (開始日, 終了日)のlist。終了日を含みます。
+    """
+    if start_date is None or end_date is None or start_date > end_date:
+        return [(start_date, end_date)]
+
+    result: list[tuple[str | None, str | None]] = []
+    shard_start = datetime.date.fromisoformat(start_date)
+    last_date = datetime.date.fromisoformat(end_date)
+    while shard_start <= last_date:
+        shard_end = min(shard_start + datetime.timedelta(days=days - 1), last_date)
+        result.append((shard_start.isoformat(), shard_end.isoformat()))
+        shard_start = shard_end + datetime.timedelta(days=1)
+    return result
+
+
+def _create_query_params(start_date: str | None, end_date: str | None) -> dict[str, Any]:
+    query_params = {}
+    if start_date is not None:
+        query_params["term_start"] = start_date
+    if end_date is not None:
+        query_params["term_end"] = end_date
+    return query_params
+
 
 class ListExpectedWorkingTime:
     def __init__(self, annowork_service: AnnoworkResource, workspace_id: str) -> None:
@@ -24,27 +65,48 @@ class ListExpectedWorkingTime:
     def get_expected_working_times_by_user_id(
         self, user_id_list: list[str], *, start_date: str | None = None, end_date: str | None = None
     ) -> list[dict[str, Any]]:
+        """
+        ユーザごとの予定稼働時間を取得します。
+        メンバと分割した期間の組み合わせごとに、並行してWebAPIを呼び出します。
+        対象のメンバがワークスペースメンバの大部分を占める場合は、ワークスペース全体の予定稼働時間を取得してから絞り込みます。
+        """
         workspace_member_dict = {e["user_id"]: e["workspace_member_id"] for e in self.workspace_members}
 
-        query_params = {}
-        if start_date is not None:
-            query_params["term_start"] = start_date
-        if end_date is not None:
-            query_params["term_end"] = end_date
-
-        result = []
+        workspace_member_id_list = []
         for user_id in user_id_list:
             workspace_member_id = workspace_member_dict.get(user_id)
             if workspace_member_id is None:
                 logger.warning(f"{user_id=} に該当するワークスペースメンバが存在しませんでした。")
                 continue
+            workspace_member_id_list.append(workspace_member_id)
 
-            logger.debug(f"予定稼働時間情報を取得します。{query_params=}")
-            tmp = self.annowork_service.api.get_expected_working_times_by_workspace_member(
+        if len(workspace_member_id_list) >= len(self.workspace_members) * WORKSPACE_WIDE_FETCH_MEMBER_RATIO:
+            logger.debug(
+                f"{len(workspace_member_id_list)} / {len(self.workspace_members)} 人のワークスペースメンバが対象なので、"
+                "ワークスペース全体の予定稼働時間を取得してから絞り込みます。"
+            )
+            workspace_member_id_set = set(workspace_member_id_list)
+            return [
+                e
+                for e in self.get_expected_working_times(start_date=start_date, end_date=end_date)
+                if e["workspace_member_id"] in workspace_member_id_set
+            ]
+
+        def get_expected_working_times(item: tuple[str, tuple[str | None, str | None]]) -> list[dict[str, Any]]:
+            workspace_member_id, (term_start, term_end) = item
+            query_params = _create_query_params(term_start, term_end)
+            logger.debug(f"予定稼働時間情報を取得します。{workspace_member_id=}, {query_params=}")
+            return self.annowork_service.api.get_expected_working_times_by_workspace_member(
                 self.workspace_id, workspace_member_id, query_params=query_params
             )
-            result.extend(tmp)
-        return result
+
+        terms = split_term(start_date, end_date)
+        with phase("fetch_expected_working_times"):
+            return flat_map_concurrently(
+                get_expected_working_times,
+                [(m, term) for m in workspace_member_id_list for term in terms],
+                progress_description="メンバごとの予定稼働時間の取得",
+            )
 
     def get_expected_working_times(
         self,
@@ -52,14 +114,18 @@ class ListExpectedWorkingTime:
         start_date: str | None = None,
         end_date: str | None = None,
     ) -> list[dict[str, Any]]:
-        query_params = {}
-        if start_date is not None:
-            query_params["term_start"] = start_date
-        if end_date is not None:
-            query_params["term_end"] = end_date
+        """
+        ワークスペース全体の予定稼働時間を取得します。
+        期間が長い場合は、期間を分割して並行してWebAPIを呼び出します。
+        """
+
+        def get_expected_working_times(term: tuple[str | None, str | None]) -> list[dict[str, Any]]:
+            query_params = _create_query_params(*term)
+            logger.debug(f"予定稼働時間情報を取得します。{query_params=}")
+            return self.annowork_service.api.get_expected_working_times(self.workspace_id, query_params=query_params)
 
-        logger.debug(f"予定稼働時間情報を取得します。{query_params=}")
-        return self.annowork_service.api.get_expected_working_times(self.workspace_id, query_params=query_params)
+        with phase("fetch_expected_working_times"):
+            return flat_map_concurrently(get_expected_working_times, split_term(start_date, end_date), progress_description="予定稼働時間の取得")
 
     def set_member_info_to_working_times(self, working_times: list[dict[str, Any]]) -> None:
         workspace_member_dict = {e["workspace_member_id"]: e for e in self.workspace_members}
@@ -138,7 +204,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="集計対象のユーザID")
 
@@ -12,6 +12,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import map_concurrently
 from annoworkcli.common.utils import print_csv, print_json
 from annoworkcli.expected_working_time.list_expected_working_time import ListExpectedWorkingTime
 
@@ -60,9 +61,13 @@ class ListExpectedWorkingTimeGroupbyTag:
         dict_hours: dict[tuple[str, str], float] = defaultdict(float)
 
         # ワークスペースタグごと日毎の時間を集計する
-        for workspace_tag in workspace_tags:
+        tag_members_list = map_concurrently(
+            lambda workspace_tag: self.annowork_service.api.get_workspace_tag_members(self.workspace_id, workspace_tag["workspace_tag_id"]),
+            workspace_tags,
+            progress_description="ワークスペースタグのメンバの取得",
+        )
+        for workspace_tag, members in zip(workspace_tags, tag_members_list, strict=True):
             workspace_tag_name = workspace_tag["workspace_tag_name"]
-            members = self.annowork_service.api.get_workspace_tag_members(self.workspace_id, workspace_tag["workspace_tag_id"])
             member_ids = {e["workspace_member_id"] for e in members}
             for elm in expected_working_times:
                 if elm["workspace_member_id"] in member_ids:
@@ -162,7 +167,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="集計対象のユーザID")
 
@@ -10,43 +10,34 @@ import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, OutputFormat, build_annoworkapi, get_list_from_args
 from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.weekly import DEFAULT_WEEK_START, WeekStart, add_week_start_argument, aggregate_weekly
 from annoworkcli.expected_working_time.list_expected_working_time import ListExpectedWorkingTime
 
 logger = logging.getLogger(__name__)
 
 
-def get_weekly_expected_working_hours_df(expected_working_times: list[dict[str, Any]], workspace_members: list[dict[str, Any]]) -> pandas.DataFrame:
+def get_weekly_expected_working_hours_df(
+    expected_working_times: list[dict[str, Any]], workspace_members: list[dict[str, Any]], *, week_start: WeekStart = DEFAULT_WEEK_START
+) -> pandas.DataFrame:
     """週単位の予定稼働時間が格納されたDataFrameを生成します。
 
     Args:
         expected_working_times: 予定稼働時間情報。date, workspace_member_id, expected_working_hours を参照します。
         workspace_members: ワークスペースメンバ情報。workspace_member_id, user_id, username を参照します。
+        week_start: 週の始まりの曜日
 
     Returns:
         以下の列を返すDataFrame。
             "workspace_member_id", "user_id","username", "start_date", "end_date", "expected_working_hours"
     """
     df = pandas.DataFrame(expected_working_times)
-    # 1週間ごとに集計する（日曜日始まり, 日曜日がindexになっている）
-    df["date"] = pandas.to_datetime(df["date"])
-
-    df_weekly = (
-        # `include_groups=False`を指定する理由：pandas2.2.0で以下の警告が出ないようにするため
-        # DeprecationWarning: DataFrameGroupBy.resample operated on the grouping columns.
-        # This behavior is deprecated, and in a future version of pandas the grouping columns will be excluded from the operation.
-        # Either pass `include_groups=False` to exclude the groupings or explicitly select the grouping columns after groupby to silence this warning.  # noqa: E501
-        df.groupby("workspace_member_id")
-        .resample("W-SUN", on="date", label="left", closed="left", include_groups=False)
-        .agg({"expected_working_hours": "sum"})
+    df_weekly = aggregate_weekly(
+        df,
+        date_column="date",
+        group_columns=["workspace_member_id"],
+        agg={"expected_working_hours": "sum"},
+        week_start=week_start,
     )
-    df_weekly.reset_index(inplace=True)
-
-    # 1週間の始まり（日曜日）と終わり（土曜日）の日付列を設定
-    df_weekly.rename(columns={"date": "start_date"}, inplace=True)
-    df_weekly["end_date"] = df_weekly["start_date"] + pandas.Timedelta(days=6)
-    # pandas.Timestamp型をstr型に変換する
-    df_weekly["start_date"] = df_weekly["start_date"].dt.date.apply(lambda e: e.isoformat())
-    df_weekly["end_date"] = df_weekly["end_date"].dt.date.apply(lambda e: e.isoformat())
 
     # 予定稼働時間が0の行は不要なので、除外する
     df_weekly = df_weekly.query("expected_working_hours > 0")
@@ -82,7 +73,7 @@ def main(args: argparse.Namespace) -> None:
     if len(expected_working_times) == 0:
         df = pandas.DataFrame(columns=required_columns)
     else:
-        df = get_weekly_expected_working_hours_df(expected_working_times, main_obj.workspace_members)
+        df = get_weekly_expected_working_hours_df(expected_working_times, main_obj.workspace_members, week_start=WeekStart(args.week_start))
         df = df[required_columns]
 
     logger.info(f"{len(df)} 件の週単位の予定稼働時間情報を出力します。")
@@ -98,13 +89,15 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="集計対象のユーザID")
 
     parser.add_argument("--start_date", type=str, required=False, help="集計開始日(YYYY-mm-dd)")
     parser.add_argument("--end_date", type=str, required=False, help="集計終了日(YYYY-mm-dd)")
 
+    add_week_start_argument(parser)
+
     parser.add_argument("-o", "--output", type=Path, help="出力先")
     parser.add_argument(
         "-f",
@@ -120,7 +113,7 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
 
 def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
     subcommand_name = "list_weekly"
-    subcommand_help = "予定稼働時間の一覧を週ごと（日曜日始まり）に出力します。"
+    subcommand_help = "予定稼働時間の一覧を週ごとに出力します。"
 
     parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=subcommand_help)
     parse_args(parser)
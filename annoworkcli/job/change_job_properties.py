@@ -6,6 +6,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import build_annoworkapi, get_list_from_args, prompt_yesnoall
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -44,13 +45,16 @@ class ChangeJobProperties:
     def main(self, *, job_id_list: list[str], status: str):  # noqa: ANN201
         logger.info(f"{len(job_id_list)} 件のジョブのステータスを変更します。")
         success_count = 0
-        for job_id in job_id_list:
-            try:
-                result = self.change_job_status(job_id, status=status)
-                if result:
-                    success_count += 1
-            except Exception as e:
-                logger.warning(f"{job_id=} のジョブのステータスの変更に失敗しました。{e}")
+        with track_progress("ジョブのステータスの変更", total=len(job_id_list)) as progress:
+            for job_id in job_id_list:
+                with progress.track_item():
+                    try:
+                        result = self.change_job_status(job_id, status=status)
+                        if result:
+                            success_count += 1
+                    except Exception as e:
+                        progress.record_failure()
+                        logger.warning(f"{job_id=} のジョブのステータスの変更に失敗しました。{e}")
 
         logger.info(f"{success_count} / {len(job_id_list)} 件のジョブのステータスを変更しました。")
 
@@ -6,6 +6,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import build_annoworkapi, prompt_yesnoall
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -43,13 +44,16 @@ class DeleteJob:
     ):
         logger.info(f"{len(job_id_list)} 件のジョブを削除します。")
         success_count = 0
-        for job_id in job_id_list:
-            try:
-                result = self.delete_job(job_id)
-                if result:
-                    success_count += 1
-            except Exception as e:
-                logger.warning(f"{job_id=} のジョブの削除に失敗しました。{e}", e)
+        with track_progress("ジョブの削除", total=len(job_id_list)) as progress:
+            for job_id in job_id_list:
+                with progress.track_item():
+                    try:
+                        result = self.delete_job(job_id)
+                        if result:
+                            success_count += 1
+                    except Exception as e:
+                        progress.record_failure()
+                        logger.warning(f"{job_id=} のジョブの削除に失敗しました。{e}", e)
         logger.info(f"{success_count} / {len(job_id_list)} 件のジョブを削除しました。")
 
 
@@ -9,6 +9,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 
 import annoworkcli
 import annoworkcli.common.cli
+from annoworkcli.common.annofab import AnnofabLinkageIndex
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
 from annoworkcli.common.utils import print_csv, print_json
 
@@ -16,18 +17,8 @@ logger = logging.getLogger(__name__)
 
 
 def filter_job_list_with_external_linkage_info_url(job_list: list[dict[str, Any]], external_linkage_info_url_list: list[str]) -> list[dict[str, Any]]:
-    result = []
-    for job in job_list:
-        url = job["external_linkage_info"].get("url")
-        if url is None:
-            continue
-        url = url.strip()
-        for target_url in external_linkage_info_url_list:
-            target_url.strip()
-            if url.startswith(target_url):
-                result.append(job)
-                break
-    return result
+    job_id_set = AnnofabLinkageIndex.from_jobs(job_list).get_job_ids_by_url_prefix(external_linkage_info_url_list)
+    return [job for job in job_list if job["job_id"] in job_id_set]
 
 
 class ListJob:
@@ -119,7 +110,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     job_id_group = parser.add_mutually_exclusive_group()
     job_id_group.add_argument(
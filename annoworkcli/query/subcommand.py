@@ -0,0 +1,99 @@
+import argparse
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any
+
+import pandas
+
+import annoworkcli
+import annoworkcli.common.cli
+from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, OutputFormat
+from annoworkcli.common.cube import WorkingHoursCube
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.utils import get_file_scheme_path, print_csv, print_json
+
+logger = logging.getLogger(__name__)
+
+
+def get_sql_from_args(sql: str) -> str:
+    """プレフィックスが ``file://`` ならば、ファイルパスとしてファイルを読み込み、SQLを返します。"""
+    path = get_file_scheme_path(sql)
+    if path is not None:
+        return Path(path).read_text(encoding="utf-8")
+    return sql
+
+
+def execute_query(cube: WorkingHoursCube, sql: str) -> tuple[list[str], list[tuple[Any, ...]]]:
+    """
+    キューブに対してSQLを実行します。
+
+    Returns:
+        tuple[0]: 列名のlist
+        tuple[1]: 行のlist
+    """
+    with phase("execute_query"):
+        cursor = cube.connection.execute(sql)
+        columns = [e[0] for e in cursor.description] if cursor.description is not None else []
+        rows = cursor.fetchall()
+    return columns, rows
+
+
+def print_query_result(columns: list[str], rows: list[tuple[Any, ...]], *, output: Path | None, output_format: OutputFormat) -> None:
+    logger.info(f"{len(rows)} 件の行を出力します。")
+    if output_format == OutputFormat.JSON:
+        print_json([dict(zip(columns, row, strict=True)) for row in rows], is_pretty=True, output=output)
+    else:
+        print_csv(pandas.DataFrame.from_records(rows, columns=columns), output=output)
+
+
+def main(args: argparse.Namespace) -> None:
+    command = " ".join(sys.argv[0:2])
+    sql = get_sql_from_args(args.sql)
+
+    with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+        try:
+            columns, rows = execute_query(cube, sql)
+        except sqlite3.Error as e:
+            print(f"{command}: error: SQLの実行に失敗しました。 :: {e}", file=sys.stderr)  # noqa: T201
+            sys.exit(COMMAND_LINE_ERROR_STATUS_CODE)
+
+    print_query_result(columns, rows, output=args.output, output_format=OutputFormat(args.format))
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--cube", type=Path, required=True, help="``annoworkcli cube build`` で作成したキューブのファイル")
+
+    parser.add_argument(
+        "--sql",
+        type=str,
+        required=True,
+        help="実行するSQL（SQLiteの構文）。 ``file://`` を先頭に付けると、SQLが記載されたファイルを指定できます。",
+    )
+
+    parser.add_argument("-o", "--output", type=Path, help="出力先")
+
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=[e.value for e in OutputFormat],
+        help="出力先のフォーマット",
+        default=OutputFormat.CSV.value,
+    )
+
+    parser.set_defaults(subcommand_func=main)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "query"
+    subcommand_help = "キューブに格納されているデータに対してSQLを実行して、結果を出力します。"
+    description = (
+        "``annoworkcli cube build`` で作成したキューブに対してSQLを実行して、結果を出力します。WebAPIにはアクセスしません。\n"
+        "キューブは読み取り専用で開くので、キューブを変更するSQLは実行できません。"
+    )
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=description)
+    parse_args(parser)
+    return parser
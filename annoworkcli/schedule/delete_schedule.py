@@ -12,6 +12,7 @@ from annoworkcli.common.cli import (
     get_list_from_args,
     prompt_yesnoall,
 )
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -41,55 +42,58 @@ class DeleteSchedule:
         target_job_ids = set(target_job_ids) if target_job_ids is not None else None
 
         success_count = 0
-        for index, schedule_id in enumerate(schedule_ids):
-            try:
-                schedule = self.annowork_service.api.get_schedule(self.workspace_id, schedule_id)
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == requests.codes.not_found:
-                    logger.warning(f"schedule_id='{schedule_id}'の作業計画情報は存在しません。作業計画情報の削除をスキップします。")
-                    continue
-                raise e
-
-            if target_job_ids is not None:
-                if schedule["job_id"] in target_job_ids:
-                    continue
-
-            job = all_job_dict.get(schedule["job_id"])
-            member = all_member_dict.get(schedule["workspace_member_id"])
-            job_name = job["job_name"] if job is not None else None
-            user_id = member["user_id"] if member is not None else None
-
-            if target_user_ids is not None:
-                if user_id != target_user_ids:
-                    continue
-
-            if not self.all_yes:
-                message = (
-                    f"schedule_id='{schedule_id}', start_date='{schedule['start_date']}, end_date='{schedule['end_date']}, "
-                    f"user_id='{user_id}', job_name='{job_name}' である作業計画情報を削除しますか？"
-                )
-                is_yes, all_yes = prompt_yesnoall(message)
-                if not is_yes:
-                    continue
-                if all_yes:
-                    self.all_yes = all_yes
-
-            try:
-                self.annowork_service.api.delete_schedule(self.workspace_id, schedule_id)
-                logger.debug(
-                    f"{index + 1} 件目: 作業計画情報を削除しました。:: "
-                    f"schedule_id='{schedule_id}', start_date='{schedule['start_date']}, end_date='{schedule['end_date']}, "
-                    f"user_id='{user_id}', job_name='{job_name}'"
-                )
-                success_count += 1
-            except requests.exceptions.HTTPError:
-                logger.debug(
-                    f"{index + 1} 件目: 作業計画情報の削除に失敗しました。:: "
-                    f"schedule_id='{schedule_id}', start_date='{schedule['start_date']}, end_date='{schedule['end_date']}, "
-                    f"user_id='{user_id}', job_name='{job_name}'",
-                    exc_info=True,
-                )
-                continue
+        with track_progress("作業計画の削除", total=len(schedule_ids)) as progress:
+            for index, schedule_id in enumerate(schedule_ids):
+                with progress.track_item():
+                    try:
+                        schedule = self.annowork_service.api.get_schedule(self.workspace_id, schedule_id)
+                    except requests.exceptions.HTTPError as e:
+                        if e.response.status_code == requests.codes.not_found:
+                            logger.warning(f"schedule_id='{schedule_id}'の作業計画情報は存在しません。作業計画情報の削除をスキップします。")
+                            continue
+                        raise e
+
+                    if target_job_ids is not None:
+                        if schedule["job_id"] in target_job_ids:
+                            continue
+
+                    job = all_job_dict.get(schedule["job_id"])
+                    member = all_member_dict.get(schedule["workspace_member_id"])
+                    job_name = job["job_name"] if job is not None else None
+                    user_id = member["user_id"] if member is not None else None
+
+                    if target_user_ids is not None:
+                        if user_id != target_user_ids:
+                            continue
+
+                    if not self.all_yes:
+                        message = (
+                            f"schedule_id='{schedule_id}', start_date='{schedule['start_date']}, end_date='{schedule['end_date']}, "
+                            f"user_id='{user_id}', job_name='{job_name}' である作業計画情報を削除しますか？"
+                        )
+                        is_yes, all_yes = prompt_yesnoall(message)
+                        if not is_yes:
+                            continue
+                        if all_yes:
+                            self.all_yes = all_yes
+
+                    try:
+                        self.annowork_service.api.delete_schedule(self.workspace_id, schedule_id)
+                        logger.debug(
+                            f"{index + 1} 件目: 作業計画情報を削除しました。:: "
+                            f"schedule_id='{schedule_id}', start_date='{schedule['start_date']}, end_date='{schedule['end_date']}, "
+                            f"user_id='{user_id}', job_name='{job_name}'"
+                        )
+                        success_count += 1
+                    except requests.exceptions.HTTPError:
+                        progress.record_failure()
+                        logger.debug(
+                            f"{index + 1} 件目: 作業計画情報の削除に失敗しました。:: "
+                            f"schedule_id='{schedule_id}', start_date='{schedule['start_date']}, end_date='{schedule['end_date']}, "
+                            f"user_id='{user_id}', job_name='{job_name}'",
+                            exc_info=True,
+                        )
+                        continue
 
         logger.info(f"{success_count} / {len(schedule_ids)} 件の作業計画情報を削除しました。")
 
@@ -13,6 +13,7 @@ from dataclasses_json import DataClassJsonMixin
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.job import get_all_jobs
 from annoworkcli.common.utils import print_csv, print_json
 from annoworkcli.schedule.list_schedule import ExpectedWorkingHoursDict, ListSchedule, create_assigned_hours_dict
 
@@ -93,7 +94,7 @@ class ListAssignedHoursDaily:
                 result_dict[(date, workspace_member_id, job_id)] += assigned_hours
 
         all_members_dict = {e["workspace_member_id"]: e for e in self.list_schedule_obj.workspace_members}
-        all_jobs = self.annowork_service.api.get_jobs(self.workspace_id)
+        all_jobs = get_all_jobs(self.annowork_service, self.workspace_id)
         all_jobs_dict = {e["job_id"]: e for e in all_jobs}
 
         result_list: list[AssignedHoursDaily] = []
@@ -197,7 +198,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
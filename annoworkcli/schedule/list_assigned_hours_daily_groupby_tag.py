@@ -171,7 +171,7 @@ def main(args):  # noqa: ANN001, ANN201
 
 
 def parse_args(parser: argparse.ArgumentParser):  # noqa: ANN201
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
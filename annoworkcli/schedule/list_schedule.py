@@ -11,6 +11,8 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import flat_map_concurrently
+from annoworkcli.common.metrics import phase
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
@@ -139,15 +141,18 @@ class ListSchedule:
             "term_end": end_date,
         }
 
-        schedule_list = []
-        if job_ids is not None:
-            for job_id in job_ids:
-                query_params["job_id"] = job_id
+        with phase("fetch_schedules"):
+            if job_ids is not None:
+
+                def get_schedules(job_id: str) -> list[dict[str, Any]]:
+                    query_params_with_job_id = {**query_params, "job_id": job_id}
+                    logger.debug(f"作業計画を取得します。 :: {query_params_with_job_id=}")
+                    return self.annowork_service.api.get_schedules(self.workspace_id, query_params=query_params_with_job_id)
+
+                schedule_list = flat_map_concurrently(get_schedules, job_ids, progress_description="ジョブごとの作業計画の取得")
+            else:
                 logger.debug(f"作業計画を取得します。 :: {query_params=}")
-                schedule_list.extend(self.annowork_service.api.get_schedules(self.workspace_id, query_params=query_params))
-        else:
-            logger.debug(f"作業計画を取得します。 :: {query_params=}")
-            schedule_list.extend(self.annowork_service.api.get_schedules(self.workspace_id, query_params=query_params))
+                schedule_list = self.annowork_service.api.get_schedules(self.workspace_id, query_params=query_params)
 
         if user_ids is not None:
             workspace_member_id_list = self.get_workspace_member_id_list_from_user_id(user_ids)
@@ -235,7 +240,7 @@ def main(args):  # noqa: ANN001, ANN201
 
 
 def parse_args(parser: argparse.ArgumentParser):  # noqa: ANN201
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="絞り込み対象のユーザID")
 
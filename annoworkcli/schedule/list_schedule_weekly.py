@@ -10,43 +10,34 @@ import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE, OutputFormat, build_annoworkapi, get_list_from_args
 from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.weekly import DEFAULT_WEEK_START, WeekStart, add_week_start_argument, aggregate_weekly
 from annoworkcli.schedule.list_assigned_hours_daily import ListAssignedHoursDaily
 
 logger = logging.getLogger(__name__)
 
 
-def get_weekly_assigned_hours_df(assigned_hours_daily_list: list[dict[str, Any]], workspace_members: list[dict[str, Any]]) -> pandas.DataFrame:
+def get_weekly_assigned_hours_df(
+    assigned_hours_daily_list: list[dict[str, Any]], workspace_members: list[dict[str, Any]], *, week_start: WeekStart = DEFAULT_WEEK_START
+) -> pandas.DataFrame:
     """週単位のアサイン時間が格納されたDataFrameを生成します。
 
     Args:
         assigned_hours_daily_list: 日ごとのアサイン時間情報。date, workspace_member_id, job_id, job_name, assigned_working_hours を参照します。
         workspace_members: ワークスペースメンバ情報。workspace_member_id, user_id, username を参照します。
+        week_start: 週の始まりの曜日
 
     Returns:
         以下の列を返すDataFrame。
             "workspace_member_id", "user_id","username", "job_id", "job_name", "start_date", "end_date", "assigned_working_hours"
     """
     df = pandas.DataFrame(assigned_hours_daily_list)
-    # 1週間ごとに集計する（日曜日始まり, 日曜日がindexになっている）
-    df["dt_date"] = pandas.to_datetime(df["date"])
-
-    df_weekly = (
-        # `include_groups=False`を指定する理由：pandas2.2.0で以下の警告が出ないようにするため
-        # DeprecationWarning: DataFrameGroupBy.resample operated on the grouping columns.
-        # This behavior is deprecated, and in a future version of pandas the grouping columns will be excluded from the operation.
-        # Either pass `include_groups=False` to exclude the groupings or explicitly select the grouping columns after groupby to silence this warning.  # noqa: E501
-        df.groupby(["workspace_member_id", "job_id", "job_name"])
-        .resample("W-SUN", on="dt_date", label="left", closed="left", include_groups=False)
-        .agg({"assigned_working_hours": "sum"})
+    df_weekly = aggregate_weekly(
+        df,
+        date_column="date",
+        group_columns=["workspace_member_id", "job_id", "job_name"],
+        agg={"assigned_working_hours": "sum"},
+        week_start=week_start,
     )
-    df_weekly.reset_index(inplace=True)
-
-    # 1週間の始まり（日曜日）と終わり（土曜日）の日付列を設定
-    df_weekly.rename(columns={"dt_date": "dt_start_date"}, inplace=True)
-    df_weekly["dt_end_date"] = df_weekly["dt_start_date"] + pandas.Timedelta(days=6)
-    # pandas.Timestamp型をstr型に変換する
-    df_weekly["start_date"] = df_weekly["dt_start_date"].dt.date.apply(lambda e: e.isoformat())
-    df_weekly["end_date"] = df_weekly["dt_end_date"].dt.date.apply(lambda e: e.isoformat())
 
     # アサイン時間が0の行は不要なので、除外する
     df_weekly = df_weekly.query("assigned_working_hours > 0")
@@ -88,7 +79,9 @@ def main(args: argparse.Namespace) -> None:
     if len(assigned_hours_daily_dict_list) == 0:
         df = pandas.DataFrame(columns=required_columns)
     else:
-        df = get_weekly_assigned_hours_df(assigned_hours_daily_dict_list, main_obj.list_schedule_obj.workspace_members)
+        df = get_weekly_assigned_hours_df(
+            assigned_hours_daily_dict_list, main_obj.list_schedule_obj.workspace_members, week_start=WeekStart(args.week_start)
+        )
         df = df[required_columns]
 
     logger.info(f"{len(df)} 件の週単位のアサイン時間情報を出力します。")
@@ -104,7 +97,7 @@ def main(args: argparse.Namespace) -> None:
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-u", "--user_id", type=str, nargs="+", required=False, help="集計対象のユーザID")
 
@@ -113,6 +106,8 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--start_date", type=str, required=False, help="集計開始日(YYYY-mm-dd)")
     parser.add_argument("--end_date", type=str, required=False, help="集計終了日(YYYY-mm-dd)")
 
+    add_week_start_argument(parser)
+
     parser.add_argument("-o", "--output", type=Path, help="出力先")
     parser.add_argument(
         "-f",
@@ -128,7 +123,7 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
 
 def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
     subcommand_name = "list_weekly"
-    subcommand_help = "作業計画から求めたアサイン時間を週ごと（日曜日始まり）に出力します。"
+    subcommand_help = "作業計画から求めたアサイン時間を週ごとに出力します。"
 
     parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=subcommand_help)
     parse_args(parser)
@@ -1,16 +1,28 @@
 import datetime
-from collections.abc import Mapping
+import logging
+from collections.abc import Collection, Mapping
 from pathlib import Path
+from typing import Any
 
 import pandas
+from annoworkapi.job import get_parent_job_id_from_job_tree
 from annoworkapi.resource import Resource as AnnoworkResource
 
 from annoworkcli.actual_working_time.list_actual_working_hours_daily import create_actual_working_hours_daily_list, filter_actual_daily_list
 from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
 from annoworkcli.common.cli import OutputFormat
-from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.cube import WorkingHoursCube
+from annoworkcli.common.job import get_all_jobs
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.utils import get_today_str, print_csv, print_json
+from annoworkcli.common.weekly import DEFAULT_WEEK_START, WeekStart, aggregate_weekly
 from annoworkcli.schedule.list_assigned_hours_daily import ListAssignedHoursDaily
 
+logger = logging.getLogger(__name__)
+
+ALL_PARENT_JOBS = "all"
+"""``--parent_job_id`` に指定すると、すべての親ジョブが対象になる値"""
+
 DAILY_COLUMNS = [
     "date",
     "assigned_working_hours",
@@ -25,16 +37,8 @@ WEEKLY_COLUMNS = [
     "cumulative_working_hours",
 ]
 
-
-def get_tzinfo(timezone_offset_hours: float | None) -> datetime.tzinfo:
-    if timezone_offset_hours is not None:
-        return datetime.timezone(datetime.timedelta(hours=timezone_offset_hours))
-    return datetime.datetime.now().astimezone().tzinfo  # type: ignore[return-value]
-
-
-def get_today_str(*, timezone_offset_hours: float | None) -> str:
-    tzinfo = get_tzinfo(timezone_offset_hours)
-    return datetime.datetime.now(tz=tzinfo).date().isoformat()
+PARENT_JOB_COLUMNS = ["parent_job_id", "parent_job_name"]
+"""複数の親ジョブを対象にした場合に、先頭に追加する列"""
 
 
 def build_daily_schedule_actual_df(
@@ -62,23 +66,21 @@ def build_daily_schedule_actual_df(
     return df[DAILY_COLUMNS]
 
 
-def build_weekly_schedule_actual_df(daily_df: pandas.DataFrame) -> pandas.DataFrame:
+def build_weekly_schedule_actual_df(daily_df: pandas.DataFrame, *, week_start: WeekStart = DEFAULT_WEEK_START) -> pandas.DataFrame:
     if len(daily_df) == 0:
         return pandas.DataFrame(columns=WEEKLY_COLUMNS)
 
-    df = daily_df.copy()
-    df["dt_date"] = pandas.to_datetime(df["date"])
-    df_weekly = df.resample("W-SUN", on="dt_date", label="left", closed="left").agg(
-        {
+    df_weekly = aggregate_weekly(
+        daily_df,
+        date_column="date",
+        group_columns=[],
+        agg={
             "assigned_working_hours": "sum",
             "actual_working_hours": "sum",
-        }
+        },
+        week_start=week_start,
+        is_fill_empty_weeks=True,
     )
-    df_weekly.reset_index(inplace=True)
-    df_weekly.rename(columns={"dt_date": "dt_start_date"}, inplace=True)
-    df_weekly["dt_end_date"] = df_weekly["dt_start_date"] + pandas.Timedelta(days=6)
-    df_weekly["start_date"] = df_weekly["dt_start_date"].dt.date.apply(lambda e: e.isoformat())
-    df_weekly["end_date"] = df_weekly["dt_end_date"].dt.date.apply(lambda e: e.isoformat())
     df_weekly["cumulative_working_hours"] = (df_weekly["assigned_working_hours"] + df_weekly["actual_working_hours"]).cumsum()
     return df_weekly[WEEKLY_COLUMNS]
 
@@ -161,6 +163,286 @@ def get_daily_schedule_actual_df(
     )
 
 
+def resolve_parent_jobs(all_jobs: list[dict[str, Any]], parent_job_ids: Collection[str]) -> dict[str, str]:
+    """
+    対象の親ジョブを返します。 ``all`` が指定されている場合は、すべての親ジョブ（親を持たないジョブ）に置き換えます。
+
+    Returns:
+        key:親ジョブのjob_id, value:親ジョブのjob_name。指定された順序を維持します。
+    """
+    return _resolve_parent_jobs(
+        {e["job_id"]: e["job_name"] for e in all_jobs},
+        [e["job_id"] for e in all_jobs if get_parent_job_id_from_job_tree(e["job_tree"]) is None],
+        parent_job_ids,
+    )
+
+
+def _resolve_parent_jobs(job_name_dict: Mapping[str, str], root_job_ids: Collection[str], parent_job_ids: Collection[str]) -> dict[str, str]:
+    """
+    Args:
+        job_name_dict: key:job_id, value:job_name
+        root_job_ids: 親を持たないジョブのjob_id
+    """
+    result: dict[str, str] = {}
+    for parent_job_id in parent_job_ids:
+        if parent_job_id == ALL_PARENT_JOBS:
+            result.update({job_id: job_name_dict[job_id] for job_id in root_job_ids})
+            continue
+        job_name = job_name_dict.get(parent_job_id)
+        if job_name is None:
+            logger.warning(f"job_id='{parent_job_id}' であるジョブは存在しません。")
+            continue
+        result[parent_job_id] = job_name
+    return result
+
+
+def build_daily_schedule_actual_df_by_parent_job(
+    df_actual: pandas.DataFrame,
+    df_assigned: pandas.DataFrame,
+    *,
+    parent_jobs: Mapping[str, str],
+    start_date: str | None,
+    end_date: str | None,
+) -> pandas.DataFrame:
+    """
+    親ジョブごとに、日ごとの予定・実績作業時間と累積作業時間を算出します。
+
+    Args:
+        df_actual: "parent_job_id", "date", "actual_working_hours" 列を持つDataFrame
+        df_assigned: "parent_job_id", "date", "assigned_working_hours" 列を持つDataFrame
+        parent_jobs: key:親ジョブのjob_id, value:親ジョブのjob_name
+        start_date: 出力対象の開始日。Noneなら親ジョブごとの作業時間が存在する最初の日
+        end_date: 出力対象の終了日。Noneなら親ジョブごとの作業時間が存在する最後の日
+
+    Returns:
+        ``PARENT_JOB_COLUMNS`` と ``DAILY_COLUMNS`` の列を持つDataFrame
+    """
+    columns = [*PARENT_JOB_COLUMNS, *DAILY_COLUMNS]
+    df_sum = pandas.concat(
+        [
+            df_assigned.groupby(["parent_job_id", "date"])["assigned_working_hours"].sum(),
+            df_actual.groupby(["parent_job_id", "date"])["actual_working_hours"].sum(),
+        ],
+        axis=1,
+    )
+
+    # 親ジョブごとに、出力対象の期間の日付を列挙する
+    dates_by_parent_job = df_sum.reset_index().groupby("parent_job_id")["date"]
+    min_date_dict = dates_by_parent_job.min().to_dict()
+    max_date_dict = dates_by_parent_job.max().to_dict()
+    index_tuples: list[tuple[str, str]] = []
+    for parent_job_id in parent_jobs:
+        range_start = start_date or min_date_dict.get(parent_job_id)
+        range_end = end_date or max_date_dict.get(parent_job_id)
+        if range_start is None or range_end is None or range_start > range_end:
+            continue
+        index_tuples.extend((parent_job_id, e.isoformat()) for e in pandas.date_range(range_start, range_end).date)
+
+    if len(index_tuples) == 0:
+        return pandas.DataFrame(columns=columns)
+
+    df = df_sum.reindex(pandas.MultiIndex.from_tuples(index_tuples, names=["parent_job_id", "date"])).fillna(0.0).astype("float64")
+    df["cumulative_working_hours"] = (df["assigned_working_hours"] + df["actual_working_hours"]).groupby(level="parent_job_id").cumsum()
+    df = df.reset_index()
+    df["parent_job_name"] = df["parent_job_id"].map(parent_jobs)
+    return df[columns]
+
+
+def build_weekly_schedule_actual_df_by_parent_job(daily_df: pandas.DataFrame, *, week_start: WeekStart = DEFAULT_WEEK_START) -> pandas.DataFrame:
+    """:func:`build_daily_schedule_actual_df_by_parent_job` で算出した日ごとの作業時間を、親ジョブごと週ごとに集計します。"""
+    columns = [*PARENT_JOB_COLUMNS, *WEEKLY_COLUMNS]
+    if len(daily_df) == 0:
+        return pandas.DataFrame(columns=columns)
+
+    # 日ごとの作業時間は親ジョブごとに連続しているので、値が存在しない週を補完する必要はない
+    df_weekly = aggregate_weekly(
+        daily_df,
+        date_column="date",
+        group_columns=["parent_job_id"],
+        agg={
+            "parent_job_name": "first",
+            "assigned_working_hours": "sum",
+            "actual_working_hours": "sum",
+        },
+        week_start=week_start,
+    )
+    df_weekly["cumulative_working_hours"] = (
+        (df_weekly["assigned_working_hours"] + df_weekly["actual_working_hours"]).groupby(df_weekly["parent_job_id"]).cumsum()
+    )
+    return df_weekly[columns]
+
+
+def get_daily_schedule_actual_df_by_parent_job(
+    *,
+    annowork_service: AnnoworkResource,
+    workspace_id: str,
+    parent_job_ids: Collection[str],
+    start_date: str | None,
+    end_date: str | None,
+    timezone_offset_hours: float | None,
+) -> pandas.DataFrame:
+    """
+    複数の親ジョブについて、前日までの実績と当日以降の予定を結合した日ごとの作業時間を取得します。
+
+    親ジョブごとにWebAPIを呼び出さないように、ワークスペース全体の実績作業時間と作業計画を1回ずつ取得してから、
+    対象の親ジョブで絞り込んで、親ジョブと日付の単位で集計します。
+
+    Args:
+        parent_job_ids: 親ジョブのjob_id。 ``all`` を指定すると、すべての親ジョブが対象になります。
+
+    Returns:
+        ``PARENT_JOB_COLUMNS`` と ``DAILY_COLUMNS`` の列を持つDataFrame
+    """
+    today = get_today_str(timezone_offset_hours=timezone_offset_hours)
+    yesterday = (datetime.date.fromisoformat(today) - datetime.timedelta(days=1)).isoformat()
+    actual_start_date, actual_end_date = _clamp_range(start_date=start_date, end_date=end_date, upper=yesterday)
+    assigned_start_date, assigned_end_date = _clamp_range(start_date=start_date, end_date=end_date, lower=today)
+
+    all_jobs = get_all_jobs(annowork_service, workspace_id)
+    parent_jobs = resolve_parent_jobs(all_jobs, parent_job_ids)
+    logger.info(f"{len(parent_jobs)} 件の親ジョブの作業時間を集計します。")
+
+    df_actual = pandas.DataFrame(columns=["parent_job_id", "date", "actual_working_hours"])
+    if actual_start_date is None or actual_end_date is None or actual_start_date <= actual_end_date:
+        actual_working_times = ListActualWorkingTime(
+            annowork_service=annowork_service,
+            workspace_id=workspace_id,
+            timezone_offset_hours=timezone_offset_hours,
+        ).get_actual_working_times(start_date=actual_start_date, end_date=actual_end_date, is_set_additional_info=True)
+        # ジョブ一覧を取得した後に追加されたジョブの実績作業時間も集計できるように、ジョブ一覧を取得し直す場合がある
+        all_jobs = get_all_jobs(annowork_service, workspace_id, required_job_ids={e["job_id"] for e in actual_working_times})
+        parent_job_id_by_job_id = {e["job_id"]: get_parent_job_id_from_job_tree(e["job_tree"]) for e in all_jobs}
+        actual_working_times = [e for e in actual_working_times if parent_job_id_by_job_id.get(e["job_id"]) in parent_jobs]
+        actual_daily_list = create_actual_working_hours_daily_list(
+            actual_working_times,
+            timezone_offset_hours=timezone_offset_hours,
+            show_notes=False,
+        )
+        actual_daily_list = filter_actual_daily_list(actual_daily_list, start_date=actual_start_date, end_date=actual_end_date)
+        if len(actual_daily_list) > 0:
+            df_actual = pandas.DataFrame(
+                {
+                    "parent_job_id": [parent_job_id_by_job_id[e.job_id] for e in actual_daily_list],
+                    "date": [e.date for e in actual_daily_list],
+                    "actual_working_hours": [e.actual_working_hours for e in actual_daily_list],
+                }
+            )
+
+    df_assigned = pandas.DataFrame(columns=["parent_job_id", "date", "assigned_working_hours"])
+    if assigned_start_date is None or assigned_end_date is None or assigned_start_date <= assigned_end_date:
+        # 作業計画は親ジョブに紐付いている
+        assigned_daily_list = ListAssignedHoursDaily(
+            annowork_service=annowork_service,
+            workspace_id=workspace_id,
+        ).get_assigned_hours_daily_list(start_date=assigned_start_date, end_date=assigned_end_date)
+        assigned_daily_list = [e for e in assigned_daily_list if e.job_id in parent_jobs]
+        if len(assigned_daily_list) > 0:
+            df_assigned = pandas.DataFrame(
+                {
+                    "parent_job_id": [e.job_id for e in assigned_daily_list],
+                    "date": [e.date for e in assigned_daily_list],
+                    "assigned_working_hours": [e.assigned_working_hours for e in assigned_daily_list],
+                }
+            )
+
+    with phase("aggregate"):
+        return build_daily_schedule_actual_df_by_parent_job(df_actual, df_assigned, parent_jobs=parent_jobs, start_date=start_date, end_date=end_date)
+
+
+def get_daily_schedule_actual_df_from_cube(
+    cube: WorkingHoursCube,
+    *,
+    parent_job_ids: Collection[str],
+    start_date: str | None,
+    end_date: str | None,
+    timezone_offset_hours: float | None,
+) -> pandas.DataFrame:
+    """
+    WebAPIにアクセスせずに、キューブから前日までの実績と当日以降の予定を結合した日ごとの作業時間を取得します。
+    実績作業時間は、親ジョブごとに集計済みのテーブルから取得します。
+
+    Args:
+        parent_job_ids: 親ジョブのjob_id。 ``all`` を指定すると、すべての親ジョブが対象になります。
+
+    Returns:
+        複数の親ジョブを対象にした場合は ``PARENT_JOB_COLUMNS`` と ``DAILY_COLUMNS`` の列、そうでなければ ``DAILY_COLUMNS`` の列を持つDataFrame
+    """
+    today = get_today_str(timezone_offset_hours=timezone_offset_hours)
+    yesterday = (datetime.date.fromisoformat(today) - datetime.timedelta(days=1)).isoformat()
+    actual_start_date, actual_end_date = _clamp_range(start_date=start_date, end_date=end_date, upper=yesterday)
+    assigned_start_date, assigned_end_date = _clamp_range(start_date=start_date, end_date=end_date, lower=today)
+
+    is_multi = is_multi_parent_job(parent_job_ids)
+    parent_jobs: dict[str, str] = {}
+    if is_multi:
+        df_job = cube.read_jobs()
+        parent_jobs = _resolve_parent_jobs(
+            dict(zip(df_job["job_id"], df_job["job_name"], strict=True)),
+            list(df_job.loc[df_job["parent_job_id"].isna(), "job_id"]),
+            parent_job_ids,
+        )
+        logger.info(f"{len(parent_jobs)} 件の親ジョブの作業時間を集計します。")
+        target_parent_job_ids: Collection[str] = parent_jobs.keys()
+    else:
+        target_parent_job_ids = parent_job_ids
+
+    df_actual = pandas.DataFrame(columns=["parent_job_id", "date", "actual_working_hours"])
+    if actual_start_date is None or actual_end_date is None or actual_start_date <= actual_end_date:
+        df_actual = cube.read_actual_hours_by_parent_job(parent_job_ids=target_parent_job_ids, start_date=actual_start_date, end_date=actual_end_date)
+
+    df_assigned = pandas.DataFrame(columns=["parent_job_id", "date", "assigned_working_hours"])
+    if assigned_start_date is None or assigned_end_date is None or assigned_start_date <= assigned_end_date:
+        # 作業計画は親ジョブに紐付いている
+        df_assigned = cube.read_assigned_daily(start_date=assigned_start_date, end_date=assigned_end_date, job_ids=target_parent_job_ids).rename(
+            columns={"job_id": "parent_job_id"}
+        )[["parent_job_id", "date", "assigned_working_hours"]]
+
+    with phase("aggregate"):
+        if is_multi:
+            return build_daily_schedule_actual_df_by_parent_job(
+                df_actual, df_assigned, parent_jobs=parent_jobs, start_date=start_date, end_date=end_date
+            )
+        return build_daily_schedule_actual_df(
+            _sum_working_hours_by_date(df_actual, "actual_working_hours"),
+            _sum_working_hours_by_date(df_assigned, "assigned_working_hours"),
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+
+def merge_daily_schedule_actual_df(df: pandas.DataFrame, df_window: pandas.DataFrame, *, window_start: str, window_end: str) -> pandas.DataFrame:
+    """
+    ``df`` のうち ``window_start`` から ``window_end`` までの行を ``df_window`` の行で置き換えて、累積作業時間を算出し直します。
+    ``parent_job_id`` 列が存在する場合は、親ジョブごとに累積作業時間を算出します。
+
+    Args:
+        df: ``DAILY_COLUMNS`` の列（と ``PARENT_JOB_COLUMNS`` の列）を持つDataFrame
+        df_window: ``df`` と同じ列を持つ、 ``window_start`` から ``window_end`` までのDataFrame
+    """
+    df_outside = df[(df["date"] < window_start) | (df["date"] > window_end)]
+    dfs = [e for e in [df_outside, df_window] if len(e) > 0]
+    if len(dfs) == 0:
+        return df_window
+    df_merged = pandas.concat(dfs, ignore_index=True)
+
+    if "parent_job_id" in df_merged.columns:
+        # 親ジョブの順序は維持して、親ジョブごとに日付順に並べる
+        parent_job_order = {e: i for i, e in enumerate(dict.fromkeys(df_merged["parent_job_id"]))}
+        df_merged = df_merged.assign(_order=df_merged["parent_job_id"].map(parent_job_order))
+        df_merged = df_merged.sort_values(["_order", "date"], kind="stable").drop(columns="_order").reset_index(drop=True)
+        hours = df_merged["assigned_working_hours"] + df_merged["actual_working_hours"]
+        df_merged["cumulative_working_hours"] = hours.groupby(df_merged["parent_job_id"]).cumsum()
+    else:
+        df_merged = df_merged.sort_values("date", kind="stable").reset_index(drop=True)
+        df_merged["cumulative_working_hours"] = (df_merged["assigned_working_hours"] + df_merged["actual_working_hours"]).cumsum()
+    return df_merged[df.columns]
+
+
+def is_multi_parent_job(parent_job_ids: Collection[str]) -> bool:
+    """複数の親ジョブを対象にしているかどうかを返します。"""
+    return len(parent_job_ids) > 1 or ALL_PARENT_JOBS in parent_job_ids
+
+
 def print_df(df: pandas.DataFrame, *, output: Path | None, output_format: OutputFormat) -> None:
     if output_format == OutputFormat.JSON:
         print_json(df.to_dict("records"), is_pretty=True, output=output)
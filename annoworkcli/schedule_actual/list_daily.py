@@ -2,37 +2,117 @@ import argparse
 import logging
 from pathlib import Path
 
+import pandas
+
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi
-from annoworkcli.schedule_actual.common import DAILY_COLUMNS, get_daily_schedule_actual_df, print_df
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.utils import get_today_str
+from annoworkcli.common.watch import add_watch_argument, get_watch_window, run_watch, validate_watch_args, write_if_changed
+from annoworkcli.schedule_actual.common import (
+    DAILY_COLUMNS,
+    PARENT_JOB_COLUMNS,
+    get_daily_schedule_actual_df,
+    get_daily_schedule_actual_df_by_parent_job,
+    get_daily_schedule_actual_df_from_cube,
+    is_multi_parent_job,
+    merge_daily_schedule_actual_df,
+    print_df,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def main_with_cube(args: argparse.Namespace) -> None:
+    """WebAPIにアクセスせずに、キューブから日ごとの予定・実績作業時間を出力します。"""
+    parent_job_ids: list[str] = args.parent_job_id
+    with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+        cube.warn_if_out_of_range(start_date=args.start_date, end_date=args.end_date)
+        df = get_daily_schedule_actual_df_from_cube(
+            cube,
+            parent_job_ids=parent_job_ids,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            timezone_offset_hours=args.timezone_offset,
+        )
+    columns = [*PARENT_JOB_COLUMNS, *DAILY_COLUMNS] if is_multi_parent_job(parent_job_ids) else DAILY_COLUMNS
+    logger.info(f"{len(df)} 件の日ごとの予定・実績作業時間情報を出力します。")
+    print_df(df[columns], output=args.output, output_format=OutputFormat(args.format))
+
+
 def main(args: argparse.Namespace) -> None:
+    if args.cube is not None:
+        if args.watch is not None:
+            raise CommandLineArgumentError("'--watch' と '--cube' は同時に指定できません。")
+        main_with_cube(args)
+        return
+
+    validate_watch_args(args)
     annowork_service = build_annoworkapi(args)
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
-    df = get_daily_schedule_actual_df(
-        annowork_service=annowork_service,
-        workspace_id=workspace_id,
-        parent_job_id=args.parent_job_id,
-        start_date=args.start_date,
-        end_date=args.end_date,
-        timezone_offset_hours=args.timezone_offset,
-    )
+    parent_job_ids: list[str] = args.parent_job_id
+
+    def get_df(start_date: str | None, end_date: str | None) -> pandas.DataFrame:
+        if is_multi_parent_job(parent_job_ids):
+            df = get_daily_schedule_actual_df_by_parent_job(
+                annowork_service=annowork_service,
+                workspace_id=workspace_id,
+                parent_job_ids=parent_job_ids,
+                start_date=start_date,
+                end_date=end_date,
+                timezone_offset_hours=args.timezone_offset,
+            )
+            return df[[*PARENT_JOB_COLUMNS, *DAILY_COLUMNS]]
+
+        df = get_daily_schedule_actual_df(
+            annowork_service=annowork_service,
+            workspace_id=workspace_id,
+            parent_job_id=parent_job_ids[0],
+            start_date=start_date,
+            end_date=end_date,
+            timezone_offset_hours=args.timezone_offset,
+        )
+        return df[DAILY_COLUMNS]
+
+    df = get_df(args.start_date, args.end_date)
     logger.info(f"{len(df)} 件の日ごとの予定・実績作業時間情報を出力します。")
-    print_df(df[DAILY_COLUMNS], output=args.output, output_format=OutputFormat(args.format))
+    output_format = OutputFormat(args.format)
+    print_df(df, output=args.output, output_format=output_format)
+
+    if args.watch is None:
+        return
+
+    def update() -> bool:
+        nonlocal df
+        window = get_watch_window(
+            today=get_today_str(timezone_offset_hours=args.timezone_offset),
+            window_days=args.watch_window_days,
+            start_date=args.start_date,
+            end_date=args.end_date,
+        )
+        if window is None:
+            return False
+        # ウォッチ期間の行だけを置き換えて、累積作業時間を算出し直す
+        df = merge_daily_schedule_actual_df(
+            df, get_df(window.start_date, window.end_date), window_start=window.start_date, window_end=window.end_date
+        )
+        return write_if_changed(args.output, lambda f: print_df(df, output=f, output_format=output_format))
+
+    run_watch(update, interval_seconds=args.watch)
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
     parser.add_argument(
         "-pj",
         "--parent_job_id",
         type=str,
+        nargs="+",
         required=True,
-        help="集計対象の親ジョブID",
+        help="集計対象の親ジョブID。複数指定できます。 ``all`` を指定すると、すべての親ジョブが対象になります。\n"
+        "複数の親ジョブを対象にした場合は、先頭に ``parent_job_id`` , ``parent_job_name`` 列を追加して、親ジョブごとの作業時間を出力します。",
     )
     parser.add_argument("--start_date", type=str, required=False, help="集計開始日(YYYY-mm-dd)")
     parser.add_argument("--end_date", type=str, required=False, help="集計終了日(YYYY-mm-dd)")
@@ -41,6 +121,8 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         type=float,
         help="日付に対するタイムゾーンのオフセット時間を指定します。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
     )
+    add_watch_argument(parser)
+    add_cube_argument(parser)
     parser.add_argument("-o", "--output", type=Path, help="出力先")
     parser.add_argument(
         "-f",
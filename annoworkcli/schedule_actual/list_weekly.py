@@ -2,38 +2,86 @@ import argparse
 import logging
 from pathlib import Path
 
+import pandas
+
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi
-from annoworkcli.schedule_actual.common import WEEKLY_COLUMNS, build_weekly_schedule_actual_df, get_daily_schedule_actual_df, print_df
+from annoworkcli.common.cube import WorkingHoursCube, add_cube_argument
+from annoworkcli.common.weekly import WeekStart, add_week_start_argument
+from annoworkcli.schedule_actual.common import (
+    PARENT_JOB_COLUMNS,
+    WEEKLY_COLUMNS,
+    build_weekly_schedule_actual_df,
+    build_weekly_schedule_actual_df_by_parent_job,
+    get_daily_schedule_actual_df,
+    get_daily_schedule_actual_df_by_parent_job,
+    get_daily_schedule_actual_df_from_cube,
+    is_multi_parent_job,
+    print_df,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def main(args: argparse.Namespace) -> None:
+def get_daily_df(args: argparse.Namespace) -> pandas.DataFrame:
+    """週ごとに集計する前の、日ごとの予定・実績作業時間を取得します。 ``--cube`` が指定されていればキューブから取得します。"""
+    parent_job_ids: list[str] = args.parent_job_id
+    if args.cube is not None:
+        with WorkingHoursCube.open(args.cube, is_readonly=True) as cube:
+            cube.warn_if_out_of_range(start_date=args.start_date, end_date=args.end_date)
+            return get_daily_schedule_actual_df_from_cube(
+                cube,
+                parent_job_ids=parent_job_ids,
+                start_date=args.start_date,
+                end_date=args.end_date,
+                timezone_offset_hours=args.timezone_offset,
+            )
+
     annowork_service = build_annoworkapi(args)
     workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
-    daily_df = get_daily_schedule_actual_df(
+    if is_multi_parent_job(parent_job_ids):
+        return get_daily_schedule_actual_df_by_parent_job(
+            annowork_service=annowork_service,
+            workspace_id=workspace_id,
+            parent_job_ids=parent_job_ids,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            timezone_offset_hours=args.timezone_offset,
+        )
+    return get_daily_schedule_actual_df(
         annowork_service=annowork_service,
         workspace_id=workspace_id,
-        parent_job_id=args.parent_job_id,
+        parent_job_id=parent_job_ids[0],
         start_date=args.start_date,
         end_date=args.end_date,
         timezone_offset_hours=args.timezone_offset,
     )
-    df = build_weekly_schedule_actual_df(daily_df)
+
+
+def main(args: argparse.Namespace) -> None:
+    week_start = WeekStart(args.week_start)
+    daily_df = get_daily_df(args)
+    if is_multi_parent_job(args.parent_job_id):
+        df = build_weekly_schedule_actual_df_by_parent_job(daily_df, week_start=week_start)
+        columns = [*PARENT_JOB_COLUMNS, *WEEKLY_COLUMNS]
+    else:
+        df = build_weekly_schedule_actual_df(daily_df, week_start=week_start)
+        columns = WEEKLY_COLUMNS
     logger.info(f"{len(df)} 件の週ごとの予定・実績作業時間情報を出力します。")
-    print_df(df[WEEKLY_COLUMNS], output=args.output, output_format=OutputFormat(args.format))
+    print_df(df[columns], output=args.output, output_format=OutputFormat(args.format))
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
     parser.add_argument(
         "-pj",
         "--parent_job_id",
         type=str,
+        nargs="+",
         required=True,
-        help="集計対象の親ジョブID",
+        help="集計対象の親ジョブID。複数指定できます。 ``all`` を指定すると、すべての親ジョブが対象になります。\n"
+        "複数の親ジョブを対象にした場合は、先頭に ``parent_job_id`` , ``parent_job_name`` 列を追加して、親ジョブごとの作業時間を出力します。",
     )
     parser.add_argument("--start_date", type=str, required=False, help="集計開始日(YYYY-mm-dd)")
     parser.add_argument("--end_date", type=str, required=False, help="集計終了日(YYYY-mm-dd)")
@@ -42,6 +90,8 @@ def parse_args(parser: argparse.ArgumentParser) -> None:
         type=float,
         help="日付に対するタイムゾーンのオフセット時間を指定します。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
     )
+    add_week_start_argument(parser)
+    add_cube_argument(parser)
     parser.add_argument("-o", "--output", type=Path, help="出力先")
     parser.add_argument(
         "-f",
@@ -0,0 +1,20 @@
+import argparse
+
+import annoworkcli
+import annoworkcli.common.cli
+import annoworkcli.trace.summarize_trace
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    subparsers = parser.add_subparsers(dest="subcommand_name")
+
+    annoworkcli.trace.summarize_trace.add_parser(subparsers)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "trace"
+    subcommand_help = "``--trace`` で出力したスパン関係のサブコマンド"
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=subcommand_help, is_subcommand=False)
+    parse_args(parser)
+    return parser
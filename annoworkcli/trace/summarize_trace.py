@@ -0,0 +1,214 @@
+import argparse
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import annoworkcli
+import annoworkcli.common.cli
+from annoworkcli.common.trace import SPAN_KIND_CLIENT, STATUS_CODE_ERROR
+from annoworkcli.common.transport import is_retried_by_api_client
+from annoworkcli.common.utils import output_string, print_json
+
+logger = logging.getLogger(__name__)
+
+NANOSECONDS_PER_SECOND = 1e9
+
+
+@dataclass(frozen=True)
+class Span:
+    span_id: str
+    parent_span_id: str | None
+    name: str
+    kind: str
+    start_time_unix_nano: int
+    end_time_unix_nano: int
+    attributes: dict[str, Any]
+    is_error: bool
+
+    @property
+    def duration_seconds(self) -> float:
+        return (self.end_time_unix_nano - self.start_time_unix_nano) / NANOSECONDS_PER_SECOND
+
+    @classmethod
+    def from_dict(cls, span: dict[str, Any]) -> "Span":
+        return cls(
+            span_id=span["spanId"],
+            parent_span_id=span.get("parentSpanId"),
+            name=span["name"],
+            kind=span.get("kind", ""),
+            start_time_unix_nano=int(span["startTimeUnixNano"]),
+            end_time_unix_nano=int(span["endTimeUnixNano"]),
+            attributes=span.get("attributes", {}),
+            is_error=span.get("status", {}).get("code") == STATUS_CODE_ERROR,
+        )
+
+
+def read_spans(trace_file: Path) -> list[Span]:
+    """``--trace`` で出力したファイルからスパンを読み込みます。読み込めない行は無視します。"""
+    spans = []
+    with trace_file.open(encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip() == "":
+                continue
+            try:
+                spans.append(Span.from_dict(json.loads(line)))
+            except (ValueError, KeyError, TypeError):
+                # コマンドが途中で終了した場合は、最後の行が途中までしか書き込まれていない場合がある
+                logger.warning(f"'{trace_file}' の {line_number} 行目はスパンとして読み込めないので、無視します。")
+    return spans
+
+
+def summarize_endpoints(spans: list[Span]) -> list[dict[str, Any]]:
+    """
+    WebAPIの呼び出しのスパンを、エンドポイントごとに集計します。合計時間の降順に並べて返します。
+    """
+    spans_by_name: dict[str, list[Span]] = defaultdict(list)
+    for span in spans:
+        if span.kind == SPAN_KIND_CLIENT:
+            spans_by_name[span.name].append(span)
+
+    result = []
+    for name, endpoint_spans in spans_by_name.items():
+        durations = [e.duration_seconds for e in endpoint_spans]
+        result.append(
+            {
+                "endpoint": name,
+                "count": len(endpoint_spans),
+                "total_seconds": sum(durations),
+                "mean_seconds": sum(durations) / len(durations),
+                "max_seconds": max(durations),
+                "error_count": sum(1 for e in endpoint_spans if e.is_error),
+                # リトライしたリクエストも1個のスパンとして記録されるので、リトライされる失敗のレスポンスを数える
+                "retry_count": sum(1 for e in endpoint_spans if is_retried_by_api_client(e.attributes.get("http.response.status_code", 0))),
+                "response_bytes": sum(e.attributes.get("http.response.body.size", 0) for e in endpoint_spans),
+            }
+        )
+    return sorted(result, key=lambda e: e["total_seconds"], reverse=True)
+
+
+def get_critical_path(spans: list[Span]) -> list[dict[str, Any]]:
+    """
+    クリティカルパス（全体の時間を決めているスパンの並び）を返します。
+
+    親スパンの終了時刻から遡って、その時刻までに終わった子スパンのうち最も遅く終わったものを選び、
+    その子スパンの開始時刻からさらに遡る、という処理を再帰的に繰り返します。選んだ子スパンと重なる子スパンは選びません。
+    子スパンが終わってから次に選んだ子スパンが始まるまでの時間は、親スパン自身の処理時間とみなします。
+    並行して実行したWebAPIの呼び出しのうち、待ち時間を決めている呼び出しだけが選ばれます。
+
+    Returns:
+        クリティカルパス上のスパン。親子関係の深さ（ ``depth`` ）と、最初のスパンの開始時刻からの経過時間（ ``start_offset_seconds`` ）を持ちます。
+    """
+    span_ids = {e.span_id for e in spans}
+    children: dict[str, list[Span]] = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span.parent_span_id is not None and span.parent_span_id in span_ids:
+            children[span.parent_span_id].append(span)
+        else:
+            roots.append(span)
+    if len(roots) == 0:
+        return []
+
+    trace_start_time = min(e.start_time_unix_nano for e in roots)
+    result: list[dict[str, Any]] = []
+
+    def visit(span: Span, depth: int) -> None:
+        result.append(
+            {
+                "depth": depth,
+                "name": span.name,
+                "start_offset_seconds": (span.start_time_unix_nano - trace_start_time) / NANOSECONDS_PER_SECOND,
+                "duration_seconds": span.duration_seconds,
+            }
+        )
+        cursor = span.end_time_unix_nano
+        selected = []
+        for child in sorted(children[span.span_id], key=lambda e: e.end_time_unix_nano, reverse=True):
+            # 選んだ子スパンと並行して実行されていた子スパンは、待ち時間を決めていないので選ばない
+            if child.end_time_unix_nano > cursor:
+                continue
+            selected.append(child)
+            cursor = child.start_time_unix_nano
+        for child in reversed(selected):
+            visit(child, depth + 1)
+
+    for root in sorted(roots, key=lambda e: e.start_time_unix_nano):
+        visit(root, 0)
+    return result
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    lines = [f"{summary['span_count']} 件のスパン, 全体の時間 {summary['elapsed_seconds']:.3f}秒", ""]
+
+    lines.append("エンドポイントごとの時間（合計時間の降順）")
+    lines.append(f"{'total_s':>10} {'count':>7} {'mean_s':>8} {'max_s':>8} {'errors':>7} {'retries':>8} {'bytes':>12}  endpoint")
+    lines.extend(
+        f"{e['total_seconds']:>10.3f} {e['count']:>7} {e['mean_seconds']:>8.3f} {e['max_seconds']:>8.3f} "
+        f"{e['error_count']:>7} {e['retry_count']:>8} {e['response_bytes']:>12}  {e['endpoint']}"
+        for e in summary["endpoints"]
+    )
+    lines.append("")
+
+    lines.append("クリティカルパス")
+    lines.append(f"{'start_s':>10} {'duration_s':>10}  name")
+    lines.extend(
+        f"{e['start_offset_seconds']:>10.3f} {e['duration_seconds']:>10.3f}  {'  ' * e['depth']}{e['name']}" for e in summary["critical_path"]
+    )
+    return "\n".join(lines)
+
+
+def summarize_trace(spans: list[Span], *, top: int | None) -> dict[str, Any]:
+    elapsed_seconds = 0.0
+    if len(spans) > 0:
+        elapsed_seconds = (max(e.end_time_unix_nano for e in spans) - min(e.start_time_unix_nano for e in spans)) / NANOSECONDS_PER_SECOND
+    endpoints = summarize_endpoints(spans)
+    return {
+        "span_count": len(spans),
+        "elapsed_seconds": elapsed_seconds,
+        "endpoints": endpoints[:top] if top is not None else endpoints,
+        "critical_path": get_critical_path(spans),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    spans = read_spans(args.trace_file)
+    summary = summarize_trace(spans, top=args.top)
+    if args.format == "json":
+        print_json(summary, is_pretty=True, output=args.output)
+    else:
+        output_string(format_summary(summary), args.output)
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--trace_file", type=Path, required=True, help="``--trace`` で出力したJSON Linesファイル")
+
+    parser.add_argument("--top", type=int, default=20, help="出力するエンドポイントの件数。合計時間の上位から出力します。")
+
+    parser.add_argument("-o", "--output", type=Path, help="出力先")
+
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=["text", "json"],
+        default="text",
+        help="出力先のフォーマット",
+    )
+
+    parser.set_defaults(subcommand_func=main)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "summarize"
+    subcommand_help = "``--trace`` で出力したスパンを集計して、エンドポイントごとの時間とクリティカルパスを出力します。"
+    description = (
+        "``--trace`` で出力したスパンを集計して、合計時間の多いエンドポイントと、クリティカルパス（全体の時間を決めているスパンの並び）を出力します。"
+        "WebAPIにはアクセスしません。"
+    )
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=description)
+    parse_args(parser)
+    return parser
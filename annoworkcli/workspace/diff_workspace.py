@@ -0,0 +1,126 @@
+import argparse
+import csv
+import io
+import json
+import logging
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack
+from enum import Enum
+from pathlib import Path
+
+import annoworkcli
+import annoworkcli.common.cli
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.snapshot_diff import RowChange, diff_sources, open_diff_source
+from annoworkcli.common.utils import DEFAULT_CSV_FORMAT
+from annoworkcli.common.writer import write_lines
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["table_name", "change_type", "key", "changed_columns", "old_hash", "new_hash"]
+
+
+class DiffOutputFormat(Enum):
+    """差分の出力フォーマット。差分を1行ずつ出力できるフォーマットだけです。"""
+
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+def _to_csv_line(values: Sequence[str | None]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+def iter_output_lines(changes: Iterator[RowChange], output_format: DiffOutputFormat) -> Iterator[str]:
+    """差分を、出力する行に1件ずつ変換します。"""
+    if output_format == DiffOutputFormat.JSONL:
+        for change in changes:
+            yield json.dumps(change.to_dict(), ensure_ascii=False) + "\n"
+        return
+
+    yield _to_csv_line(COLUMNS)
+    for change in changes:
+        elm = change.to_dict()
+        elm["changed_columns"] = " ".join(elm["changed_columns"])
+        yield _to_csv_line([elm[column] for column in COLUMNS])
+
+
+def main(args: argparse.Namespace) -> None:
+    output_format = DiffOutputFormat(args.format)
+    counter: Counter[tuple[str, str]] = Counter()
+
+    def count_changes(changes: Iterator[RowChange]) -> Iterator[RowChange]:
+        for change in changes:
+            counter[(change.table_name, change.change_type.value)] += 1
+            yield change
+
+    with ExitStack() as stack:
+        old_source = open_diff_source(args.old_file, stack)
+        new_source = open_diff_source(args.new_file, stack)
+        if type(old_source) is not type(new_source):
+            raise CommandLineArgumentError("`--old_file` と `--new_file` には、スナップショット同士またはキューブ同士を指定してください。")
+
+        # 差分を求めながら1行ずつ出力するので、差分の件数によらずメモリに保持するのは一定の行数だけ
+        with phase("diff"):
+            changes = count_changes(diff_sources(old_source, new_source, table_names=args.table_name))
+            encoding = str(DEFAULT_CSV_FORMAT["encoding"]) if output_format == DiffOutputFormat.CSV else "utf_8"
+            output_file = write_lines(iter_output_lines(changes, output_format), args.output, encoding=encoding)
+
+    if output_file is not None:
+        logger.info(f"{output_file} に出力しました。")
+    if len(counter) == 0:
+        logger.info("差分はありませんでした。")
+    for (table_name, change_type), count in sorted(counter.items()):
+        logger.info(f"table_name='{table_name}', change_type='{change_type}' :: {count} 件")
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--old_file",
+        type=Path,
+        required=True,
+        help="変更前のスナップショット（ ``annoworkcli workspace snapshot`` の出力）またはキューブ（ ``annoworkcli cube build`` の出力）",
+    )
+    parser.add_argument(
+        "--new_file",
+        type=Path,
+        required=True,
+        help="変更後のスナップショットまたはキューブ。 ``--old_file`` と同じ種類のファイルを指定してください。",
+    )
+
+    parser.add_argument(
+        "--table_name",
+        type=str,
+        nargs="+",
+        help="差分を求めるテーブル。指定しない場合は、両方に存在するすべてのテーブルの差分を求めます。",
+    )
+
+    parser.add_argument("-o", "--output", type=Path, help="出力先")
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=[e.value for e in DiffOutputFormat],
+        help="出力先のフォーマット。 ``jsonl`` の場合は、1行に1件の差分をJSONで出力します（JSON Lines）。",
+        default=DiffOutputFormat.CSV.value,
+    )
+
+    parser.set_defaults(subcommand_func=main)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "diff"
+    subcommand_help = "2個のスナップショット（またはキューブ）の間で、追加・更新・削除された行を出力します。"
+    description = (
+        "2個のスナップショット（またはキューブ）のテーブルを、行を一意に識別するキー（ ``actual_working_time_id`` や ``schedule_id`` など）の順に"
+        "読みながら突き合わせて、追加（insert）・更新（update）・削除（delete）された行を出力します。"
+        "行の内容はハッシュ値で比較するので、スナップショットの大きさによらず少ないメモリで実行できます。WebAPIにはアクセスしません。"
+    )
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=description)
+    parse_args(parser)
+    return parser
@@ -9,6 +9,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import OutputFormat, build_annoworkapi, get_list_from_args
+from annoworkcli.common.concurrency import map_concurrently
 from annoworkcli.common.utils import print_csv, print_json
 
 logger = logging.getLogger(__name__)
@@ -28,9 +29,11 @@ class ListWorkspace:
         if workspace_id_list is None:
             return self.annowork_service.api.get_my_workspaces()
 
+        workspaces = map_concurrently(
+            self.annowork_service.wrapper.get_workspace_or_none, workspace_id_list, progress_description="ワークスペースの取得"
+        )
         workspace_list = []
-        for workspace_id in workspace_id_list:
-            org = self.annowork_service.wrapper.get_workspace_or_none(workspace_id)
+        for workspace_id, org in zip(workspace_id_list, workspaces, strict=True):
             if org is None:
                 logger.warning(f"{workspace_id=} であるワークスペースは存在しませんでした。")
                 continue
@@ -0,0 +1,193 @@
+import argparse
+import datetime
+import logging
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from annoworkapi.resource import Resource as AnnoworkResource
+
+import annoworkcli
+import annoworkcli.common.cli
+from annoworkcli.actual_working_time.list_actual_working_time import ListActualWorkingTime
+from annoworkcli.common.cli import build_annoworkapi
+from annoworkcli.common.concurrency import flat_map_concurrently, map_concurrently
+from annoworkcli.common.job import get_all_jobs
+from annoworkcli.common.metrics import phase
+from annoworkcli.common.utils import get_today_str
+from annoworkcli.common.workspace_snapshot import TABLE_NAMES, TableFormat, check_table_format, write_snapshot
+from annoworkcli.expected_working_time.list_expected_working_time import ListExpectedWorkingTime, split_term
+from annoworkcli.workspace.list_workspace import ListWorkspace
+from annoworkcli.workspace_tag.list_workspace_tag import ListWorkspaceTag
+
+logger = logging.getLogger(__name__)
+
+Tables = dict[str, list[dict[str, Any]]]
+"""key:テーブル名, value:テーブルの行"""
+
+
+def _unique_by(rows: list[dict[str, Any]], key: str) -> list[dict[str, Any]]:
+    """``key`` の値が重複する行を除きます。分割した期間の境界をまたぐ作業計画などは、複数の期間で取得されるためです。"""
+    return list({row[key]: row for row in rows}.values())
+
+
+class SnapshotWorkspace:
+    """
+    ワークスペースのデータを、テーブルごとのコレクタで並行して取得します。
+    作業計画・予定稼働時間・実績作業時間は、期間を分割して並行して取得します。
+    スナップショットにはWebAPIのレスポンスをそのまま格納するので、名前などの付加情報は設定しません。
+    """
+
+    def __init__(self, annowork_service: AnnoworkResource, workspace_id: str, *, timezone_offset_hours: float | None) -> None:
+        self.annowork_service = annowork_service
+        self.workspace_id = workspace_id
+        self.timezone_offset_hours = timezone_offset_hours
+
+    def collect_workspaces(self) -> Tables:
+        return {"workspaces": ListWorkspace(self.annowork_service).get_workspace_list([self.workspace_id])}
+
+    def collect_workspace_tags(self) -> Tables:
+        workspace_tags = ListWorkspaceTag(self.annowork_service, self.workspace_id).get_workspace_tag_list()
+
+        def get_tag_members(workspace_tag: dict[str, Any]) -> list[dict[str, Any]]:
+            members = self.annowork_service.api.get_workspace_tag_members(self.workspace_id, workspace_tag["workspace_tag_id"])
+            return [{"workspace_tag_id": workspace_tag["workspace_tag_id"], "workspace_member_id": e["workspace_member_id"]} for e in members]
+
+        with phase("fetch_workspace_tag_members"):
+            tag_member_rows = flat_map_concurrently(get_tag_members, workspace_tags, progress_description="ワークスペースタグのメンバの取得")
+        return {"workspace_tags": workspace_tags, "workspace_tag_members": tag_member_rows}
+
+    def collect_jobs(self) -> Tables:
+        return {"jobs": get_all_jobs(self.annowork_service, self.workspace_id)}
+
+    def collect_schedules(self, *, start_date: str | None, end_date: str | None) -> Tables:
+        def get_schedules(term: tuple[str | None, str | None]) -> list[dict[str, Any]]:
+            term_start, term_end = term
+            query_params = {key: value for key, value in [("term_start", term_start), ("term_end", term_end)] if value is not None}
+            return self.annowork_service.api.get_schedules(self.workspace_id, query_params=query_params)
+
+        # `ListSchedule.get_schedules`は名前などの付加情報を設定するので、期間ごとにWebAPIを直接呼び出す
+        with phase("fetch_schedules"):
+            schedules = flat_map_concurrently(get_schedules, split_term(start_date, end_date), progress_description="作業計画の取得")
+        return {"schedules": _unique_by(schedules, "schedule_id")}
+
+    def collect_expected_working_times(self, *, start_date: str | None, end_date: str | None) -> Tables:
+        list_obj = ListExpectedWorkingTime(self.annowork_service, self.workspace_id)
+        return {"expected_working_times": list_obj.get_expected_working_times(start_date=start_date, end_date=end_date)}
+
+    def collect_actual_working_times(self, *, start_date: str | None, end_date: str | None) -> Tables:
+        list_obj = ListActualWorkingTime(self.annowork_service, self.workspace_id, timezone_offset_hours=self.timezone_offset_hours)
+
+        def get_actual_working_times(term: tuple[str | None, str | None]) -> list[dict[str, Any]]:
+            term_start, term_end = term
+            return list_obj.get_actual_working_times_by_job(start_date=term_start, end_date=term_end)
+
+        with phase("fetch_actual_working_times"):
+            actual_working_times = flat_map_concurrently(
+                get_actual_working_times, split_term(start_date, end_date), progress_description="実績作業時間の取得"
+            )
+        return {
+            "workspace_members": list_obj.workspace_members,
+            "actual_working_times": _unique_by(actual_working_times, "actual_working_time_id"),
+        }
+
+    def collect(self, *, start_date: str | None, end_date: str | None) -> Tables:
+        """すべてのコレクタを実行して、スナップショットに格納するテーブルを返します。 ``--max_concurrency`` を指定した場合は並行して実行します。"""
+        collectors: list[Callable[[], Tables]] = [
+            self.collect_workspaces,
+            self.collect_workspace_tags,
+            self.collect_jobs,
+            lambda: self.collect_schedules(start_date=start_date, end_date=end_date),
+            lambda: self.collect_expected_working_times(start_date=start_date, end_date=end_date),
+            lambda: self.collect_actual_working_times(start_date=start_date, end_date=end_date),
+        ]
+
+        def run(collector: Callable[[], Tables]) -> Tables:
+            return collector()
+
+        tables: Tables = {}
+        for collected_tables in map_concurrently(run, collectors):
+            tables.update(collected_tables)
+        return {table_name: tables[table_name] for table_name in TABLE_NAMES}
+
+    def main(self, output: Path, *, start_date: str | None, end_date: str | None, table_format: TableFormat) -> None:
+        tables = self.collect(start_date=start_date, end_date=end_date)
+        if len(tables["workspaces"]) == 0:
+            logger.warning(f"workspace_id='{self.workspace_id}' であるワークスペースは存在しませんでした。")
+
+        manifest = {
+            "workspace_id": self.workspace_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "timezone_offset_hours": self.timezone_offset_hours,
+            "created_datetime": datetime.datetime.now().astimezone().isoformat(),
+            "annoworkcli_version": annoworkcli.__version__,
+        }
+        with phase("write_snapshot"):
+            write_snapshot(output, manifest, tables, table_format=table_format)
+
+        row_counts = ", ".join(f"{table_name}={len(rows)}" for table_name, rows in tables.items())
+        logger.info(f"スナップショットを '{output}' に出力しました。 :: {row_counts}")
+
+
+def main(args: argparse.Namespace) -> None:
+    workspace_id = annoworkcli.common.cli.resolve_required_workspace_id(args)
+    table_format = TableFormat(args.table_format)
+    check_table_format(table_format)
+
+    start_date = args.start_date
+    end_date = args.end_date
+    if start_date is not None and end_date is None:
+        end_date = get_today_str(timezone_offset_hours=args.timezone_offset)
+
+    SnapshotWorkspace(build_annoworkapi(args), workspace_id, timezone_offset_hours=args.timezone_offset).main(
+        args.output, start_date=start_date, end_date=end_date, table_format=table_format
+    )
+
+
+def parse_args(parser: argparse.ArgumentParser) -> None:
+    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+
+    parser.add_argument(
+        "--start_date",
+        type=str,
+        required=False,
+        help="作業計画・予定稼働時間・実績作業時間を取得する期間の開始日(YYYY-mm-dd)。指定しない場合は、すべての期間のデータを取得します。",
+    )
+    parser.add_argument(
+        "--end_date",
+        type=str,
+        required=False,
+        help="作業計画・予定稼働時間・実績作業時間を取得する期間の終了日(YYYY-mm-dd)。 ``--start_date`` だけを指定した場合は今日です。",
+    )
+
+    parser.add_argument(
+        "--timezone_offset",
+        type=float,
+        help="日付に対するタイムゾーンのオフセット時間。例えばJSTなら '9' です。指定しない場合はローカルのタイムゾーンを参照します。",
+    )
+
+    parser.add_argument("-o", "--output", type=Path, required=True, help="出力先のスナップショット（zipファイル）")
+
+    parser.add_argument(
+        "--table_format",
+        type=str,
+        choices=[e.value for e in TableFormat],
+        default=TableFormat.JSONL.value,
+        help="スナップショットに格納するテーブルのファイル形式。 ``parquet`` を指定するには、 ``pyarrow`` パッケージをインストールしてください。",
+    )
+
+    parser.set_defaults(subcommand_func=main)
+
+
+def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
+    subcommand_name = "snapshot"
+    subcommand_help = "ワークスペースのデータをまとめたスナップショット（zipファイル）を出力します。"
+    description = (
+        "ワークスペース、メンバ、タグ、ジョブ、作業計画、予定稼働時間、実績作業時間を取得して、1個のスナップショット（zipファイル）に出力します。\n"
+        "``--snapshot`` にスナップショットを指定すると、Annowork WebAPIにアクセスせずにスナップショットのデータを利用してコマンドを実行できます。"
+    )
+
+    parser = annoworkcli.common.cli.add_parser(subparsers, subcommand_name, subcommand_help, description=description)
+    parse_args(parser)
+    return parser
@@ -1,15 +1,19 @@
 import argparse
 
 import annoworkcli
+import annoworkcli.workspace.diff_workspace
 import annoworkcli.workspace.list_workspace
 import annoworkcli.workspace.put_workspace
+import annoworkcli.workspace.snapshot_workspace
 from annoworkcli.common.cli import add_parser as add_root_parser
 
 
 def parse_args(parser: argparse.ArgumentParser) -> None:
     subparsers = parser.add_subparsers(dest="subcommand_name")
+    annoworkcli.workspace.diff_workspace.add_parser(subparsers)
     annoworkcli.workspace.list_workspace.add_parser(subparsers)
     annoworkcli.workspace.put_workspace.add_parser(subparsers)
+    annoworkcli.workspace.snapshot_workspace.add_parser(subparsers)
 
 
 def add_parser(subparsers: argparse._SubParsersAction | None = None) -> argparse.ArgumentParser:
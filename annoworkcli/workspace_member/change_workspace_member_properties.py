@@ -9,6 +9,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import build_annoworkapi, get_list_from_args
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -48,26 +49,29 @@ class ChangeWorkspaceMemberProperties:
         workspace_members = self.annowork_service.api.get_workspace_members(self.workspace_id, query_params={"includes_inactive_members": True})
         member_dict: dict[str, dict[str, Any]] = {m["user_id"]: m for m in workspace_members}
         success_count = 0
-        for user_id in user_id_list:
-            try:
-                old_member = member_dict.get(user_id)
-                if old_member is None:
-                    logger.warning(f"{user_id=} のユーザはワークスペースメンバに存在しないので、スキップします。")
-                    continue
-
-                if old_member["role"] == role:
-                    logger.warning(f"{user_id=} のロールは '{role}' なので、ロールを変更する必要はありません。スキップします。")
-                    continue
-
-                old_tags = self.annowork_service.api.get_workspace_member_tags(self.workspace_id, old_member["workspace_member_id"])
-                old_workspace_tag_ids = {e["workspace_tag_id"] for e in old_tags}
-
-                result = self.put_workspace_member(user_id, role=role, old_workspace_tag_ids=old_workspace_tag_ids, old_member=old_member)
-                if result:
-                    success_count += 1
-            except Exception as e:
-                logger.warning(f"{user_id=}: ワークスペースメンバの登録に失敗しました。{e}")
-                continue
+        with track_progress("ワークスペースメンバのロールの変更", total=len(user_id_list)) as progress:
+            for user_id in user_id_list:
+                with progress.track_item():
+                    try:
+                        old_member = member_dict.get(user_id)
+                        if old_member is None:
+                            logger.warning(f"{user_id=} のユーザはワークスペースメンバに存在しないので、スキップします。")
+                            continue
+
+                        if old_member["role"] == role:
+                            logger.warning(f"{user_id=} のロールは '{role}' なので、ロールを変更する必要はありません。スキップします。")
+                            continue
+
+                        old_tags = self.annowork_service.api.get_workspace_member_tags(self.workspace_id, old_member["workspace_member_id"])
+                        old_workspace_tag_ids = {e["workspace_tag_id"] for e in old_tags}
+
+                        result = self.put_workspace_member(user_id, role=role, old_workspace_tag_ids=old_workspace_tag_ids, old_member=old_member)
+                        if result:
+                            success_count += 1
+                    except Exception as e:
+                        progress.record_failure()
+                        logger.warning(f"{user_id=}: ワークスペースメンバの登録に失敗しました。{e}")
+                        continue
 
         logger.info(f"{success_count}/{len(user_id_list)} 件のユーザをワークスペースメンバに登録しました。")
 
@@ -10,6 +10,7 @@ from annoworkapi.resource import Resource as AnnoworkResource
 import annoworkcli
 import annoworkcli.common.cli
 from annoworkcli.common.cli import build_annoworkapi, get_list_from_args
+from annoworkcli.common.progress import track_progress
 
 logger = logging.getLogger(__name__)
 
@@ -63,19 +64,22 @@ class PutWorkspaceMember:
         workspace_members = self.annowork_service.api.get_workspace_members(self.workspace_id, query_params={"includes_inactive_members": True})
         member_dict: dict[str, dict[str, Any]] = {m["user_id"]: m for m in workspace_members}
         success_count = 0
-        for user_id in user_id_list:
-            try:
-                result = self.put_workspace_member(
-                    user_id,
-                    role,
-                    workspace_tag_id_list=workspace_tag_id_list,
-                    old_member=member_dict.get(user_id),
-                )
-                if result:
-                    success_count += 1
-            except Exception:
-                logger.warning(f"{user_id=}: ワークスペースメンバの登録に失敗しました。", exc_info=True)
-                continue
+        with track_progress("ワークスペースメンバの登録", total=len(user_id_list)) as progress:
+            for user_id in user_id_list:
+                with progress.track_item():
+                    try:
+                        result = self.put_workspace_member(
+                            user_id,
+                            role,
+                            workspace_tag_id_list=workspace_tag_id_list,
+                            old_member=member_dict.get(user_id),
+                        )
+                        if result:
+                            success_count += 1
+                    except Exception:
+                        progress.record_failure()
+                        logger.warning(f"{user_id=}: ワークスペースメンバの登録に失敗しました。", exc_info=True)
+                        continue
 
         logger.info(f"{success_count}/{len(user_id_list)} 件のユーザをワークスペースメンバに登録しました。")
 
@@ -1,6 +1,7 @@
 import argparse
 import logging
 from pathlib import Path
+from typing import Any
 
 import pandas
 from annoworkapi.resource import Resource as AnnoworkResource
@@ -18,8 +19,11 @@ class ListWorkspaceTag:
         self.annowork_service = annowork_service
         self.workspace_id = workspace_id
 
+    def get_workspace_tag_list(self) -> list[dict[str, Any]]:
+        return self.annowork_service.api.get_workspace_tags(self.workspace_id)
+
     def main(self, output: Path, output_format: OutputFormat):  # noqa: ANN201
-        workspace_tags = self.annowork_service.api.get_workspace_tags(self.workspace_id)
+        workspace_tags = self.get_workspace_tag_list()
 
         if len(workspace_tags) == 0:
             logger.warning("ワークスペースタグ情報は0件です。")
@@ -51,7 +55,7 @@ def main(args):  # noqa: ANN001, ANN201
 
 
 def parse_args(parser: argparse.ArgumentParser):  # noqa: ANN201
-    annoworkcli.common.cli.add_workspace_id_argument_with_env_fallback(parser)
+    annoworkcli.common.cli.add_workspace_ids_argument_with_env_fallback(parser)
 
     parser.add_argument("-o", "--output", type=Path, help="出力先")
 
@@ -4,6 +4,8 @@ from pathlib import Path
 import pandas
 
 from annoworkcli.annofab.list_working_hours import ListWorkingHoursWithAnnofab, _get_df_working_hours_from_df
+from tests.helpers.working_hours import get_df_working_hours_by_merge
+from tests.helpers.workspace_generator import generate_workspace
 
 # プロジェクトトップに移動する
 os.chdir(os.path.dirname(os.path.abspath(__file__)) + "/../../")
@@ -29,6 +31,94 @@ class Test__get_df_working_hours_from_df:
 
         df.to_csv(out_dir / "out.csv", index=False)
 
+    def test_mergeで結合した結果と一致する(self):
+        kwargs = {
+            "df_user_and_af_account": pandas.read_csv(str(data_dir / "user_and_af_account.csv")),
+            "df_job_and_af_project": pandas.read_csv(str(data_dir / "job_and_af_project.csv")),
+            "df_af_working_hours": pandas.read_csv(str(data_dir / "af_working_hours.csv")),
+            "df_actual_working_hours": pandas.read_csv(str(data_dir / "actual_working_hours.csv")),
+        }
+        assert_same_rows(_get_df_working_hours_from_df(**kwargs), get_df_working_hours_by_merge(**kwargs))
+
+    def test_mergeで結合した結果と一致する__生成したワークスペース(self):
+        workspace = generate_workspace(actual_row_count=2000)
+        df_job_and_af_project = workspace.get_df_job_and_af_project()
+        # 1個のAnnofabプロジェクトに複数のジョブが紐づくケースと、Annofabプロジェクトに紐づかないジョブのケースを含める
+        df_job_and_af_project.loc[0, "annofab_project_id"] = df_job_and_af_project.loc[1, "annofab_project_id"]
+        df_job_and_af_project.loc[2, "annofab_project_id"] = None
+        kwargs = {
+            "df_actual_working_hours": workspace.get_df_actual_working_hours_daily(),
+            "df_user_and_af_account": workspace.get_df_user_and_af_account(),
+            "df_job_and_af_project": df_job_and_af_project,
+            # Annoworkに実績作業時間が入力されていないAnnofabの作業時間を含める
+            "df_af_working_hours": pandas.concat(
+                [
+                    workspace.get_df_af_working_hours(),
+                    pandas.DataFrame(
+                        [
+                            {
+                                "date": "2021-12-31",
+                                "annofab_project_id": "job_0_3",
+                                "annofab_account_id": "af_account_0",
+                                "annofab_working_hours": 1.0,
+                            },
+                            {"date": "2021-12-31", "annofab_project_id": "unknown", "annofab_account_id": "unknown", "annofab_working_hours": 2.0},
+                        ]
+                    ),
+                ],
+                ignore_index=True,
+            ),
+        }
+        assert_same_rows(_get_df_working_hours_from_df(**kwargs), get_df_working_hours_by_merge(**kwargs))
+
+    def test_Annofabアカウントが紐づいていないユーザが複数いても行が重複しない(self):
+        df_user_and_af_account = pandas.DataFrame(
+            {
+                "user_id": ["alice", "bob", "chris"],
+                "username": ["Alice", "Bob", "Chris"],
+                "workspace_member_id": ["alice", "bob", "chris"],
+                "annofab_account_id": ["af_alice", None, None],
+            },
+            dtype="string",
+        )
+        df_actual_working_hours = pandas.DataFrame(
+            {
+                "date": ["2022-01-01", "2022-01-01"],
+                "job_id": ["job1", "job1"],
+                "job_name": ["JOB1", "JOB1"],
+                "workspace_member_id": ["alice", "bob"],
+                "user_id": ["alice", "bob"],
+                "username": ["Alice", "Bob"],
+                "actual_working_hours": [1.0, 2.0],
+                "notes": [None, None],
+            }
+        )
+        df_job_and_af_project = pandas.DataFrame(
+            {"job_id": ["job1"], "job_name": ["JOB1"], "annofab_project_id": ["prj1"], "annofab_project_title": ["PRJ1"]}, dtype="string"
+        )
+        df_af_working_hours = pandas.DataFrame(
+            {"date": ["2022-01-01"], "annofab_project_id": ["prj1"], "annofab_account_id": ["af_alice"], "annofab_working_hours": [3.0]}
+        ).astype({"date": "string", "annofab_project_id": "string", "annofab_account_id": "string"})
+
+        df = _get_df_working_hours_from_df(
+            df_actual_working_hours=df_actual_working_hours,
+            df_user_and_af_account=df_user_and_af_account,
+            df_job_and_af_project=df_job_and_af_project,
+            df_af_working_hours=df_af_working_hours,
+        )
+        assert len(df) == 2
+        assert df["actual_working_hours"].sum() == 3.0
+        assert df["annofab_working_hours"].sum() == 3.0
+
+
+def assert_same_rows(actual: pandas.DataFrame, expected: pandas.DataFrame) -> None:
+    """行の順序とdtypeを無視して、DataFrameの値が一致することを確認します。"""
+    assert list(actual.columns) == list(expected.columns)
+    columns = list(expected.columns)
+    actual = actual.astype(object).where(actual.notna(), None).sort_values(columns, key=lambda e: e.astype(str)).reset_index(drop=True)
+    expected = expected.astype(object).where(expected.notna(), None).sort_values(columns, key=lambda e: e.astype(str)).reset_index(drop=True)
+    pandas.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
 
 class TestListWorkingHoursWithAnnofab:
     def test_get_df_job_parent_job_when_parent_job_id_is_missing(self):
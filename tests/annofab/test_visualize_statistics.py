@@ -0,0 +1,49 @@
+import argparse
+from pathlib import Path
+
+import pandas
+from annofabcli.statistics.visualize_statistics import VisualizeStatistics, read_actual_worktime
+
+from annoworkcli.annofab.visualize_statistics import create_annofabcli_visualize_options, run_annofabcli_visualize_in_process
+
+
+def create_args(**kwargs) -> argparse.Namespace:  # noqa: ANN003
+    values = {
+        "start_date": "2022-01-01",
+        "end_date": None,
+        "output_dir": Path("out"),
+        "annofabcli_options": ["--minimal"],
+        "annofab_user_id": None,
+        "annofab_password": None,
+        "annofab_pat": "pat",
+    }
+    values.update(kwargs)
+    return argparse.Namespace(**values)
+
+
+def test_create_annofabcli_visualize_options():
+    actual = create_annofabcli_visualize_options(create_args(), ["prj1", "prj2"])
+    assert actual == ["--project_id", "prj1", "prj2", "--start_date", "2022-01-01", "--output_dir", "out", "--minimal"]
+
+
+def test_run_annofabcli_visualize_in_process(monkeypatch):
+    called_args: list[argparse.Namespace] = []
+
+    def visualize_main(self: VisualizeStatistics) -> None:
+        called_args.append(self.args)
+
+    monkeypatch.setattr(VisualizeStatistics, "main", visualize_main)
+
+    df_labor = pandas.DataFrame(
+        {"date": ["2022-01-01"], "account_id": ["alice"], "project_id": ["prj1"], "actual_worktime_hour": [2.0]},
+    )
+    args = create_args()
+    run_annofabcli_visualize_in_process(df_labor, args, create_annofabcli_visualize_options(args, ["prj1"]))
+
+    (annofabcli_args,) = called_args
+    assert annofabcli_args.project_id == ["prj1"]
+    assert annofabcli_args.minimal
+
+    # 実績作業時間はファイルを経由せずに渡される
+    actual_worktime = read_actual_worktime(actual_worktime_csv=annofabcli_args.actual_worktime_csv, labor_csv=None)
+    assert actual_worktime.df["actual_worktime_hour"].tolist() == [2.0]
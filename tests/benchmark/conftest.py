@@ -0,0 +1,142 @@
+"""
+ベンチマークの計測結果を記録・出力するための処理
+
+ベンチマークは ``pytest -m benchmark tests/benchmark`` で実行します。
+データ量（実績作業時間の件数）は、環境変数 ``ANNOWORKCLI_BENCHMARK_SIZES`` にカンマ区切りで指定します（例: ``10000,100000,1000000`` ）。
+計測結果は、ターミナルに表形式で出力され、 ``tests/out/benchmark/results.json`` にJSON形式で保存されます。
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, TypeVar
+
+import pytest
+
+from tests.benchmark.fake_server import FakeApiServer
+from tests.helpers.workspace_generator import SyntheticWorkspace
+
+BENCHMARK_SIZES_ENVVAR = "ANNOWORKCLI_BENCHMARK_SIZES"
+DEFAULT_BENCHMARK_SIZES = [10_000]
+
+RESULTS_FILE = Path(__file__).parent.parent / "out/benchmark/results.json"
+
+T = TypeVar("T")
+
+_results_key = pytest.StashKey[list[dict[str, Any]]]()
+
+
+def get_benchmark_sizes() -> list[int]:
+    value = os.environ.get(BENCHMARK_SIZES_ENVVAR)
+    if value is None or value.strip() == "":
+        return DEFAULT_BENCHMARK_SIZES
+    return [int(e) for e in value.split(",")]
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.stash[_results_key] = []
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    # 時間がかかるので、`-m benchmark` を指定したときだけ実行する
+    if "benchmark" in (config.getoption("markexpr") or ""):
+        return
+    skip_marker = pytest.mark.skip(reason="ベンチマークは `-m benchmark` を指定したときだけ実行します。")
+    for item in items:
+        if item.get_closest_marker("benchmark") is not None:
+            item.add_marker(skip_marker)
+
+
+class Measurer:
+    """関数の処理時間とメモリ使用量のピークを計測します。"""
+
+    def __init__(self, results: list[dict[str, Any]], test_name: str) -> None:
+        self._results = results
+        self._test_name = test_name
+
+    def __call__(self, name: str, size: int, func: Callable[[], T], *, extra: Callable[[], dict[str, Any]] | None = None) -> T:
+        """
+        ``func`` の処理時間[秒]とメモリ使用量のピーク[byte]を記録します。
+        tracemallocを有効にすると処理が遅くなるので、処理時間とメモリ使用量は別々に ``func`` を実行して計測します。
+
+        Args:
+            name: 計測対象の名前
+            size: データ量（実績作業時間の件数）
+            func: 計測対象の処理
+            extra: 計測結果に追加する情報を返す関数。 ``func`` の実行後に呼び出します。
+        """
+        start_time = time.perf_counter()
+        result = func()
+        elapsed_seconds = time.perf_counter() - start_time
+        extra_info = extra() if extra is not None else {}
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self._results.append(
+            {
+                "name": name,
+                "size": size,
+                "elapsed_seconds": elapsed_seconds,
+                "peak_memory_bytes": peak_memory_bytes,
+                "test": self._test_name,
+                **extra_info,
+            }
+        )
+        return result
+
+
+@pytest.fixture
+def measure(request: pytest.FixtureRequest) -> Iterator[Measurer]:
+    yield Measurer(request.config.stash[_results_key], request.node.nodeid)
+
+
+@pytest.fixture
+def start_fake_api_server(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[..., FakeApiServer]]:
+    """
+    :class:`FakeApiServer` を起動して、CLIがそのサーバにアクセスするように環境変数を設定する関数を返します。
+    起動したサーバはテストの終了時に停止します。
+    """
+    servers: list[FakeApiServer] = []
+
+    def start(workspace: SyntheticWorkspace, **kwargs: Any) -> FakeApiServer:  # noqa: ANN401
+        server = FakeApiServer(workspace, **kwargs)
+        server.start()
+        servers.append(server)
+        monkeypatch.setenv("ANNOWORK_ENDPOINT_URL", server.annowork_endpoint_url)
+        monkeypatch.setenv("ANNOWORK_USER_ID", "alice")
+        monkeypatch.setenv("ANNOWORK_PASSWORD", "password")
+        monkeypatch.setenv("ANNOFAB_ENDPOINT_URL", server.annofab_endpoint_url)
+        monkeypatch.setenv("ANNOFAB_USER_ID", "alice")
+        monkeypatch.setenv("ANNOFAB_PASSWORD", "password")
+        monkeypatch.delenv("ANNOFAB_PAT", raising=False)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.stop()
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:  # noqa: ANN401
+    results = config.stash[_results_key]
+    if len(results) == 0:
+        return
+
+    terminalreporter.section("benchmark")
+    terminalreporter.write_line(f"{'name':<65} {'size':>10} {'time[s]':>10} {'peak memory[MiB]':>17}")
+    for result in results:
+        terminalreporter.write_line(
+            f"{result['name']:<65} {result['size']:>10} {result['elapsed_seconds']:>10.3f} {result['peak_memory_bytes'] / 2**20:>17.1f}"
+        )
+
+    RESULTS_FILE.parent.mkdir(exist_ok=True, parents=True)
+    RESULTS_FILE.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    terminalreporter.write_line(f"計測結果を '{RESULTS_FILE}' に出力しました。")
@@ -0,0 +1,354 @@
+"""
+負荷試験用に、AnnoworkとAnnofabのWebAPIの代わりになるローカルのHTTPサーバ
+
+:class:`SyntheticWorkspace` のデータを返します。CLIが利用するWebAPIのうち、参照系のWebAPIだけを実装しています。
+レイテンシ、エラー率、流量制限（429 Too Many Requests）を設定できます。
+
+.. code-block:: python
+
+    with FakeApiServer(generate_workspace(actual_row_count=10000), latency_seconds=0.05) as server:
+        os.environ["ANNOWORK_ENDPOINT_URL"] = server.annowork_endpoint_url
+        os.environ["ANNOFAB_ENDPOINT_URL"] = server.annofab_endpoint_url
+"""
+
+import collections
+import datetime
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, Self
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from tests.helpers.workspace_generator import JST, SyntheticWorkspace
+
+ANNOWORK_PREFIX = "/annowork/api/v1"
+ANNOFAB_PREFIX = "/annofab/api/v1"
+
+StartResponse = Callable[[str, list[tuple[str, str]]], Any]
+Route = tuple[str, re.Pattern[str], Callable[..., Any]]
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+        # リクエストごとに標準エラー出力にログを出力しないようにする
+        pass
+
+
+class HttpError(Exception):
+    def __init__(self, status: str, headers: list[tuple[str, str]] | None = None) -> None:
+        super().__init__(status)
+        self.status = status
+        self.headers = headers or []
+
+
+def _parse_term_datetime(value: str, *, is_end: bool) -> datetime.datetime:
+    """
+    実績作業時間の ``term_start`` , ``term_end`` を日時に変換します。
+    CLIは ``2022-01-01T00:00:00.000Z`` のようなUTCの日時を渡します。日付だけの場合はJSTの日付とみなします。
+    """
+    if len(value) == len("2022-01-01"):
+        dt = datetime.datetime.fromisoformat(value).replace(tzinfo=JST)
+        return dt + datetime.timedelta(days=1) - datetime.timedelta(microseconds=1) if is_end else dt
+    return datetime.datetime.fromisoformat(value)
+
+
+def _is_datetime_in_term(dt: datetime.datetime, query: dict[str, str]) -> bool:
+    """実績作業時間の開始日時が、WebAPIと同じように日時で比較して期間に含まれるかどうか"""
+    term_start = query.get("term_start")
+    term_end = query.get("term_end")
+    return (term_start is None or dt >= _parse_term_datetime(term_start, is_end=False)) and (
+        term_end is None or dt <= _parse_term_datetime(term_end, is_end=True)
+    )
+
+
+def _is_in_term(date: str, query: dict[str, str]) -> bool:
+    """予定稼働時間のように日付で絞り込むWebAPIで、日付が期間に含まれるかどうか"""
+    term_start = query.get("term_start")
+    term_end = query.get("term_end")
+    return (term_start is None or date >= term_start) and (term_end is None or date <= term_end)
+
+
+class FakeApiServer:
+    """
+    AnnoworkとAnnofabのWebAPIの代わりになるHTTPサーバ。別スレッドで起動します。
+
+    Args:
+        workspace: WebAPIが返すデータ
+        latency_seconds: レスポンスを返すまでの待ち時間[秒]
+        error_rate: 503 Service Unavailableを返す割合（0以上1以下）
+        max_rps: 1秒あたりに受け付けるリクエスト数の上限。超えた場合は429 Too Many Requestsを返します。Noneなら制限しません。
+        seed: エラーを返すかどうかを決める乱数のシード
+    """
+
+    def __init__(
+        self,
+        workspace: SyntheticWorkspace,
+        *,
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        max_rps: float | None = None,
+        seed: int = 0,
+    ) -> None:
+        self.workspace = workspace
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)  # noqa: S311
+        self._request_times: collections.deque[float] = collections.deque()
+
+        self.request_count = 0
+        """受け付けたリクエストの件数（エラーを返したリクエストも含む）"""
+        self.error_count = 0
+        """503を返したリクエストの件数"""
+        self.throttled_count = 0
+        """429を返したリクエストの件数"""
+        self.login_count = 0
+        """Annoworkへのログインのリクエストの件数"""
+
+        self._job_dict = {job["job_id"]: job for job in workspace.jobs}
+        self._member_dict = {member["workspace_member_id"]: member for member in workspace.workspace_members}
+        self._actual_start_datetimes = [datetime.datetime.fromisoformat(actual["start_datetime"]) for actual in workspace.actual_working_times]
+        self._af_working_hours_by_project: dict[str, list[dict[str, Any]]] = collections.defaultdict(list)
+        for elm in workspace.annofab_working_hours:
+            self._af_working_hours_by_project[elm["annofab_project_id"]].append(elm)
+
+        self._routes = self._create_routes()
+        self._server: WSGIServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def annowork_endpoint_url(self) -> str:
+        """annoworkapiの ``endpoint_url`` に渡すURL"""
+        return f"{self.base_url}/annowork"
+
+    @property
+    def annofab_endpoint_url(self) -> str:
+        """annofabapiの ``endpoint_url`` に渡すURL"""
+        return f"{self.base_url}/annofab"
+
+    def start(self) -> None:
+        self._server = make_server("127.0.0.1", 0, self, server_class=_ThreadingWSGIServer, handler_class=_QuietRequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def _create_routes(self) -> list[Route]:
+        ws = "(?P<workspace_id>[^/]+)"
+        routes: list[tuple[str, str, Callable[..., Any]]] = [
+            ("POST", f"{ANNOWORK_PREFIX}/login", self._annowork_login),
+            ("GET", f"{ANNOWORK_PREFIX}/my/account", self._get_my_account),
+            ("GET", f"{ANNOWORK_PREFIX}/my/workspace-members", self._get_my_workspace_members),
+            ("GET", f"{ANNOWORK_PREFIX}/accounts/(?P<user_id>[^/]+)/external-linkage-info", self._get_account_external_linkage_info),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}", self._get_workspace),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/jobs", self._get_jobs),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/jobs/(?P<job_id>[^/]+)", self._get_job),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/jobs/(?P<job_id>[^/]+)/children", self._get_job_children),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/members", self._get_workspace_members),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/members/(?P<workspace_member_id>[^/]+)", self._get_workspace_member),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/members/(?P<workspace_member_id>[^/]+)/tags", self._get_workspace_member_tags),
+            (
+                "GET",
+                f"{ANNOWORK_PREFIX}/workspaces/{ws}/members/(?P<workspace_member_id>[^/]+)/actual-working-times",
+                self._get_actual_working_times,
+            ),
+            (
+                "GET",
+                f"{ANNOWORK_PREFIX}/workspaces/{ws}/members/(?P<workspace_member_id>[^/]+)/expected-working-times",
+                self._get_expected_working_times,
+            ),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/tags", self._get_workspace_tags),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/tags/(?P<workspace_tag_id>[^/]+)/members", self._get_workspace_tag_members),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/actual-working-times", self._get_actual_working_times),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/schedules", self._get_schedules),
+            ("GET", f"{ANNOWORK_PREFIX}/workspaces/{ws}/expected-working-times", self._get_expected_working_times),
+            ("POST", f"{ANNOFAB_PREFIX}/login", self._annofab_login),
+            ("POST", f"{ANNOFAB_PREFIX}/refresh-token", self._annofab_refresh_token),
+            ("GET", f"{ANNOFAB_PREFIX}/projects/(?P<project_id>[^/]+)", self._get_annofab_project),
+            ("GET", f"{ANNOFAB_PREFIX}/projects/(?P<project_id>[^/]+)/statistics/dates", self._get_annofab_statistics_dates),
+            ("GET", f"{ANNOFAB_PREFIX}/projects/(?P<project_id>[^/]+)/statistics/accounts/daily", self._get_annofab_account_daily_statistics),
+        ]
+        return [(method, re.compile(f"{pattern}$"), handler) for method, pattern, handler in routes]
+
+    def __call__(self, environ: dict[str, Any], start_response: StartResponse) -> Iterable[bytes]:
+        method = environ["REQUEST_METHOD"]
+        path = environ["PATH_INFO"]
+        query = {key: values[-1] for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        try:
+            body = self._handle(method, path, query, environ)
+        except HttpError as e:
+            start_response(e.status, [("Content-Type", "application/json"), *e.headers])
+            return [json.dumps({"errors": [{"error_code": e.status}]}).encode()]
+
+        content = json.dumps(body, ensure_ascii=False).encode()
+        start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(content)))])
+        return [content]
+
+    def _handle(self, method: str, path: str, query: dict[str, str], environ: dict[str, Any]) -> Any:  # noqa: ANN401
+        with self._lock:
+            self.request_count += 1
+            now = time.monotonic()
+            if self.max_rps is not None:
+                while len(self._request_times) > 0 and self._request_times[0] <= now - 1:
+                    self._request_times.popleft()
+                if len(self._request_times) >= self.max_rps:
+                    self.throttled_count += 1
+                    raise HttpError("429 Too Many Requests", [("Retry-After", "1")])
+                self._request_times.append(now)
+
+            is_error = self._random.random() < self.error_rate
+
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+        if is_error:
+            with self._lock:
+                self.error_count += 1
+            raise HttpError("503 Service Unavailable")
+
+        for route_method, pattern, handler in self._routes:
+            m = pattern.match(path)
+            if m is None or route_method != method:
+                continue
+            if not path.endswith(("/login", "/refresh-token")) and environ.get("HTTP_AUTHORIZATION", "") == "":
+                raise HttpError("401 Unauthorized")
+            return handler(query=query, **m.groupdict())
+
+        raise HttpError("404 Not Found")
+
+    def _annowork_login(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        with self._lock:
+            self.login_count += 1
+        return {"id_token": "fake-id-token", "access_token": "fake-access-token", "refresh_token": "fake-refresh-token"}
+
+    def _annofab_login(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return {"token": {"id_token": "fake-id-token", "access_token": "fake-access-token", "refresh_token": "fake-refresh-token"}}
+
+    def _annofab_refresh_token(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return {"id_token": "fake-id-token", "access_token": "fake-access-token", "refresh_token": "fake-refresh-token"}
+
+    def _get_my_account(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return {"account_id": "account_0", "user_id": "user_0", "username": "User 0"}
+
+    def _get_my_workspace_members(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        member = self.workspace.workspace_members[0]
+        return [{**member, "workspace_id": self.workspace.workspace_id}]
+
+    def _get_account_external_linkage_info(self, user_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        account_id = user_id.replace("user_", "account_", 1)
+        return {"user_id": user_id, "external_linkage_info": {"annofab": {"account_id": f"af_{account_id}"}}}
+
+    def _get_workspace(self, workspace_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if workspace_id != self.workspace.workspace_id:
+            raise HttpError("404 Not Found")
+        return {"workspace_id": workspace_id, "workspace_name": workspace_id}
+
+    def _get_jobs(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return self.workspace.jobs
+
+    def _get_job(self, job_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if job_id not in self._job_dict:
+            raise HttpError("404 Not Found")
+        return self._job_dict[job_id]
+
+    def _get_job_children(self, job_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return [job for job in self.workspace.jobs if job["job_tree"].split("/")[-2] == job_id]
+
+    def _get_workspace_members(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return self.workspace.workspace_members
+
+    def _get_workspace_member(self, workspace_member_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if workspace_member_id not in self._member_dict:
+            raise HttpError("404 Not Found")
+        return self._member_dict[workspace_member_id]
+
+    def _get_workspace_member_tags(self, workspace_member_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return [tag for tag in self.workspace.workspace_tags if workspace_member_id in self.workspace.workspace_tag_members[tag["workspace_tag_id"]]]
+
+    def _get_workspace_tags(self, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return self.workspace.workspace_tags
+
+    def _get_workspace_tag_members(self, workspace_tag_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        member_ids = self.workspace.workspace_tag_members.get(workspace_tag_id, [])
+        return [self._member_dict[member_id] for member_id in member_ids]
+
+    def _get_actual_working_times(self, query: dict[str, str], workspace_member_id: str | None = None, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        job_id = query.get("job_id")
+        return [
+            actual
+            for actual, start_datetime in zip(self.workspace.actual_working_times, self._actual_start_datetimes, strict=True)
+            if (workspace_member_id is None or actual["workspace_member_id"] == workspace_member_id)
+            and (job_id is None or actual["job_id"] == job_id)
+            and _is_datetime_in_term(start_datetime, query)
+        ]
+
+    def _get_schedules(self, query: dict[str, str], **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        job_id = query.get("job_id")
+        term_start = query.get("term_start")
+        term_end = query.get("term_end")
+        return [
+            schedule
+            for schedule in self.workspace.schedules
+            if (job_id is None or schedule["job_id"] == job_id)
+            and (term_start is None or schedule["end_date"] >= term_start)
+            and (term_end is None or schedule["start_date"] <= term_end)
+        ]
+
+    def _get_expected_working_times(self, query: dict[str, str], workspace_member_id: str | None = None, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        return [
+            elm
+            for elm in self.workspace.expected_working_times
+            if (workspace_member_id is None or elm["workspace_member_id"] == workspace_member_id) and _is_in_term(elm["date"], query)
+        ]
+
+    def _get_annofab_project(self, project_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if project_id not in self._job_dict:
+            raise HttpError("404 Not Found")
+        return {"project_id": project_id, "title": f"PRJ-{self._job_dict[project_id]['job_name']}"}
+
+    def _get_annofab_statistics_dates(self, project_id: str, **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        dates = sorted(elm["date"] for elm in self._af_working_hours_by_project.get(project_id, []))
+        if len(dates) == 0:
+            today = datetime.date.today().isoformat()  # noqa: DTZ011
+            return [{"from": today, "to": today}]
+        return [{"from": dates[0], "to": dates[-1]}]
+
+    def _get_annofab_account_daily_statistics(self, project_id: str, query: dict[str, str], **kwargs: Any) -> Any:  # noqa: ANN401, ARG002
+        if project_id not in self._job_dict:
+            raise HttpError("404 Not Found")
+        histories_by_account: dict[str, list[dict[str, Any]]] = collections.defaultdict(list)
+        for elm in self._af_working_hours_by_project.get(project_id, []):
+            if query["from"] <= elm["date"] <= query["to"]:
+                histories_by_account[elm["annofab_account_id"]].append(
+                    {"date": elm["date"], "worktime": f"PT{elm['annofab_working_hours'] * 3600:.3f}S"}
+                )
+        return [{"account_id": account_id, "histories": histories} for account_id, histories in histories_by_account.items()]
@@ -0,0 +1,161 @@
+"""
+集計処理のベンチマーク
+
+``pytest -m benchmark tests/benchmark`` で実行します。詳細は ``conftest.py`` を参照してください。
+"""
+
+import functools
+from typing import Any
+
+import pytest
+
+from annoworkcli.actual_working_time.list_actual_working_hours_daily import create_actual_working_hours_daily_list
+from annoworkcli.actual_working_time.list_actual_working_time_weekly import get_weekly_actual_working_hours_df
+from annoworkcli.annofab.list_working_hours import _get_df_working_hours_from_df
+from annoworkcli.annofab.reshape_working_hours import ReshapeDataFrame
+from annoworkcli.expected_working_time.list_expected_working_time_weekly import get_weekly_expected_working_hours_df
+from annoworkcli.schedule.list_schedule import ExpectedWorkingHoursDict, create_assigned_hours_dict
+from annoworkcli.schedule.list_schedule_weekly import get_weekly_assigned_hours_df
+from tests.benchmark.conftest import Measurer, get_benchmark_sizes
+from tests.helpers.working_hours import get_df_working_hours_by_merge
+from tests.helpers.workspace_generator import SyntheticWorkspace, generate_workspace
+
+# モジュールレベルでpytestのmarkerを付ける
+pytestmark = pytest.mark.benchmark
+
+SIZES = get_benchmark_sizes()
+
+
+@functools.cache
+def get_workspace(size: int) -> SyntheticWorkspace:
+    # 同じデータ量のテストで、生成したデータを使い回す
+    return generate_workspace(actual_row_count=size)
+
+
+def create_assigned_hours_daily_list(workspace: SyntheticWorkspace) -> list[dict[str, Any]]:
+    expected_working_hours_dict: ExpectedWorkingHoursDict = {
+        (e["date"], e["workspace_member_id"]): e["expected_working_hours"] for e in workspace.expected_working_times
+    }
+    job_dict = {job["job_id"]: job for job in workspace.jobs}
+    result: list[dict[str, Any]] = []
+    for schedule in workspace.schedules:
+        assigned_hours_dict = create_assigned_hours_dict(schedule, expected_working_hours_dict)
+        result.extend(
+            {
+                "workspace_member_id": schedule["workspace_member_id"],
+                "date": date,
+                "job_id": schedule["job_id"],
+                "job_name": job_dict[schedule["job_id"]]["job_name"],
+                "assigned_working_hours": hours,
+            }
+            for date, hours in assigned_hours_dict.items()
+        )
+    return result
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_create_actual_working_hours_daily_list(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    actual_list = measure(
+        "create_actual_working_hours_daily_list",
+        size,
+        lambda: create_actual_working_hours_daily_list(workspace.actual_working_times, timezone_offset_hours=9),
+    )
+    assert sum(e.actual_working_hours for e in actual_list) == pytest.approx(sum(e["actual_working_hours"] for e in workspace.actual_working_times))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_create_assigned_hours_dict(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    assigned_list = measure("create_assigned_hours_dict", size, lambda: create_assigned_hours_daily_list(workspace))
+    assert len(assigned_list) > 0
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_df_working_hours_from_df(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    df_actual_working_hours = workspace.get_df_actual_working_hours_daily()
+    df_user_and_af_account = workspace.get_df_user_and_af_account()
+    df_job_and_af_project = workspace.get_df_job_and_af_project()
+    df_af_working_hours = workspace.get_df_af_working_hours()
+
+    df = measure(
+        "_get_df_working_hours_from_df",
+        size,
+        lambda: _get_df_working_hours_from_df(
+            df_actual_working_hours=df_actual_working_hours,
+            df_user_and_af_account=df_user_and_af_account,
+            df_job_and_af_project=df_job_and_af_project,
+            df_af_working_hours=df_af_working_hours,
+        ),
+    )
+    assert df["annofab_working_hours"].sum() == pytest.approx(df_af_working_hours["annofab_working_hours"].sum())
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_df_working_hours_by_merge(size: int, measure: Measurer):
+    # `map`で結合するように書き換える前の実装。 `_get_df_working_hours_from_df` と処理時間を比較する
+    workspace = get_workspace(size)
+    df_af_working_hours = workspace.get_df_af_working_hours()
+    kwargs = {
+        "df_actual_working_hours": workspace.get_df_actual_working_hours_daily(),
+        "df_user_and_af_account": workspace.get_df_user_and_af_account(),
+        "df_job_and_af_project": workspace.get_df_job_and_af_project(),
+        "df_af_working_hours": df_af_working_hours,
+    }
+    df = measure("_get_df_working_hours_from_df(merge)", size, lambda: get_df_working_hours_by_merge(**kwargs))
+    assert df["annofab_working_hours"].sum() == pytest.approx(df_af_working_hours["annofab_working_hours"].sum())
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_df_details(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    df_actual = _get_df_working_hours_from_df(
+        df_actual_working_hours=workspace.get_df_actual_working_hours_daily(),
+        df_user_and_af_account=workspace.get_df_user_and_af_account(),
+        df_job_and_af_project=workspace.get_df_job_and_af_project(),
+        df_af_working_hours=workspace.get_df_af_working_hours(),
+    )
+    df_assigned = workspace.get_df_assigned(df_actual)
+
+    # get_df_detailsは引数のDataFrameを変更するので、コピーを渡す
+    df = measure(
+        "ReshapeDataFrame.get_df_details",
+        size,
+        lambda: ReshapeDataFrame().get_df_details(df_actual=df_actual.copy(), df_assigned=df_assigned.copy()),
+    )
+    assert len(df) > 0
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_weekly_actual_working_hours_df(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    df = measure(
+        "get_weekly_actual_working_hours_df",
+        size,
+        lambda: get_weekly_actual_working_hours_df(workspace.actual_working_times, workspace.workspace_members),
+    )
+    assert len(df) > 0
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_weekly_expected_working_hours_df(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    df = measure(
+        "get_weekly_expected_working_hours_df",
+        size,
+        lambda: get_weekly_expected_working_hours_df(workspace.expected_working_times, workspace.workspace_members),
+    )
+    assert len(df) > 0
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_weekly_assigned_hours_df(size: int, measure: Measurer):
+    workspace = get_workspace(size)
+    assigned_hours_daily_list = create_assigned_hours_daily_list(workspace)
+    df = measure(
+        "get_weekly_assigned_hours_df",
+        size,
+        lambda: get_weekly_assigned_hours_df(assigned_hours_daily_list, workspace.workspace_members),
+    )
+    assert len(df) > 0
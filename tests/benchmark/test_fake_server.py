@@ -0,0 +1,255 @@
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas
+import pytest
+
+from annoworkcli.__main__ import main
+from tests.benchmark.fake_server import FakeApiServer
+from tests.helpers.workspace_generator import generate_workspace
+
+
+def test_ローカルのWebAPIサーバに対してサブコマンドを実行できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace)
+    output = tmp_path / "out.csv"
+
+    main(["actual_working_time", "list_daily", "--workspace_id", workspace.workspace_id, "--output", str(output)])
+
+    df = pandas.read_csv(output)
+    assert df["actual_working_hours"].sum() == pytest.approx(sum(e["actual_working_hours"] for e in workspace.actual_working_times))
+    assert server.request_count > 0
+
+
+def test_エラーや流量制限が発生してもリトライして取得できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace, error_rate=0.2, max_rps=50, seed=1)
+    output = tmp_path / "out.csv"
+
+    main(["annofab", "list_working_hours", "--workspace_id", workspace.workspace_id, "--output", str(output), "--max_concurrency", "4"])
+
+    df = pandas.read_csv(output)
+    assert df["annofab_working_hours"].sum() > 0
+    assert server.error_count > 0
+
+
+def test_記録したレスポンスを再生してWebAPIにアクセスせずに実行できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace)
+    command = ["annofab", "list_working_hours", "--workspace_id", workspace.workspace_id, "--start_date", "2022-01-01"]
+    cassette_dir = tmp_path / "cassette"
+
+    main([*command, "--output", str(tmp_path / "recorded.csv"), "--record", str(cassette_dir)])
+    server.stop()
+    main([*command, "--output", str(tmp_path / "replayed.csv"), "--replay", str(cassette_dir)])
+
+    assert (tmp_path / "replayed.csv").read_text() == (tmp_path / "recorded.csv").read_text()
+
+
+def test_キューブを作成してWebAPIにアクセスせずに日ごとの実績作業時間を出力できる(
+    start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path
+):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace)
+    cube_file = tmp_path / "cube.sqlite"
+    # 日付の境界がホストのタイムゾーンに依存しないように、生成したデータと同じJSTを指定する
+    timezone_offset = ["--timezone_offset", "9"]
+    command = [
+        "actual_working_time",
+        "list_daily",
+        "--workspace_id",
+        workspace.workspace_id,
+        "--start_date",
+        "2022-01-01",
+        "--end_date",
+        "2022-03-31",
+        *timezone_offset,
+    ]
+
+    main(
+        [
+            "cube",
+            "build",
+            "--workspace_id",
+            workspace.workspace_id,
+            "--cube",
+            str(cube_file),
+            "--start_date",
+            "2022-01-01",
+            "--end_date",
+            "2022-03-31",
+            *timezone_offset,
+        ]
+    )
+    main([*command, "--output", str(tmp_path / "webapi.csv")])
+    server.stop()
+    main([*command, "--output", str(tmp_path / "cube.csv"), "--cube", str(cube_file)])
+
+    df_webapi = pandas.read_csv(tmp_path / "webapi.csv").sort_values(["date", "job_id", "user_id"], ignore_index=True)
+    df_cube = pandas.read_csv(tmp_path / "cube.csv").sort_values(["date", "job_id", "user_id"], ignore_index=True)
+    pandas.testing.assert_frame_equal(df_cube, df_webapi, check_dtype=False)
+
+
+def test_スナップショットを作成してWebAPIにアクセスせずにコマンドを実行できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace, error_rate=0.1, seed=1)
+    snapshot_file = tmp_path / "snapshot.zip"
+    term = ["--start_date", "2022-01-01", "--end_date", "2022-03-31"]
+    commands = {
+        "actual_daily": ["actual_working_time", "list_daily", *term],
+        "schedule": ["schedule", "list", *term],
+        "expected": ["expected_working_time", "list", *term],
+        "job": ["job", "list"],
+        "workspace_tag": ["workspace_tag", "list"],
+        "workspace_member": ["workspace_member", "list"],
+    }
+
+    main(["workspace", "snapshot", "--workspace_id", workspace.workspace_id, *term, "--output", str(snapshot_file)])
+    for name, command in commands.items():
+        main([*command, "--workspace_id", workspace.workspace_id, "--output", str(tmp_path / f"webapi_{name}.csv")])
+    server.stop()
+    for name, command in commands.items():
+        main(
+            [*command, "--workspace_id", workspace.workspace_id, "--output", str(tmp_path / f"snapshot_{name}.csv"), "--snapshot", str(snapshot_file)]
+        )
+
+    for name in commands:
+        assert (tmp_path / f"snapshot_{name}.csv").read_text() == (tmp_path / f"webapi_{name}.csv").read_text(), name
+
+
+def test_複数のワークスペースに対してコマンドを実行して結果を結合できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace)
+    output = tmp_path / "out.csv"
+
+    # ローカルのWebAPIサーバはワークスペースIDによらず同じデータを返す
+    main(["actual_working_time", "list_daily", "--workspace_id", workspace.workspace_id, "other_workspace", "--output", str(output)])
+
+    df = pandas.read_csv(output)
+    assert df.columns[0] == "workspace_id"
+    assert df.groupby("workspace_id")["actual_working_hours"].sum().to_dict() == pytest.approx(
+        dict.fromkeys([workspace.workspace_id, "other_workspace"], sum(e["actual_working_hours"] for e in workspace.actual_working_times))
+    )
+    assert server.login_count == 1
+
+
+def test_すべてのワークスペースに対してワークスペースごとのファイルに出力できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=10)
+    start_fake_api_server(workspace)
+    output_dir = tmp_path / "out"
+
+    main(["job", "list", "--workspace_id", "all", "--output", str(output_dir), "--partition_by_workspace", "--format", "json"])
+
+    assert [e.name for e in output_dir.iterdir()] == [f"{workspace.workspace_id}.json"]
+
+
+def test_複数の親ジョブの予定と実績をまとめて出力できる(start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = generate_workspace(actual_row_count=300)
+    server = start_fake_api_server(workspace)
+    command = [
+        "schedule_actual",
+        "list_daily",
+        "--workspace_id",
+        workspace.workspace_id,
+        "--start_date",
+        "2022-01-01",
+        "--end_date",
+        "2022-01-31",
+        "--timezone_offset",
+        "9",
+    ]
+
+    main([*command, "--parent_job_id", "parent_0", "parent_1", "--output", str(tmp_path / "multi.csv")])
+    multi_request_count = server.request_count
+
+    df_multi = pandas.read_csv(tmp_path / "multi.csv")
+    for parent_job_id in ["parent_0", "parent_1"]:
+        output = tmp_path / f"{parent_job_id}.csv"
+        main([*command, "--parent_job_id", parent_job_id, "--output", str(output)])
+        df_single = pandas.read_csv(output)
+        df_actual = df_multi[df_multi["parent_job_id"] == parent_job_id].drop(columns=["parent_job_id", "parent_job_name"])
+        pandas.testing.assert_frame_equal(df_actual.reset_index(drop=True), df_single)
+
+    assert df_multi["actual_working_hours"].sum() > 0
+    # 親ジョブごとにWebAPIを呼び出さない
+    assert multi_request_count < server.request_count - multi_request_count
+
+
+def test_Annofabプロジェクトの情報をキャッシュして次回以降のコマンド実行で再利用できる(
+    start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace)
+    command = ["annofab", "list_working_hours", "--workspace_id", workspace.workspace_id, "--use_annofab_project_cache"]
+
+    main([*command, "--output", str(tmp_path / "first.csv")])
+    first_request_count = server.request_count
+    main([*command, "--output", str(tmp_path / "second.csv")])
+    second_request_count = server.request_count - first_request_count
+
+    assert second_request_count < first_request_count
+    assert (tmp_path / "second.csv").read_text() == (tmp_path / "first.csv").read_text()
+
+
+def test_watchを指定すると直近の期間だけを取得し直して出力ファイルを更新する(
+    start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace)
+    command = ["actual_working_time", "list_daily", "--workspace_id", workspace.workspace_id]
+    main([*command, "--output", str(tmp_path / "expected.csv")])
+    full_request_count = server.request_count
+
+    sleep_count = 0
+
+    def sleep(seconds: float) -> None:  # noqa: ARG001
+        nonlocal sleep_count
+        sleep_count += 1
+        if sleep_count > 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr("annoworkcli.common.watch.time.sleep", sleep)
+    main([*command, "--output", str(tmp_path / "watched.csv"), "--watch", "60"])
+    watch_request_count = server.request_count - full_request_count
+
+    assert (tmp_path / "watched.csv").read_text() == (tmp_path / "expected.csv").read_text()
+    # 2回の更新で取得し直したリクエスト数は、最初の集計のリクエスト数より少ない
+    assert watch_request_count - full_request_count < full_request_count
+
+
+def test_traceを指定するとWebAPIの呼び出しをフェーズの子のスパンとして出力して集計できる(
+    start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path
+):
+    workspace = generate_workspace(actual_row_count=100)
+    server = start_fake_api_server(workspace, error_rate=0.2, seed=1)
+    trace_file = tmp_path / "trace.jsonl"
+
+    main(
+        [
+            *["annofab", "list_working_hours", "--workspace_id", workspace.workspace_id, "--output", str(tmp_path / "out.csv")],
+            *["--max_concurrency", "4", "--trace", str(trace_file)],
+        ]
+    )
+
+    spans = [json.loads(line) for line in trace_file.read_text(encoding="utf-8").splitlines()]
+    span_by_name = {e["name"]: e for e in spans}
+    root_span = span_by_name["annoworkcli annofab list_working_hours"]
+    assert root_span["parentSpanId"] is None
+    client_spans = [e for e in spans if e["kind"] == "SPAN_KIND_CLIENT"]
+    # リトライも含めて、WebAPIの呼び出しごとにスパンを出力する
+    assert len(client_spans) == server.request_count
+    # スレッドプール上で呼び出したWebAPIも、呼び出し元のフェーズの子になる
+    fetch_jobs_span = span_by_name["fetch_jobs"]
+    assert any(e["parentSpanId"] == fetch_jobs_span["spanId"] for e in client_spans)
+    assert any(e["parentSpanId"] == span_by_name["fetch_annofab_working_hours"]["spanId"] for e in client_spans)
+
+    summary_file = tmp_path / "summary.json"
+    main(["trace", "summarize", "--trace_file", str(trace_file), "--format", "json", "--output", str(summary_file)])
+    summary = json.loads(summary_file.read_text(encoding="utf-8"))
+    assert summary["span_count"] == len(spans)
+    assert summary["critical_path"][0]["name"] == "annoworkcli annofab list_working_hours"
+    assert sum(e["count"] for e in summary["endpoints"]) == len(client_spans)
+    # 503が返ってきてリトライした呼び出しを数える
+    assert sum(e["retry_count"] for e in summary["endpoints"]) > 0
@@ -0,0 +1,78 @@
+"""
+ローカルのWebAPIサーバ（ :class:`FakeApiServer` ）に対して実際のサブコマンドを実行して、スループットを計測するベンチマーク
+
+``pytest -m benchmark tests/benchmark/test_throughput.py`` で実行します。
+レイテンシ、エラー率、流量制限を変えたシナリオごとに、処理時間とリクエスト数を計測します。
+"""
+
+import functools
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from annoworkcli.__main__ import main
+from tests.benchmark.conftest import Measurer, get_benchmark_sizes
+from tests.benchmark.fake_server import FakeApiServer
+from tests.helpers.workspace_generator import SyntheticWorkspace, generate_workspace
+
+# モジュールレベルでpytestのmarkerを付ける
+pytestmark = pytest.mark.benchmark
+
+SIZES = get_benchmark_sizes()
+
+SCENARIOS: dict[str, tuple[dict[str, Any], list[str]]] = {
+    "no_latency": ({}, []),
+    "latency_50ms": ({"latency_seconds": 0.05}, []),
+    "latency_50ms_error_1pct": ({"latency_seconds": 0.05, "error_rate": 0.01}, []),
+    "throttled_20rps": ({"latency_seconds": 0.05, "max_rps": 20}, []),
+    "throttled_20rps_with_max_rps": ({"latency_seconds": 0.05, "max_rps": 20}, ["--max_rps", "20"]),
+}
+"""key:シナリオ名, value:tuple( :class:`FakeApiServer` に渡す引数, コマンドに追加する引数)"""
+
+COMMANDS = {
+    "actual_working_time list_daily": ["actual_working_time", "list_daily"],
+    "schedule list_daily": ["schedule", "list_daily"],
+    "expected_working_time list": ["expected_working_time", "list"],
+    "annofab list_working_hours": ["annofab", "list_working_hours"],
+}
+"""key:コマンド名, value:サブコマンドの引数"""
+
+START_DATE = "2022-01-01"
+
+
+@functools.cache
+def get_workspace(size: int) -> SyntheticWorkspace:
+    return generate_workspace(actual_row_count=size)
+
+
+def create_extra(server: FakeApiServer) -> Callable[[], dict[str, Any]]:
+    def extra() -> dict[str, Any]:
+        return {
+            "request_count": server.request_count,
+            "error_count": server.error_count,
+            "throttled_count": server.throttled_count,
+        }
+
+    return extra
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("scenario", SCENARIOS.keys())
+@pytest.mark.parametrize("command", COMMANDS.keys())
+def test_throughput(size: int, scenario: str, command: str, measure: Measurer, start_fake_api_server: Callable[..., FakeApiServer], tmp_path: Path):
+    workspace = get_workspace(size)
+    server_kwargs, additional_args = SCENARIOS[scenario]
+    server = start_fake_api_server(workspace, **server_kwargs)
+    output = tmp_path / "out.csv"
+
+    measure(
+        f"{command} ({scenario})",
+        size,
+        lambda: main(
+            [*COMMANDS[command], "--workspace_id", workspace.workspace_id, "--start_date", START_DATE, "--output", str(output), *additional_args]
+        ),
+        extra=create_extra(server),
+    )
+    assert output.exists()
@@ -1,4 +1,4 @@
-from annoworkcli.common.annofab import get_annofab_project_id_from_job
+from annoworkcli.common.annofab import AnnofabLinkageIndex, get_annofab_project_id_from_job
 
 
 class Test_get_annofab_project_id_from_job:
@@ -27,3 +27,37 @@ class Test_get_annofab_project_id_from_job:
         }
         actual = get_annofab_project_id_from_job(job)
         assert actual is None
+
+
+JOBS = [
+    {"job_id": "parent1", "job_tree": "org/parent1", "external_linkage_info": {}},
+    {"job_id": "job1", "job_tree": "org/parent1/job1", "external_linkage_info": {"url": "https://annofab.com/projects/prj1"}},
+    {"job_id": "job2", "job_tree": "org/parent1/job2", "external_linkage_info": {"url": " https://annofab.com/projects/prj2/ "}},
+    {"job_id": "job3", "job_tree": "org/parent2/job3", "external_linkage_info": {"url": "https://annofab.com/projects/prj1"}},
+    {"job_id": "job4", "job_tree": "org/parent2/job4", "external_linkage_info": {"url": "https://example.com/foo"}},
+]
+
+
+class TestAnnofabLinkageIndex:
+    index = AnnofabLinkageIndex.from_jobs(JOBS)
+
+    def test_get_annofab_project_id(self):
+        assert self.index.get_annofab_project_id("job2") == "prj2"
+        assert self.index.get_annofab_project_id("job4") is None
+        assert self.index.get_annofab_project_id("parent1") is None
+
+    def test_get_annofab_project_ids(self):
+        assert self.index.get_annofab_project_ids() == {"prj1", "prj2"}
+
+    def test_get_job_ids(self):
+        assert self.index.get_job_ids(["prj1"]) == ["job1", "job3"]
+        assert self.index.get_job_ids(["prj2", "prj2", "unknown"]) == ["job2"]
+
+    def test_get_parent_job_ids(self):
+        assert self.index.get_parent_job_ids(["prj1", "prj2"]) == ["parent1", "parent2"]
+        assert self.index.parent_job_id_to_annofab_project_ids == {"parent1": ["prj1", "prj2"], "parent2": ["prj1"]}
+
+    def test_get_job_ids_by_url_prefix(self):
+        assert self.index.get_job_ids_by_url_prefix(["https://annofab.com/projects/prj"]) == {"job1", "job2", "job3"}
+        assert self.index.get_job_ids_by_url_prefix([" https://example.com", "https://annofab.com/projects/prj2"]) == {"job2", "job4"}
+        assert self.index.get_job_ids_by_url_prefix(["https://annofab.com/projects/prj3"]) == set()
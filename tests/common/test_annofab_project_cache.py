@@ -0,0 +1,84 @@
+import stat
+from pathlib import Path
+from typing import Any
+
+import requests
+from annofabapi.credentials import IdPass
+
+from annoworkcli.common.annofab_project_cache import AnnofabProjectCache
+
+PROJECTS = {"prj1": {"project_id": "prj1", "title": "Project 1"}}
+FORBIDDEN_PROJECT_ID = "forbidden"
+
+
+class WrapperStub:
+    def __init__(self) -> None:
+        self.requested_project_ids: list[str] = []
+
+    def get_project_or_none(self, project_id: str) -> dict[str, Any] | None:
+        self.requested_project_ids.append(project_id)
+        if project_id == FORBIDDEN_PROJECT_ID:
+            response = requests.Response()
+            response.status_code = 403
+            raise requests.HTTPError(response=response)
+        return PROJECTS.get(project_id)
+
+
+class ApiStub:
+    def __init__(self, user_id: str) -> None:
+        self.endpoint_url = "https://annofab.com"
+        self.credentials = IdPass(user_id, "password")
+
+
+class AnnofabServiceStub:
+    def __init__(self, user_id: str = "alice") -> None:
+        self.api = ApiStub(user_id)
+        self.wrapper = WrapperStub()
+
+
+class TestAnnofabProjectCache:
+    def test_get_projects__有効期限内ならWebAPIを呼び出さない(self, tmp_path: Path):
+        cache = AnnofabProjectCache(tmp_path, ttl_seconds=100, negative_ttl_seconds=10)
+        service: Any = AnnofabServiceStub()
+
+        actual = cache.get_projects(service, ["prj1", "unknown"], now=1000)
+        assert actual == {"prj1": PROJECTS["prj1"], "unknown": None}
+        assert sorted(service.wrapper.requested_project_ids) == ["prj1", "unknown"]
+
+        service.wrapper.requested_project_ids.clear()
+        assert cache.get_projects(service, ["prj1", "unknown"], now=1005) == actual
+        assert service.wrapper.requested_project_ids == []
+
+        (cache_file,) = tmp_path.iterdir()
+        assert stat.S_IMODE(cache_file.stat().st_mode) == 0o600
+
+    def test_get_projects__取得できなかったプロジェクトは短い有効期限で再取得する(self, tmp_path: Path):
+        cache = AnnofabProjectCache(tmp_path, ttl_seconds=100, negative_ttl_seconds=10)
+        service: Any = AnnofabServiceStub()
+        cache.get_projects(service, ["prj1", "unknown"], now=1000)
+        service.wrapper.requested_project_ids.clear()
+
+        cache.get_projects(service, ["prj1", "unknown"], now=1050)
+        assert service.wrapper.requested_project_ids == ["unknown"]
+
+    def test_get_projects__アクセスできないプロジェクトもネガティブキャッシュする(self, tmp_path: Path):
+        cache = AnnofabProjectCache(tmp_path, ttl_seconds=100, negative_ttl_seconds=10)
+        service: Any = AnnofabServiceStub()
+
+        actual = cache.get_projects(service, ["prj1", FORBIDDEN_PROJECT_ID], now=1000)
+        assert actual == {"prj1": PROJECTS["prj1"], FORBIDDEN_PROJECT_ID: None}
+
+        service.wrapper.requested_project_ids.clear()
+        assert cache.get_projects(service, ["prj1", FORBIDDEN_PROJECT_ID], now=1005) == actual
+        assert service.wrapper.requested_project_ids == []
+
+        cache.get_projects(service, ["prj1", FORBIDDEN_PROJECT_ID], now=1050)
+        assert service.wrapper.requested_project_ids == [FORBIDDEN_PROJECT_ID]
+
+    def test_get_projects__ユーザーごとにキャッシュする(self, tmp_path: Path):
+        cache = AnnofabProjectCache(tmp_path)
+        cache.get_projects(AnnofabServiceStub("alice"), ["prj1"], now=1000)  # type: ignore[arg-type]
+
+        bob_service: Any = AnnofabServiceStub("bob")
+        cache.get_projects(bob_service, ["prj1"], now=1000)
+        assert bob_service.wrapper.requested_project_ids == ["prj1"]
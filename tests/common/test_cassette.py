@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import pytest
+import requests
+
+from annoworkcli.common.cassette import CassetteNotFoundError, CassettePlayer, CassetteRecorder, ReplayHTTPAdapter
+
+
+def create_response(method: str, url: str, body: dict | list, status_code: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = "OK"
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(body).encode()
+    response.url = url
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+class TestCassetteRecorder:
+    def test_認証情報は記録しない(self, tmp_path):
+        recorder = CassetteRecorder(tmp_path)
+        recorder.record(create_response("POST", "https://example.com/api/v1/login", {"id_token": "secret", "user_id": "alice"}))
+
+        (cassette_file,) = tmp_path.glob("cassette-*.jsonl.gz")
+        content = gzip.decompress(cassette_file.read_bytes()).decode()
+        assert "secret" not in content
+        assert "alice" in content
+        assert recorder.record_count == 1
+
+
+class TestCassettePlayer:
+    def test_記録された順にレスポンスを返し最後のレスポンスを繰り返す(self, tmp_path):
+        url = "https://example.com/api/v1/my/account"
+        recorder = CassetteRecorder(tmp_path)
+        recorder.record(create_response("GET", url, {"errors": []}, status_code=401))
+        recorder.record(create_response("GET", url, {"user_id": "alice"}))
+
+        session = requests.Session()
+        session.mount("https://", ReplayHTTPAdapter(CassettePlayer(tmp_path)))
+
+        assert session.get(url).status_code == 401
+        assert session.get(url).json() == {"user_id": "alice"}
+        assert session.get(url).json() == {"user_id": "alice"}
+
+    def test_記録されていないリクエストは例外になる(self, tmp_path):
+        CassetteRecorder(tmp_path).record(create_response("GET", "https://example.com/api/v1/jobs", []))
+
+        session = requests.Session()
+        session.mount("https://", ReplayHTTPAdapter(CassettePlayer(tmp_path)))
+        with pytest.raises(CassetteNotFoundError):
+            session.get("https://example.com/api/v1/jobs?job_id=foo")
+
+    def test_カセットがなければ例外になる(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            CassettePlayer(tmp_path)
@@ -38,6 +38,17 @@ class TestResolveRequiredWorkspaceId:
         with pytest.raises(CommandLineArgumentError):
             resolve_required_workspace_id(argparse.Namespace(workspace_id=None))
 
+    def test_複数指定できる引数に1個だけ指定した(self, monkeypatch):
+        monkeypatch.setenv("ANNOWORK_WORKSPACE_ID", "workspace_from_env")
+
+        assert resolve_required_workspace_id(argparse.Namespace(workspace_id=["workspace_from_cli"])) == "workspace_from_cli"
+
+    def test_複数のワークスペースIDが指定されたらエラー(self):
+        with pytest.raises(CommandLineArgumentError):
+            resolve_required_workspace_id(argparse.Namespace(workspace_id=["workspace1", "workspace2"]))
+        with pytest.raises(CommandLineArgumentError):
+            resolve_required_workspace_id(argparse.Namespace(workspace_id=["all"]))
+
 
 def test_add_workspace_id_argument_with_env_fallback():
     parser = argparse.ArgumentParser()
@@ -0,0 +1,57 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from annoworkcli.common.concurrency import flat_map_concurrently, map_concurrently
+
+
+def test_map_concurrently_結果は引数の順番で返す():
+    def func(value: int) -> int:
+        # 後の要素ほど早く終わるようにする
+        time.sleep(0.01 * (5 - value))
+        return value * 2
+
+    assert map_concurrently(func, range(5), max_concurrency=5) == [0, 2, 4, 6, 8]
+
+
+def test_map_concurrently_同時実行数の上限を超えない():
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def func(value: int) -> int:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return value
+
+    map_concurrently(func, range(20), max_concurrency=3)
+    assert 1 < max_in_flight <= 3
+
+
+def test_map_concurrently_同時実行数を指定しなければ逐次的に実行する():
+    thread_ids: set[int] = set()
+
+    def func(value: int) -> int:
+        thread_ids.add(threading.get_ident())
+        return value
+
+    assert map_concurrently(func, range(5)) == [0, 1, 2, 3, 4]
+    assert thread_ids == {threading.get_ident()}
+
+
+def test_flat_map_concurrently():
+    assert flat_map_concurrently(lambda e: [e] * e, [1, 2, 3], max_concurrency=2) == [1, 2, 2, 3, 3, 3]
+
+
+def test_map_concurrently_進捗を表示する場合も結果は引数の順番で返す(caplog: pytest.LogCaptureFixture):
+    with caplog.at_level(logging.DEBUG, logger="annoworkcli.common.progress"):
+        assert map_concurrently(lambda e: e * 2, range(5), max_concurrency=2, progress_description="テスト") == [0, 2, 4, 6, 8]
+
+    assert "progress: description=テスト done=5 total=5 failed=0 in_flight=0" in caplog.text
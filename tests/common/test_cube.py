@@ -0,0 +1,280 @@
+from pathlib import Path
+
+import pytest
+
+from annoworkcli.actual_working_time.list_actual_working_time_weekly import get_weekly_actual_working_hours_df_from_cube
+from annoworkcli.common.cube import WorkingHoursCube
+from annoworkcli.common.weekly import WeekStart
+from annoworkcli.cube.build_cube import create_job_rows, get_build_date_range
+from annoworkcli.schedule_actual.common import get_daily_schedule_actual_df_from_cube
+
+
+def _build_cube(cube: WorkingHoursCube) -> None:
+    cube.replace_dimension(
+        "jobs",
+        [
+            {"job_id": "parent", "job_name": "親ジョブ", "parent_job_id": None, "parent_job_name": None, "annofab_project_id": None},
+            {"job_id": "job1", "job_name": "ジョブ1", "parent_job_id": "parent", "parent_job_name": "親ジョブ", "annofab_project_id": "af1"},
+            {"job_id": "job2", "job_name": "ジョブ2", "parent_job_id": "parent", "parent_job_name": "親ジョブ", "annofab_project_id": None},
+        ],
+    )
+    cube.replace_dimension(
+        "members",
+        [
+            {"workspace_member_id": "m_alice", "user_id": "alice", "username": "Alice", "annofab_account_id": "af_alice"},
+            {"workspace_member_id": "m_bob", "user_id": "bob", "username": "Bob", "annofab_account_id": None},
+        ],
+    )
+    cube.replace_dimension(
+        "tags",
+        [
+            {"workspace_tag_id": "tag_a", "workspace_tag_name": "company:A", "company": "A"},
+            {"workspace_tag_id": "tag_x", "workspace_tag_name": "type:acceptor", "company": None},
+        ],
+    )
+    cube.replace_dimension(
+        "tag_members",
+        [
+            {"workspace_tag_id": "tag_a", "workspace_member_id": "m_alice"},
+            {"workspace_tag_id": "tag_a", "workspace_member_id": "m_bob"},
+            {"workspace_tag_id": "tag_x", "workspace_member_id": "m_bob"},
+        ],
+    )
+    # 2022-03-05(土), 2022-03-06(日), 2022-03-07(月)
+    cube.replace_facts(
+        "actual_daily",
+        [
+            {"date": "2022-03-05", "workspace_member_id": "m_alice", "job_id": "job1", "actual_working_hours": 1.0, "notes": '["備考"]'},
+            {"date": "2022-03-06", "workspace_member_id": "m_alice", "job_id": "job1", "actual_working_hours": 2.0, "notes": None},
+            {"date": "2022-03-07", "workspace_member_id": "m_alice", "job_id": "job1", "actual_working_hours": 3.0, "notes": None},
+            {"date": "2022-03-06", "workspace_member_id": "m_bob", "job_id": "job2", "actual_working_hours": 4.0, "notes": None},
+        ],
+        start_date="2022-03-05",
+        end_date="2022-03-07",
+    )
+    cube.replace_facts(
+        "assigned_daily",
+        [{"date": "2022-03-06", "workspace_member_id": "m_bob", "job_id": "job2", "assigned_working_hours": 5.0}],
+        start_date="2022-03-05",
+        end_date="2022-03-07",
+    )
+    cube.replace_facts(
+        "annofab_daily",
+        [{"date": "2022-03-05", "annofab_project_id": "af1", "annofab_account_id": "af_alice", "annofab_working_hours": 0.5}],
+        start_date="2022-03-05",
+        end_date="2022-03-07",
+    )
+    cube.update_date_range(start_date="2022-03-05", end_date="2022-03-07")
+    cube.refresh_aggregates(week_start=WeekStart.SUNDAY)
+
+
+@pytest.fixture
+def cube(tmp_path: Path):
+    with WorkingHoursCube.open(tmp_path / "cube.sqlite", is_create=True) as cube:
+        _build_cube(cube)
+        yield cube
+
+
+def test_open__ファイルが存在しない場合はis_createがFalseなら例外を発生させる(tmp_path: Path):
+    with pytest.raises(FileNotFoundError):  # noqa: SIM117
+        with WorkingHoursCube.open(tmp_path / "not_exists.sqlite"):
+            pass
+
+
+def test_cube_daily(cube: WorkingHoursCube):
+    df = cube.read_sql("SELECT * FROM cube_daily WHERE date = '2022-03-05'")
+    assert df.to_dict("records") == [
+        {
+            "date": "2022-03-05",
+            "workspace_member_id": "m_alice",
+            "job_id": "job1",
+            "actual_working_hours": 1.0,
+            "assigned_working_hours": 0.0,
+            "annofab_working_hours": 0.5,
+        }
+    ]
+
+
+def test_cube_daily_parent_job(cube: WorkingHoursCube):
+    df = cube.read_actual_hours_by_parent_job(parent_job_ids=["parent"], start_date="2022-03-06")
+    assert df.to_dict("records") == [
+        {"parent_job_id": "parent", "date": "2022-03-06", "actual_working_hours": 6.0},
+        {"parent_job_id": "parent", "date": "2022-03-07", "actual_working_hours": 3.0},
+    ]
+
+
+def test_read_actual_daily(cube: WorkingHoursCube):
+    df = cube.read_actual_daily(start_date="2022-03-05", end_date="2022-03-05")
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["parent_job_id"] == "parent"
+    assert row["user_id"] == "alice"
+    assert row["notes"] == ["備考"]
+
+    df = cube.read_actual_daily(user_ids=["bob"])
+    assert df["actual_working_hours"].tolist() == [4.0]
+
+
+def test_read_actual_weekly(cube: WorkingHoursCube):
+    df = cube.read_actual_weekly(user_ids=["alice"])
+    assert df[["start_date", "end_date", "actual_working_hours"]].to_dict("records") == [
+        {"start_date": "2022-02-27", "end_date": "2022-03-05", "actual_working_hours": 1.0},
+        {"start_date": "2022-03-06", "end_date": "2022-03-12", "actual_working_hours": 5.0},
+    ]
+
+
+def test_get_weekly_actual_working_hours_df_from_cube__キューブと異なる週の始まりの曜日を指定する(cube: WorkingHoursCube):
+    df = get_weekly_actual_working_hours_df_from_cube(cube, week_start=WeekStart.MONDAY, user_ids=["alice"])
+    assert df[["start_date", "end_date", "actual_working_hours"]].to_dict("records") == [
+        {"start_date": "2022-02-28", "end_date": "2022-03-06", "actual_working_hours": 3.0},
+        {"start_date": "2022-03-07", "end_date": "2022-03-13", "actual_working_hours": 3.0},
+    ]
+
+
+def test_read_actual_daily_groupby_tag(cube: WorkingHoursCube):
+    actual = cube.read_actual_daily_groupby_tag(start_date="2022-03-06", end_date="2022-03-06")
+    actual_hours = {e["job_id"]: e["actual_working_hours"] for e in actual}
+    assert actual_hours == {
+        "job1": {"company:A": 2.0, "total": 2.0},
+        "job2": {"company:A": 4.0, "type:acceptor": 4.0, "total": 4.0},
+    }
+
+    # user_idを指定した場合は、集計済みのテーブルを参照せずに集計する
+    actual = cube.read_actual_daily_groupby_tag(
+        start_date="2022-03-06", end_date="2022-03-06", user_ids=["bob"], workspace_tag_names=["type:acceptor"]
+    )
+    assert [e["actual_working_hours"] for e in actual] == [{"type:acceptor": 4.0, "total": 4.0}]
+
+
+def test_replace_facts__指定した期間のデータだけ差し替える(cube: WorkingHoursCube):
+    cube.replace_facts(
+        "actual_daily",
+        [{"date": "2022-03-07", "workspace_member_id": "m_alice", "job_id": "job1", "actual_working_hours": 10.0, "notes": None}],
+        start_date="2022-03-07",
+        end_date="2022-03-08",
+    )
+    cube.update_date_range(start_date="2022-03-07", end_date="2022-03-08")
+    cube.refresh_aggregates()
+
+    assert cube.get_date_range() == ("2022-03-05", "2022-03-08")
+    df = cube.read_actual_daily(user_ids=["alice"])
+    assert df["actual_working_hours"].tolist() == [1.0, 2.0, 10.0]
+
+
+def test_refresh_aggregates__指定した期間の集計結果だけ作り直す(cube: WorkingHoursCube):
+    # 集計済みのテーブルを作り直す期間外のデータは、集計結果に反映されない
+    cube.connection.execute("UPDATE actual_daily SET actual_working_hours = 100 WHERE date = '2022-03-05'")
+    cube.connection.execute("UPDATE actual_daily SET actual_working_hours = 30 WHERE date = '2022-03-07'")
+    cube.refresh_aggregates(start_date="2022-03-07", end_date="2022-03-07", week_start=WeekStart.SUNDAY)
+
+    df = cube.read_sql("SELECT date, actual_working_hours FROM cube_daily WHERE workspace_member_id = 'm_alice' ORDER BY date")
+    assert df["actual_working_hours"].tolist() == [1.0, 2.0, 30.0]
+    # 週ごとの集計結果は、期間を含む週の行が作り直される
+    df = cube.read_actual_weekly(user_ids=["alice"])
+    assert df["actual_working_hours"].tolist() == [1.0, 32.0]
+    df = cube.read_sql("SELECT SUM(actual_working_hours) AS hours FROM cube_daily_tag WHERE workspace_tag_id = 'tag_a'")
+    assert df["hours"].tolist() == [37.0]
+
+
+def test_refresh_aggregates__ワークスペースタグのメンバが変わった場合はすべての期間の集計結果を作り直す(cube: WorkingHoursCube):
+    assert not cube.replace_dimension(
+        "tag_members",
+        [
+            {"workspace_tag_id": "tag_a", "workspace_member_id": "m_alice"},
+            {"workspace_tag_id": "tag_a", "workspace_member_id": "m_bob"},
+            {"workspace_tag_id": "tag_x", "workspace_member_id": "m_bob"},
+        ],
+    )
+    assert cube.replace_dimension("tag_members", [{"workspace_tag_id": "tag_x", "workspace_member_id": "m_alice"}])
+    cube.refresh_aggregates(start_date="2022-03-07", end_date="2022-03-07", week_start=WeekStart.SUNDAY, is_dimension_changed=True)
+
+    df = cube.read_sql("SELECT workspace_tag_id, SUM(actual_working_hours) AS hours FROM cube_daily_tag GROUP BY workspace_tag_id")
+    assert df.to_dict("records") == [{"workspace_tag_id": "tag_x", "hours": 6.0}]
+
+
+def test_read_actual_daily_by_job(cube: WorkingHoursCube):
+    df = cube.read_actual_daily_by_job(start_date="2022-03-06", end_date="2022-03-06")
+    assert df[["job_id", "parent_job_id", "actual_working_hours", "active_user_count"]].to_dict("records") == [
+        {"job_id": "job1", "parent_job_id": "parent", "actual_working_hours": 2.0, "active_user_count": 1},
+        {"job_id": "job2", "parent_job_id": "parent", "actual_working_hours": 4.0, "active_user_count": 1},
+    ]
+
+
+def test_read_working_hours_daily(cube: WorkingHoursCube):
+    df = cube.read_working_hours_daily(start_date="2022-03-05", end_date="2022-03-05")
+    assert df.to_dict("records") == [
+        {
+            "date": "2022-03-05",
+            "parent_job_id": "parent",
+            "parent_job_name": "親ジョブ",
+            "job_id": "job1",
+            "job_name": "ジョブ1",
+            "workspace_member_id": "m_alice",
+            "user_id": "alice",
+            "username": "Alice",
+            "actual_working_hours": 1.0,
+            "annofab_project_id": "af1",
+            "annofab_project_title": None,
+            "annofab_account_id": "af_alice",
+            "annofab_working_hours": 0.5,
+            "notes": ["備考"],
+        }
+    ]
+
+
+def test_read_assigned_daily_and_read_user_company(cube: WorkingHoursCube):
+    df = cube.read_assigned_daily(job_ids=["job2"])
+    assert df[["date", "job_id", "user_id", "assigned_working_hours"]].to_dict("records") == [
+        {"date": "2022-03-06", "job_id": "job2", "user_id": "bob", "assigned_working_hours": 5.0}
+    ]
+    assert cube.read_user_company().to_dict("records") == [
+        {"user_id": "alice", "username": "Alice", "company": "A"},
+        {"user_id": "bob", "username": "Bob", "company": "A"},
+    ]
+
+
+def test_get_daily_schedule_actual_df_from_cube(cube: WorkingHoursCube):
+    df = get_daily_schedule_actual_df_from_cube(
+        cube, parent_job_ids=["parent"], start_date="2022-03-05", end_date="2022-03-07", timezone_offset_hours=9
+    )
+    assert df["actual_working_hours"].tolist() == [1.0, 6.0, 3.0]
+    assert df["cumulative_working_hours"].tolist() == [1.0, 7.0, 10.0]
+
+    df = get_daily_schedule_actual_df_from_cube(cube, parent_job_ids=["all"], start_date="2022-03-06", end_date="2022-03-06", timezone_offset_hours=9)
+    assert df[["parent_job_id", "parent_job_name", "date", "actual_working_hours"]].to_dict("records") == [
+        {"parent_job_id": "parent", "parent_job_name": "親ジョブ", "date": "2022-03-06", "actual_working_hours": 6.0}
+    ]
+
+
+def test_get_build_date_range(cube: WorkingHoursCube):
+    assert get_build_date_range(cube, start_date=None, end_date="2022-03-07", refresh_days=1, timezone_offset_hours=9) == (
+        "2022-03-06",
+        "2022-03-07",
+    )
+    # キューブの開始日より前の日付から取得し直すことはない
+    assert get_build_date_range(cube, start_date=None, end_date="2022-03-07", refresh_days=7, timezone_offset_hours=9) == (
+        "2022-03-05",
+        "2022-03-07",
+    )
+
+
+def test_create_job_rows():
+    all_jobs = [
+        {"job_id": "parent", "job_name": "親ジョブ", "job_tree": "org/parent", "status": "unarchived", "external_linkage_info": {}},
+        {
+            "job_id": "job1",
+            "job_name": "ジョブ1",
+            "job_tree": "org/parent/job1",
+            "status": "unarchived",
+            "external_linkage_info": {"url": "https://annofab.com/projects/af1"},
+        },
+    ]
+    actual = create_job_rows(all_jobs)
+    assert actual[1] == {
+        "job_id": "job1",
+        "job_name": "ジョブ1",
+        "parent_job_id": "parent",
+        "parent_job_name": "親ジョブ",
+        "status": "unarchived",
+        "annofab_project_id": "af1",
+    }
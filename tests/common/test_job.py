@@ -0,0 +1,39 @@
+from typing import Any
+
+from annoworkcli.common.job import get_all_jobs, get_job_snapshot
+
+JOBS = [
+    {"job_id": "job1", "job_tree": "org/parent1/job1", "external_linkage_info": {"url": "https://annofab.com/projects/prj1"}},
+]
+
+
+class ApiStub:
+    def __init__(self) -> None:
+        self.request_count = 0
+
+    def get_jobs(self, workspace_id: str) -> list[dict[str, Any]]:  # noqa: ARG002
+        self.request_count += 1
+        return JOBS
+
+
+class AnnoworkServiceStub:
+    def __init__(self) -> None:
+        self.api = ApiStub()
+
+
+def test_get_job_snapshot__同じワークスペースのジョブは1回だけ取得する():
+    annowork_service: Any = AnnoworkServiceStub()
+
+    snapshot = get_job_snapshot(annowork_service, "org")
+    assert get_job_snapshot(annowork_service, "org") is snapshot
+    assert get_all_jobs(annowork_service, "org") == JOBS
+    assert annowork_service.api.request_count == 1
+    assert snapshot.annofab_linkage_index.get_job_ids(["prj1"]) == ["job1"]
+
+    get_job_snapshot(annowork_service, "org2")
+    assert annowork_service.api.request_count == 2
+
+    # 別のインスタンスはキャッシュを共有しない
+    other_service: Any = AnnoworkServiceStub()
+    get_job_snapshot(other_service, "org")
+    assert other_service.api.request_count == 1
@@ -0,0 +1,57 @@
+import json
+import pstats
+
+import requests
+
+from annoworkcli.common.concurrency import map_concurrently
+from annoworkcli.common.metrics import get_metrics_recorder, phase, profile_and_measure, record_response_hook
+
+
+def create_response(url: str, content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.url = url
+    response._content = content
+    return response
+
+
+def test_profile_and_measure(tmp_path, capsys):
+    profile_output = tmp_path / "profile.pstats"
+    with profile_and_measure(profile_output=profile_output, is_output_metrics=True):
+        with phase("fetch"):
+            record_response_hook(create_response("https://annowork.com/api/v1/jobs", b"[1,2,3]"))
+            record_response_hook(create_response("https://annowork.com/api/v1/jobs", b"[]"))
+        with phase("fetch"):
+            pass
+        with phase("write"):
+            _ = [0] * 100000
+
+    summary = json.loads(capsys.readouterr().err)
+    assert summary["phases"]["fetch"]["count"] == 2
+    assert set(summary["phases"]) == {"fetch", "write"}
+    assert summary["apis"] == {"annowork.com": {"call_count": 2, "response_bytes": 9}}
+    assert summary["peak_memory_bytes"] > 0
+
+    # pstatsで読み込める
+    pstats.Stats(str(profile_output))
+
+
+def test_profile_and_measure_計測情報を出力しない(capsys):
+    with profile_and_measure(profile_output=None, is_output_metrics=False), phase("fetch"):
+        pass
+
+    assert capsys.readouterr().err == ""
+    assert "fetch" in get_metrics_recorder().phases
+
+
+def _fetch_in_worker_thread(value: int) -> int:
+    return value * 2
+
+
+def test_profile_and_measure_ワーカースレッドの処理もプロファイリングする(tmp_path):
+    profile_output = tmp_path / "profile.pstats"
+    with profile_and_measure(profile_output=profile_output, is_output_metrics=False):
+        assert map_concurrently(_fetch_in_worker_thread, range(10), max_concurrency=2) == [e * 2 for e in range(10)]
+
+    stats = pstats.Stats(str(profile_output))
+    call_counts = [value[1] for (_, _, function_name), value in stats.stats.items() if function_name == "_fetch_in_worker_thread"]  # type: ignore[attr-defined]
+    assert call_counts == [10]
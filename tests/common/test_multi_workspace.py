@@ -0,0 +1,35 @@
+import argparse
+import json
+from pathlib import Path
+
+from annoworkcli.common.multi_workspace import is_multi_workspace, merge_csv_files, merge_json_files
+
+
+def test_is_multi_workspace():
+    assert is_multi_workspace(argparse.Namespace(workspace_id=["ws1", "ws2"]))
+    assert is_multi_workspace(argparse.Namespace(workspace_id=["all"]))
+    assert not is_multi_workspace(argparse.Namespace(workspace_id=["ws1"]))
+    assert not is_multi_workspace(argparse.Namespace(workspace_id="ws1"))
+    assert not is_multi_workspace(argparse.Namespace())
+
+
+def test_merge_csv_files(tmp_path: Path):
+    (tmp_path / "ws1.csv").write_text("job_id,hours\njob1,1.50\n", encoding="utf_8_sig")
+    (tmp_path / "ws2.csv").write_text("job_id,hours\njob2,\n", encoding="utf_8_sig")
+
+    df = merge_csv_files({"ws1": tmp_path / "ws1.csv", "ws2": tmp_path / "ws2.csv"})
+
+    # 値の表現は変わらない
+    assert df.to_dict("records") == [
+        {"workspace_id": "ws1", "job_id": "job1", "hours": "1.50"},
+        {"workspace_id": "ws2", "job_id": "job2", "hours": ""},
+    ]
+
+
+def test_merge_json_files(tmp_path: Path):
+    (tmp_path / "ws1.json").write_text(json.dumps([{"job_id": "job1"}]))
+    (tmp_path / "ws2.json").write_text(json.dumps([]))
+
+    actual = merge_json_files({"ws1": tmp_path / "ws1.json", "ws2": tmp_path / "ws2.json"})
+
+    assert actual == [{"workspace_id": "ws1", "job_id": "job1"}]
@@ -0,0 +1,72 @@
+import io
+import logging
+
+import pytest
+
+from annoworkcli.common.progress import LOG_INTERVAL_SECONDS, Progress, clear_progress_line, track_progress
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_snapshot__処理速度と残り時間を算出する():
+    clock = FakeClock()
+    progress = Progress("テスト", total=10, stream=io.StringIO(), is_tty=False, clock=clock)
+    clock.now = 2.0
+    progress.advance(4)
+    progress.record_failure()
+
+    snapshot = progress.snapshot()
+    assert (snapshot.done, snapshot.failed, snapshot.in_flight) == (4, 1, 0)
+    assert snapshot.items_per_second == 2.0
+    assert snapshot.eta_seconds == 3.0
+
+
+def test_track_item__例外が発生した場合は失敗した件数として数える():
+    progress = Progress("テスト", total=2, stream=io.StringIO(), is_tty=False)
+    with progress.track_item():
+        assert progress.snapshot().in_flight == 1
+    with pytest.raises(RuntimeError), progress.track_item():
+        raise RuntimeError
+
+    snapshot = progress.snapshot()
+    assert (snapshot.done, snapshot.failed, snapshot.in_flight) == (2, 1, 0)
+
+
+def test_advance__端末でない場合は一定間隔でログに出力する(caplog: pytest.LogCaptureFixture):
+    clock = FakeClock()
+    progress = Progress("テスト", total=100, stream=io.StringIO(), is_tty=False, clock=clock)
+    with caplog.at_level(logging.INFO, logger="annoworkcli.common.progress"):
+        progress.advance()
+        clock.now = LOG_INTERVAL_SECONDS
+        progress.advance()
+        progress.advance()
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage() == (
+        "progress: description=テスト done=2 total=100 failed=0 in_flight=0 retries=0 items_per_second=0.20 elapsed_seconds=10 eta_seconds=490"
+    )
+
+
+def test_advance__端末の場合は1行を更新し続ける():
+    clock = FakeClock()
+    stream = io.StringIO()
+    with track_progress("テスト", total=4, stream=stream, is_tty=True, clock=clock) as progress:
+        # 表示し始めるまでの時間が経つまでは表示しない
+        progress.advance()
+        assert stream.getvalue() == ""
+        clock.now = 2.0
+        progress.advance()
+        assert stream.getvalue() == "\r\x1b[Kテスト: 2/4 件 (50%) 1.0 件/秒 経過 0:02 残り 0:02"
+        # 確認メッセージを表示する前に行を消す
+        clear_progress_line()
+        assert stream.getvalue().endswith("\r\x1b[K")
+        clock.now = 4.0
+        progress.advance(2)
+
+    assert stream.getvalue().endswith("\r\x1b[Kテスト: 4/4 件 (100%) 1.0 件/秒 経過 0:04 残り 0:00\n")
@@ -0,0 +1,79 @@
+import gzip
+import json
+from pathlib import Path
+
+import pandas
+import pytest
+
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.reader import RowFilter, iter_input_file, read_input_file
+
+DTYPES = {"date": "string", "user_id": "string", "job_id": "string", "hours": "float64"}
+
+RECORDS = [
+    {"date": "2022-01-01", "user_id": "alice", "job_id": "001", "hours": 1.0, "notes": "x"},
+    {"date": "2022-01-02", "user_id": "bob", "job_id": "002", "hours": 2.0, "notes": None},
+    {"date": "2022-01-03", "user_id": "alice", "job_id": "003", "hours": 3.0, "notes": None},
+]
+
+
+def test_read_input_file__csv(tmp_path: Path):
+    input_file = tmp_path / "input.csv"
+    pandas.DataFrame(RECORDS).to_csv(input_file, index=False, encoding="utf_8_sig")
+
+    df = read_input_file(input_file, dtypes=DTYPES)
+
+    # dtypesに含まれない列は読み込まない。IDは数値に変換されない
+    assert list(df.columns) == ["date", "user_id", "job_id", "hours"]
+    assert df["job_id"].tolist() == ["001", "002", "003"]
+    assert df.dtypes.to_dict() == {"date": "string", "user_id": "string", "job_id": "string", "hours": "float64"}
+
+
+def test_read_input_file__チャンクごとに絞り込む(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    input_file = tmp_path / "input.csv.gz"
+    with gzip.open(input_file, "wt", encoding="utf_8") as f:
+        pandas.DataFrame(RECORDS).to_csv(f, index=False)
+
+    # pyarrowがインストールされていても、chunk_sizeを指定すれば1行ずつ読み込む
+    monkeypatch.setattr("annoworkcli.common.reader._is_pyarrow_installed", lambda: True)
+    row_filter = RowFilter(start_date="2022-01-02", user_ids=["alice"])
+    chunks = list(iter_input_file(input_file, dtypes=DTYPES, row_filter=row_filter, chunk_size=1))
+    assert [len(e) for e in chunks] == [0, 0, 1]
+    monkeypatch.undo()
+
+    chunks = list(iter_input_file(input_file, dtypes=DTYPES, row_filter=row_filter, chunk_size=None))
+    assert [len(e) for e in chunks] == [1]
+
+    df = read_input_file(input_file, dtypes=DTYPES, columns=["date", "hours"], row_filter=row_filter, chunk_size=1)
+    assert df.to_dict("records") == [{"date": "2022-01-03", "hours": 3.0}]
+
+
+def test_read_input_file__json(tmp_path: Path):
+    input_file = tmp_path / "input.json"
+    input_file.write_text(json.dumps(RECORDS), encoding="utf-8")
+
+    df = read_input_file(input_file, dtypes={**DTYPES, "notes": "object"}, row_filter=RowFilter(end_date="2022-01-01"))
+    assert df.to_dict("records") == [{"date": "2022-01-01", "user_id": "alice", "job_id": "001", "hours": 1.0, "notes": "x"}]
+
+
+def test_read_input_file__json_lines(tmp_path: Path):
+    input_file = tmp_path / "input.jsonl"
+    input_file.write_text("\n".join(json.dumps(e) for e in RECORDS), encoding="utf-8")
+
+    df = read_input_file(input_file, dtypes=DTYPES, row_filter=RowFilter(user_ids=["bob"]), chunk_size=2)
+    assert df["job_id"].tolist() == ["002"]
+    assert df["date"].tolist() == ["2022-01-02"]
+
+
+def test_read_input_file__存在しない列は空の列として追加する(tmp_path: Path):
+    input_file = tmp_path / "input.csv"
+    input_file.write_text("date,hours\n2022-01-01,1\n", encoding="utf-8")
+
+    df = read_input_file(input_file, dtypes=DTYPES)
+    assert df["user_id"].isna().all()
+    assert df["user_id"].dtype == "string"
+
+
+def test_read_input_file__サポート対象外の拡張子(tmp_path: Path):
+    with pytest.raises(CommandLineArgumentError):
+        read_input_file(tmp_path / "input.xlsx", dtypes=DTYPES)
@@ -0,0 +1,140 @@
+import json
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from annoworkcli.__main__ import main
+from annoworkcli.common.cube import WorkingHoursCube
+from annoworkcli.common.exeptions import AnnoworkCliException
+from annoworkcli.common.snapshot_diff import (
+    ChangeType,
+    CubeDiffSource,
+    SnapshotDiffSource,
+    diff_sorted_rows,
+    diff_sources,
+    get_row_hash,
+    open_diff_source,
+    sort_keyed_rows,
+)
+from annoworkcli.common.workspace_snapshot import TABLE_NAMES, TableFormat, write_snapshot
+
+
+def _keyed(rows: list[dict[str, Any]], key_column: str) -> Any:  # noqa: ANN401
+    return iter([((row[key_column],), row) for row in rows])
+
+
+def test_get_row_hash_列の順番に依存しない():
+    assert get_row_hash({"a": 1, "b": "x"}) == get_row_hash({"b": "x", "a": 1})
+    assert get_row_hash({"a": 1, "b": "x"}) != get_row_hash({"a": 2, "b": "x"})
+
+
+def test_diff_sorted_rows_追加更新削除を返す():
+    old_rows = [{"id": "a", "v": 1}, {"id": "b", "v": 1}, {"id": "c", "v": 1}]
+    new_rows = [{"id": "b", "v": 2}, {"id": "c", "v": 1}, {"id": "d", "v": 1}]
+    actual = list(diff_sorted_rows("t", _keyed(old_rows, "id"), _keyed(new_rows, "id")))
+    assert [(e.change_type, e.key) for e in actual] == [
+        (ChangeType.DELETE, ("a",)),
+        (ChangeType.UPDATE, ("b",)),
+        (ChangeType.INSERT, ("d",)),
+    ]
+    assert actual[1].changed_columns == ["v"]
+    assert actual[0].new_hash is None
+    assert actual[2].old_hash is None
+
+
+def test_diff_sorted_rows_キーの順に並んでいない場合は例外を発生させる():
+    old_rows = [{"id": "b"}, {"id": "a"}]
+    with pytest.raises(AnnoworkCliException):
+        list(diff_sorted_rows("t", _keyed(old_rows, "id"), _keyed([], "id")))
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_sort_keyed_rows_一時ファイルに書き出してもキーの昇順に並べ替える(chunk_size: int):
+    rows = [{"id": f"{i:02d}", "value": [i]} for i in [5, 3, 9, 1, 7, 2, 8]]
+    actual = list(sort_keyed_rows(_keyed(rows, "id"), chunk_size=chunk_size))
+    assert [key for key, _ in actual] == [("01",), ("02",), ("03",), ("05",), ("07",), ("08",), ("09",)]
+    assert actual[0][1] == {"id": "01", "value": [1]}
+
+
+def test_diff_sources_スナップショットの差分を求める(tmp_path: Path):
+    def create_snapshot(file: Path, actual_working_times: list[dict[str, Any]]) -> None:
+        tables: dict[str, list[dict[str, Any]]] = {table_name: [] for table_name in TABLE_NAMES}
+        tables["actual_working_times"] = actual_working_times
+        write_snapshot(file, {"workspace_id": "org"}, tables, table_format=TableFormat.JSONL)
+
+    old_file = tmp_path / "old.zip"
+    new_file = tmp_path / "new.zip"
+    # スナップショットの行はキーの順に並んでいない
+    create_snapshot(old_file, [{"actual_working_time_id": "a2", "hours": 1}, {"actual_working_time_id": "a1", "hours": 1}])
+    create_snapshot(new_file, [{"actual_working_time_id": "a3", "hours": 1}, {"actual_working_time_id": "a1", "hours": 2}])
+
+    with ExitStack() as stack:
+        old_source = open_diff_source(old_file, stack)
+        new_source = open_diff_source(new_file, stack)
+        assert isinstance(old_source, SnapshotDiffSource)
+        actual = [e.to_dict() for e in diff_sources(old_source, new_source)]
+
+    assert [(e["table_name"], e["change_type"], e["key"], e["changed_columns"]) for e in actual] == [
+        ("actual_working_times", "update", "a1", ["hours"]),
+        ("actual_working_times", "delete", "a2", []),
+        ("actual_working_times", "insert", "a3", []),
+    ]
+
+
+def test_diff_sources_キューブの差分を主キーの順に求める(tmp_path: Path):
+    def create_cube(file: Path, rows: list[dict[str, Any]]) -> None:
+        with WorkingHoursCube.open(file, is_create=True) as cube:
+            cube.replace_facts("expected_daily", rows, start_date="2022-01-01", end_date="2022-01-31")
+
+    old_file = tmp_path / "old.sqlite"
+    new_file = tmp_path / "new.sqlite"
+    create_cube(
+        old_file,
+        [
+            {"date": "2022-01-01", "workspace_member_id": "m1", "expected_working_hours": 8},
+            {"date": "2022-01-02", "workspace_member_id": "m1", "expected_working_hours": 8},
+        ],
+    )
+    create_cube(new_file, [{"date": "2022-01-01", "workspace_member_id": "m1", "expected_working_hours": 6}])
+
+    with ExitStack() as stack:
+        old_source = open_diff_source(old_file, stack)
+        new_source = open_diff_source(new_file, stack)
+        assert isinstance(old_source, CubeDiffSource)
+        actual = [e.to_dict() for e in diff_sources(old_source, new_source, table_names=["expected_daily"])]
+
+    assert [(e["change_type"], e["key"], e["changed_columns"]) for e in actual] == [
+        ("update", "2022-01-01,m1", ["expected_working_hours"]),
+        ("delete", "2022-01-02,m1", []),
+    ]
+
+
+def test_workspace_diff_差分を1行ずつ出力する(tmp_path: Path):
+    def create_snapshot(file: Path, actual_working_times: list[dict[str, Any]]) -> None:
+        tables: dict[str, list[dict[str, Any]]] = {table_name: [] for table_name in TABLE_NAMES}
+        tables["actual_working_times"] = actual_working_times
+        write_snapshot(file, {"workspace_id": "org"}, tables, table_format=TableFormat.JSONL)
+
+    old_file = tmp_path / "old.zip"
+    new_file = tmp_path / "new.zip"
+    create_snapshot(old_file, [{"actual_working_time_id": "a1", "hours": 1}, {"actual_working_time_id": "a2", "hours": 1}])
+    create_snapshot(new_file, [{"actual_working_time_id": "a1", "hours": 2}, {"actual_working_time_id": "a3", "hours": 1}])
+
+    common_args = ["workspace", "diff", "--old_file", str(old_file), "--new_file", str(new_file)]
+    main([*common_args, "--output", str(tmp_path / "out.csv")])
+    assert (tmp_path / "out.csv").read_text(encoding="utf_8_sig").splitlines()[:2] == [
+        "table_name,change_type,key,changed_columns,old_hash,new_hash",
+        f"actual_working_times,update,a1,hours,{get_row_hash({'actual_working_time_id': 'a1', 'hours': 1})},"
+        f"{get_row_hash({'actual_working_time_id': 'a1', 'hours': 2})}",
+    ]
+
+    main([*common_args, "--format", "jsonl", "--output", str(tmp_path / "out.jsonl")])
+    with (tmp_path / "out.jsonl").open(encoding="utf_8") as f:
+        actual = [json.loads(line) for line in f]
+    assert [(e["change_type"], e["key"], e["changed_columns"]) for e in actual] == [
+        ("update", "a1", ["hours"]),
+        ("delete", "a2", []),
+        ("insert", "a3", []),
+    ]
@@ -0,0 +1,79 @@
+import base64
+import json
+import stat
+import time
+
+import annofabapi
+import annoworkapi
+from annofabapi.credentials import IdPass, Tokens
+
+from annoworkcli.common.token_cache import TokenCache, get_jwt_expiration, is_token_expired
+
+
+def create_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+def test_get_jwt_expiration():
+    assert get_jwt_expiration(create_jwt(1700000000)) == 1700000000
+    assert get_jwt_expiration("not-jwt") is None
+
+
+def test_is_token_expired():
+    now = time.time()
+    assert is_token_expired(create_jwt(now - 10), now=now)
+    assert not is_token_expired(create_jwt(now + 3600), now=now)
+    # 有効期限が分からない場合は期限切れとみなさない
+    assert not is_token_expired("not-jwt", now=now)
+
+
+class TestTokenCache:
+    def test_saveしたトークンをloadできる(self, tmp_path):
+        cache = TokenCache(tmp_path / "tokens")
+        cache.save("annowork", "https://example.com", "alice", {"id_token": "foo"})
+
+        assert cache.load("annowork", "https://example.com", "alice") == {"id_token": "foo"}
+        assert cache.load("annowork", "https://example.com", "bob") is None
+        assert cache.load("annowork", "https://localhost", "alice") is None
+
+        (cache_file,) = (tmp_path / "tokens").iterdir()
+        assert stat.S_IMODE(cache_file.stat().st_mode) == 0o600
+        assert "alice" not in cache_file.name
+
+    def test_apply_to_annoworkapi_有効なトークンを再利用する(self, tmp_path):
+        cache = TokenCache(tmp_path)
+        id_token = create_jwt(time.time() + 3600)
+        api = annoworkapi.AnnoworkApi("alice", "password", endpoint_url="https://example.com")
+        cache.save("annowork", api.base_url, "alice", {"id_token": id_token})
+
+        cache.apply_to_annoworkapi(api)
+        assert api.token_dict == {"id_token": id_token}
+
+    def test_apply_to_annoworkapi_期限切れのトークンは利用せずログイン時に保存する(self, tmp_path):
+        cache = TokenCache(tmp_path)
+        api = annoworkapi.AnnoworkApi("alice", "password", endpoint_url="https://example.com")
+        cache.save("annowork", api.base_url, "alice", {"id_token": create_jwt(time.time() - 10)})
+        new_token_dict = {"id_token": create_jwt(time.time() + 3600)}
+        api.login = lambda: new_token_dict
+
+        cache.apply_to_annoworkapi(api)
+        assert api.token_dict is None
+
+        api.login()
+        assert cache.load("annowork", api.base_url, "alice") == new_token_dict
+
+    def test_apply_to_annofabapi_期限切れならトークンを再発行する(self, tmp_path):
+        cache = TokenCache(tmp_path)
+        api = annofabapi.AnnofabApi(IdPass("alice", "password"), endpoint_url="https://example.com")
+        cache.save("annofab", "https://example.com", "alice", {"id_token": create_jwt(time.time() - 10), "access_token": "a", "refresh_token": "r"})
+        refreshed_tokens = Tokens(id_token=create_jwt(time.time() + 3600), access_token="a2", refresh_token="r2")
+
+        def refresh_token() -> None:
+            api.tokens = refreshed_tokens
+
+        api.refresh_token = refresh_token  # type: ignore[method-assign]
+
+        cache.apply_to_annofabapi(api)
+        assert api.tokens == refreshed_tokens
+        assert cache.load("annofab", "https://example.com", "alice") == refreshed_tokens.to_dict()
@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+from annoworkcli.common.trace import SPAN_KIND_CLIENT, SPAN_KIND_INTERNAL, TraceRecorder, get_endpoint_template
+from annoworkcli.trace.summarize_trace import Span, get_critical_path, read_spans, summarize_endpoints
+
+
+def _span(span_id: str, parent_span_id: str | None, name: str, start: float, end: float, *, kind: str = SPAN_KIND_INTERNAL) -> Span:
+    return Span(
+        span_id=span_id,
+        parent_span_id=parent_span_id,
+        name=name,
+        kind=kind,
+        start_time_unix_nano=int(start * 1e9),
+        end_time_unix_nano=int(end * 1e9),
+        attributes={},
+        is_error=False,
+    )
+
+
+def test_get_endpoint_template():
+    assert get_endpoint_template("/api/v1/workspaces/org/jobs/job1") == "/api/v1/workspaces/{id}/jobs/{id}"
+    assert get_endpoint_template("/api/v1/workspaces/org/jobs") == "/api/v1/workspaces/{id}/jobs"
+    assert get_endpoint_template("/api/v1/projects/p1/statistics/accounts/daily") == "/api/v1/projects/{id}/statistics/accounts/daily"
+
+
+def test_TraceRecorder_親スパンの中で記録したスパンは子スパンになる(tmp_path: Path):
+    trace_file = tmp_path / "trace.jsonl"
+    recorder = TraceRecorder(trace_file)
+    with recorder.span("root"), recorder.span("child"):
+        pass
+    recorder.close()
+
+    spans = {e.name: e for e in read_spans(trace_file)}
+    assert recorder.span_count == 2
+    assert spans["root"].parent_span_id is None
+    assert spans["child"].parent_span_id == spans["root"].span_id
+
+
+def test_read_spans_読み込めない行は無視する(tmp_path: Path):
+    trace_file = tmp_path / "trace.jsonl"
+    span = {"spanId": "a", "parentSpanId": None, "name": "root", "startTimeUnixNano": 0, "endTimeUnixNano": 1}
+    trace_file.write_text(json.dumps(span) + "\n" + '{"spanId": "b", "na', encoding="utf-8")
+    assert [e.name for e in read_spans(trace_file)] == ["root"]
+
+
+def test_summarize_endpoints_合計時間の降順に並ぶ():
+    spans = [
+        _span("a", None, "GET /jobs", 0, 1, kind=SPAN_KIND_CLIENT),
+        _span("b", None, "GET /jobs", 1, 2, kind=SPAN_KIND_CLIENT),
+        _span("c", None, "GET /members", 0, 3, kind=SPAN_KIND_CLIENT),
+        _span("d", None, "fetch_jobs", 0, 10),
+    ]
+    actual = summarize_endpoints(spans)
+    assert [e["endpoint"] for e in actual] == ["GET /members", "GET /jobs"]
+    assert actual[1]["count"] == 2
+    assert actual[1]["total_seconds"] == 2
+    assert actual[1]["mean_seconds"] == 1
+
+
+def test_get_critical_path_並行して実行したスパンのうち最も遅く終わったスパンを選ぶ():
+    spans = [
+        _span("root", None, "root", 0, 10),
+        _span("phase1", "root", "phase1", 0, 6),
+        _span("call1", "phase1", "GET /a", 0, 5, kind=SPAN_KIND_CLIENT),
+        _span("call2", "phase1", "GET /b", 0, 6, kind=SPAN_KIND_CLIENT),
+        _span("call3", "phase1", "GET /c", 1, 2, kind=SPAN_KIND_CLIENT),
+        _span("phase2", "root", "phase2", 6, 10),
+    ]
+    actual = get_critical_path(spans)
+    assert [(e["depth"], e["name"]) for e in actual] == [(0, "root"), (1, "phase1"), (2, "GET /b"), (1, "phase2")]
+    assert actual[3]["start_offset_seconds"] == 6
+
+
+def test_get_critical_path_重なって並行に実行したスパンは選ばない():
+    # スレッドプールで並行に実行した呼び出しのように、入れ子にならずに重なるスパン
+    spans = [
+        _span("root", None, "root", 0, 8),
+        _span("call1", "root", "GET /1", 0, 3, kind=SPAN_KIND_CLIENT),
+        _span("call2", "root", "GET /2", 1, 4, kind=SPAN_KIND_CLIENT),
+        _span("call3", "root", "GET /3", 2, 5, kind=SPAN_KIND_CLIENT),
+        _span("call4", "root", "GET /4", 4, 7, kind=SPAN_KIND_CLIENT),
+        _span("call5", "root", "GET /5", 5, 8, kind=SPAN_KIND_CLIENT),
+    ]
+    actual = get_critical_path(spans)
+    assert [(e["depth"], e["name"]) for e in actual] == [(0, "root"), (1, "GET /3"), (1, "GET /5")]
@@ -0,0 +1,118 @@
+import io
+import pickle
+
+import pytest
+import requests
+
+from annoworkcli.common.transport import AdaptiveConcurrencyLimiter, ControlledHTTPAdapter, TokenBucket, TransportController
+
+
+def create_response(status_code: int, headers: dict[str, str] | None = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(b"")
+    if headers is not None:
+        response.headers.update(headers)
+    return response
+
+
+def create_request(method: str) -> requests.PreparedRequest:
+    return requests.Request(method, "https://example.com/api/v1/foo").prepare()
+
+
+class TestTokenBucket:
+    def test_容量分は待たずに取得できる(self, monkeypatch):
+        sleep_seconds: list[float] = []
+        monkeypatch.setattr("annoworkcli.common.transport.time.sleep", sleep_seconds.append)
+        bucket = TokenBucket(rate=1000, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        assert sleep_seconds == []
+
+    def test_不正なrate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_流量制限されたら上限を半分にする(self):
+        limiter = AdaptiveConcurrencyLimiter(8)
+        limiter.acquire()
+        limiter.release(latency=0.1, is_throttled=True)
+        assert limiter.limit == 4
+
+        # クールダウン中は減らさない
+        limiter.acquire()
+        limiter.release(latency=0.1, is_throttled=True)
+        assert limiter.limit == 4
+
+    def test_正常なレスポンスが続けば上限を戻す(self):
+        limiter = AdaptiveConcurrencyLimiter(4)
+        limiter.acquire()
+        limiter.release(latency=0.1, is_throttled=True)
+        assert limiter.limit == 2
+
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release(latency=0.1, is_throttled=False)
+        assert limiter.limit == 4
+        assert limiter.in_flight == 0
+
+    def test_レイテンシが悪化したレスポンスが続いたら上限を減らす(self):
+        limiter = AdaptiveConcurrencyLimiter(8, latency_tolerance=3.0, slow_response_threshold=3)
+        for latency in [0.1, 0.1, 1.0, 1.0]:
+            limiter.acquire()
+            limiter.release(latency=latency, is_throttled=False)
+        # 遅いレスポンスが続いていないので減らさない
+        assert limiter.limit == 8
+
+        limiter.acquire()
+        limiter.release(latency=5.0, is_throttled=False)
+        assert limiter.limit == 4
+
+
+class TestTransportController:
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        monkeypatch.setattr("annoworkcli.common.transport.time.sleep", lambda _: None)
+
+    def test_429でもリトライしない(self):
+        responses = [create_response(429), create_response(200)]
+        controller = TransportController(max_rps=100, max_concurrency=2)
+        actual = controller.send(lambda _request, **_kwargs: responses.pop(0), create_request("GET"))
+        assert actual.status_code == 429
+        assert controller.request_count == 1
+        # annoworkapi/annofabapiがリトライするレスポンスとして数える
+        assert controller.retry_count == 1
+
+    def test_Retry_Afterの秒数だけ後続のリクエストを止める(self):
+        controller = TransportController(max_rps=100)
+        controller.send(lambda _request, **_kwargs: create_response(503, {"Retry-After": "3"}), create_request("GET"))
+        assert controller.token_bucket is not None
+        assert controller.token_bucket._paused_until > 0
+
+    def test_通信エラーの場合も枠を返却する(self):
+        def send(_request, **_kwargs):  # noqa: ANN001, ANN003, ANN202
+            raise requests.exceptions.ConnectionError
+
+        controller = TransportController(max_concurrency=2)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            controller.send(send, create_request("GET"))
+        assert controller.concurrency_limiter is not None
+        assert controller.concurrency_limiter.in_flight == 0
+        assert controller.retry_count == 1
+
+    def test_get_retry_after_seconds(self):
+        assert TransportController.get_retry_after_seconds(create_response(429, {"Retry-After": "3"})) == 3.0
+        assert TransportController.get_retry_after_seconds(create_response(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) is None
+        assert TransportController.get_retry_after_seconds(create_response(429)) is None
+
+
+def test_ControlledHTTPAdapter_pickleできる():
+    session = requests.Session()
+    session.mount("https://", ControlledHTTPAdapter(TransportController(max_rps=5, max_concurrency=3)))
+    actual = pickle.loads(pickle.dumps(session))  # noqa: S301
+    adapter = actual.get_adapter("https://example.com")
+    assert isinstance(adapter, ControlledHTTPAdapter)
+    assert adapter.controller.max_rps == 5
+    assert adapter.controller.max_concurrency == 3
@@ -0,0 +1,58 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+import annoworkcli.common.watch
+from annoworkcli.common.watch import WatchWindow, get_watch_window, run_watch, write_if_changed
+
+
+def test_get_watch_window():
+    assert get_watch_window(today="2022-01-10", window_days=2, start_date=None, end_date=None) == WatchWindow("2022-01-09", "2022-01-10")
+    assert get_watch_window(today="2022-01-10", window_days=3, start_date="2022-01-09", end_date="2022-01-31") == WatchWindow(
+        "2022-01-09", "2022-01-10"
+    )
+    # 集計期間とウォッチ期間が重ならない場合
+    assert get_watch_window(today="2022-01-10", window_days=2, start_date=None, end_date="2022-01-05") is None
+
+
+def _writer(text: str) -> Callable[[Path], None]:
+    def write(output: Path) -> None:
+        output.write_text(text)
+
+    return write
+
+
+def test_write_if_changed__内容が変わった場合だけ置き換える(tmp_path: Path):
+    output = tmp_path / "out/out.csv"
+
+    assert write_if_changed(output, _writer("a\n"))
+    mtime = output.stat().st_mtime_ns
+    assert not write_if_changed(output, _writer("a\n"))
+    assert output.stat().st_mtime_ns == mtime
+    assert write_if_changed(output, _writer("b\n"))
+    assert output.read_text() == "b\n"
+    # 一時ファイルは残らない
+    assert [e.name for e in output.parent.iterdir()] == ["out.csv"]
+
+
+def test_run_watch__例外が発生しても続行してCtrl_Cで終了する(monkeypatch: pytest.MonkeyPatch):
+    sleep_count = 0
+
+    def sleep(seconds: float) -> None:  # noqa: ARG001
+        nonlocal sleep_count
+        sleep_count += 1
+        if sleep_count > 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(annoworkcli.common.watch.time, "sleep", sleep)
+    results: list[Exception | bool] = [RuntimeError("error"), True, False]
+
+    def update() -> bool:
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    run_watch(update, interval_seconds=60)
+    assert results == []
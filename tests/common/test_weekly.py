@@ -0,0 +1,52 @@
+import pandas
+
+from annoworkcli.common.weekly import WeekStart, aggregate_weekly, get_week_ids
+
+
+def test_WeekStart_weekday():
+    assert WeekStart.MONDAY.weekday == 0
+    assert WeekStart.SUNDAY.weekday == 6
+
+
+def test_get_week_ids():
+    # 2022-03-05(土), 2022-03-06(日), 2022-03-07(月)
+    dates = pandas.Series(["2022-03-05", "2022-03-06", "2022-03-07"])
+
+    actual = pandas.to_datetime(get_week_ids(dates, week_start=WeekStart.SUNDAY), unit="D").strftime("%Y-%m-%d").tolist()
+    assert actual == ["2022-02-27", "2022-03-06", "2022-03-06"]
+
+    actual = pandas.to_datetime(get_week_ids(dates, week_start=WeekStart.MONDAY), unit="D").strftime("%Y-%m-%d").tolist()
+    assert actual == ["2022-02-28", "2022-02-28", "2022-03-07"]
+
+
+def test_get_week_ids__タイムゾーン付きの日時はそのタイムゾーンでの日付を参照する():
+    # JSTでは2022-03-06(日)、UTCでは2022-03-05(土)
+    dates = pandas.Series(pandas.to_datetime(["2022-03-06T08:00:00+09:00"]))
+    actual = pandas.to_datetime(get_week_ids(dates), unit="D").strftime("%Y-%m-%d").tolist()
+    assert actual == ["2022-03-06"]
+
+
+def test_aggregate_weekly():
+    df = pandas.DataFrame(
+        {
+            "date": ["2022-03-05", "2022-03-06", "2022-03-12", "2022-03-06"],
+            "user_id": ["alice", "alice", "alice", "bob"],
+            "hours": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    actual = aggregate_weekly(df, date_column="date", group_columns=["user_id"], agg={"hours": "sum"})
+    assert actual.to_dict("records") == [
+        {"user_id": "alice", "start_date": "2022-02-27", "end_date": "2022-03-05", "hours": 1.0},
+        {"user_id": "alice", "start_date": "2022-03-06", "end_date": "2022-03-12", "hours": 5.0},
+        {"user_id": "bob", "start_date": "2022-03-06", "end_date": "2022-03-12", "hours": 4.0},
+    ]
+
+
+def test_aggregate_weekly__値が存在しない週も出力する():
+    df = pandas.DataFrame({"date": ["2022-03-01", "2022-03-15"], "hours": [1.0, 2.0]})
+    actual = aggregate_weekly(df, date_column="date", group_columns=[], agg={"hours": "sum"}, is_fill_empty_weeks=True)
+    assert actual.to_dict("records") == [
+        {"start_date": "2022-02-27", "end_date": "2022-03-05", "hours": 1.0},
+        {"start_date": "2022-03-06", "end_date": "2022-03-12", "hours": 0.0},
+        {"start_date": "2022-03-13", "end_date": "2022-03-19", "hours": 2.0},
+    ]
@@ -0,0 +1,119 @@
+import json
+import zipfile
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from annoworkcli.common.exeptions import AnnoworkCliException
+from annoworkcli.common.workspace_snapshot import (
+    MANIFEST_FILE_NAME,
+    TABLE_NAMES,
+    SnapshotRequestError,
+    SnapshotResponder,
+    TableFormat,
+    WorkspaceSnapshot,
+    write_snapshot,
+)
+
+ENDPOINT_URL = "https://annowork.com/api/v1"
+
+
+def _create_tables() -> dict[str, list[dict[str, Any]]]:
+    tables: dict[str, list[dict[str, Any]]] = {table_name: [] for table_name in TABLE_NAMES}
+    tables["workspaces"] = [{"workspace_id": "org", "workspace_name": "org"}]
+    tables["workspace_members"] = [
+        {"workspace_member_id": "m1", "user_id": "u1", "status": "active"},
+        {"workspace_member_id": "m2", "user_id": "u2", "status": "inactive"},
+    ]
+    tables["jobs"] = [
+        {"job_id": "parent", "job_tree": "org/parent", "external_linkage_info": {}},
+        {"job_id": "job1", "job_tree": "org/parent/job1", "external_linkage_info": {"url": "https://annofab.com/projects/af1"}},
+    ]
+    tables["schedules"] = [
+        {"schedule_id": "s1", "job_id": "job1", "workspace_member_id": "m1", "start_date": "2022-01-01", "end_date": "2022-01-10"},
+        {"schedule_id": "s2", "job_id": "job1", "workspace_member_id": "m1", "start_date": "2022-01-11", "end_date": "2022-01-20"},
+    ]
+    tables["actual_working_times"] = [
+        {
+            "actual_working_time_id": "a1",
+            "job_id": "job1",
+            "workspace_member_id": "m1",
+            "start_datetime": "2022-01-01T23:00:00.000+09:00",
+            "end_datetime": "2022-01-02T01:00:00.000+09:00",
+        },
+        {
+            "actual_working_time_id": "a2",
+            "job_id": "job1",
+            "workspace_member_id": "m2",
+            "start_datetime": "2022-01-02T10:00:00.000+09:00",
+            "end_datetime": "2022-01-02T11:00:00.000+09:00",
+        },
+    ]
+    return tables
+
+
+@pytest.fixture
+def snapshot_file(tmp_path: Path) -> Path:
+    snapshot_file = tmp_path / "snapshot.zip"
+    manifest = {"workspace_id": "org", "start_date": "2022-01-01", "end_date": "2022-01-31", "timezone_offset_hours": 9}
+    write_snapshot(snapshot_file, manifest, _create_tables(), table_format=TableFormat.JSONL)
+    return snapshot_file
+
+
+def _get(responder: SnapshotResponder, path: str, params: dict[str, str] | None = None) -> tuple[int, Any]:
+    return responder.respond(requests.Request("GET", f"{ENDPOINT_URL}{path}", params=params).prepare())
+
+
+def test_write_snapshot_書き込んだスナップショットを読み込める(snapshot_file: Path):
+    snapshot = WorkspaceSnapshot.load(snapshot_file)
+    assert snapshot.workspace_id == "org"
+    assert snapshot.tables == _create_tables()
+    assert snapshot.manifest["tables"]["jobs"]["row_count"] == 2
+
+
+def test_WorkspaceSnapshot_load_フォーマットのバージョンが異なるスナップショットは読み込めない(snapshot_file: Path, tmp_path: Path):
+    with zipfile.ZipFile(snapshot_file) as zf:
+        manifest = json.loads(zf.read(MANIFEST_FILE_NAME))
+    old_snapshot_file = tmp_path / "old.zip"
+    with zipfile.ZipFile(old_snapshot_file, "w") as zf:
+        zf.writestr(MANIFEST_FILE_NAME, json.dumps({**manifest, "format_version": 0}))
+
+    with pytest.raises(AnnoworkCliException):
+        WorkspaceSnapshot.load(old_snapshot_file)
+
+
+class TestSnapshotResponder:
+    def test_WebAPIと同じ条件で実績作業時間を絞り込む(self, snapshot_file: Path):
+        responder = SnapshotResponder(snapshot_file)
+        params = {"term_start": "2022-01-01T15:00:00.000Z", "term_end": "2022-01-02T14:59:59.999Z"}
+        _, actual = _get(responder, "/workspaces/org/actual-working-times", params)
+        assert [e["actual_working_time_id"] for e in actual] == ["a2"]
+
+        _, actual = _get(responder, "/workspaces/org/members/m1/actual-working-times", {"term_start": "2022-01-01"})
+        assert [e["actual_working_time_id"] for e in actual] == ["a1"]
+
+    def test_期間が重なる作業計画を返す(self, snapshot_file: Path):
+        responder = SnapshotResponder(snapshot_file)
+        _, actual = _get(responder, "/workspaces/org/schedules", {"term_start": "2022-01-10", "term_end": "2022-01-12"})
+        assert [e["schedule_id"] for e in actual] == ["s1", "s2"]
+
+    def test_無効なメンバはincludes_inactive_membersを指定した場合だけ返す(self, snapshot_file: Path):
+        responder = SnapshotResponder(snapshot_file)
+        assert len(_get(responder, "/workspaces/org/members")[1]) == 1
+        assert len(_get(responder, "/workspaces/org/members", {"includes_inactive_members": "True"})[1]) == 2
+
+    def test_存在しないリソースには404を返す(self, snapshot_file: Path):
+        responder = SnapshotResponder(snapshot_file)
+        assert _get(responder, "/workspaces/org/jobs/job1")[0] == 200
+        assert _get(responder, "/workspaces/org/jobs/unknown")[0] == 404
+        assert _get(responder, "/workspaces/other/jobs")[0] == 404
+        assert [e["job_id"] for e in _get(responder, "/workspaces/org/jobs/parent/children")[1]] == ["job1"]
+
+    def test_スナップショットから返せないリクエストは例外を発生させる(self, snapshot_file: Path):
+        responder = SnapshotResponder(snapshot_file)
+        with pytest.raises(SnapshotRequestError):
+            responder.respond(requests.Request("PUT", f"{ENDPOINT_URL}/workspaces/org/jobs/job1", json={}).prepare())
+        with pytest.raises(SnapshotRequestError):
+            _get(responder, "/my/account")
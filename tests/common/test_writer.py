@@ -0,0 +1,86 @@
+import gzip
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas
+import pytest
+
+import annoworkcli.common.writer
+from annoworkcli.common.exeptions import CommandLineArgumentError
+from annoworkcli.common.utils import print_csv, print_json
+from annoworkcli.common.writer import Compression, OutputOptions, check_compression, set_output_options, write_lines
+
+
+@pytest.fixture(autouse=True)
+def _reset_output_options() -> Iterator[None]:
+    yield
+    set_output_options(OutputOptions())
+
+
+def test_print_csv__gzipで圧縮する(tmp_path: Path):
+    set_output_options(OutputOptions(compression=Compression.GZIP))
+    df = pandas.DataFrame({"user_id": ["alice", "bob"], "hours": [1.0, 2.5]})
+
+    print_csv(df, output=tmp_path / "out.csv")
+
+    assert not (tmp_path / "out.csv").exists()
+    with gzip.open(tmp_path / "out.csv.gz", "rt", encoding="utf_8_sig") as f:
+        assert f.read() == "user_id,hours\nalice,1.0\nbob,2.5\n"
+
+
+def test_print_csv__列の値ごとにファイルを分割する(tmp_path: Path):
+    set_output_options(OutputOptions(partition_by="date"))
+    df = pandas.DataFrame({"date": ["2022-01-01", "2022-01-02", "2022-01-01", None], "hours": [1, 2, 3, 4]})
+
+    print_csv(df, output=tmp_path / "out")
+
+    assert sorted(e.name for e in (tmp_path / "out").iterdir()) == ["date=2022-01-01.csv", "date=2022-01-02.csv", "date=__null__.csv"]
+    df_actual = pandas.read_csv(tmp_path / "out/date=2022-01-01.csv", encoding="utf_8_sig")
+    assert df_actual["hours"].tolist() == [1, 3]
+
+
+def test_print_csv__チャンクに分けて変換してもBOMとヘッダは先頭だけに付く(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(annoworkcli.common.writer, "CHUNK_ROW_COUNT", 2)
+    set_output_options(OutputOptions(compression=Compression.GZIP))
+    df = pandas.DataFrame({"user_id": ["a", "b", "c", "d", "e"]})
+
+    print_csv(df, output=tmp_path / "out.csv.gz")
+
+    with gzip.open(tmp_path / "out.csv.gz", "rb") as f:
+        data = f.read()
+    assert data == "user_id\na\nb\nc\nd\ne\n".encode("utf_8_sig")
+
+
+def test_print_json__dictのlistを分割して圧縮する(tmp_path: Path):
+    set_output_options(OutputOptions(partition_by="user_id", compression=Compression.GZIP))
+    target = [{"user_id": "alice", "hours": 1}, {"user_id": "bob", "hours": 2}, {"user_id": "alice", "hours": 3}]
+
+    print_json(target, output=tmp_path / "out")
+
+    with gzip.open(tmp_path / "out/user_id=alice.json.gz", "rt", encoding="utf_8") as f:
+        assert json.load(f) == [{"user_id": "alice", "hours": 1}, {"user_id": "alice", "hours": 3}]
+    with gzip.open(tmp_path / "out/user_id=bob.json.gz", "rt", encoding="utf_8") as f:
+        assert json.load(f) == [{"user_id": "bob", "hours": 2}]
+
+
+def test_write_lines__チャンクに分けて書き込んでもBOMは先頭だけに付く(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(annoworkcli.common.writer, "CHUNK_ROW_COUNT", 2)
+    set_output_options(OutputOptions(compression=Compression.GZIP))
+    lines = (f"{value}\n" for value in ["user_id", "a", "b", "c", "d"])
+
+    output_file = write_lines(lines, tmp_path / "out.csv", encoding="utf_8_sig")
+
+    assert output_file == tmp_path / "out.csv.gz"
+    with gzip.open(output_file, "rb") as f:
+        assert f.read() == "user_id\na\nb\nc\nd\n".encode("utf_8_sig")
+
+
+def test_check_compression__zstdが利用できない場合は例外を発生させる(monkeypatch: pytest.MonkeyPatch):
+    def import_module(name: str):  # noqa: ANN202
+        raise ImportError(name)
+
+    monkeypatch.setattr(annoworkcli.common.writer.importlib, "import_module", import_module)
+    check_compression(Compression.GZIP)
+    with pytest.raises(CommandLineArgumentError):
+        check_compression(Compression.ZSTD)
@@ -0,0 +1,87 @@
+from typing import Any
+
+from annoworkcli.expected_working_time.list_expected_working_time import ListExpectedWorkingTime, split_term
+
+WORKSPACE_MEMBERS = [{"workspace_member_id": f"member_{i}", "user_id": f"user_{i}", "username": f"User {i}"} for i in range(4)]
+
+EXPECTED_WORKING_TIMES: list[dict[str, Any]] = [
+    {"workspace_member_id": f"member_{i}", "date": date, "expected_working_hours": 8.0}
+    for i in range(4)
+    for date in ["2022-01-01", "2022-02-15", "2022-03-31"]
+]
+
+
+def _is_in_term(date: str, query_params: dict[str, Any]) -> bool:
+    term_start = query_params.get("term_start")
+    term_end = query_params.get("term_end")
+    return (term_start is None or date >= term_start) and (term_end is None or date <= term_end)
+
+
+class ApiStub:
+    def __init__(self) -> None:
+        self.requests: list[tuple[str | None, dict[str, Any]]] = []
+
+    def get_workspace_members(self, workspace_id: str, query_params: dict[str, Any]) -> list[dict[str, Any]]:  # noqa: ARG002
+        return WORKSPACE_MEMBERS
+
+    def get_expected_working_times(self, workspace_id: str, query_params: dict[str, Any]) -> list[dict[str, Any]]:  # noqa: ARG002
+        self.requests.append((None, query_params))
+        return [e for e in EXPECTED_WORKING_TIMES if _is_in_term(e["date"], query_params)]
+
+    def get_expected_working_times_by_workspace_member(
+        self,
+        workspace_id: str,  # noqa: ARG002
+        workspace_member_id: str,
+        query_params: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        self.requests.append((workspace_member_id, query_params))
+        return [e for e in EXPECTED_WORKING_TIMES if e["workspace_member_id"] == workspace_member_id and _is_in_term(e["date"], query_params)]
+
+
+class AnnoworkServiceStub:
+    def __init__(self) -> None:
+        self.api = ApiStub()
+
+
+def _create_main_obj() -> tuple[ListExpectedWorkingTime, ApiStub]:
+    annowork_service: Any = AnnoworkServiceStub()
+    return ListExpectedWorkingTime(annowork_service, "org"), annowork_service.api
+
+
+def test_split_term():
+    assert split_term("2022-01-01", "2022-03-31", days=31) == [
+        ("2022-01-01", "2022-01-31"),
+        ("2022-02-01", "2022-03-03"),
+        ("2022-03-04", "2022-03-31"),
+    ]
+    assert split_term("2022-01-01", "2022-01-01", days=31) == [("2022-01-01", "2022-01-01")]
+    # 開始日または終了日が未指定の場合は分割しない
+    assert split_term("2022-01-01", None) == [("2022-01-01", None)]
+
+
+def test_get_expected_working_times__期間を分割して取得する():
+    main_obj, api = _create_main_obj()
+
+    actual = main_obj.get_expected_working_times(start_date="2022-01-01", end_date="2022-03-31")
+
+    assert len(api.requests) == 3
+    assert sorted(actual, key=lambda e: (e["workspace_member_id"], e["date"])) == EXPECTED_WORKING_TIMES
+
+
+def test_get_expected_working_times_by_user_id__メンバと期間の組み合わせごとに取得する():
+    main_obj, api = _create_main_obj()
+
+    actual = main_obj.get_expected_working_times_by_user_id(["user_1"], start_date="2022-01-01", end_date="2022-03-31")
+
+    assert {member for member, _ in api.requests} == {"member_1"}
+    assert len(api.requests) == 3
+    assert [e["date"] for e in actual] == ["2022-01-01", "2022-02-15", "2022-03-31"]
+
+
+def test_get_expected_working_times_by_user_id__大部分のメンバが対象ならワークスペース全体を取得する():
+    main_obj, api = _create_main_obj()
+
+    actual = main_obj.get_expected_working_times_by_user_id(["user_0", "user_1", "user_2"], start_date="2022-01-01", end_date="2022-01-31")
+
+    assert api.requests == [(None, {"term_start": "2022-01-01", "term_end": "2022-01-31"})]
+    assert [e["workspace_member_id"] for e in actual] == ["member_0", "member_1", "member_2"]
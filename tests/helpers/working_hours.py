@@ -0,0 +1,75 @@
+"""
+``annofab list_working_hours`` の結合処理の結果を比較するための処理。ユニットテストとベンチマークで共有します。
+"""
+
+import pandas
+
+
+def get_df_working_hours_by_merge(
+    *,
+    df_actual_working_hours: pandas.DataFrame,
+    df_user_and_af_account: pandas.DataFrame,
+    df_job_and_af_project: pandas.DataFrame,
+    df_af_working_hours: pandas.DataFrame,
+) -> pandas.DataFrame:
+    """
+    `map`で結合するように書き換える前の、`merge`で結合する`_get_df_working_hours_from_df`の実装。
+    書き換え後の結果が変わらないことを確認するために利用します。
+    """
+    # annowork側の作業時間情報
+    df_aw_working_hours = df_actual_working_hours.merge(df_user_and_af_account[["user_id", "annofab_account_id"]], how="left", on="user_id").merge(
+        df_job_and_af_project[["job_id", "annofab_project_id"]],
+        how="left",
+        on="job_id",
+    )
+
+    df_merged = df_aw_working_hours.merge(df_af_working_hours, how="outer", on=["date", "annofab_project_id", "annofab_account_id"])
+
+    TMP_SUFFIX = "_tmp"  # noqa: N806
+    # df_merged は outer joinしているため、左側にも欠損値ができる。
+    # それを埋めるために、以前に user情報, job情報の一意な dataframe を生成して、欠損値を埋める
+    USER_COLUMNS = ["workspace_member_id", "user_id", "username"]  # noqa: N806
+    df_merged = df_merged.merge(df_user_and_af_account, how="left", on="annofab_account_id", suffixes=(None, TMP_SUFFIX))
+    for user_column in USER_COLUMNS:
+        df_merged[user_column] = df_merged[user_column].fillna(df_merged[f"{user_column}{TMP_SUFFIX}"])
+
+    # job_id, job_nameの欠損値を、df_job_and_af_project を使って埋める
+    # af_projectに紐付いているジョブとaf_projectのDataFrameを生成して、それを使って欠損値を埋める
+    # drop_duplicatesの理由: AnnoworkのジョブとAnnofabのプロジェクトが1対1で紐づくときだけ、df_mergeのjob_idとjob_nameの欠損値を埋めるようにするため
+    df_job_id_af_project = df_job_and_af_project[df_job_and_af_project["annofab_project_id"].notna()].drop_duplicates(
+        ["annofab_project_id"], keep=False
+    )
+    df_merged = df_merged.merge(
+        df_job_id_af_project[["job_id", "job_name", "annofab_project_id"]],
+        how="left",
+        on=["annofab_project_id"],
+        suffixes=(None, TMP_SUFFIX),
+    )
+    df_merged["job_id"] = df_merged["job_id"].fillna(df_merged[f"job_id{TMP_SUFFIX}"])
+    df_merged["job_name"] = df_merged["job_name"].fillna(df_merged[f"job_name{TMP_SUFFIX}"])
+
+    # annofab_project_titleを結合するために、annofab_projectだけのDataFrameを生成する
+    df_af_project = df_job_and_af_project.drop_duplicates(subset=["annofab_project_id"])[["annofab_project_id", "annofab_project_title"]]
+    df_merged = df_merged.merge(df_af_project, on="annofab_project_id", how="left")
+
+    df_merged = df_merged.fillna(
+        {
+            "actual_working_hours": 0.0,
+            "annofab_working_hours": 0.0,
+        },
+    )
+
+    return df_merged[
+        [
+            "date",
+            "job_id",
+            "job_name",
+            *USER_COLUMNS,
+            "actual_working_hours",
+            "annofab_project_id",
+            "annofab_project_title",
+            "annofab_account_id",
+            "annofab_working_hours",
+            "notes",
+        ]
+    ]
@@ -0,0 +1,246 @@
+"""
+ベンチマークとテスト用に、現実的な構造を持つワークスペースのデータを決定的に生成する処理
+"""
+
+import datetime
+import random
+from dataclasses import dataclass, field
+from typing import Any
+
+import pandas
+from annoworkapi.enums import ScheduleType
+
+JST = datetime.timezone(datetime.timedelta(hours=9))
+
+
+def to_api_datetime_str(dt: datetime.datetime) -> str:
+    """WebAPIのレスポンスと同じ形式（UTC, ミリ秒まで）の日時文字列に変換します。"""
+    return dt.astimezone(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+@dataclass
+class SyntheticWorkspace:
+    """
+    ベンチマーク用のワークスペースのデータ。各属性はAnnowork/AnnofabのWebAPIのレスポンスと同じ構造です。
+    """
+
+    workspace_id: str
+    workspace_members: list[dict[str, Any]] = field(default_factory=list)
+    jobs: list[dict[str, Any]] = field(default_factory=list)
+    """2階層のジョブツリー（親ジョブと子ジョブ）。子ジョブの外部連携情報にはAnnofabプロジェクトのURLが設定されています。"""
+    actual_working_times: list[dict[str, Any]] = field(default_factory=list)
+    """実績作業時間。一部は日付をまたぎます。"""
+    schedules: list[dict[str, Any]] = field(default_factory=list)
+    """作業計画。HOURSとPERCENTAGEの両方を含みます。"""
+    expected_working_times: list[dict[str, Any]] = field(default_factory=list)
+    workspace_tags: list[dict[str, Any]] = field(default_factory=list)
+    workspace_tag_members: dict[str, list[str]] = field(default_factory=dict)
+    """key:workspace_tag_id, value:タグが付与されたworkspace_member_idのlist"""
+    annofab_working_hours: list[dict[str, Any]] = field(default_factory=list)
+    """Annofabの作業時間。 ``ListWorkingHoursWithAnnofab.get_af_working_hours`` が返す行と同じ構造です。"""
+
+    @property
+    def child_jobs(self) -> list[dict[str, Any]]:
+        return [job for job in self.jobs if job["job_tree"].count("/") == 2]  # noqa: PLR2004
+
+    def get_df_actual_working_hours_daily(self) -> pandas.DataFrame:
+        """実績作業時間を日ごとに集計したDataFrame。 ``_get_df_working_hours_from_df`` の引数に渡す形式です。"""
+        df = pandas.DataFrame(self.actual_working_times)
+        df["date"] = pandas.to_datetime(df["start_datetime"]).dt.tz_convert(JST).dt.strftime("%Y-%m-%d")
+        df = df.groupby(["date", "job_id", "job_name", "workspace_member_id", "user_id", "username"], as_index=False)["actual_working_hours"].sum()
+        df["notes"] = pandas.NA
+        return df.astype({"date": "string", "job_id": "string", "user_id": "string", "actual_working_hours": "float64"})
+
+    def get_df_user_and_af_account(self) -> pandas.DataFrame:
+        df = pandas.DataFrame(self.workspace_members)[["user_id", "username", "account_id", "workspace_member_id"]]
+        df["annofab_account_id"] = "af_" + df["account_id"]
+        return df
+
+    def get_df_job_and_af_project(self) -> pandas.DataFrame:
+        return pandas.DataFrame(
+            [
+                {
+                    "job_id": job["job_id"],
+                    "job_name": job["job_name"],
+                    "annofab_project_id": job["job_id"],
+                    "annofab_project_title": f"PRJ-{job['job_name']}",
+                }
+                for job in self.child_jobs
+            ]
+        )
+
+    def get_df_af_working_hours(self) -> pandas.DataFrame:
+        return pandas.DataFrame(self.annofab_working_hours).astype(
+            {"date": "string", "annofab_project_id": "string", "annofab_account_id": "string", "annofab_working_hours": "float64"}
+        )
+
+    def get_df_assigned(self, df_actual: pandas.DataFrame) -> pandas.DataFrame:
+        """``ReshapeDataFrame`` に渡すアサイン時間のDataFrame。実績作業時間と同じ日・メンバに対して生成します。"""
+        df = df_actual[["date", "workspace_member_id", "user_id", "username"]].drop_duplicates()
+        df = df.assign(job_id="parent_0", job_name="PARENT-0", assigned_working_hours=8.0)
+        return df.reset_index(drop=True)
+
+
+def generate_workspace(  # noqa: PLR0913
+    *,
+    actual_row_count: int,
+    member_count: int | None = None,
+    parent_job_count: int = 10,
+    child_job_count_per_parent: int = 10,
+    start_date: datetime.date = datetime.date(2022, 1, 1),
+    seed: int = 0,
+) -> SyntheticWorkspace:
+    """
+    ベンチマーク用のワークスペースのデータを生成します。同じ引数なら同じデータを返します。
+
+    Args:
+        actual_row_count: 実績作業時間の件数。データ量の基準になります。
+        member_count: ワークスペースメンバの人数。Noneなら ``actual_row_count`` から決めます（1人あたり約500件）。
+        parent_job_count: 親ジョブの個数
+        child_job_count_per_parent: 親ジョブ1個あたりの子ジョブの個数
+        start_date: データの開始日
+        seed: 乱数のシード
+    """
+    rng = random.Random(seed)  # noqa: S311
+    if member_count is None:
+        member_count = max(5, actual_row_count // 500)
+
+    workspace = SyntheticWorkspace(workspace_id="org")
+
+    for i in range(member_count):
+        workspace.workspace_members.append(
+            {
+                "workspace_id": workspace.workspace_id,
+                "workspace_member_id": f"member_{i}",
+                "account_id": f"account_{i}",
+                "user_id": f"user_{i}",
+                "username": f"User {i}",
+                "role": "worker",
+                "status": "active",
+                "inactivated_datetime": None,
+            }
+        )
+
+    company_count = 3
+    for i in range(company_count):
+        workspace_tag_id = f"company_{i}"
+        workspace.workspace_tags.append(
+            {"workspace_id": workspace.workspace_id, "workspace_tag_id": workspace_tag_id, "workspace_tag_name": f"company:Company{i}"}
+        )
+        workspace.workspace_tag_members[workspace_tag_id] = [
+            member["workspace_member_id"] for index, member in enumerate(workspace.workspace_members) if index % company_count == i
+        ]
+
+    for i in range(parent_job_count):
+        parent_job_id = f"parent_{i}"
+        workspace.jobs.append(
+            {
+                "job_id": parent_job_id,
+                "job_name": f"PARENT-{i}",
+                "job_tree": f"{workspace.workspace_id}/{parent_job_id}",
+                "status": "unarchived",
+                "target_hours": None,
+                "note": None,
+                "external_linkage_info": {},
+            }
+        )
+        for j in range(child_job_count_per_parent):
+            job_id = f"job_{i}_{j}"
+            workspace.jobs.append(
+                {
+                    "job_id": job_id,
+                    "job_name": f"JOB-{i}-{j}",
+                    "job_tree": f"{workspace.workspace_id}/{parent_job_id}/{job_id}",
+                    "status": "unarchived",
+                    "target_hours": None,
+                    "note": None,
+                    "external_linkage_info": {"url": f"https://annofab.com/projects/{job_id}"},
+                }
+            )
+
+    child_jobs = workspace.child_jobs
+    # 1人のメンバは、数個のジョブを担当する
+    member_jobs = {member["workspace_member_id"]: rng.sample(child_jobs, k=min(3, len(child_jobs))) for member in workspace.workspace_members}
+
+    rows_per_member = -(-actual_row_count // member_count)
+    # 1日あたり2件の実績作業時間を入力する
+    day_count = max(1, -(-rows_per_member // 2))
+
+    annofab_hours: dict[tuple[str, str, str], float] = {}
+    for i in range(actual_row_count):
+        member = workspace.workspace_members[i % member_count]
+        row_index_of_member = i // member_count
+        date = start_date + datetime.timedelta(days=row_index_of_member // 2)
+        job = rng.choice(member_jobs[member["workspace_member_id"]])
+
+        if row_index_of_member % 2 == 0:
+            start_hour = 9.0 + rng.random()
+            hours = 2.0 + rng.random() * 2
+        elif rng.random() < 0.1:  # noqa: PLR2004
+            # 日付をまたぐ実績作業時間
+            start_hour = 22.0 + rng.random()
+            hours = 3.0 + rng.random() * 2
+        else:
+            start_hour = 14.0 + rng.random()
+            hours = 1.0 + rng.random() * 3
+
+        # WebAPIの日時はミリ秒までなので、秒単位に丸めて実績作業時間と開始・終了日時の整合性を保つ
+        dt_start = datetime.datetime.combine(date, datetime.time(), tzinfo=JST) + datetime.timedelta(seconds=round(start_hour * 3600))
+        working_seconds = round(hours * 3600)
+        hours = working_seconds / 3600
+        dt_end = dt_start + datetime.timedelta(seconds=working_seconds)
+        workspace.actual_working_times.append(
+            {
+                "workspace_id": workspace.workspace_id,
+                "actual_working_time_id": f"actual_{i}",
+                "workspace_member_id": member["workspace_member_id"],
+                "job_id": job["job_id"],
+                "job_name": job["job_name"],
+                "user_id": member["user_id"],
+                "username": member["username"],
+                "start_datetime": to_api_datetime_str(dt_start),
+                "end_datetime": to_api_datetime_str(dt_end),
+                "actual_working_hours": hours,
+                "note": "note" if rng.random() < 0.05 else None,  # noqa: PLR2004
+            }
+        )
+
+        # Annofabの作業時間は、実績作業時間の8割程度になる
+        key = (date.isoformat(), job["job_id"], f"af_{member['account_id']}")
+        annofab_hours[key] = annofab_hours.get(key, 0.0) + hours * (0.6 + rng.random() * 0.3)
+
+    workspace.annofab_working_hours = [
+        {"date": date, "annofab_project_id": project_id, "annofab_account_id": account_id, "annofab_working_hours": hours}
+        for (date, project_id, account_id), hours in annofab_hours.items()
+    ]
+
+    for member in workspace.workspace_members:
+        for day in range(day_count):
+            date = start_date + datetime.timedelta(days=day)
+            workspace.expected_working_times.append(
+                {
+                    "workspace_id": workspace.workspace_id,
+                    "workspace_member_id": member["workspace_member_id"],
+                    "date": date.isoformat(),
+                    "expected_working_hours": 0.0 if date.weekday() >= 5 else 8.0,  # noqa: PLR2004
+                }
+            )
+
+        # 2週間ごとに、担当するジョブの作業計画を入れる
+        for index, week_start in enumerate(range(0, day_count, 14)):
+            job = member_jobs[member["workspace_member_id"]][index % len(member_jobs[member["workspace_member_id"]])]
+            schedule_type = ScheduleType.HOURS if index % 2 == 0 else ScheduleType.PERCENTAGE
+            workspace.schedules.append(
+                {
+                    "workspace_id": workspace.workspace_id,
+                    "schedule_id": f"schedule_{member['workspace_member_id']}_{index}",
+                    "workspace_member_id": member["workspace_member_id"],
+                    "job_id": job["job_id"],
+                    "start_date": (start_date + datetime.timedelta(days=week_start)).isoformat(),
+                    "end_date": (start_date + datetime.timedelta(days=min(week_start + 13, day_count - 1))).isoformat(),
+                    "type": schedule_type.value,
+                    "value": 4.0 if schedule_type == ScheduleType.HOURS else 50.0,
+                }
+            )
+
+    return workspace
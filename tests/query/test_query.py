@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from annoworkcli.__main__ import main
+from annoworkcli.common.cli import COMMAND_LINE_ERROR_STATUS_CODE
+from annoworkcli.common.cube import WorkingHoursCube
+
+
+@pytest.fixture
+def cube_file(tmp_path: Path) -> Path:
+    cube_file = tmp_path / "cube.sqlite"
+    with WorkingHoursCube.open(cube_file, is_create=True) as cube:
+        cube.replace_dimension("members", [{"workspace_member_id": "m_alice", "user_id": "alice", "username": "Alice"}])
+        cube.replace_dimension("jobs", [{"job_id": "job1", "job_name": "ジョブ1", "parent_job_id": None}])
+        cube.replace_facts(
+            "actual_daily",
+            [
+                {"date": "2022-03-05", "workspace_member_id": "m_alice", "job_id": "job1", "actual_working_hours": 1.0},
+                {"date": "2022-03-06", "workspace_member_id": "m_alice", "job_id": "job1", "actual_working_hours": 2.0},
+            ],
+            start_date="2022-03-05",
+            end_date="2022-03-06",
+        )
+        cube.update_date_range(start_date="2022-03-05", end_date="2022-03-06")
+        cube.refresh_aggregates()
+    return cube_file
+
+
+def test_query(cube_file: Path, tmp_path: Path):
+    output = tmp_path / "out.json"
+    sql = """
+        SELECT m.user_id, j.job_name, j.parent_job_id, SUM(a.actual_working_hours) AS actual_working_hours
+        FROM actual_daily AS a
+        INNER JOIN members AS m USING (workspace_member_id)
+        INNER JOIN jobs AS j USING (job_id)
+        GROUP BY m.user_id, j.job_name
+    """
+    main(["query", "--cube", str(cube_file), "--sql", sql, "--format", "json", "--output", str(output)])
+
+    assert json.loads(output.read_text()) == [{"user_id": "alice", "job_name": "ジョブ1", "parent_job_id": None, "actual_working_hours": 3.0}]
+
+
+def test_query__SQLをファイルで指定する(cube_file: Path, tmp_path: Path):
+    sql_file = tmp_path / "query.sql"
+    sql_file.write_text("SELECT date, actual_working_hours FROM cube_daily ORDER BY date")
+    output = tmp_path / "out.csv"
+    main(["query", "--cube", str(cube_file), "--sql", f"file://{sql_file}", "--output", str(output)])
+
+    assert output.read_text(encoding="utf-8-sig").splitlines() == ["date,actual_working_hours", "2022-03-05,1.0", "2022-03-06,2.0"]
+
+
+def test_query__キューブを変更するSQLは実行できない(cube_file: Path):
+    with pytest.raises(SystemExit) as e:
+        main(["query", "--cube", str(cube_file), "--sql", "DELETE FROM actual_daily"])
+    assert e.value.code == COMMAND_LINE_ERROR_STATUS_CODE
+
+    with WorkingHoursCube.open(cube_file, is_readonly=True) as cube:
+        assert len(cube.read_actual_daily()) == 2
@@ -1,7 +1,17 @@
 from typing import TYPE_CHECKING, cast
 
+import pandas
+
 from annoworkcli.schedule.list_assigned_hours_daily import AssignedHoursDaily
-from annoworkcli.schedule_actual.common import build_daily_schedule_actual_df, build_weekly_schedule_actual_df, get_daily_schedule_actual_df
+from annoworkcli.schedule_actual.common import (
+    build_daily_schedule_actual_df,
+    build_daily_schedule_actual_df_by_parent_job,
+    build_weekly_schedule_actual_df,
+    build_weekly_schedule_actual_df_by_parent_job,
+    get_daily_schedule_actual_df,
+    merge_daily_schedule_actual_df,
+    resolve_parent_jobs,
+)
 
 if TYPE_CHECKING:
     from annoworkapi.resource import Resource as AnnoworkResource
@@ -151,3 +161,145 @@ def test_get_daily_schedule_actual_dfは親ジョブIDで作業計画を取得
             "cumulative_working_hours": 5.0,
         }
     ]
+
+
+def test_build_daily_schedule_actual_df_by_parent_job():
+    df_actual = pandas.DataFrame(
+        {"parent_job_id": ["p1", "p1", "p2"], "date": ["2022-03-05", "2022-03-05", "2022-03-06"], "actual_working_hours": [1.0, 2.0, 4.0]}
+    )
+    df_assigned = pandas.DataFrame({"parent_job_id": ["p1"], "date": ["2022-03-07"], "assigned_working_hours": [5.0]})
+
+    actual = build_daily_schedule_actual_df_by_parent_job(
+        df_actual, df_assigned, parent_jobs={"p1": "親1", "p2": "親2", "p3": "親3"}, start_date=None, end_date=None
+    )
+
+    # 期間が未指定なので、親ジョブごとに作業時間が存在する期間を出力する。作業時間が存在しない親ジョブは出力しない
+    assert actual.to_dict("records") == [
+        {
+            "parent_job_id": "p1",
+            "parent_job_name": "親1",
+            "date": "2022-03-05",
+            "assigned_working_hours": 0.0,
+            "actual_working_hours": 3.0,
+            "cumulative_working_hours": 3.0,
+        },
+        {
+            "parent_job_id": "p1",
+            "parent_job_name": "親1",
+            "date": "2022-03-06",
+            "assigned_working_hours": 0.0,
+            "actual_working_hours": 0.0,
+            "cumulative_working_hours": 3.0,
+        },
+        {
+            "parent_job_id": "p1",
+            "parent_job_name": "親1",
+            "date": "2022-03-07",
+            "assigned_working_hours": 5.0,
+            "actual_working_hours": 0.0,
+            "cumulative_working_hours": 8.0,
+        },
+        {
+            "parent_job_id": "p2",
+            "parent_job_name": "親2",
+            "date": "2022-03-06",
+            "assigned_working_hours": 0.0,
+            "actual_working_hours": 4.0,
+            "cumulative_working_hours": 4.0,
+        },
+    ]
+
+    # 期間を指定すると、作業時間が存在しない親ジョブも出力する
+    actual = build_daily_schedule_actual_df_by_parent_job(
+        df_actual, df_assigned, parent_jobs={"p1": "親1", "p3": "親3"}, start_date="2022-03-05", end_date="2022-03-06"
+    )
+    assert actual[["parent_job_id", "date", "cumulative_working_hours"]].to_dict("records") == [
+        {"parent_job_id": "p1", "date": "2022-03-05", "cumulative_working_hours": 3.0},
+        {"parent_job_id": "p1", "date": "2022-03-06", "cumulative_working_hours": 3.0},
+        {"parent_job_id": "p3", "date": "2022-03-05", "cumulative_working_hours": 0.0},
+        {"parent_job_id": "p3", "date": "2022-03-06", "cumulative_working_hours": 0.0},
+    ]
+
+
+def test_build_weekly_schedule_actual_df_by_parent_job():
+    daily_df = build_daily_schedule_actual_df_by_parent_job(
+        pandas.DataFrame({"parent_job_id": ["p1", "p2"], "date": ["2022-03-05", "2022-03-08"], "actual_working_hours": [4.0, 1.0]}),
+        pandas.DataFrame({"parent_job_id": ["p1"], "date": ["2022-03-07"], "assigned_working_hours": [3.0]}),
+        parent_jobs={"p1": "親1", "p2": "親2"},
+        start_date=None,
+        end_date=None,
+    )
+
+    actual = build_weekly_schedule_actual_df_by_parent_job(daily_df)
+
+    assert actual.to_dict("records") == [
+        {
+            "parent_job_id": "p1",
+            "parent_job_name": "親1",
+            "start_date": "2022-02-27",
+            "end_date": "2022-03-05",
+            "assigned_working_hours": 0.0,
+            "actual_working_hours": 4.0,
+            "cumulative_working_hours": 4.0,
+        },
+        {
+            "parent_job_id": "p1",
+            "parent_job_name": "親1",
+            "start_date": "2022-03-06",
+            "end_date": "2022-03-12",
+            "assigned_working_hours": 3.0,
+            "actual_working_hours": 0.0,
+            "cumulative_working_hours": 7.0,
+        },
+        {
+            "parent_job_id": "p2",
+            "parent_job_name": "親2",
+            "start_date": "2022-03-06",
+            "end_date": "2022-03-12",
+            "assigned_working_hours": 0.0,
+            "actual_working_hours": 1.0,
+            "cumulative_working_hours": 1.0,
+        },
+    ]
+
+
+def test_resolve_parent_jobs():
+    all_jobs = [
+        {"job_id": "p1", "job_name": "親1", "job_tree": "org/p1"},
+        {"job_id": "c1", "job_name": "子1", "job_tree": "org/p1/c1"},
+        {"job_id": "p2", "job_name": "親2", "job_tree": "org/p2"},
+    ]
+    assert resolve_parent_jobs(all_jobs, ["all"]) == {"p1": "親1", "p2": "親2"}
+    assert resolve_parent_jobs(all_jobs, ["p2", "not_exists"]) == {"p2": "親2"}
+
+
+def test_merge_daily_schedule_actual_df__ウォッチ期間の行を置き換えて累積作業時間を算出し直す():
+    df = build_daily_schedule_actual_df({"2022-03-05": 1.0, "2022-03-06": 2.0}, {"2022-03-07": 3.0}, start_date="2022-03-05", end_date="2022-03-07")
+    df_window = build_daily_schedule_actual_df(
+        {"2022-03-06": 4.0}, {"2022-03-07": 5.0, "2022-03-08": 6.0}, start_date="2022-03-06", end_date="2022-03-08"
+    )
+
+    actual = merge_daily_schedule_actual_df(df, df_window, window_start="2022-03-06", window_end="2022-03-08")
+
+    assert actual["date"].tolist() == ["2022-03-05", "2022-03-06", "2022-03-07", "2022-03-08"]
+    assert actual["cumulative_working_hours"].tolist() == [1.0, 5.0, 10.0, 16.0]
+
+
+def test_merge_daily_schedule_actual_df__親ジョブごとに累積作業時間を算出し直す():
+    parent_jobs = {"p1": "親1", "p2": "親2"}
+    df_actual = pandas.DataFrame({"parent_job_id": ["p1", "p2"], "date": ["2022-03-05", "2022-03-05"], "actual_working_hours": [1.0, 2.0]})
+    df_assigned = pandas.DataFrame(columns=["parent_job_id", "date", "assigned_working_hours"])
+    df = build_daily_schedule_actual_df_by_parent_job(df_actual, df_assigned, parent_jobs=parent_jobs, start_date="2022-03-05", end_date="2022-03-06")
+    df_window_actual = pandas.DataFrame({"parent_job_id": ["p2"], "date": ["2022-03-06"], "actual_working_hours": [3.0]})
+    df_window = build_daily_schedule_actual_df_by_parent_job(
+        df_window_actual, df_assigned, parent_jobs=parent_jobs, start_date="2022-03-06", end_date="2022-03-06"
+    )
+
+    actual = merge_daily_schedule_actual_df(df, df_window, window_start="2022-03-06", window_end="2022-03-06")
+
+    assert actual[["parent_job_id", "date", "cumulative_working_hours"]].to_dict("records") == [
+        {"parent_job_id": "p1", "date": "2022-03-05", "cumulative_working_hours": 1.0},
+        {"parent_job_id": "p1", "date": "2022-03-06", "cumulative_working_hours": 1.0},
+        {"parent_job_id": "p2", "date": "2022-03-05", "cumulative_working_hours": 2.0},
+        {"parent_job_id": "p2", "date": "2022-03-06", "cumulative_working_hours": 5.0},
+    ]